@@ -102,6 +102,8 @@ from .tplot_tools import ctime
 from .tplot_tools import highlight
 from .tplot_tools import annotate
 from .tplot_tools import tplot
+from .tplot_tools import tplot_batch
+from .tplot_tools import tplot_pyramid
 from .tplot_tools import tplotxy
 from .tplot_tools import tplotxy3
 from .tplot_tools import tplotxy3_add_mpause
@@ -123,8 +125,8 @@ from .analysis.wavelet98 import wavelet98
 from .analysis.wave_signif import wave_signif
 from .analysis.wav_data import wav_data
 from .analysis.wavelet2 import wavelet2
-from .analysis.time_domain_filter import time_domain_filter
-from .analysis.find_magnetic_nulls import find_magnetic_nulls_fote, classify_null_type
+from .analysis.time_domain_filter import time_domain_filter, ttime_domain_filter
+from .analysis.find_magnetic_nulls import find_magnetic_nulls_fote, classify_null_type, classify_null_types
 from .analysis.lingradest import lingradest
 from .analysis.neutral_sheet import neutral_sheet
 from .cdagui_tools.cdagui import cdagui
@@ -161,7 +163,7 @@ from .hapi_tools.hapi import hapi
 
 from .particles.moments import moments_3d, spd_pgs_moments, spd_pgs_moments_tplot
 from .particles.spd_part_products import spd_pgs_do_fac, spd_pgs_regrid, spd_pgs_v_shift
-from .particles.spd_slice2d import slice1d_plot, slice2d, slice2d_plot
+from .particles.spd_slice2d import slice1d_plot, slice2d, slice2d_plot, slice2d_series
 from .utilities.spice.time_ephemeris import time_ephemeris
 from .utilities.dailynames import dailynames
 from .utilities.datasets import find_datasets
@@ -9,10 +9,11 @@ Creates a new tplot variable as the time average of original.
 import logging
 import numpy as np
 from pyspedas.tplot_tools import store_data, get_data, tnames, time_double
+from pyspedas.tplot_tools.tplot_math.bin_reduce import bin_reduce
 
 
 def avg_data(names, trange=None, res=None, width=None,
-             newname=None, suffix=None, overwrite=False):
+             newname=None, suffix=None, overwrite=False, method='mean'):
     """
     Get a new tplot variable with averaged data.
 
@@ -39,6 +40,10 @@ def avg_data(names, trange=None, res=None, width=None,
     overwrite: bool, optional
         Replace the existing tplot name.
         Default is False.
+    method: str, optional
+        How the values in each bin are combined: 'mean', 'median', 'min',
+        'max', 'std' or 'count'. NaN values are ignored.
+        Default is 'mean'.
 
     Returns
     -------
@@ -56,6 +61,10 @@ def avg_data(names, trange=None, res=None, width=None,
         logging.error('avg_data: No valid tplot names were provided.')
         return
 
+    if method not in ['mean', 'median', 'min', 'max', 'std', 'count']:
+        logging.error('avg_data: Invalid method: ' + str(method))
+        return
+
     if suffix is None:
         # IDL SPEDAS default suffix is '_avg'
         suffix = '-avg'
@@ -107,8 +116,6 @@ def avg_data(names, trange=None, res=None, width=None,
                     retain_energies.append(i)
 
         process_v = {}
-        for i in process_energies:
-            process_v[d._fields[i]] = []
 
         # Find start and end times
         if trange is not None and len(trange) == 2 and trange[0] < trange[1]:
@@ -164,36 +171,17 @@ def avg_data(names, trange=None, res=None, width=None,
         mx = np.max(ind) + 1
         new_times = (np.arange(mx) + 0.5) * dt + time_start
 
-        # Find new data
-        new_data = []
-        for i in range(int(max_ind)):
-            if i < 0:
-                continue
-
-            idx0 = np.asarray(ind == i).nonzero()
-            isempty = True if len(idx0) < 1 else False
-
-            if dim1 < 2:
-                nd0 = np.nan if isempty else np.nanmean(data[idx0])
-            else:
-                nd0 = []
-                for j in range(dim1):
-                    tmp = np.nan if isempty else np.nanmean(data[idx0, j])
-                    nd0.append(tmp)
-
-            new_data.append(nd0)
-
-            for ii in process_energies:
-                # The following processes v, v1, v2, v3
-                dime1 = len(d[ii][0])
-                if dime1 < 2:
-                    nd1 = np.nan if isempty else np.nanmean(d[ii][idx0])
-                else:
-                    nd1 = []
-                    for j in range(dime1):
-                        tmp = np.nan if isempty else np.nanmean(d[ii][idx0, j])
-                        nd1.append(tmp)
-                process_v[d._fields[ii]].append(nd1)
+        # Find new data: all bins are reduced at once, for y and any v, v1, v2, v3
+        nbins = int(max_ind)
+        new_data = bin_reduce(ind, data[:len(ind)], nbins, method=method)
+        if dim1 < 2:
+            new_data = new_data.reshape(nbins)
+
+        for ii in process_energies:
+            nd1 = bin_reduce(ind, np.asarray(d[ii])[:len(ind)], nbins, method=method)
+            if nd1.ndim > 1 and nd1.shape[1] < 2:
+                nd1 = nd1.reshape(nbins)
+            process_v[d._fields[ii]] = nd1
 
         # Create the new tplot variable
         data_dict = {'x': new_times, 'y': new_data}
@@ -1,8 +1,8 @@
 import numpy as np
 import logging
-from .lingradest import lingradest
+from .lingradest import lingradest, lingradest_reciprocal_vectors
 from pyspedas import tinterpol
-from pyspedas.tplot_tools import get_data, store_data, time_double, time_string, time_clip, deflag
+from pyspedas.tplot_tools import get_data, store_data, time_double, time_clip, deflag
 from pyspedas.tplot_tools import tnames, options, tplot_options, tsmooth, tplot, get_coords, get_units, set_coords, set_units
 
 def classify_null_type(lambdas_in):
@@ -42,71 +42,50 @@ def classify_null_type(lambdas_in):
     Paschmann, G., Daly, P. (1998), Analysis Methods for Multi-Spacecraft Data, ISSR
     """
 
-    lambda1 = lambdas_in[0]
-    lambda2 = lambdas_in[1]
-    lambda3 = lambdas_in[2]
+    return int(classify_null_types(np.reshape(lambdas_in, (1, 3)))[0])
+
+
+def classify_null_types(lambdas_in):
+    """
+    Determine the topological types of a set of magnetic nulls, given the eigenvalues of their Jacobian matrices.
+
+    This is the array version of classify_null_type(), used by find_magnetic_nulls_fote() to classify
+    all of the nulls at once.
+
+    Parameters
+    ----------
+    lambdas_in: An array of complex-valued eigenvalues with shape [n, 3], with the 3 eigenvalues of each Jacobian
+        matrix in no particular order.
+
+    Returns
+    -------
+    ndarray
+        An integer array of n null types; see classify_null_type() for the interpretation.
+    """
+
+    lambdas = np.asarray(lambdas_in).astype(complex)
 
     # We want to find the max and min (absolute value) norms, real, and imaginary parts,
     # to decide later if 3-d type nulls should degenerate to 2-d type nulls
 
-    n1 = np.abs(lambda1)
-    n2 = np.abs(lambda2)
-    n3 = np.abs(lambda3)
-    nlist = np.array([n1,n3,n3])
-    n_max = np.max(nlist)
-    n_min = np.min(nlist)
-
-    re1 = np.abs(lambda1.real)
-    re2 = np.abs(lambda2.real)
-    re3 = np.abs(lambda2.real)
-    re_list = np.array([re1,re2,re3])
-    re_max = np.max(re_list)
-    re_min = np.min(re_list)
-
-    im1 = np.abs(lambda1.imag)
-    im2 = np.abs(lambda2.imag)
-    im3 = np.abs(lambda3.imag)
+    norms = np.abs(lambdas)
+    n_max = np.max(norms, axis=1)
+    n_min = np.min(norms, axis=1)
+
+    re_max = np.max(np.abs(lambdas.real), axis=1)
+
     # One of the eigenvalues is always pure real. So for this comparison, we only want to
     # consider the ones that might have imaginary components.  If they're all real, it won't matter.
-    if (im1 == 0.0):
-        im_list = np.array([im2,im3])
-    elif (im2 == 0.0):
-        im_list = np.array([im1,im3])
-    else:
-        im_list = np.array([im1,im2])
-    im_max = np.max(im_list)
-    im_min = np.min(im_list)
-
+    im = np.abs(lambdas.imag)
+    im_min = np.where(im[:, 0] == 0.0, np.minimum(im[:, 1], im[:, 2]),
+                      np.where(im[:, 1] == 0.0, np.minimum(im[:, 0], im[:, 2]), np.minimum(im[:, 0], im[:, 1])))
 
     # Now we order by size of the norms
-    if (n1 <= n2) and (n2 <= n3):
-        s1 = lambda1
-        s2 = lambda2
-        s3 = lambda3
-    elif (n1 <= n3) and (n3 <= n2):
-        s1 = lambda1
-        s2 = lambda3
-        s3 = lambda2
-    elif (n2 <= n3) and (n3 <= n1):
-        s1 = lambda2
-        s2 = lambda3
-        s3 = lambda1
-    elif (n2 <= n1) and (n1 <= n3):
-        s1 = lambda2
-        s2 = lambda1
-        s3 = lambda3
-    elif (n3 <= n1) and (n1 <= n2):
-        s1 = lambda3
-        s2 = lambda1
-        s3 = lambda2
-    else:
-        s1 = lambda3
-        s2 = lambda2
-        s3 = lambda1
-
-    typecode = 0  # Default to unclassified
+    order = np.argsort(norms, axis=1, kind='stable')
+    s = np.take_along_axis(lambdas, order, axis=1)
+    s1, s2, s3 = s[:, 0], s[:, 1], s[:, 2]
 
-    # Now we can classify the null type.  It should be safe to use floating point equality to check
+    # Now we can classify the null types.  It should be safe to use floating point equality to check
     # the imaginary parts.  It is unlikely that any of the real parts or norms will be exactly 0,
     # but see below where we check for some possibly degenerate cases.
 
@@ -115,53 +94,84 @@ def classify_null_type(lambdas_in):
     # 6 classifications might become "unknown" if I also looked at the components of the complex eigenvalues,
     # rather than just checking the sign of the pure real.
 
-    if (s1.imag == 0.0) and (s2.imag == 0.0) and (s3.imag == 0.0):  # all eigenvalues pure real
-        if (s1.real == 0.0):  # smallest (absolute val) real is exactly 0
-            typecode = 1 # type X
-        elif (s3.real > 0.0): # largest (absolute val) real part is +ve
-            typecode = 3 # type A
-        else: # largest (abs) real part is -ve
-            typecode = 4  # type B
-    elif (n1 == 0.0): # one pure real == 0, other two imaginary
-        typecode = 2 # O-type
-    else:  # all eigenvalues nonzero, one pure real two imaginary
-        if (s1.imag == 0.0): # s1 is the pure real eigenvalue
-            if s1.real > 0.0:   # real eigenvalue is +ve
-                typecode = 5 # A_s
-            else:               # real eigenvalue is -ve
-                typecode = 6 # B_s
-        elif (s2.imag == 0.0): # s2 is the pure real eigenvalue
-            if s2.real > 0.0:   # real eigenvalue is +ve
-                typecode = 5 # A_s
-            else:               # real eigenvalue is -ve
-                typecode = 6 # B_s
-        else:   # s3 must be the pure real
-            if s3.real > 0.0:
-                typecode = 5 # A_s
-            else:
-                typecode = 6 # B_s
+    all_real = (s1.imag == 0.0) & (s2.imag == 0.0) & (s3.imag == 0.0)
+
+    # all eigenvalues nonzero, one pure real two imaginary: A_s if the real eigenvalue is +ve, B_s if -ve
+    pure_real = np.where(s1.imag == 0.0, s1.real, np.where(s2.imag == 0.0, s2.real, s3.real))
+    typecode = np.where(pure_real > 0.0, 5, 6)
 
+    # one pure real == 0, other two imaginary: O-type
+    typecode[~all_real & (n_min == 0.0)] = 2
+
+    # all eigenvalues pure real: type X if the smallest (absolute val) is exactly 0,
+    # otherwise type A if the largest (absolute val) is +ve, type B if it's -ve
+    typecode[all_real] = np.where(s1.real[all_real] == 0.0, 1, np.where(s3.real[all_real] > 0.0, 3, 4))
 
     # Now check to see if a 3-d null should degenerate to a 2-d type of null
     # Type A and B nulls should degenerate to type X if min(norms) < .25*max(norms)
     # Type A_s and B_s nulls should degenerate to type O if max(real) < 0.25*min(imag)
 
-    if (typecode == 3) or (typecode == 4): # Type A or B
-        if n_min < 0.25 * n_max:
-            typecode = typecode + 4 # degenerate to X-type
-    elif (typecode == 5) or (typecode == 6):  # Type A_s or B_s
-        if re_max < 0.25*im_min:
-            typecode = typecode + 4   # degenerate to O-type
+    radial = (typecode == 3) | (typecode == 4)
+    spiral = (typecode == 5) | (typecode == 6)
+    typecode[radial & (n_min < 0.25 * n_max)] += 4  # degenerate to X-type
+    typecode[spiral & (re_max < 0.25 * im_min)] += 4  # degenerate to O-type
     return typecode
 
 
+def null_sign_change(fields):
+    """
+    Check whether each component of the magnetic field changes sign across the tetrahedron.
+
+    This is a necessary condition for a null to be inside the tetrahedron, and only needs the
+    field measurements, so it can be used to skip samples before doing any linear algebra.
+
+    Parameters
+    ----------
+    fields: ndarray
+        Field vectors measured by the four probes, [time, probe, component]
+
+    Returns
+    -------
+    ndarray
+        Boolean array, True where all three components change sign (or are 0) across the four probes
+    """
+    fields = np.asarray(fields)[:, :, 0:3]
+    return np.all((np.min(fields, axis=1) <= 0.0) & (np.max(fields, axis=1) >= 0.0), axis=1)
+
+
+def null_poincare_index(jacobians, weights):
+    """
+    Calculate the Poincare index of the field with respect to the tetrahedron.
+
+    With the linear field approximation, the index is the sign of the determinant of the Jacobian if the null is
+    inside the tetrahedron (all four barycentric coordinates of the null are non-negative), and 0 otherwise.
+
+    Parameters
+    ----------
+    jacobians: ndarray
+        Jacobian matrices of the field, [time, component, direction]
+
+    weights: ndarray
+        Barycentric coordinates of the nulls, i.e. the weights of the four probes in the linear
+        interpolation of the field at the null, [time, probe]
+
+    Returns
+    -------
+    ndarray
+        Integer array with the Poincare index (-1, 0 or 1) of each sample
+    """
+    inside = np.all(np.asarray(weights) >= 0.0, axis=1)
+    return np.where(inside, np.sign(np.linalg.det(jacobians)), 0.0).astype(int)
+
+
 # Define some stuff we'll use in debugging messages and plot options
 
 typecode_strings = ['Unknown','X','O','A','B','A_s', 'B_s','X_a','X_b','O_a','O_b']
 typecode_symbols = ['.','x','$o$','4','4','>','>','x','x','$o$','$o$']
 typecode_colors = ['k','k','k','r','b','r','b','r','b','r','b']
 
-def find_magnetic_nulls_fote(positions=None, fields=None, smooth_fields=True, smooth_npts=10, smooth_median=True,scale_factor=1.0):
+def find_magnetic_nulls_fote(positions=None, fields=None, smooth_fields=True, smooth_npts=10, smooth_median=True,scale_factor=1.0,
+                             prefilter=False):
     """
     Find magnetic null points, using the First Order Taylor Expansion (FOTE) method, from a set of four-point magnetic field observations.
 
@@ -189,6 +199,13 @@ def find_magnetic_nulls_fote(positions=None, fields=None, smooth_fields=True, sm
         The scale factor passed to the lingradest routine to scale some of the distances
         Default: 1.0
 
+    prefilter: bool
+        If True, only look for nulls inside the tetrahedron.  Samples where some field component has the same
+        sign at all four probes are skipped before doing any linear algebra, and of the remaining samples, only
+        those with a nonzero Poincare index (i.e. with the null inside the tetrahedron) are kept.  The outputs
+        for the skipped samples are NaN, with typecode 0.
+        Default: False
+
     Returns
     -------
     list of str
@@ -317,23 +334,10 @@ def find_magnetic_nulls_fote(positions=None, fields=None, smooth_fields=True, sm
     b4 = get_data('b4_i')
 
     # The MMS field variables also include a fourth component with the total field
-    bx1 = b1.y[:,0]
-    by1 = b1.y[:,1]
-    bz1 = b1.y[:,2]
-
-    bx2 = b2.y[:,0]
-    by2 = b2.y[:,1]
-    bz2 = b2.y[:,2]
-
-    bx3 = b3.y[:,0]
-    by3 = b3.y[:,1]
-    bz3 = b3.y[:,2]
+    b_obs = np.stack((b1.y[:,0:3], b2.y[:,0:3], b3.y[:,0:3], b4.y[:,0:3]), axis=1)  # [time, probe, component]
+    r_probes = np.stack((r1, r2, r3, r4), axis=1)
 
-    bx4 = b4.y[:,0]
-    by4 = b4.y[:,1]
-    bz4 = b4.y[:,2]
-
-    datapoint_count = len(bx1)
+    datapoint_count = b_obs.shape[0]
     times = b1.times
 
 
@@ -341,159 +345,84 @@ def find_magnetic_nulls_fote(positions=None, fields=None, smooth_fields=True, sm
 
     # Output of lingradest is a dictionary of string keys and numpy array values
 
-    lingrad_output = lingradest(bx1, bx2, bx3, bx4,
-                                by1, by2, by3, by4,
-                                bz1, bz2, bz3, bz4,
-                                r1,r2,r3,r4, scale_factor=scale_factor)
-
-    # Output arrays
-    out_pos_null = np.zeros((datapoint_count,3))
-    out_pos_bary = np.zeros((datapoint_count,3))
-    out_null_bary_dist = np.zeros((datapoint_count))
-    out_null_p1_dist = np.zeros((datapoint_count))
-    out_null_p2_dist = np.zeros((datapoint_count))
-    out_null_p3_dist = np.zeros((datapoint_count))
-    out_null_p4_dist = np.zeros((datapoint_count))
-    out_null_eta = np.zeros((datapoint_count))
-    out_null_xi = np.zeros((datapoint_count))
+    reciprocal_vectors = lingradest_reciprocal_vectors(r1, r2, r3, r4, scale_factor=scale_factor)
+    lingrad_output = lingradest(b_obs[:,0,0], b_obs[:,1,0], b_obs[:,2,0], b_obs[:,3,0],
+                                b_obs[:,0,1], b_obs[:,1,1], b_obs[:,2,1], b_obs[:,3,1],
+                                b_obs[:,0,2], b_obs[:,1,2], b_obs[:,2,2], b_obs[:,3,2],
+                                r1,r2,r3,r4, scale_factor=scale_factor, reciprocal_vectors=reciprocal_vectors)
+
+    # Output arrays (samples skipped by the prefilter are left as NaN, with typecode 0)
+    out_pos_null = np.full((datapoint_count,3), np.nan)
+    out_null_bary_dist = np.full((datapoint_count), np.nan)
+    out_null_p_dist = np.full((datapoint_count,4), np.nan)
+    out_null_eta = np.full((datapoint_count), np.nan)
+    out_null_xi = np.full((datapoint_count), np.nan)
     out_typecode = np.zeros((datapoint_count))
-    out_max_reconstruction_error = np.zeros((datapoint_count))
-
-    for i in range(datapoint_count):
-        Rbary = lingrad_output['Rbary'][i]
-        out_pos_bary[i,:] = Rbary[:]
-
-        # Get field vector at barycenter for i-th point
-        bxbc = lingrad_output['Bxbc'][i]
-        bybc = lingrad_output['Bybc'][i]
-        bzbc = lingrad_output['Bzbc'][i]
-        b0 = np.array((bxbc, bybc, bzbc)) # Field at barycenter
-        b0_neg = np.array((-bxbc,-bybc,-bzbc))  # Negative of field at barycenter
-
-        # Form Jacobian matrix from field gradients at barycenter
-        LGBx = lingrad_output['LGBx'][i]
-        LGBy = lingrad_output['LGBy'][i]
-        LGBz = lingrad_output['LGBz'][i]
-        J = np.stack((LGBx, LGBy, LGBz))  # Jacobian matrix
-
-        # Solve for null position with respect to barycenter (maybe check for singular matrix first?)
-
-        r_null = np.linalg.solve(J,b0_neg)
-        F_null = b0 + np.matmul(J,r_null)
-        r_null_bary_dist = np.linalg.norm(r_null)
-        out_null_bary_dist[i] = r_null_bary_dist
-
-        # Translate r_null to origin of probe coordinate system
-        pos_null = r_null + Rbary
-        out_pos_null[i,:] = pos_null[:]
-
-        # Get distances from null to each probe in the tetrahedron
-        p1_null = r1[i] - pos_null
-        p1_null_dist = np.linalg.norm(p1_null)
-        p2_null = r2[i] - pos_null
-        p2_null_dist = np.linalg.norm(p2_null)
-        p3_null = r3[i] + pos_null
-        p3_null_dist = np.linalg.norm(p3_null)
-        p4_null = r4[i] - pos_null
-        p4_null_dist = np.linalg.norm(p4_null)
-        min_null_dist = np.min(np.array([p1_null_dist,p2_null_dist,p3_null_dist,p4_null_dist]))
-
-        out_null_p1_dist[i] = p1_null_dist
-        out_null_p2_dist[i] = p2_null_dist
-        out_null_p3_dist[i] = p3_null_dist
-        out_null_p4_dist[i] = p4_null_dist
-
-        # Estimate field at each probe using the estimated linear gradient
-        # These should all be quite close to the measured fields.
-
-        dR1 = -1.0 * lingrad_output['dR1'][i]
-        dR2 = -1.0 * lingrad_output['dR2'][i]
-        dR3 = -1.0 * lingrad_output['dR3'][i]
-        dR4 = -1.0 * lingrad_output['dR4'][i]
-
-        F1_est = b0 + np.matmul(J,dR1)
-        F2_est = b0 + np.matmul(J,dR2)
-        F3_est = b0 + np.matmul(J,dR3)
-        F4_est = b0 + np.matmul(J,dR4)
-
-        F1_obs = np.array([bx1[i],by1[i],bz1[i]])
-        F2_obs = np.array([bx2[i],by2[i],bz2[i]])
-        F3_obs = np.array([bx3[i],by3[i],bz3[i]])
-        F4_obs = np.array([bx4[i],by4[i],bz4[i]])
-
-        F1_err = F1_est - F1_obs
-        F2_err = F2_est - F2_obs
-        F3_err = F3_est - F3_obs
-        F4_err = F4_est - F4_obs
-
-        F1_err_norm = np.linalg.norm(F1_err)
-        F2_err_norm = np.linalg.norm(F2_err)
-        F3_err_norm = np.linalg.norm(F3_err)
-        F4_err_norm = np.linalg.norm(F4_err)
-
-        max_reconstruction_error = np.max(np.array([F1_err_norm,F2_err_norm,F3_err_norm,F4_err_norm]))
-        out_max_reconstruction_error[i] = max_reconstruction_error
-
-        # Look for opposite signs in each field component, necessary if null is within tetrahedron
-        bxmax = np.max( (F1_obs[0],F2_obs[0],F3_obs[0],F4_obs[0]))
-        bxmin = np.min( (F1_obs[0],F2_obs[0],F3_obs[0],F4_obs[0]))
-        bymax = np.max( (F1_obs[1],F2_obs[1],F3_obs[1],F4_obs[1]))
-        bymin = np.min( (F1_obs[1],F2_obs[1],F3_obs[1],F4_obs[1]))
-        bzmax = np.max( (F1_obs[2],F2_obs[2],F3_obs[2],F4_obs[2]))
-        bzmin = np.min( (F1_obs[2],F2_obs[2],F3_obs[2],F4_obs[2]))
-
-        tstring = time_string(times[i])
-
-        # Get eigenvalues of J to characterize field topology near the null
-        eigenvalues, eigenvectors = np.linalg.eig(J)
-        lambdas = eigenvalues
-        l1_norm = np.linalg.norm(lambdas[0])
-        l2_norm = np.linalg.norm(lambdas[1])
-        l3_norm = np.linalg.norm(lambdas[2])
-        eig_sum_norm = np.linalg.norm(lambdas[0] + lambdas[1] + lambdas[2])
-        eig_max_norm = np.max((l1_norm,l2_norm,l3_norm))
-        # Determine the toplogical type of the null by inspecting the eigenvalues
-        typecode = classify_null_type(lambdas)
-        out_typecode[i] = typecode
-
-        # div B should be close to 0 (exactly 0 in theory), so the difference from 0 is a measure of how
-        # credible any null we've found might be.  We normalize it, dividing by the magnitude of the curl,
-        # to get the statistic eta.  eta < 0.40 for a credible null.
-        divB = lingrad_output['LD'][i]
-        LCx = lingrad_output['LCxB'][i]
-        LCy = lingrad_output['LCyB'][i]
-        LCz = lingrad_output['LCzB'][i]
-        curlB = np.array([LCx,LCy,LCz])
-        curlB_norm = np.linalg.norm(curlB)
-        # eta - | del dot B| /  |del x B|
-        eta = np.abs(divB)/curlB_norm
-        out_null_eta[i] = eta
+    out_max_reconstruction_error = np.full((datapoint_count), np.nan)
+
+    # Look for opposite signs in each field component, necessary if null is within tetrahedron
+    if prefilter:
+        idx = np.flatnonzero(null_sign_change(b_obs))
+    else:
+        idx = np.arange(datapoint_count)
+
+    # Field at barycenter, and Jacobian matrices formed from the field gradients at barycenter, [time, component, direction]
+    b0 = np.stack((lingrad_output['Bxbc'][idx], lingrad_output['Bybc'][idx], lingrad_output['Bzbc'][idx]), axis=-1)
+    J = np.stack((lingrad_output['LGBx'][idx], lingrad_output['LGBy'][idx], lingrad_output['LGBz'][idx]), axis=1)
+
+    # Solve for null positions with respect to barycenter (maybe check for singular matrices first?)
+    r_null = np.linalg.solve(J, -b0[:, :, np.newaxis])[:, :, 0]
+
+    if prefilter:
+        # Only keep the nulls inside the tetrahedron, i.e. those with a nonzero Poincare index; the barycentric
+        # coordinates of the null are the weights of the probes in the linear interpolation of the field at the null
+        weights = reciprocal_vectors['mu'][idx] + np.matmul(reciprocal_vectors['k'][idx], r_null[:, :, np.newaxis])[:, :, 0]
+        inside = null_poincare_index(J, weights) != 0
+        idx = idx[inside]
+        b0 = b0[inside]
+        J = J[inside]
+        r_null = r_null[inside]
+
+    out_null_bary_dist[idx] = np.linalg.norm(r_null, axis=1)
+
+    # Translate r_null to origin of probe coordinate system
+    pos_null = r_null + lingrad_output['Rbary'][idx]
+    out_pos_null[idx] = pos_null
+
+    # Get distances from null to each probe in the tetrahedron
+    out_null_p_dist[idx] = np.linalg.norm(r_probes[idx] - pos_null[:, np.newaxis, :], axis=2)
+
+    # Estimate field at each probe using the estimated linear gradient
+    # These should all be quite close to the measured fields.
+    dR = -1.0 * np.stack((lingrad_output['dR1'][idx], lingrad_output['dR2'][idx],
+                          lingrad_output['dR3'][idx], lingrad_output['dR4'][idx]), axis=2)  # [time, direction, probe]
+    F_est = b0[:, np.newaxis, :] + np.matmul(J, dR).transpose(0, 2, 1)
+    F_err = F_est - b_obs[idx]
+    out_max_reconstruction_error[idx] = np.max(np.linalg.norm(F_err, axis=2), axis=1)
+
+    # Get eigenvalues of J to characterize field topology near the null
+    lambdas, eigenvectors = np.linalg.eig(J)
+    eig_sum_norm = np.abs(np.sum(lambdas, axis=1))
+    eig_max_norm = np.max(np.abs(lambdas), axis=1, initial=0.0)
+    # Determine the toplogical type of the nulls by inspecting the eigenvalues
+    out_typecode[idx] = classify_null_types(lambdas)
+
+    # div B should be close to 0 (exactly 0 in theory), so the difference from 0 is a measure of how
+    # credible any null we've found might be.  We normalize it, dividing by the magnitude of the curl,
+    # to get the statistic eta.  eta < 0.40 for a credible null.
+    divB = lingrad_output['LD'][idx]
+    curlB = np.stack((lingrad_output['LCxB'][idx], lingrad_output['LCyB'][idx], lingrad_output['LCzB'][idx]), axis=-1)
+    curlB_norm = np.linalg.norm(curlB, axis=1)
+    # eta - | del dot B| /  |del x B|
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out_null_eta[idx] = np.abs(divB)/curlB_norm
 
         # Similarly, the sum of the eigenvectors of the Jacobian gives another figure of merit.  Here,
         # we normalize by dividing the norm of the sum by the norm of the largest eigenvalue to yield xi.
         # xi < 0.40 if we trust the topology derived from the eigenvalues.  Larger values may mean that the type of
         # null detected (radial vs. spiral, etc) may be an artifact.
 
-        xi = eig_sum_norm/eig_max_norm
-        out_null_xi[i] = xi
-
-        show_in_box = False
-        if show_in_box and (bxmax*bxmin < 0.0) and (bymax*bymin < 0.0) and (bzmax*bzmin < 1.0):
-            print("Null of type ",typecode_strings[typecode]," may be in tetrahedron at time ",tstring )
-            if times[i] > time_double('2003-08-17/16:41:55.43'):
-                print("Jacobian:")
-                print(LGBx)
-                print(LGBy)
-                print(LGBz)
-                print("Eigenvalues:")
-                for l in lambdas: print(l)
-                print("Eigenvectors:")
-                for e in eigenvectors: print(e)
-                print("r_null", r_null)
-                print("Max reconstruction error:",max_reconstruction_error)
-                print("Distance from null to nearest spacecraft",min_null_dist)
-                print("eta:", eta)
-                print("xi",xi)
+        out_null_xi[idx] = eig_sum_norm/eig_max_norm
 
 
     # Now create output tplot variables and set some plot options
@@ -545,8 +474,7 @@ def find_magnetic_nulls_fote(positions=None, fields=None, smooth_fields=True, sm
     set_units('null_bary_dist_types',pos_units)
 
     # Distances from null to each probe
-    p_distances = np.stack((out_null_p1_dist,out_null_p2_dist,out_null_p3_dist,out_null_p4_dist),axis=1)
-    store_data('null_sc_distances',data={'x':times,'y':p_distances})
+    store_data('null_sc_distances',data={'x':times,'y':out_null_p_dist})
     set_units('null_sc_distances',pos_units)
     options('null_sc_distances','color',['k','r','g','b'])
     options('null_sc_distances', 'yrange', [0.0, 1000.0])
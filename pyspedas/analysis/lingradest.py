@@ -5,7 +5,7 @@ import numpy as np
 def lingradest(Bx1, Bx2, Bx3, Bx4,
                By1, By2, By3, By4,
                Bz1, Bz2, Bz3, Bz4,
-               R1, R2, R3, R4, scale_factor=1000.0):
+               R1, R2, R3, R4, scale_factor=1000.0, reciprocal_vectors=None, chunk_size=2**16):
     """
     Calculate magnetic field gradients, divergence, curl, and field line
     curvature from 4-point observations
@@ -25,6 +25,14 @@ def lingradest(Bx1, Bx2, Bx3, Bx4,
     scale_factor: float
         Scaling divisor to apply to internal distance calculations. Default: 1000.0
 
+    reciprocal_vectors: dict
+        Barycenter and reciprocal vectors returned by lingradest_reciprocal_vectors for
+        the positions R1, R2, R3, R4; if not set, they're calculated from the positions.
+        This allows the reciprocal vectors to be reused for several fields (see lingradest_field)
+
+    chunk_size: int
+        Number of time samples processed at once. Default: 2**16
+
     References
     -----------
 
@@ -56,119 +64,172 @@ def lingradest(Bx1, Bx2, Bx3, Bx4,
             logging.error('Problem with input sizes; all input data should be interpolated to the same time stamps')
             return
 
-    Rb = np.zeros((datarrLength, 3))
-    dR1 = np.zeros((datarrLength, 3))
-    dR2 = np.zeros((datarrLength, 3))
-    dR3 = np.zeros((datarrLength, 3))
-    dR4 = np.zeros((datarrLength, 3))
-    k1 = np.zeros((datarrLength, 3))
-    k2 = np.zeros((datarrLength, 3))
-    k3 = np.zeros((datarrLength, 3))
-    k4 = np.zeros((datarrLength, 3))
-    mu1 = np.zeros(datarrLength)
-    mu2 = np.zeros(datarrLength)
-    mu3 = np.zeros(datarrLength)
-    mu4 = np.zeros(datarrLength)
-    Bxbc = np.zeros(datarrLength)
-    Bybc = np.zeros(datarrLength)
-    Bzbc = np.zeros(datarrLength)
-    Bbc = np.zeros(datarrLength)
-    LGBx = np.zeros((datarrLength, 3)) # Linear Gradient B estimator
-    LGBy = np.zeros((datarrLength, 3))
-    LGBz = np.zeros((datarrLength, 3))
-    LCxB = np.zeros(datarrLength) # Linear Curl B estimator
-    LCyB = np.zeros(datarrLength)
-    LCzB = np.zeros(datarrLength)
-    LD = np.zeros(datarrLength)
-    curv_x_B = np.zeros(datarrLength)
-    curv_y_B = np.zeros(datarrLength)
-    curv_z_B = np.zeros(datarrLength)
-    curvB = np.zeros(datarrLength)
-    RcurvB = np.zeros(datarrLength)
-    B_cross_R_x = np.zeros(datarrLength)
-    B_cross_R_y = np.zeros(datarrLength)
-    B_cross_R_z = np.zeros(datarrLength)
-    B_cross_R = np.zeros(datarrLength)
-    Ncurv_x = np.zeros(datarrLength)
-    Ncurv_y = np.zeros(datarrLength)
-    Ncurv_z = np.zeros(datarrLength)
-
-    # distances in 1000 km!
-    r12 = (R2-R1)/scale_factor
-    r13 = (R3-R1)/scale_factor
-    r14 = (R4-R1)/scale_factor
-    r21 = (R1-R2)/scale_factor
-    r23 = (R3-R2)/scale_factor
-    r24 = (R4-R2)/scale_factor
-    r31 = (R1-R3)/scale_factor
-    r32 = (R2-R3)/scale_factor
-    r34 = (R4-R3)/scale_factor
-    r41 = (R1-R4)/scale_factor
-    r42 = (R2-R4)/scale_factor
-    r43 = (R3-R4)/scale_factor
-
-    for i in range(datarrLength):
-        # Tetrahedrom mesocentre coordinates
-        Rb[i, 0] = 0.25 * (R1[i, 0] + R2[i, 0] + R3[i, 0] + R4[i, 0])
-        Rb[i, 1] = 0.25 * (R1[i, 1] + R2[i, 1] + R3[i, 1] + R4[i, 1])
-        Rb[i, 2] = 0.25 * (R1[i, 2] + R2[i, 2] + R3[i, 2] + R4[i, 2])
-
-        # Difference in 1000 km!
-        dR1[i, 0:3] = (Rb[i, 0:3] - R1[i, 0:3]) / scale_factor
-        dR2[i, 0:3] = (Rb[i, 0:3] - R2[i, 0:3]) / scale_factor
-        dR3[i, 0:3] = (Rb[i, 0:3] - R3[i, 0:3]) / scale_factor
-        dR4[i, 0:3] = (Rb[i, 0:3] - R4[i, 0:3]) / scale_factor
-
-        k1[i, 0:3] = np.cross(r23[i, 0:3], r24[i, 0:3])
-        k1[i, 0:3] = k1[i, 0:3] / (r21[i, 0] * k1[i, 0] + r21[i, 1] * k1[i, 1] + r21[i, 2] * k1[i, 2])
-        k2[i, 0:3] = np.cross(r34[i, 0:3], r31[i, 0:3])
-        k2[i, 0:3] = k2[i, 0:3] / (r32[i, 0] * k2[i, 0] + r32[i, 1] * k2[i, 1] + r32[i, 2] * k2[i, 2])
-        k3[i, 0:3] = np.cross(r41[i, 0:3], r42[i, 0:3])
-        k3[i, 0:3] = k3[i, 0:3] / (r43[i, 0] * k3[i, 0] + r43[i, 1] * k3[i, 1] + r43[i, 2] * k3[i, 2])
-        k4[i, 0:3] = np.cross(r12[i, 0:3], r13[i, 0:3])
-        k4[i, 0:3] = k4[i, 0:3] / (r14[i, 0] * k4[i, 0] + r14[i, 1] * k4[i, 1] + r14[i, 2] * k4[i, 2])
-
-        mu1[i] = 1. + (k1[i, 0] * dR1[i, 0] + k1[i, 1] * dR1[i, 1] + k1[i, 2] * dR1[i, 2])
-        mu2[i] = 1. + (k2[i, 0] * dR2[i, 0] + k2[i, 1] * dR2[i, 1] + k2[i, 2] * dR2[i, 2])
-        mu3[i] = 1. + (k3[i, 0] * dR3[i, 0] + k3[i, 1] * dR3[i, 1] + k3[i, 2] * dR3[i, 2])
-        mu4[i] = 1. + (k4[i, 0] * dR4[i, 0] + k4[i, 1] * dR4[i, 1] + k4[i, 2] * dR4[i, 2])
-
-        # Magnetic field in the barycentre
-        Bxbc[i] = mu1[i] * Bx1[i] + mu2[i] * Bx2[i] + mu3[i] * Bx3[i] + mu4[i] * Bx4[i]
-        Bybc[i] = mu1[i] * By1[i] + mu2[i] * By2[i] + mu3[i] * By3[i] + mu4[i] * By4[i]
-        Bzbc[i] = mu1[i] * Bz1[i] + mu2[i] * Bz2[i] + mu3[i] * Bz3[i] + mu4[i] * Bz4[i]
-        Bbc[i] = np.sqrt(Bxbc[i]**2 + Bybc[i]**2 + Bzbc[i]**2)
-
-        LGBx[i, 0:3] = Bx1[i] * k1[i, 0:3] + Bx2[i] * k2[i, 0:3] + Bx3[i] * k3[i, 0:3] + Bx4[i] * k4[i, 0:3]
-        LGBy[i, 0:3] = By1[i] * k1[i, 0:3] + By2[i] * k2[i, 0:3] + By3[i] * k3[i, 0:3] + By4[i] * k4[i, 0:3]
-        LGBz[i, 0:3] = Bz1[i] * k1[i, 0:3] + Bz2[i] * k2[i, 0:3] + Bz3[i] * k3[i, 0:3] + Bz4[i] * k4[i, 0:3]
-
-        # Divergence B
-        LD[i] = Bx1[i] * k1[i, 0] + By1[i] * k1[i, 1] + Bz1[i] * k1[i, 2] + \
-                Bx2[i] * k2[i, 0] + By2[i] * k2[i, 1] + Bz2[i] * k2[i, 2] + \
-                Bx3[i] * k3[i, 0] + By3[i] * k3[i, 1] + Bz3[i] * k3[i, 2] + \
-                Bx4[i] * k4[i, 0] + By4[i] * k4[i, 1] + Bz4[i] * k4[i, 2]
-
-        LCxB[i] = (k1[i, 1] * Bz1[i] - k1[i, 2] * By1[i]) + (k2[i, 1] * Bz2[i] - k2[i, 2] * By2[i]) + \
-                  (k3[i, 1] * Bz3[i] - k3[i, 2] * By3[i]) + (k4[i, 1] * Bz4[i] - k4[i, 2] * By4[i])
-        LCyB[i] = (k1[i, 2] * Bx1[i] - k1[i, 0] * Bz1[i]) + (k2[i, 2] * Bx2[i] - k2[i, 0] * Bz2[i]) + \
-                  (k3[i, 2] * Bx3[i] - k3[i, 0] * Bz3[i]) + (k4[i, 2] * Bx4[i] - k4[i, 0] * Bz4[i])
-        LCzB[i] = (k1[i, 0] * By1[i] - k1[i, 1] * Bx1[i]) + (k2[i, 0] * By2[i] - k2[i, 1] * Bx2[i]) + \
-                  (k3[i, 0] * By3[i] - k3[i, 1] * Bx3[i]) + (k4[i, 0] * By4[i] - k4[i, 1] * Bx4[i])
-
-        curv_x_B[i] = (Bxbc[i] * LGBx[i, 0] + Bybc[i] * LGBx[i, 1] + Bzbc[i] * LGBx[i, 2]) / (Bbc[i] * Bbc[i])
-        curv_y_B[i] = (Bxbc[i] * LGBy[i, 0] + Bybc[i] * LGBy[i, 1] + Bzbc[i] * LGBy[i, 2]) / (Bbc[i] * Bbc[i])
-        curv_z_B[i] = (Bxbc[i] * LGBz[i, 0] + Bybc[i] * LGBz[i, 1] + Bzbc[i] * LGBz[i, 2]) / (Bbc[i] * Bbc[i])
-
-        curvB[i] = np.sqrt(curv_x_B[i] * curv_x_B[i] + curv_y_B[i] * curv_y_B[i] + curv_z_B[i] * curv_z_B[i])
-
-        RcurvB[i] = curvB[i]**(-1)
+    if reciprocal_vectors is None:
+        reciprocal_vectors = lingradest_reciprocal_vectors(R1, R2, R3, R4, scale_factor=scale_factor,
+                                                           chunk_size=chunk_size)
+
+    field = lingradest_field(np.stack((Bx1, By1, Bz1), axis=-1),
+                             np.stack((Bx2, By2, Bz2), axis=-1),
+                             np.stack((Bx3, By3, Bz3), axis=-1),
+                             np.stack((Bx4, By4, Bz4), axis=-1),
+                             reciprocal_vectors, chunk_size=chunk_size)
+
+    # Magnetic field in the barycentre
+    Bxbc = field['Fbc'][:, 0]
+    Bybc = field['Fbc'][:, 1]
+    Bzbc = field['Fbc'][:, 2]
+    Bbc = np.sqrt(Bxbc**2 + Bybc**2 + Bzbc**2)
+
+    # Linear Gradient B estimator
+    LGBx = field['grad'][:, 0, :]
+    LGBy = field['grad'][:, 1, :]
+    LGBz = field['grad'][:, 2, :]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        curv_x_B = (Bxbc * LGBx[:, 0] + Bybc * LGBx[:, 1] + Bzbc * LGBx[:, 2]) / (Bbc * Bbc)
+        curv_y_B = (Bxbc * LGBy[:, 0] + Bybc * LGBy[:, 1] + Bzbc * LGBy[:, 2]) / (Bbc * Bbc)
+        curv_z_B = (Bxbc * LGBz[:, 0] + Bybc * LGBz[:, 1] + Bzbc * LGBz[:, 2]) / (Bbc * Bbc)
+
+        curvB = np.sqrt(curv_x_B * curv_x_B + curv_y_B * curv_y_B + curv_z_B * curv_z_B)
+
+        RcurvB = 1.0 / curvB
 
     logging.info('Calculations completed')
 
-    return { 'Rbary': Rb, # Barycenter position
-             'dR1': dR1, 'dR2': dR2, 'dR3': dR3, 'dR4': dR4, # Probe to barycenter distances
+    return { 'Rbary': reciprocal_vectors['Rbary'], # Barycenter position
+             # Probe to barycenter distances
+             'dR1': reciprocal_vectors['dR1'], 'dR2': reciprocal_vectors['dR2'],
+             'dR3': reciprocal_vectors['dR3'], 'dR4': reciprocal_vectors['dR4'],
             'Bxbc': Bxbc, 'Bybc': Bybc, 'Bzbc': Bzbc, 'Bbc': Bbc,  # Field at barycenter
             'LGBx': LGBx, 'LGBy': LGBy, 'LGBz': LGBz,
-            'LCxB': LCxB, 'LCyB': LCyB, 'LCzB': LCzB, 'LD': LD,
+            'LCxB': field['curl'][:, 0], 'LCyB': field['curl'][:, 1], 'LCzB': field['curl'][:, 2], 'LD': field['div'],
             'curv_x_B': curv_x_B, 'curv_y_B': curv_y_B, 'curv_z_B': curv_z_B, 'RcurvB': RcurvB}
+
+
+def lingradest_reciprocal_vectors(R1, R2, R3, R4, scale_factor=1000.0, chunk_size=2**16):
+    """
+    Calculate the barycenter and reciprocal vectors of the tetrahedron formed by four probes
+
+    These only depend on the probe positions, so they can be calculated once and reused
+    for several fields measured at the same positions (e.g., B, E and the plasma velocity);
+    see lingradest_field
+
+    Parameters
+    ----------
+    R1, R2, R3, R4: ndarray
+
+            Position vectors for the four probes versus time
+
+    scale_factor: float
+        Scaling divisor to apply to internal distance calculations. Default: 1000.0
+
+    chunk_size: int
+        Number of time samples processed at once. Default: 2**16
+
+    Returns
+    --------
+    dict
+        A dictionary containing::
+
+            Rbary, # position of barycenter
+            dR1, dR2, dR3, dR4, # Distance of barycenter from each probe
+            k, # reciprocal vectors, [time, probe, component]
+            mu # weights of the probes for the field at the barycenter, [time, probe]
+    """
+    R = [np.asarray(R1), np.asarray(R2), np.asarray(R3), np.asarray(R4)]
+    datarrLength = R[0].shape[0]
+
+    Rb = np.zeros((datarrLength, 3))
+    dR = np.zeros((4, datarrLength, 3))
+    k = np.zeros((datarrLength, 4, 3))
+    mu = np.zeros((datarrLength, 4))
+
+    for start in range(0, datarrLength, chunk_size):
+        t = slice(start, start + chunk_size)
+        Rt = [Ri[t, 0:3] for Ri in R]
+
+        # Tetrahedrom mesocentre coordinates
+        Rb[t] = 0.25 * (Rt[0] + Rt[1] + Rt[2] + Rt[3])
+
+        for i in range(4):
+            # Difference in 1000 km!
+            dR[i, t] = (Rb[t] - Rt[i]) / scale_factor
+
+            # e.g., k1 = (r23 x r24) / (r21 . (r23 x r24)), with distances relative to probe 2
+            ref, ia, ib = (i + 1) % 4, (i + 2) % 4, (i + 3) % 4
+            ki = np.cross((Rt[ia] - Rt[ref]) / scale_factor, (Rt[ib] - Rt[ref]) / scale_factor)
+            ri = (Rt[i] - Rt[ref]) / scale_factor
+            k[t, i] = ki / (ri[:, 0] * ki[:, 0] + ri[:, 1] * ki[:, 1] + ri[:, 2] * ki[:, 2])[:, np.newaxis]
+
+            mu[t, i] = 1. + (k[t, i, 0] * dR[i, t, 0] + k[t, i, 1] * dR[i, t, 1] + k[t, i, 2] * dR[i, t, 2])
+
+    return {'Rbary': Rb, 'dR1': dR[0], 'dR2': dR[1], 'dR3': dR[2], 'dR4': dR[3], 'k': k, 'mu': mu}
+
+
+def lingradest_field(F1, F2, F3, F4, reciprocal_vectors, chunk_size=2**16):
+    """
+    Calculate the value at the barycenter, gradient, divergence and curl of a vector field
+    measured by four probes, using the reciprocal vectors from lingradest_reciprocal_vectors
+
+    Parameters
+    ----------
+    F1, F2, F3, F4: ndarray
+
+            Field vectors measured by the four probes versus time, [time, component]
+
+    reciprocal_vectors: dict
+        Barycenter and reciprocal vectors returned by lingradest_reciprocal_vectors
+
+    chunk_size: int
+        Number of time samples processed at once. Default: 2**16
+
+    Returns
+    --------
+    dict
+        A dictionary containing::
+
+            Fbc, # field at the barycenter, [time, component]
+            grad, # gradient, [time, component, direction]; e.g., grad[:, 0, :] is the gradient of the x component
+            div, # divergence
+            curl # curl, [time, component]
+
+    Examples
+    --------
+    >>> rv = lingradest_reciprocal_vectors(R1, R2, R3, R4)
+    >>> bfield = lingradest_field(B1, B2, B3, B4, rv)
+    >>> efield = lingradest_field(E1, E2, E3, E4, rv)
+    """
+    k = reciprocal_vectors['k']
+    mu = reciprocal_vectors['mu']
+    F = [np.asarray(F1), np.asarray(F2), np.asarray(F3), np.asarray(F4)]
+    datarrLength = k.shape[0]
+
+    Fbc = np.zeros((datarrLength, 3))
+    grad = np.zeros((datarrLength, 3, 3))
+    div = np.zeros(datarrLength)
+    curl = np.zeros((datarrLength, 3))
+
+    for start in range(0, datarrLength, chunk_size):
+        t = slice(start, start + chunk_size)
+        kt = k[t]
+        mut = mu[t]
+        Ft = [Fi[t, 0:3] for Fi in F]
+
+        # Field in the barycentre
+        Fbc[t] = (mut[:, 0:1] * Ft[0] + mut[:, 1:2] * Ft[1] + mut[:, 2:3] * Ft[2] + mut[:, 3:4] * Ft[3])
+
+        # Linear gradient estimator: grad[:, c, :] = sum over probes of F_c * k
+        grad[t] = (Ft[0][:, :, np.newaxis] * kt[:, np.newaxis, 0, :] + Ft[1][:, :, np.newaxis] * kt[:, np.newaxis, 1, :] +
+                   Ft[2][:, :, np.newaxis] * kt[:, np.newaxis, 2, :] + Ft[3][:, :, np.newaxis] * kt[:, np.newaxis, 3, :])
+
+        # Divergence
+        div[t] = (Ft[0][:, 0] * kt[:, 0, 0] + Ft[0][:, 1] * kt[:, 0, 1] + Ft[0][:, 2] * kt[:, 0, 2] +
+                  Ft[1][:, 0] * kt[:, 1, 0] + Ft[1][:, 1] * kt[:, 1, 1] + Ft[1][:, 2] * kt[:, 1, 2] +
+                  Ft[2][:, 0] * kt[:, 2, 0] + Ft[2][:, 1] * kt[:, 2, 1] + Ft[2][:, 2] * kt[:, 2, 2] +
+                  Ft[3][:, 0] * kt[:, 3, 0] + Ft[3][:, 1] * kt[:, 3, 1] + Ft[3][:, 2] * kt[:, 3, 2])
+
+        # Curl: sum over probes of k x F
+        curl[t] = (np.cross(kt[:, 0], Ft[0]) + np.cross(kt[:, 1], Ft[1]) +
+                   np.cross(kt[:, 2], Ft[2]) + np.cross(kt[:, 3], Ft[3]))
+
+    return {'Fbc': Fbc, 'grad': grad, 'div': div, 'curl': curl}
@@ -1,10 +1,10 @@
 """
 Python implementation of IDL reduce_tres function.
 
-Uses pyspedas rebin function.
+Averages samples with the same grouped reduction used by avg_data.
 """
 import numpy as np
-from pyspedas.analysis.rebin import rebin
+from pyspedas.tplot_tools.tplot_math.bin_reduce import bin_reduce
 
 
 def reduce_tres(dat, n):
@@ -31,32 +31,15 @@ def reduce_tres(dat, n):
     dat = np.asarray(dat)
     dim = dat.shape
 
-    # Calculate how many elements to truncate to make divisible by n
-    m = dim[0] % n
-    l = dim[0] - m - 1
-
-    # Handle different dimensionalities
-    if dat.ndim == 1:
-        # IDL: return,rebin(dat[0:l],dim[0]/n)
-        truncated = dat[: l + 1]
-        new_dim = len(truncated) // n
-        return rebin(truncated, new_dim)
-
-    elif dat.ndim == 2:
-        # IDL: return,rebin(dat[0:l,*],dim[0]/n,dim[1])
-        truncated = dat[: l + 1, :]
-        new_dim0 = truncated.shape[0] // n
-        new_dim1 = dim[1]
-        return rebin(truncated, (new_dim0, new_dim1))
-
-    elif dat.ndim == 3:
-        # IDL: return,rebin(dat[0:l,*,*],dim[0]/n,dim[1],dim[2])
-        truncated = dat[: l + 1, :, :]
-        new_dim0 = truncated.shape[0] // n
-        new_dim1 = dim[1]
-        new_dim2 = dim[2]
-        return rebin(truncated, (new_dim0, new_dim1, new_dim2))
-
-    else:
-        # For higher dimensions, return 0 (matching IDL behavior)
+    # For higher dimensions, return 0 (matching IDL behavior)
+    if dat.ndim > 3:
         return 0
+
+    # IDL: return,rebin(dat[0:l,*,*],dim[0]/n,dim[1],dim[2])
+    # i.e., average groups of n consecutive samples, dropping the remainder
+    new_dim0 = dim[0] // n
+    ind = np.arange(dim[0]) // n
+    reduced = bin_reduce(ind, dat, new_dim0, skipna=False)
+
+    # rebin keeps the type of the input array
+    return reduced.astype(dat.dtype, copy=False)
@@ -17,6 +17,7 @@ from pyspedas import (
     tvectot,
     wavelet,
     time_domain_filter,
+    ttime_domain_filter,
     get_data,
     store_data,
     replace_data,
@@ -381,6 +382,9 @@ class TestAnalysisFunctions(unittest.TestCase):
         self.assertTrue(len(d2) > 0)
         self.assertTrue(d2[1][-1][0] == 15.0)
         self.assertTrue(len(d2[2]) == len(d2[0]))
+        avg_data("test1", newname="test3", width=2, method="max")  # Test other reductions
+        d3 = get_data("test3")
+        self.assertTrue((d3[1][0] == [15.0, 20.0, 8.0]).all())
 
     def test_avg_data_idl(self):
         # Compare data with IDL avg_data
@@ -611,6 +615,42 @@ class TestAnalysisFunctions(unittest.TestCase):
         deriv_data(["test", "test-der"], newname="testtest2")
         self.assertTrue((d[1] == [2.0, 2.5, 5.0, 6.0, -7.0, -19.0]).all())
 
+    def test_lingradest_linear_field(self):
+        """The linear gradient estimator is exact for a linear field"""
+        from pyspedas.analysis.lingradest import lingradest, lingradest_reciprocal_vectors, lingradest_field
+
+        nt = 50
+        rng = np.random.default_rng(0)
+        # positions in km, tetrahedron moving and deforming with time
+        base = np.array([[0.0, 0.0, 0.0], [20.0, 0.0, 0.0], [0.0, 20.0, 0.0], [0.0, 0.0, 20.0]])
+        R = [base[i] + 1.0e4 + rng.uniform(-2, 2, (nt, 3)) for i in range(4)]
+        # gradient in nT/1000 km, grad[c, d] = dB_c/dx_d
+        grad = np.array([[1.0, 2.0, 0.5], [-2.0, 0.3, 4.0], [0.2, 1.0, -1.3]])
+        b0 = np.array([10.0, -5.0, 30.0])
+        B = [b0 + (R[i] / 1000.0) @ grad.T for i in range(4)]
+        args = [B[i][:, c] for c in range(3) for i in range(4)]
+
+        out = lingradest(*args, *R, chunk_size=16)
+        assert_allclose(out["LGBx"], np.broadcast_to(grad[0], (nt, 3)), rtol=1e-6)
+        assert_allclose(out["LGBy"], np.broadcast_to(grad[1], (nt, 3)), rtol=1e-6)
+        assert_allclose(out["LGBz"], np.broadcast_to(grad[2], (nt, 3)), rtol=1e-6)
+        assert_allclose(out["LD"], np.trace(grad), atol=1e-6)
+        assert_allclose(out["LCxB"], grad[2, 1] - grad[1, 2], atol=1e-6)
+        assert_allclose(out["LCyB"], grad[0, 2] - grad[2, 0], atol=1e-6)
+        assert_allclose(out["LCzB"], grad[1, 0] - grad[0, 1], atol=1e-6)
+        rbary = (R[0] + R[1] + R[2] + R[3]) / 4.0
+        assert_allclose(out["Rbary"], rbary)
+        assert_allclose(out["Bxbc"], b0[0] + (rbary / 1000.0) @ grad[0], rtol=1e-9)
+
+        # the reciprocal vectors can be reused for other fields
+        rv = lingradest_reciprocal_vectors(*R)
+        out2 = lingradest(*args, *R, reciprocal_vectors=rv)
+        for key in out:
+            assert_allclose(out[key], out2[key])
+        efield = lingradest_field(*[2.0 * Bi for Bi in B], rv)
+        assert_allclose(efield["grad"], 2.0 * np.broadcast_to(grad, (nt, 3, 3)), rtol=1e-6)
+        assert_allclose(efield["div"], 2.0 * out["LD"], atol=1e-9)
+
     def test_tvectot(self):
         from pyspedas.projects.themis import state
         from pyspedas.tplot_tools import data_exists
@@ -673,6 +713,23 @@ class TestAnalysisFunctions(unittest.TestCase):
         self.assertEqual(output.shape[0], dat.shape[0])
         self.assertEqual(output.shape[1], dat.shape[1])
 
+    def test_time_domain_filter_chunks(self):
+        # The chunked FFT convolution should match a direct convolution, including at the ends
+        from scipy import signal
+        from pyspedas.analysis.time_domain_filter import time_domain_filter_kernel
+        t = np.arange(5000.0)
+        dat = np.random.default_rng(1).normal(size=(5000, 3))
+        kernel = time_domain_filter_kernel(1.0, 0.01, 0.1)
+        expected = np.stack([signal.convolve(dat[:, i], kernel, mode="same", method="direct") for i in range(3)], axis=1)
+        for chunk_size in [100, 1000, 2**16]:
+            output = time_domain_filter(dat, t, 0.01, 0.1, chunk_size=chunk_size)
+            np.testing.assert_allclose(output, expected, atol=1e-12)
+        # the kernel is cached
+        self.assertIs(time_domain_filter_kernel(1.0, 0.01, 0.1), kernel)
+        store_data("tdf_test", data={"x": time_float("2010-01-01") + t, "y": dat})
+        self.assertEqual(ttime_domain_filter("tdf_test", 0.01, 0.1), ["tdf_test-tdf"])
+        np.testing.assert_allclose(get_data("tdf_test-tdf").y, expected, atol=1e-12)
+
     def test_tsmooth(self):
         """Test smooth."""
         tsmooth("aaabbbccc")  # Test non-existent name
@@ -754,6 +811,29 @@ class TestAnalysisFunctions(unittest.TestCase):
         d5 = get_data("nparray_str")
         self.assertTrue(abs(d5[1][1][0] - 5.80645161) < 1e-6)
 
+    def test_tinterpol_methods(self):
+        """Test the native interpolation engine used for sorted times."""
+        times = np.array([0.0, 1.0, 2.0, 4.0])
+        store_data("itrp_a", data={"x": times, "y": np.array([0.0, 10.0, 20.0, 40.0])})
+        store_data("itrp_b", data={"x": times, "y": np.array([[0.0, 1.0], [1.0, 0.0], [0.0, 0.0], [4.0, 1.0]])})
+        interp_to = [-1.0, 0.0, 0.5, 1.5, 3.0, 4.0, 5.0]
+        tinterpol(["itrp_a", "itrp_b"], interp_to)
+        assert_allclose(get_data("itrp_a-itrp").y, [np.nan, 0.0, 5.0, 15.0, 30.0, 40.0, np.nan])
+        assert_allclose(get_data("itrp_b-itrp").y[:, 1], [np.nan, 1.0, 0.5, 0.0, 0.5, 1.0, np.nan])
+        tinterpol("itrp_a", interp_to, method="nearest", newname="itrp_nearest")
+        assert_allclose(get_data("itrp_nearest").y, [np.nan, 0.0, 0.0, 10.0, 20.0, 40.0, np.nan])
+        tinterpol("itrp_a", interp_to, method="previous", newname="itrp_previous", extrapolate=True)
+        assert_allclose(get_data("itrp_previous").y, [np.nan, 0.0, 0.0, 10.0, 20.0, 40.0, 40.0])
+        tinterpol("itrp_a", interp_to, method="next", newname="itrp_next")
+        assert_allclose(get_data("itrp_next").y, [np.nan, 0.0, 10.0, 20.0, 40.0, 40.0, np.nan])
+        tinterpol("itrp_a", interp_to, extrapolate=True, newname="itrp_extrap")
+        assert_allclose(get_data("itrp_extrap").y, [-10.0, 0.0, 5.0, 15.0, 30.0, 40.0, 50.0])
+        # values at matching times are returned unchanged (see test_scipy_interp1d)
+        values = np.array([0.028584518, 0.0, 0.013626526], dtype=np.float32)
+        store_data("itrp_f32", data={"x": np.array([0.0, 0.03, 0.06]), "y": values})
+        tinterpol("itrp_f32", [0.03], newname="itrp_f32_exact")
+        self.assertEqual(get_data("itrp_f32_exact").y[0], 0.0)
+
     def test_scipy_interp1d(self):
         import scipy
         import numpy as np
@@ -112,6 +112,48 @@ class MagNullTestCases(unittest.TestCase):
         tc = pyspedas.classify_null_type(lambdas)
         self.assertEqual(tc, 10)
 
+    def test_null_classification_array(self):
+        # The array version should agree with classifying each set of eigenvalues separately
+        lambdas = np.array([[0.0, -0.5, 0.5], [0.0, 1.0j, -1.0j], [-0.25, -0.25, 0.5], [0.25, 0.25, -0.5],
+                            [0.5, -0.25+0.25j, -0.25-0.25j], [-0.5, 0.25+0.25j, 0.25-0.25j],
+                            [-0.01, -0.1, 0.89], [0.01, 0.1, -0.89], [0.1, -0.1+0.5j, -0.1-0.5j],
+                            [-0.1, -0.1+0.5j, 0.1-0.5j]])
+        tc = pyspedas.classify_null_types(lambdas)
+        np.testing.assert_array_equal(tc, np.arange(1, 11))
+        self.assertEqual([pyspedas.classify_null_type(l) for l in lambdas], list(range(1, 11)))
+
+    def test_find_magnetic_nulls_fote_linear_field(self):
+        # A linear field with a null at a known, fixed position, observed by a tetrahedron moving through it
+        from pyspedas.tplot_tools import store_data
+        n = 200
+        times = 1.5e9 + np.arange(n)
+        tetra = np.array([[0.0, 0.0, 0.0], [10.0, 0.0, 0.0], [0.0, 10.0, 0.0], [0.0, 0.0, 10.0]])
+        drift = np.outer(np.linspace(-40.0, 40.0, n), [1.0, 0.5, 0.2])
+        jacobian = np.array([[1.0, 0.2, 0.0], [0.1, -2.0, 0.3], [0.0, 0.4, 1.0]])
+        r0 = np.array([3.0, 3.0, 3.0])
+        for i in range(4):
+            pos = tetra[i] + drift
+            store_data('lin_pos'+str(i), data={'x': times, 'y': pos})
+            store_data('lin_b'+str(i), data={'x': times, 'y': (pos - r0) @ jacobian.T})
+        positions = ['lin_pos'+str(i) for i in range(4)]
+        fields = ['lin_b'+str(i) for i in range(4)]
+        pyspedas.find_magnetic_nulls_fote(positions=positions, fields=fields, smooth_fields=False)
+        null_pos = get_data('null_pos')
+        np.testing.assert_allclose(null_pos.y, np.broadcast_to(r0, null_pos.y.shape), atol=1e-8)
+        eigenvalues = np.linalg.eigvals(jacobian)
+        np.testing.assert_array_equal(get_data('null_typecode').y, pyspedas.classify_null_type(eigenvalues))
+        np.testing.assert_allclose(get_data('max_reconstruction_error').y, 0.0, atol=1e-10)
+
+        # With the prefilter, only the samples with the null inside the tetrahedron are kept
+        pyspedas.find_magnetic_nulls_fote(positions=positions, fields=fields, smooth_fields=False, prefilter=True)
+        d = get_data('null_sc_distances')
+        kept = ~np.isnan(get_data('null_bary_dist').y)
+        self.assertTrue(0 < np.sum(kept) < len(kept))
+        self.assertTrue(np.all(get_data('null_typecode').y[~kept] == 0))
+        # the null is inside the tetrahedron, so it's within one edge length of every probe
+        self.assertTrue(np.all(d.y[kept] <= 10.0*np.sqrt(2.0)))
+        np.testing.assert_allclose(get_data('null_pos').y[kept], np.broadcast_to(r0, (np.sum(kept), 3)), atol=1e-8)
+
     def test_find_magnetic_nulls_fote_mms(self):
         data = pyspedas.projects.mms.fgm(
             probe=[1, 2, 3, 4],
@@ -262,5 +262,49 @@ class TwavpolDataValidation(unittest.TestCase):
         )
 
 
+class TwavpolSyntheticTests(unittest.TestCase):
+    """Tests of wavpol with synthetic data (no downloads required)"""
+
+    def test_wavpol_circular_wave(self):
+        """A circularly polarized wave propagating along Z, with a data gap and NaNs"""
+        from pyspedas.analysis.twavpol import wavpol
+
+        times = np.arange(6000) / 32.0
+        times[3000:] += 10.0
+        phase = 2 * np.pi * 4.0 * times
+        rng = np.random.default_rng(0)
+        bx = np.cos(phase) + 0.01 * rng.standard_normal(len(times))
+        by = np.sin(phase) + 0.01 * rng.standard_normal(len(times))
+        bz = 0.01 * rng.standard_normal(len(times))
+        bx[1000:1003] = np.nan
+
+        result = wavpol(times, bx, by, bz)
+        timeline, freqline, powspec, degpol, waveangle, elliptict, helict, pspec3, err_flag = result
+        self.assertEqual(err_flag, 0)
+        # 2 batches of 23 steps, plus a leap frog step for each batch
+        self.assertEqual(len(timeline), 48)
+        self.assertTrue(np.all(np.isfinite(timeline)))
+        self.assertEqual(powspec.shape, (48, 128))
+        self.assertEqual(pspec3.shape, (48, 128, 3))
+
+        # the wave is at 4 Hz = frequency bin 32
+        steps = np.r_[0:23, 24:47]
+        self.assertEqual(freqline[32], 4.0)
+        self.assertTrue(np.all(np.argmax(powspec[steps], axis=1) == 32))
+        assert_allclose(degpol[steps, 32], 1.0, atol=0.01)
+        assert_allclose(waveangle[steps, 32], 0.0, atol=0.05)
+        assert_allclose(helict[steps, 32], 1.0, atol=0.05)
+        self.assertTrue(np.all(elliptict[steps, 32] > 0.5))
+
+        # reversing the sense of rotation changes the sign of the ellipticity
+        reversed_result = wavpol(times, bx, -by, bz)
+        assert_allclose(reversed_result[5][steps, 32], -elliptict[steps, 32])
+
+        # the results don't depend on the number of windows processed at once
+        chunked = wavpol(times, bx, by, bz, chunk_size=1000)
+        for full, part in zip(result[:-1], chunked[:-1]):
+            assert_allclose(full, part)
+
+
 if __name__ == "__main__":
     unittest.main()
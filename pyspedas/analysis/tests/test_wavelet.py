@@ -818,5 +818,79 @@ class TwaveletDataValidation(unittest.TestCase):
         tplot(allvar, display=global_display, save_png=local_png)
 
 
+class WavDataSyntheticTests(unittest.TestCase):
+    """Tests of the wav_data helpers with synthetic data (no downloads required)"""
+
+    def test_smooth_wavelet(self):
+        from scipy.ndimage import uniform_filter1d
+        from pyspedas.analysis.wav_data import smooth_wavelet
+
+        rng = np.random.default_rng(0)
+        wv = rng.standard_normal((300, 5, 3))
+        wid = np.array([1, 4, 9, 9, 500])
+        smoothed = wv.copy()
+        smooth_wavelet(smoothed, wid)
+        gsmoothed = wv.copy()
+        smooth_wavelet(gsmoothed, wid, gaussian=True)
+
+        # width <= 1: unchanged
+        assert_allclose(smoothed[:, 0, :], wv[:, 0, :])
+        assert_allclose(gsmoothed[:, 0, :], wv[:, 0, :])
+        for j, width in enumerate([4, 9, 9, 299]):
+            for k in range(3):
+                expected = uniform_filter1d(wv[:, j + 1, k], size=width, mode="nearest")
+                assert_allclose(smoothed[:, j + 1, k], expected)
+        kernel = np.exp(-np.linspace(-2, 2, 9) ** 2)
+        expected = np.convolve(wv[:, 2, 1], kernel / np.sum(kernel), mode="same")
+        assert_allclose(gsmoothed[:, 2, 1], expected)
+
+        # 1D input
+        wv1 = wv[:, 1, 0].copy()
+        smooth_wavelet(wv1, [4])
+        assert_allclose(wv1, smoothed[:, 1, 0])
+
+    def test_rotate_wavelet2(self):
+        from pyspedas.analysis.wav_data import rotate_wavelet2
+
+        rng = np.random.default_rng(1)
+        nt = 200
+        wv = rng.standard_normal((nt, 4, 3)) + 1j * rng.standard_normal((nt, 4, 3))
+        # B along x, so the field-aligned z axis is x, y is x cross [0, 0, 1] = -y, and x is z
+        bfield = np.zeros((nt, 3))
+        bfield[:, 0] = 5.0
+        wvp, rotmats = rotate_wavelet2(wv, bfield, wid=[3, 3, 10, 20], get_rotmats=True)
+        self.assertEqual(rotmats.shape, (nt, 4, 3, 3))
+        assert_allclose(wvp[..., 2], wv[..., 0], atol=1e-6)
+        assert_allclose(wvp[..., 1], -wv[..., 1], atol=1e-6)
+        assert_allclose(wvp[..., 0], wv[..., 2], atol=1e-6)
+
+        # precomputed rotation matrices give the same results
+        wvp2, _ = rotate_wavelet2(wv, bfield, rotmats=rotmats)
+        assert_allclose(wvp2, wvp)
+
+    def test_wavelet98_filter_bank_cache(self):
+        from pyspedas.analysis import wavelet98 as wavelet98_module
+
+        rng = np.random.default_rng(2)
+        y = rng.standard_normal(512)
+        wavelet98_module._filter_bank_cache.clear()
+        first = wavelet98(y, 0.5)
+        self.assertEqual(len(wavelet98_module._filter_bank_cache), 1)
+        second = wavelet98(y, 0.5)
+        self.assertEqual(len(wavelet98_module._filter_bank_cache), 1)
+        for a, b in zip(first[:4], second[:4]):
+            assert_allclose(a, b)
+
+        # a different length uses a different filter bank
+        wavelet98(y[:256], 0.5)
+        self.assertEqual(len(wavelet98_module._filter_bank_cache), 2)
+
+        # the wavelet transform of a sine wave peaks at its period
+        t = np.arange(1024) * 0.5
+        wave, scale, period, signif, _, _, _ = wavelet98(np.sin(2 * np.pi * t / 16.0), 0.5)
+        power = np.mean(np.abs(wave[256:768]) ** 2, axis=0)
+        assert_allclose(period[np.argmax(power)], 16.0, rtol=0.1)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -5,24 +5,39 @@ Created on Wed Oct 13 14:24:48 2021
 @author: kvidal
 """
 
-from scipy import signal, special
+import logging
+from scipy import fft, special
 import numpy as np
+import pyspedas
+from pyspedas.tplot_tools import get_data, tnames, tplot_copy
+
+# kernels of the most recent filters, keyed by (flow, fhigh, nterms, dt)
+_kernel_cache = {}
+_kernel_cache_size = 4
+
 
 def time_domain_filter(
         data,
         time,
         freq_low,
-        freq_high):
+        freq_high,
+        chunk_size=2**16):
     """
     Modified for python from SPEDAS's function of the same name
     Purpose: band-pass filter of data, assuming constant dt between points
 
+    The filter is applied with an overlap-save FFT convolution, in blocks of chunk_size
+    points, to all of the components at once; the result is the same as a direct
+    convolution of each component with the filter ('same' mode, with the data padded
+    with zeros at both ends).
+
     Parameters:
     ----------
-        data: input nx3 array
+        data: input nx3 array (or any n or nxm array)
         time: in seconds
         freq_low: low coutoff frequency in Hz
         freq_high: high cutoff frequency in Hz
+        chunk_size: number of points filtered at once (default 2**16)
 
     Returns:
     -------
@@ -40,6 +55,97 @@ def time_domain_filter(
 
     """
     dt = time[1]-time[0]
+    out = time_domain_filter_kernel(dt, freq_low, freq_high)
+    return overlap_save_convolve(data, out, chunk_size=chunk_size)
+
+
+def ttime_domain_filter(names, freq_low, freq_high, newname=None, suffix=None, overwrite=None, chunk_size=2**16):
+    """
+    Band-pass filter tplot variables with time_domain_filter
+
+    All the components of each variable are filtered at once, chunk_size points at a time,
+    and the filter kernel is shared by all the variables with the same time step.
+
+    Parameters
+    ----------
+    names: str/list of str
+        List of tplot variable names to be filtered (wildcards accepted)
+    freq_low: float
+        Low cutoff frequency in Hz
+    freq_high: float
+        High cutoff frequency in Hz
+    newname: str/list of str, optional
+        List of new names for tplot variables.
+        If not given, then a suffix is applied.
+    suffix: str, optional
+        A suffix to apply. Default is '-tdf'.
+    overwrite: bool, optional
+        Replace the existing tplot name.
+    chunk_size: int, optional
+        Number of points filtered at once. Default is 2**16.
+
+    Returns
+    -------
+    list of str
+        Returns list of tplot variables created or changed
+
+    Example
+    -------
+        >>> import pyspedas
+        >>> import numpy as np
+        >>> pyspedas.store_data('a', data={'x': np.arange(1000.), 'y': np.random.random((1000, 3))})
+        >>> pyspedas.ttime_domain_filter('a', 0.01, 0.1)
+    """
+    old_names = tnames(names)
+
+    if len(old_names) < 1:
+        logging.error('ttime_domain_filter: No valid tplot variable names were provided.')
+        return
+
+    if suffix is None:
+        suffix = '-tdf'
+
+    if overwrite is not None:
+        n_names = old_names
+    elif newname is None:
+        n_names = [s + suffix for s in old_names]
+    else:
+        n_names = newname
+
+    if isinstance(n_names, str):
+        n_names = [n_names]
+
+    if len(n_names) != len(old_names):
+        n_names = [s + suffix for s in old_names]
+
+    for i, old in enumerate(old_names):
+        new = n_names[i]
+
+        if new != old:
+            tplot_copy(old, new)
+
+        times = get_data(new).times
+        if len(times) < 2:
+            logging.error('ttime_domain_filter: not enough data points in ' + new)
+            continue
+
+        data = pyspedas.tplot_tools.data_quants[new].values
+        pyspedas.tplot_tools.data_quants[new].values = time_domain_filter(data, times, freq_low, freq_high,
+                                                                          chunk_size=chunk_size)
+
+        logging.info('ttime_domain_filter was applied to: ' + new)
+
+    return n_names
+
+
+def time_domain_filter_kernel(dt, freq_low, freq_high):
+    """
+    Returns the (read-only) band-pass filter kernel used by time_domain_filter
+
+    The kernels of the most recent filters are cached, so filtering several
+    variables (or chunks of a long time series) with the same filter and time
+    step only designs the filter once.
+    """
     nyquist = 1./(2.*dt)
     flow = freq_low/nyquist
     fhigh = freq_high/nyquist
@@ -50,14 +156,67 @@ def time_domain_filter(
         f = flow
     nterms = int(5./f)
     if nterms > 5000.:
-        nterms = 5000.
+        nterms = 5000
+
+    key = (flow, fhigh, nterms, dt)
+    if key in _kernel_cache:
+        return _kernel_cache[key]
+
     out = digital_filter(flow,fhigh,A,nterms)
-    new_series_x = signal.convolve(data[:,0],out,mode='same',method='direct')
-    new_series_y = signal.convolve(data[:,1],out,mode='same',method='direct')
-    new_series_z = signal.convolve(data[:,2],out,mode='same',method='direct')
-    new_series =  np.transpose(np.vstack((new_series_x,new_series_y,new_series_z)))
+    out.flags.writeable = False
+    _kernel_cache[key] = out
+    while len(_kernel_cache) > _kernel_cache_size:
+        del _kernel_cache[next(iter(_kernel_cache))]
+    return out
+
+
+def overlap_save_convolve(data, kernel, chunk_size=2**16):
+    """
+    Convolves the columns of data with a kernel, using overlap-save FFT convolution
+
+    Equivalent to scipy.signal.convolve(data[:, i], kernel, mode='same') for each column i,
+    but all the columns are filtered at once, and only chunk_size points (plus the
+    kernel length) are transformed at a time, so data can also be a memory-mapped array.
+
+    Parameters:
+    ----------
+        data: n or nxm array
+        kernel: 1-d array
+        chunk_size: number of output points computed per block (default 2**16)
+
+    Returns:
+    -------
+        array with the same shape as data
+    """
+    data = np.asanyarray(data)
+    kernel = np.asarray(kernel, dtype=np.float64)
+    npts = data.shape[0]
+    nk = len(kernel)
+    center = (nk - 1)//2
+    result = np.empty(data.shape, dtype=np.result_type(data.dtype, np.float64))
+    if npts == 0:
+        return result
+
+    block = max(1, min(int(chunk_size), npts))
+    nfft = fft.next_fast_len(block + nk - 1, real=True)
+    block = nfft - nk + 1
+    kernel_fft = fft.rfft(kernel, nfft)
+    if data.ndim > 1:
+        kernel_fft = kernel_fft.reshape((-1,) + (1,)*(data.ndim - 1))
+
+    segment = np.zeros((nfft,) + data.shape[1:], dtype=result.dtype)
+    for start in range(0, npts, block):
+        stop = min(start + block, npts)
+        # input points [start + center - nk + 1, stop + center), zero outside the data
+        first = start + center - nk + 1
+        last = stop + center
+        segment[:] = 0.0
+        segment[max(0, -first):min(npts, last) - first] = data[max(0, first):min(npts, last)]
+        filtered = fft.irfft(fft.rfft(segment, axis=0)*kernel_fft, nfft, axis=0)
+        result[start:stop] = filtered[nk - 1:nk - 1 + stop - start]
+
+    return result
 
-    return new_series
 
 def digital_filter(flow,fhigh,aGibbs,nterms):
     
@@ -36,7 +36,10 @@ def tinterpol(names, interp_to, method=None, newname=None, extrapolate=False, su
     Notes
     -----
 
-    Uses xarray interp method to interpolate data to the times in interp_to.
+    For the 'linear', 'nearest', 'previous' and 'next' methods, and numeric data with strictly increasing times,
+    the indices and weights are computed once (see tinterpol_plan) and shared by all the variables with the same
+    times; every column is then interpolated with a single gather and blend.  The other methods use the xarray
+    interp method to interpolate data to the times in interp_to.
     See: https://docs.xarray.dev/en/latest/generated/xarray.DataArray.interp.html
     Similar to tinterpol.pro in IDL SPEDAS.
 
@@ -46,7 +49,8 @@ def tinterpol(names, interp_to, method=None, newname=None, extrapolate=False, su
     interpolated value may differ slightly (on the order of 1 ULP) from the input value at that timestamp.
     This can cause problems for downstream calculations: for example, if the input is strictly non-negative, but
     contains zero values, the interpolated data may contain small negative values. The 'slinear' method does not appear
-    to suffer from this issue, but may be slightly slower.
+    to suffer from this issue, but may be slightly slower.  The native 'linear' interpolation returns the input values
+    unchanged at matching timestamps.
 
 
     Examples
@@ -113,53 +117,185 @@ def tinterpol(names, interp_to, method=None, newname=None, extrapolate=False, su
     if extrapolate:
         kwargs={'fill_value':'extrapolate'}
 
+    if len(interp_to_times) == 0:
+        logging.error("tinterpol: No times to interpolate to.")
+        return
+
+    if isinstance(interp_to_times[0], (datetime.datetime, np.datetime64)):
+        # Timezone-naive datetime or np.datetime64, use as-is
+        interp_to_datetimes = interp_to_times
+    elif isinstance(interp_to_times[0], (int, float, np.integer, np.float64)):
+        # Assume seconds since Unix epoch, convert to np.datetime64 with nanosecond precision
+        if isinstance(interp_to_times, np.ndarray):
+            interp_to_datetimes = np.array(
+                interp_to_times * 1e09, dtype="datetime64[ns]"
+            )
+        else:
+            # We need to convert input to a numpy array before scaling to nanoseconds
+            interp_to_datetimes = np.array(
+                np.array(interp_to_times) * 1e9, dtype="datetime64[ns]"
+            )
+    elif isinstance(interp_to_times[0], str):
+        # Interpret strings as timestamps, convert to np.datetime64 with nanosecond precision
+        interp_to_datetimes = np.array(interp_to_times, dtype="datetime64[ns]")
+    else:
+        # Give up for any other type
+        logging.error(
+            "tinterpol: Unable to convert type %s to timestamp.",
+            type(interp_to_times[0]),
+        )
+        return
+
+    # Index/weight plans for the linear, nearest, previous and next methods, shared by
+    # all the variables with the same time stamps
+    plans = []
 
     for name_idx, name in enumerate(old_names):
         xdata = get_data(name, xarray=True)
         metadata = get_data(name, metadata=True)
 
-        if isinstance(interp_to_times[0], (datetime.datetime, np.datetime64)):
-            # Timezone-naive datetime or np.datetime64, use as-is
-            interp_to_datetimes = interp_to_times
-        elif isinstance(interp_to_times[0], (int, float, np.integer, np.float64)):
-            # Assume seconds since Unix epoch, convert to np.datetime64 with nanosecond precision
-            if isinstance(interp_to_times, np.ndarray):
-                interp_to_datetimes = np.array(
-                    interp_to_times * 1e09, dtype="datetime64[ns]"
-                )
+        plan = None
+        if method in ["linear", "nearest", "previous", "next"]:
+            times = xdata.coords["time"].values
+            for plan_times, cached_plan in plans:
+                if np.array_equal(plan_times, times):
+                    plan = cached_plan
+                    break
             else:
-                # We need to convert input to a numpy array before scaling to nanoseconds
-                interp_to_datetimes = np.array(
-                    np.array(interp_to_times) * 1e9, dtype="datetime64[ns]"
-                )
-        elif isinstance(interp_to_times[0], str):
-            # Interpret strings as timestamps, convert to np.datetime64 with nanosecond precision
-            interp_to_datetimes = np.array(interp_to_times, dtype="datetime64[ns]")
-        else:
-            # Give up for any other type
-            logging.error(
-                "tinterpol: Unable to convert type %s to timestamp.",
-                type(interp_to_times[0]),
-            )
-            return
+                plan = tinterpol_plan(times, interp_to_datetimes, method=method, extrapolate=extrapolate)
+                if plan is not None:
+                    plans.append((times, plan))
 
-        xdata_interpolated = xdata.interp({"time": interp_to_datetimes}, method=method, kwargs=kwargs)
+        if plan is not None and xdata.dtype.kind in "iuf":
+            # Native engine: every column is gathered and blended at once
+            y = tinterpol_apply(plan, xdata.values)
+            if "spec_bins" in xdata.coords:
+                v = xdata.coords["spec_bins"].values
+                if "time" in xdata.coords["spec_bins"].dims:
+                    v = tinterpol_apply(plan, v)
+        else:
+            xdata_interpolated = xdata.interp({"time": interp_to_datetimes}, method=method, kwargs=kwargs)
+            y = xdata_interpolated.values
+            if "spec_bins" in xdata.coords:
+                v = xdata_interpolated.coords["spec_bins"].values
 
         if "spec_bins" in xdata.coords:
             store(
                 n_names[name_idx],
                 data={
                     "x": interp_to_times,
-                    "y": xdata_interpolated.values,
-                    "v": xdata_interpolated.coords["spec_bins"].values,
+                    "y": y,
+                    "v": v,
                 },
                 metadata=metadata,
             )
         else:
             store(
                 n_names[name_idx],
-                data={"x": interp_to_times, "y": xdata_interpolated.values},
+                data={"x": interp_to_times, "y": y},
                 metadata=metadata,
             )
 
         logging.info("tinterpol (" + method + ") was applied to: " + n_names[name_idx])
+
+
+def tinterpol_plan(times, interp_to_times, method="linear", extrapolate=False):
+    """
+    Computes the indices and weights used to interpolate data at times to interp_to_times
+
+    The plan only depends on the two sets of times, so it can be applied to any number of
+    variables (and columns) with tinterpol_apply.  The nearest, previous and next methods
+    select the same points as scipy's interp1d (as used by xarray.interp); the linear method
+    returns the data values unchanged where the times match exactly.
+
+    Parameters
+    ----------
+    times : np.ndarray of np.datetime64
+        Times of the data; must be strictly increasing
+    interp_to_times : np.ndarray of np.datetime64
+        Times to interpolate to
+    method : str, optional
+        'linear', 'nearest', 'previous' or 'next'. Default is 'linear'.
+    extrapolate: bool, optional
+        If True, extrapolate beyond the start/end times of the data (as with fill_value='extrapolate'
+        in interp1d); otherwise these points are NaN. Default is False.
+
+    Returns
+    -------
+    dict or None
+        The interpolation plan, or None if the times are not strictly increasing (or there are fewer than 2)
+    """
+    times = np.asarray(times)
+    if len(times) < 2 or times.dtype.kind != "M":
+        return None
+    t0 = times.min()
+    # Times relative to the first one, in nanoseconds, as in xarray.interp
+    x = (times - t0).astype("timedelta64[ns]").astype(np.int64).astype(np.float64)
+    if not np.all(x[1:] > x[:-1]):
+        return None
+    x_new = (np.asarray(interp_to_times, dtype="datetime64[ns]") - t0).astype(np.int64).astype(np.float64)
+    n = len(x)
+
+    if method == "linear":
+        lo = np.clip(np.searchsorted(x, x_new, side="right") - 1, 0, n - 2)
+        hi = lo + 1
+        x_lo = x[lo]
+        plan = {"method": method, "lo": lo, "hi": hi, "dx": x[hi] - x_lo, "offset": x_new - x_lo,
+                "at_lo": x_new == x_lo, "at_hi": x_new == x[hi]}
+    elif method == "nearest":
+        bounds = x/2.0
+        plan = {"method": method,
+                "index": np.clip(np.searchsorted(bounds[1:] + bounds[:-1], x_new, side="left"), 0, n - 1)}
+    elif method == "previous":
+        plan = {"method": method,
+                "index": np.clip(np.searchsorted(np.nextafter(x, -np.inf), x_new, side="left"), 1, n) - 1}
+    elif method == "next":
+        plan = {"method": method,
+                "index": np.clip(np.searchsorted(np.nextafter(x, np.inf), x_new, side="right"), 0, n - 1)}
+    else:
+        return None
+
+    # Points outside the data are NaN; with extrapolation, previous (next) still has no value before (after) the data
+    below = x_new < x[0]
+    above = x_new > x[-1]
+    if extrapolate:
+        below = below if method == "previous" else np.zeros(len(x_new), dtype=bool)
+        above = above if method == "next" else np.zeros(len(x_new), dtype=bool)
+    plan["invalid"] = below | above
+    return plan
+
+
+def tinterpol_apply(plan, values):
+    """
+    Interpolates data with a plan computed by tinterpol_plan
+
+    Parameters
+    ----------
+    plan : dict
+        Plan returned by tinterpol_plan
+    values : np.ndarray
+        Data values, with time as the first dimension
+
+    Returns
+    -------
+    np.ndarray
+        Interpolated values (as floating point), with time as the first dimension
+    """
+    values = np.asarray(values)
+    if values.dtype.kind not in "fc":
+        values = values.astype(np.float64)
+    shape = values.shape
+    y = values.reshape(shape[0], -1)
+
+    if plan["method"] == "linear":
+        y_lo = y[plan["lo"]]
+        y_hi = y[plan["hi"]]
+        with np.errstate(invalid="ignore"):
+            out = (y_hi - y_lo)/plan["dx"][:, np.newaxis]*plan["offset"][:, np.newaxis] + y_lo
+        out[plan["at_hi"]] = y_hi[plan["at_hi"]]
+        out[plan["at_lo"]] = y_lo[plan["at_lo"]]
+    else:
+        out = y[plan["index"]]
+
+    out[plan["invalid"]] = np.nan
+    return out.reshape((out.shape[0],) + shape[1:])
@@ -72,7 +72,6 @@ Restrictions:
 
 """
 import logging
-import warnings
 import numpy as np
 
 # use nansum from bottleneck if it's installed, otherwise use the numpy one
@@ -88,167 +87,171 @@ from pyspedas.tplot_tools import get_data, store_data, options, tnames
 
 empty_initializer = 0.0
 
-def atan2c(zx, zy):
-    """Define arctan2 with complex numbers."""
-    if np.isreal(zx) and np.isreal(zy):
-        res = np.arctan2(zx, zy)
-    else:
-        res = -1j * np.log((zx + 1j*zy)/np.sqrt(zx**2 + zy**2))
-    return res
-
+def wpol_ematspec(matspec, aa, nosmbins):
+    """Smooth the spectral matrices along the frequency axis.
 
-def wpol_ematspec(i1, i2, i3, i4, aa, nosmbins, matspec):
-    """Calculate ematspec array."""
-    id0 = (i2 - int((nosmbins-1)/2))
-    id1 = (i2 + int((nosmbins-1)/2)) + 1
+    Frequencies within (nosmbins-1)/2 bins of either end of the spectrum
+    are not smoothed, and are set to zero.
+    """
+    half = int((nosmbins-1)/2)
+    nbins = 2*half + 1
+    ematspec = np.full(matspec.shape, empty_initializer, dtype=complex)
+    if matspec.shape[1] < nbins:
+        return ematspec
+    # windows of nbins frequencies, [step, frequency, k1, k2, bin]
+    windows = np.lib.stride_tricks.sliding_window_view(matspec, nbins, axis=1)
     # Using nansum() rather than sum() here results in a mismatch between IDL and Python results.
-    res = np.sum(aa[0:nosmbins] * matspec[i1, id0:id1, i3, i4])
-    return res
-
-
-def wpol_matsqrd(i1, i2, i3, ematspec):
-    """Calculate matsqrd array."""
-    res = (ematspec[i1, :, i2, 0] * ematspec[i1, :, 0, i3] +
-           ematspec[i1, :, i2, 1] * ematspec[i1, :, 1, i3] +
-           ematspec[i1, :, i2, 2] * ematspec[i1, :, 2, i3])
-    return res
-
-
-def wpol_helicity(nosteps, nopfft, KK, ematspec, waveangle):
-    """Calculate helicity, ellipticity."""
-    # Avoid warnings.
-    warnings.simplefilter("ignore", np.exceptions.ComplexWarning)
-
-    # Define arrays.
-    helicity = np.full((nosteps, int(nopfft/2), 3), empty_initializer)
-    ellip = np.full((nosteps, int(nopfft/2), 3), empty_initializer)
-    alphax = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    alphasin2x = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    alphacos2x = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    alphasin3x = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    alphacos3x = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    alphay = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    alphasin2y = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    alphacos2y = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    alphasin3y = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    alphacos3y = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    alphaz = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    alphasin2z = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    alphacos2z = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    alphasin3z = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    alphacos3z = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    lambdau = np.full((nosteps, int(nopfft/2), 3, 3), empty_initializer, dtype=complex)
-    lambday = np.full((nosteps, int(nopfft/2), 3, 3), empty_initializer,dtype=complex)
-    lambdaurot = np.full((nosteps, int(nopfft/2), 2), empty_initializer, dtype=complex)
-
-    alphax[KK, :] = np.sqrt(ematspec[KK, :, 0, 0])
-    alphacos2x[KK, :] = (np.real(ematspec[KK, :, 0, 1]) /
-                         np.sqrt(ematspec[KK, :, 0, 0]))
-    alphasin2x[KK, :] = (-np.imag(ematspec[KK, :, 0, 1]) /
-                         np.sqrt(ematspec[KK, :, 0, 0]))
-    alphacos3x[KK, :] = (np.real(ematspec[KK, :, 0, 2]) /
-                         np.sqrt(ematspec[KK, :, 0, 0]))
-    alphasin3x[KK, :] = (-np.imag(ematspec[KK, :, 0, 2]) /
-                         np.sqrt(ematspec[KK, :, 0, 0]))
-    lambdau[KK, :, 0, 0] = alphax[KK, :]
-    lambdau[KK, :, 0, 1] = (alphacos2x[KK, :] +
-                            1j * alphasin2x[KK, :])
-    lambdau[KK, :, 0, 2] = (alphacos3x[KK, :] +
-                            1j * alphasin3x[KK, :])
-
-    alphay[KK, :] = np.sqrt(ematspec[KK, :, 1, 1])
-    alphacos2y[KK, :] = (np.real(ematspec[KK, :, 1, 0]) /
-                         np.sqrt(ematspec[KK, :, 1, 1]))
-    alphasin2y[KK, :] = (-np.imag(ematspec[KK, :, 1, 0]) /
-                         np.sqrt(ematspec[KK, :, 1, 1]))
-    alphacos3y[KK, :] = (np.real(ematspec[KK, :, 1, 2]) /
-                         np.sqrt(ematspec[KK, :, 1, 1]))
-    alphasin3y[KK, :] = (-np.imag(ematspec[KK, :, 1, 2]) /
-                         np.sqrt(ematspec[KK, :, 1, 1]))
-    lambdau[KK, :, 1, 0] = alphay[KK, :]
-    lambdau[KK, :, 1, 1] = (alphacos2y[KK, :] +
-                            1j * alphasin2y[KK, :])
-    lambdau[KK, :, 1, 2] = (alphacos3y[KK, :] +
-                            1j * alphasin3y[KK, :])
-
-    alphaz[KK, :] = np.sqrt(ematspec[KK, :, 2, 2])
-    alphacos2z[KK, :] = (np.real(ematspec[KK, :, 2, 0]) /
-                         np.sqrt(ematspec[KK, :, 2, 2]))
-    alphasin2z[KK, :] = (-np.imag(ematspec[KK, :, 2, 0]) /
-                         np.sqrt(ematspec[KK, :, 2, 2]))
-    alphacos3z[KK, :] = (np.real(ematspec[KK, :, 2, 1]) /
-                         np.sqrt(ematspec[KK, :, 2, 2]))
-    alphasin3z[KK, :] = (-np.imag(ematspec[KK, :, 2, 1]) /
-                         np.sqrt(ematspec[KK, :, 2, 2]))
-    lambdau[KK, :, 2, 0] = alphaz[KK, :]
-    lambdau[KK, :, 2, 1] = (alphacos2z[KK, :] +
-                            1j * alphasin2z[KK, :])
-    lambdau[KK, :, 2, 2] = (alphacos3z[KK, :] +
-                            1j * alphasin3z[KK, :])
-
-    for k in range(int(nopfft/2)):
-        for k1 in range(3):
-            upper = nansum(2*np.real(lambdau[KK, k, k1, 0:3]) *
-                           np.imag(lambdau[KK, k, k1, 0:3]))
-            la2 = np.imag(lambdau[KK, k, k1, 0:3])**2
-            lower = nansum(np.real(lambdau[KK, k, k1, 0:3])**2 - la2)
-            gammay = np.nan
-            if np.isfinite(upper) and np.isfinite(lower):
-                if upper > 0.0:
-                    gammay = atan2c(upper, lower)
-                else:
-                    gammay = (2*np.pi + atan2c(upper, lower))
-            lambday[KK, k, k1, :] = (np.exp((0.0 - 1j*0.5*gammay)) *
-                                     lambdau[KK, k, k1, :])
-            lay2 = np.imag(lambday[KK, k, k1, 0:3])**2
-            # Using nansum() rather than sum() in the helicity calculation results in a mismatch betweeen IDL and Python results.
-            helicity[KK, k, k1] = (1 /
-                                   (np.sqrt(np.real(lambday[KK, k, k1, 0])**2 +
-                                    np.real(lambday[KK, k, k1, 1])**2 +
-                                    np.real(lambday[KK, k, k1, 2])**2) /
-                                    np.sqrt(np.sum(lay2))))
-            uppere = (np.imag(lambday[KK, k, k1, 0]) *
-                      np.real(lambday[KK, k, k1, 0]) +
-                      np.imag(lambday[KK, k, k1, 1]) *
-                      np.real(lambday[KK, k, k1, 1]))
-            lowere = (-np.imag(lambday[KK, k, k1, 0])**2 +
-                      np.real(lambday[KK, k, k1, 0])**2 -
-                      np.imag(lambday[KK, k, k1, 1])**2 +
-                      np.real(lambday[KK, k, k1, 1])**2)
-            gammarot = np.nan
-            if np.isfinite(uppere) and np.isfinite(lowere):
-                if uppere > 0.0:
-                    gammarot = atan2c(uppere, lowere)
-                else:
-                    gammarot = 2*np.pi + atan2c(uppere, lowere)
-
-            lam = lambday[KK, k, k1, 0:2]
-            lambdaurot[KK, k, :] = np.exp(0 - 1j*0.5*gammarot) * lam[:]
-
-            ellip[KK, k, k1] = (np.sqrt(np.imag(lambdaurot[KK, k, 0])**2 +
-                                        np.imag(lambdaurot[KK, k, 1])**2) /
-                                np.sqrt(np.real(lambdaurot[KK, k, 0])**2 +
-                                        np.real(lambdaurot[KK, k, 1])**2))
-            ellip[KK, k, k1] = (-ellip[KK, k, k1] *
-                                (np.imag(ematspec[KK, k, 0, 1]) *
-                                 np.sin(waveangle[KK, k])) /
-                                np.abs(np.imag(ematspec[KK, k, 0, 1]) *
-                                       np.sin(waveangle[KK, k])))
+    ematspec[:, half:matspec.shape[1]-half] = np.sum(aa[0:nbins] * windows, axis=-1)
+    return ematspec
+
+
+def wpol_helicity(ematspec, waveangle):
+    """Calculate helicity, ellipticity.
+
+    ematspec and waveangle have the dimensions [step, frequency, 3, 3] and
+    [step, frequency]; the three components are computed at once.
+    """
+    # the columns of the off-diagonal elements in each row of the spectral matrix
+    rows = np.array([[0, 0], [1, 1], [2, 2]])
+    cols = np.array([[1, 2], [0, 2], [0, 1]])
+
+    diag = np.sqrt(np.diagonal(ematspec, axis1=-2, axis2=-1))[..., np.newaxis]
+    offdiag = ematspec[..., rows, cols]
+    alphacos = np.real(np.real(offdiag) / diag)
+    alphasin = np.real(-np.imag(offdiag) / diag)
+
+    lambdau = np.empty(ematspec.shape, dtype=complex)
+    lambdau[..., 0] = np.real(diag[..., 0])
+    lambdau[..., 1:] = alphacos + 1j * alphasin
+
+    upper = nansum(2*np.real(lambdau) * np.imag(lambdau), axis=-1)
+    la2 = np.imag(lambdau)**2
+    lower = nansum(np.real(lambdau)**2 - la2, axis=-1)
+    gammay = np.arctan2(upper, lower)
+    gammay = np.where(upper > 0.0, gammay, 2*np.pi + gammay)
+    gammay[~(np.isfinite(upper) & np.isfinite(lower))] = np.nan
+    lambday = np.exp((0.0 - 1j*0.5*gammay))[..., np.newaxis] * lambdau
+
+    lay2 = np.imag(lambday)**2
+    # Using nansum() rather than sum() in the helicity calculation results in a mismatch betweeen IDL and Python results.
+    helicity = (1 /
+                (np.sqrt(np.real(lambday[..., 0])**2 +
+                         np.real(lambday[..., 1])**2 +
+                         np.real(lambday[..., 2])**2) /
+                 np.sqrt(np.sum(lay2, axis=-1))))
+    uppere = (np.imag(lambday[..., 0]) * np.real(lambday[..., 0]) +
+              np.imag(lambday[..., 1]) * np.real(lambday[..., 1]))
+    lowere = (-np.imag(lambday[..., 0])**2 +
+              np.real(lambday[..., 0])**2 -
+              np.imag(lambday[..., 1])**2 +
+              np.real(lambday[..., 1])**2)
+    gammarot = np.arctan2(uppere, lowere)
+    gammarot = np.where(uppere > 0.0, gammarot, 2*np.pi + gammarot)
+    gammarot[~(np.isfinite(uppere) & np.isfinite(lowere))] = np.nan
+
+    lambdaurot = np.exp(0 - 1j*0.5*gammarot)[..., np.newaxis] * lambday[..., 0:2]
+
+    ellip = (np.sqrt(np.imag(lambdaurot[..., 0])**2 +
+                     np.imag(lambdaurot[..., 1])**2) /
+             np.sqrt(np.real(lambdaurot[..., 0])**2 +
+                     np.real(lambdaurot[..., 1])**2))
+    handedness = (np.imag(ematspec[..., 0, 1]) * np.sin(waveangle))[..., np.newaxis]
+    ellip = -ellip * handedness / np.abs(handedness)
 
     # Average over helicity and ellipticity results.
-    elliptict0 = (ellip[KK, :, 0]+ellip[KK, :, 1]+ellip[KK, :, 2])/3
-    helict0 = (helicity[KK, :, 0]+helicity[KK, :, 1]+helicity[KK, :, 2])/3
+    elliptict = (ellip[..., 0]+ellip[..., 1]+ellip[..., 2])/3
+    helict = (helicity[..., 0]+helicity[..., 1]+helicity[..., 2])/3
+
+    return (helict, elliptict)
+
+
+def wpol_spectra(bx, by, bz, windows, nopfft, aa, nosmbins):
+    """Calculate the polarisation results for a set of FFT windows.
 
-    return (helict0, elliptict0)
+    windows contains the indices of the points in each window, [window, nopfft];
+    the results are returned as a dictionary of arrays with the windows
+    as the first dimension.
+    """
+    nofreq = int(nopfft/2)
+
+    # FFT Calculation.
+    smooth = 0.08 + 0.46 * (1 - np.cos(2 * np.pi * np.arange(nopfft) / nopfft))
+    halfspec = np.empty((len(windows), nofreq, 3), dtype=complex)
+    for component, b in enumerate([bx, by, bz]):
+        temp = smooth * b[windows]
+
+        # mask out the NaNs
+        bad = ~np.isfinite(temp)
+        if bad.any():
+            temp_i = np.arange(nopfft)
+            for row in np.flatnonzero(bad.any(axis=1)):
+                good = ~bad[row]
+                temp[row] = np.interp(temp_i, temp_i[good], temp[row, good])
+
+        # forward normalization requires numpy >= 1.20.0
+        halfspec[:, :, component] = np.fft.fft(temp, norm='forward', axis=1)[:, 0:nofreq]
+
+    # Calculation of the spectral matrix; element [k1, k2] is spec_k2 * conj(spec_k1).
+    matspec = halfspec[:, :, np.newaxis, :] * np.conjugate(halfspec[:, :, :, np.newaxis])
+
+    # Calculation of smoothed spectral matrix.
+    ematspec = wpol_ematspec(matspec, aa, nosmbins)
+    del matspec
+
+    # Calculation of the minimum variance direction
+    # and wavenormal angle.
+    aaa2 = np.sqrt(np.imag(ematspec[:, :, 0, 1])**2 +
+                   np.imag(ematspec[:, :, 0, 2])**2 +
+                   np.imag(ematspec[:, :, 1, 2])**2)
+    wnx = np.abs(np.imag(ematspec[:, :, 1, 2]) / aaa2)
+    wny = -np.abs(np.imag(ematspec[:, :, 0, 2]) / aaa2)
+    wnz = (np.imag(ematspec[:, :, 0, 1]) / aaa2)
+    waveangle = np.arctan2(np.sqrt(wnx**2 + wny**2), np.abs(wnz))
+
+    # Calculation of the degree of polarization.
+    # Calculation of square of smoothed spec matrix.
+    matsqrd = ematspec @ ematspec
+
+    trmatsqrd = np.real(matsqrd[:, :, 0, 0] + matsqrd[:, :, 1, 1] + matsqrd[:, :, 2, 2])
+    trmatspec = np.real(ematspec[:, :, 0, 0] + ematspec[:, :, 1, 1] + ematspec[:, :, 2, 2])
+    id1 = int((nosmbins-1)/2)
+    id2 = int((nopfft/2-1)-(nosmbins-1)/2) + 1
+    degpol = np.full(trmatspec.shape, empty_initializer)
+    degpol[:, id1:id2] = ((3 * trmatsqrd[:, id1:id2] - trmatspec[:, id1:id2]**2) /
+                          (2 * trmatspec[:, id1:id2]**2))
+
+    # Calculation of helicity, ellipticity
+    # and the wave state vector
+    helict, elliptict = wpol_helicity(ematspec, waveangle)
+
+    # Scaling power results to units with meaning;
+    # binwidth is applied by the caller
+    W = np.sum(smooth**2) / np.real(nopfft)
+    scale = np.full(nofreq, 1./W*2)
+    scale[0] = 1./W
+    scale[nofreq-1] = 1./W
+    rmatspec = np.real(np.diagonal(ematspec, axis1=-2, axis2=-1))
+
+    return {'powspec': scale * trmatspec,
+            'degpol': degpol,
+            'waveangle': waveangle,
+            'elliptict': elliptict,
+            'helict': helict,
+            'pspec3': scale[:, np.newaxis] * rmatspec}
 
 
 def wavpol(ct, bx, by, bz,
            nopfft=256,
            steplength=-1,
-           bin_freq=3):
+           bin_freq=3,
+           chunk_size=2**18):
     """
     Perform polarisation analysis of Bx, By, Bz time series data.
 
+    The FFT windows are processed in chunks of up to chunk_size points
+    (the number of windows in a chunk times nopfft), which limits the
+    memory used for the spectral matrices.
+
     Parameters
     ----------
     ct : list of float
@@ -266,6 +269,9 @@ def wavpol(ct, bx, by, bz,
         The default is -1 which means nopfft/2.
     bin_freq : int, optional
         Number of bins in frequency domain. The default is 3.
+    chunk_size : int, optional
+        Maximum number of data points in the FFT windows processed at once.
+        The default is 2**18.
 
     Returns
     -------
@@ -320,7 +326,7 @@ def wavpol(ct, bx, by, bz,
     # Define variables.
     nopoints = len(bx)
     iano = np.zeros(nopoints, dtype=int)
-    dt = [ct[i+1]-ct[i] for i in range(len(ct)-1)]  # time difference
+    dt = np.diff(ct)  # time difference
     beginsampfreq = 1./(ct[1]-ct[0])
     endsampfreq = 1./(ct[nopoints-1]-ct[nopoints-2])
 
@@ -333,27 +339,19 @@ def wavpol(ct, bx, by, bz,
     samp_per = 1./samp_freq
 
     # Time reversal detection.
-    for i in range(len(dt)-1):
-        if dt[i] < 0:
-            iano[i] = 16
+    iano[0:len(dt)-1][dt[0:len(dt)-1] < 0] = 16
 
     # The accuracy of the sampling frequency should be about 1%
     accuracy = 0.01
 
     # Find discontinuities.
     discont_trigger = accuracy*samp_per
-    for i in range(nopoints-1):
-        if abs(dt[i]-1./samp_freq) > discont_trigger:
-            iano[i] = 17
+    iano[0:nopoints-1][np.abs(dt-1./samp_freq) > discont_trigger] = 17
     iano[nopoints-1] = 22
 
     # Count batches, should be less than 80,000
-    n_batches = 0
-    errs = []
-    for i in range(nopoints):
-        if iano[i] >= 15:
-            n_batches += 1
-            errs.append(i)
+    errs = np.flatnonzero(iano >= 15)
+    n_batches = len(errs)
 
     # If there are too many batches, return.
     if n_batches > 80000.0:
@@ -366,14 +364,9 @@ def wavpol(ct, bx, by, bz,
 
     nbp_fft_batches = [0] * n_batches
     # Total numbers of FFT calculations including 1 leap frog for each batch
-    ind_batch0 = 0
-    nosteps = 0
     logging.info('n_batches: ' + str(n_batches))
 
-    for i in range(n_batches):
-        nosteps = int(nosteps + np.floor((errs[i] - ind_batch0)/steplength))
-        ind_batch0 = errs[i]
-
+    nosteps = int(np.sum(np.floor(np.diff(errs, prepend=0)/steplength)))
     nosteps = nosteps + n_batches
     logging.info('Total number of steps:' + str(nosteps))
 
@@ -393,28 +386,7 @@ def wavpol(ct, bx, by, bz,
 
     ind0 = 0
     KK = 0
-
-    # Create empty arrays
-    specx = np.full((nosteps, nopfft), empty_initializer, dtype=complex)
-    specy = np.full((nosteps, nopfft), empty_initializer,  dtype=complex)
-    specz = np.full((nosteps, nopfft), empty_initializer,  dtype=complex)
-    halfspecx = np.full((nosteps, int(nopfft/2)), empty_initializer,  dtype=complex)
-    halfspecy = np.full((nosteps, int(nopfft/2)), empty_initializer,  dtype=complex)
-    halfspecz = np.full((nosteps, int(nopfft/2)), empty_initializer,  dtype=complex)
-    matspec = np.full((nosteps, int(nopfft/2), 3, 3), empty_initializer,  dtype=complex)
-    ematspec = np.full((nosteps, int(nopfft/2), 3, 3), empty_initializer,  dtype=complex)
-    aaa2 = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    wnx = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    wny = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    wnz = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    waveangle = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    matsqrd = np.full((nosteps, int(nopfft/2), 3, 3), empty_initializer, dtype=complex)
-    trmatsqrd = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    trmatspec = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    degpol = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    xrmatspec = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    yrmatspec = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    zrmatspec = np.full((nosteps, int(nopfft/2)), empty_initializer)
+    binwidth = samp_freq / nopfft
 
     # Return arrays.
     timeline = np.full((nosteps), empty_initializer)
@@ -422,184 +394,35 @@ def wavpol(ct, bx, by, bz,
     helict = np.full((nosteps, int(nopfft/2)), empty_initializer)
     elliptict = np.full((nosteps, int(nopfft/2)), empty_initializer)
     powspec = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    pspecx = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    pspecy = np.full((nosteps, int(nopfft/2)), empty_initializer)
-    pspecz = np.full((nosteps, int(nopfft/2)), empty_initializer)
+    degpol = np.full((nosteps, int(nopfft/2)), empty_initializer)
+    waveangle = np.full((nosteps, int(nopfft/2)), empty_initializer)
     pspec3 = np.full((nosteps, int(nopfft/2), 3), empty_initializer)
 
+    # Find the FFT windows of each batch: the output step, and the first point and
+    # length of the batch; the windows are moved along the batch by steplength,
+    # and wrap around to the start of the batch at the end.
+    fft_steps = []
+    fft_starts = []
+    fft_lengths = []
+    fft_offsets = []
     for batch in range(n_batches):
         ind1 = errs[batch]+1
-        # nbp_batch = ind1-ind0+1
         ind1_ref = ind1
         KK_batch_start = KK
 
-        xs = np.array(bx[ind0:ind1])
-        ys = np.array(by[ind0:ind1])
-        zs = np.array(bz[ind0:ind1])
-
-        ngood = np.count_nonzero(~np.isnan(xs))  # Count finite data.
+        ngood = np.count_nonzero(~np.isnan(bx[ind0:ind1]))  # Count finite data.
         if ngood > nopfft:
             nbp_fft_batches[batch] = np.floor(ngood/steplength)
             logging.info('Total number of possible FFT in the batch no ' + str(batch) + ' is:' + str(nbp_fft_batches[batch]))
-            ind0_fft = 0
-            for j in range(int(nbp_fft_batches[batch])):
-                # ind1_fft = nopfft * (j+1)-1
-                # ind1_ref_fft = ind1_fft
-
-                # FFT Calculation.
-                smooth = 0.08 + 0.46 * (1 - np.cos(2 * np.pi *
-                                                   np.arange(nopfft) / nopfft))
-                tempx = smooth * xs[0:nopfft]
-                tempy = smooth * ys[0:nopfft]
-                tempz = smooth * zs[0:nopfft]
-
-                # previous version (prior to 15Dec2021)
-                # specx[KK, :] = np.fft.fft(tempx, norm='forward')
-                # specy[KK, :] = np.fft.fft(tempy, norm='forward')
-                # specz[KK, :] = np.fft.fft(tempz, norm='forward')
-
-                # mask out the NaNs
-                temp_i = np.arange(len(tempx))
-                tempx_mask = np.isfinite(tempx)
-                tempx_filtered = np.interp(temp_i, temp_i[tempx_mask], tempx[tempx_mask])
-                tempy_mask = np.isfinite(tempy)
-                tempy_filtered = np.interp(temp_i, temp_i[tempy_mask], tempy[tempy_mask])
-                tempz_mask = np.isfinite(tempz)
-                tempz_filtered = np.interp(temp_i, temp_i[tempz_mask], tempz[tempz_mask])
-
-                # back to forward option, 23June2022, after applying mask for NaNs above
-                # forward seems to be the only option that works now after the NaN mask
-                # is applied; this requires numpy >= 1.20.0
-                specx[KK, :] = np.fft.fft(tempx_filtered, norm='forward')
-                specy[KK, :] = np.fft.fft(tempy_filtered, norm='forward')
-                specz[KK, :] = np.fft.fft(tempz_filtered, norm='forward')
-
-                halfspecx[KK, :] = specx[KK, 0:int(nopfft/2)]
-                halfspecy[KK, :] = specy[KK, 0:int(nopfft/2)]
-                halfspecz[KK, :] = specz[KK, 0:int(nopfft/2)]
-                xs = np.roll(xs, -int(steplength))
-                ys = np.roll(ys, -int(steplength))
-                zs = np.roll(zs, -int(steplength))
-
-                # Calculation of the spectral matrix.
-                matspec[KK, :, 0, 0] = (halfspecx[KK, :] *
-                                        np.conjugate(halfspecx[KK, :]))
-                matspec[KK, :, 1, 0] = (halfspecx[KK, :] *
-                                        np.conjugate(halfspecy[KK, :]))
-                matspec[KK, :, 2, 0] = (halfspecx[KK, :] *
-                                        np.conjugate(halfspecz[KK, :]))
-                matspec[KK, :, 0, 1] = (halfspecy[KK, :] *
-                                        np.conjugate(halfspecx[KK, :]))
-                matspec[KK, :, 1, 1] = (halfspecy[KK, :] *
-                                        np.conjugate(halfspecy[KK, :]))
-                matspec[KK, :, 2, 1] = (halfspecy[KK, :] *
-                                        np.conjugate(halfspecz[KK, :]))
-                matspec[KK, :, 0, 2] = (halfspecz[KK, :] *
-                                        np.conjugate(halfspecx[KK, :]))
-                matspec[KK, :, 1, 2] = (halfspecz[KK, :] *
-                                        np.conjugate(halfspecy[KK, :]))
-                matspec[KK, :, 2, 2] = (halfspecz[KK, :] *
-                                        np.conjugate(halfspecz[KK, :]))
-
-                # Calculation of smoothed spectral matrix.
-                for k in range(int((nosmbins-1)/2),
-                               int((nopfft/2-1)-(nosmbins-1)/2)+1):
-                    for k2 in range(0, 3):
-                        for k1 in range(0, 3):
-                            ematspec[KK, k, k1, k2] = wpol_ematspec(KK, k, k1,
-                                                                    k2, aa,
-                                                                    nosmbins,
-                                                                    matspec)
-
-                # Calculation of the minimum variance direction
-                # and wavenormal angle.
-                aaa2[KK, :] = np.sqrt(np.imag(ematspec[KK, :, 0, 1])**2 +
-                                      np.imag(ematspec[KK, :, 0, 2])**2 +
-                                      np.imag(ematspec[KK, :, 1, 2])**2)
-                # Avoid warnings due to NaN values.
-                np.seterr(divide='ignore', invalid='ignore')
-                wnx[KK, :] = np.abs(np.imag(ematspec[KK, :, 1, 2]) /
-                                    aaa2[KK, :])
-                wny[KK, :] = -np.abs(np.imag(ematspec[KK, :, 0, 2]) /
-                                     aaa2[KK, :])
-                wnz[KK, :] = (np.imag(ematspec[KK, :, 0, 1]) / aaa2[KK, :])
-                waveangle[KK, :] = np.arctan2(np.sqrt(wnx[KK, :]**2 +
-                                                      wny[KK, :]**2),
-                                              np.abs(wnz[KK, :]))
-
-                # Calculation of the degree of polarization.
-                # Calculation of square of smoothed spec matrix.
-                # for k1 in range(3):
-                #    for k2 in range(3):
-                #        matsqrd[KK, :, k1, k2] = wpol_matsqrd(KK, k1, k2,
-                #                                              ematspec)
-
-                # A user suggested using the @ operator (shorthand for np.matmul()) to square the ematspec array,
-                # since it already deals with any leading dimensions.  (Note that only the KKth and lower slices are
-                # initialized at this point.) -- JWL 2023-04-20
-
-                matsqrd[KK] = ematspec[KK] @ ematspec[KK]
-
-                trmatsqrd[KK, :] = np.real(matsqrd[KK, :, 0, 0] +
-                                           matsqrd[KK, :, 1, 1] +
-                                           matsqrd[KK, :, 2, 2])
-                trmatspec[KK, :] = np.real(ematspec[KK, :, 0, 0] +
-                                           ematspec[KK, :, 1, 1] +
-                                           ematspec[KK, :, 2, 2])
-                id1 = int((nosmbins-1)/2)
-                id2 = int((nopfft/2-1)-(nosmbins-1)/2) + 1
-                degpol[KK, id1:id2] = ((3 * trmatsqrd[KK, id1:id2] -
-                                        trmatspec[KK, id1:id2]**2) /
-                                       (2 * trmatspec[KK, id1:id2]**2))
-
-                xrmatspec[KK, :] = np.real(ematspec[KK, :, 0, 0])
-                yrmatspec[KK, :] = np.real(ematspec[KK, :, 1, 1])
-                zrmatspec[KK, :] = np.real(ematspec[KK, :, 2, 2])
-
-                # Calculation of helicity, ellipticity
-                # and the wave state vector
-                (helict[KK], elliptict[KK]) = wpol_helicity(nosteps,
-                                                            nopfft,
-                                                            KK,
-                                                            ematspec,
-                                                            waveangle)
-
-                # Scaling power results to units with meaning
-                binwidth = samp_freq / nopfft
-                W = np.sum(smooth**2) / np.real(nopfft)
-                id2 = int(nopfft/2-1)
-                powspec[KK, 1:id2] = 1./W*2*trmatspec[KK, 1:id2]/binwidth
-                powspec[KK, 0] = 1./W * trmatspec[KK, 0]/binwidth
-                powspec[KK, id2] = 1./W*trmatspec[KK, id2]/binwidth
-
-                pspecx[KK, 1:id2] = 1./W*2*xrmatspec[KK, 1:id2]/binwidth
-                pspecx[KK, 0] = 1./W*xrmatspec[KK, 0]/binwidth
-                pspecx[KK, id2] = 1./W*xrmatspec[KK, id2]/binwidth
-
-                pspecy[KK, 1:id2] = 1./W*2*yrmatspec[KK, 1:id2]/binwidth
-                pspecy[KK, 0] = 1./W*yrmatspec[KK, 0]/binwidth
-                pspecy[KK, id2] = 1./W*yrmatspec[KK, id2]/binwidth
-
-                pspecz[KK, 1:id2] = 1./W*2*zrmatspec[KK, 1:id2]/binwidth
-                pspecz[KK, 0] = 1./W*zrmatspec[KK, 0]/binwidth
-                pspecz[KK, id2] = 1./W*zrmatspec[KK, id2]/binwidth
-
-                pspec3[KK, :, 0] = pspecx[KK, :]
-                pspec3[KK, :, 1] = pspecy[KK, :]
-                pspec3[KK, :, 2] = pspecz[KK, :]
-
-                ind0_fft = ind0_fft + steplength
-                KK_batch_stop = KK
-
-                # Print an indication that a computation is happening.
-                if KK == 0 or KK % 40 == 0:
-                    logging.info('wavpol step: ' + str(KK) + ' ')
-
-                KK += 1
-                # End loop "for j"
+            nfft = int(nbp_fft_batches[batch])
+            fft_steps.append(np.arange(KK, KK+nfft))
+            fft_starts.append(np.full(nfft, ind0))
+            fft_lengths.append(np.full(nfft, ind1-ind0))
+            fft_offsets.append(np.arange(nfft)*int(steplength))
+            KK += nfft
 
             ids = KK_batch_start
-            idf = KK_batch_stop+1
+            idf = KK
             ta = np.arange(nbp_fft_batches[batch])
             timeline[ids:idf] = (ct[ind0] +
                                  np.abs(int(nopfft/2))/samp_freq +
@@ -613,7 +436,6 @@ def wavpol(ct, bx, by, bz,
             KK += 1
             # End "if ngood > nopfft"
         else:
-            binwidth = samp_freq/nopfft
             logging.error('Fourier Transform is not possible. ')
             logging.error('Ngood = ' + str(ngood))
             logging.error('Required number of points for FFT = ' + str(nopfft))
@@ -626,6 +448,30 @@ def wavpol(ct, bx, by, bz,
         ind0 = ind1_ref + 1
         # End "for batch in range(n_batches)"
 
+    if len(fft_steps) > 0:
+        fft_steps = np.concatenate(fft_steps)
+        fft_starts = np.concatenate(fft_starts)
+        fft_lengths = np.concatenate(fft_lengths)
+        fft_offsets = np.concatenate(fft_offsets)
+
+    # Calculate the spectra for chunks of windows.
+    chunk_windows = max(1, int(chunk_size/nopfft))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for chunk_start in range(0, len(fft_steps), chunk_windows):
+            chunk = slice(chunk_start, chunk_start+chunk_windows)
+            logging.info('wavpol step: ' + str(chunk_start) + ' ')
+            windows = (fft_starts[chunk, np.newaxis] +
+                       (fft_offsets[chunk, np.newaxis] + np.arange(nopfft)) % fft_lengths[chunk, np.newaxis])
+            spectra = wpol_spectra(bx, by, bz, windows, nopfft, aa, nosmbins)
+
+            steps = fft_steps[chunk]
+            powspec[steps] = spectra['powspec']/binwidth
+            degpol[steps] = spectra['degpol']
+            waveangle[steps] = spectra['waveangle']
+            elliptict[steps] = spectra['elliptict']
+            helict[steps] = spectra['helict']
+            pspec3[steps] = spectra['pspec3']/binwidth
+
     freqline = binwidth*np.arange(int(nopfft/2))
 
     # Make sure there aren't any missing data points at the end of the output.
@@ -633,9 +479,6 @@ def wavpol(ct, bx, by, bz,
     if len(wherezero) > 0:
         timeline[wherezero] = np.nan
         powspec[wherezero, :] = np.nan
-        pspecx[wherezero, :] = np.nan
-        pspecy[wherezero, :] = np.nan
-        pspecz[wherezero, :] = np.nan
         pspec3[wherezero, :, :] = np.nan
         elliptict[wherezero, :] = np.nan
         helict[wherezero, :] = np.nan
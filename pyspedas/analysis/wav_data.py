@@ -10,7 +10,7 @@ from pyspedas.analysis.wavelet2 import wavelet2
 from pyspedas.analysis.reduce_tres import reduce_tres
 from pyspedas.analysis.roundsig import roundsig
 from pyspedas.analysis.interp_gap import interp_gap
-from scipy.ndimage import uniform_filter1d
+from scipy.ndimage import uniform_filter1d, convolve1d
 from pyspedas import get_data, store_data, options, tnames
 
 
@@ -34,76 +34,54 @@ def smooth_wavelet(wv, wid, gaussian=False):
     -----
     This function modifies wv in-place to match IDL behavior.
     It does not return a new array.
+
+    All of the scales (and components) with the same smoothing width are
+    smoothed with a single filter call along the time axis.
     """
     dim = list(wv.shape) + [1, 1]
-    nk = dim[2] if len(dim) > 2 else 1
     nj = dim[1] if len(dim) > 1 else 1
     nt = dim[0]
 
     wid = np.asarray(wid)
 
+    # view of wv with dimensions (nt, nj, nk)
+    if wv.ndim == 1:
+        wv3 = wv[:, np.newaxis, np.newaxis]
+    elif wv.ndim == 2:
+        wv3 = wv[:, :, np.newaxis]
+    else:
+        wv3 = wv
+
     if gaussian:
         # Calculate widi array for Gaussian case
         widi = np.round(wid / 2).astype(int) * 2 + 1
-        # IDL behavior: width <= 1 means no smoothing
-        widi = np.clip(widi, 1, nt - 1)
-
-        for k in range(nk):
-            for j in range(nj):
-                if widi[j] > 1:  # Only smooth if width > 1
-                    # Create Gaussian kernel using dgen equivalent
-                    kernel_size = widi[j]
-                    vx = np.linspace(-2, 2, kernel_size)
-                    kernel = np.exp(-(vx**2))
-                    kernel = kernel / np.sum(kernel)
-
-                    # Apply convolution with edge truncation
-                    signal = (
-                        wv[:, j, k]
-                        if wv.ndim >= 3
-                        else wv[:, j] if wv.ndim >= 2 else wv[:]
-                    )
-                    # Use numpy.convolve with 'same' mode and handle edges
-                    convolved = np.convolve(signal, kernel, mode="same")
-
-                    if wv.ndim >= 3:
-                        wv[:, j, k] = convolved
-                    elif wv.ndim >= 2:
-                        wv[:, j] = convolved
-                    else:
-                        wv[:] = convolved
-                # If widi[j] <= 1, leave the data unchanged (IDL behavior)
-        return
-
-    # Non-Gaussian case: recalculate widi to match IDL behavior
-    widi = np.round(wid).astype(int)
-    # IDL smooth() with width <= 1 returns original data unchanged
-    widi = np.clip(widi, 1, nt - 1)
-
-    for k in range(nk):
-        for j in range(nj):
-            if widi[j] > 1:  # Only smooth if width > 1
-                # Use scipy's uniform_filter1d to match IDL's smooth function
-
-                signal = (
-                    wv[:, j, k] if wv.ndim >= 3 else wv[:, j] if wv.ndim >= 2 else wv[:]
-                )
-
-                # Apply uniform filter with size widi[j], handling NaNs and edge truncation
-                smoothed = uniform_filter1d(
-                    signal.astype(float),
-                    size=min(widi[j], nt - 1),
-                    mode="nearest",  # Equivalent to IDL's /edge_truncate
-                )
-                # smoothed = smooth(signal, width=widi[j], preserve_nans=True)
-
-                if wv.ndim >= 3:
-                    wv[:, j, k] = smoothed
-                elif wv.ndim >= 2:
-                    wv[:, j] = smoothed
-                else:
-                    wv[:] = smoothed
-            # If widi[j] <= 1, leave the data unchanged (IDL behavior)
+    else:
+        # Non-Gaussian case: recalculate widi to match IDL behavior
+        widi = np.round(wid).astype(int)
+    # IDL behavior: width <= 1 means no smoothing
+    widi = np.clip(np.atleast_1d(widi)[:nj], 1, nt - 1)
+
+    # all of the scales with the same width are smoothed at once
+    for width in np.unique(widi[widi > 1]):
+        js = np.flatnonzero(widi == width)
+        signal = wv3[:, js]
+        if gaussian:
+            # Create Gaussian kernel using dgen equivalent
+            vx = np.linspace(-2, 2, width)
+            kernel = np.exp(-(vx**2))
+            kernel = kernel / np.sum(kernel)
+            # Convolution with zeros beyond the edges (numpy.convolve with 'same' mode)
+            smoothed = convolve1d(signal, kernel, axis=0, mode="constant", cval=0.0)
+        else:
+            # Use scipy's uniform_filter1d to match IDL's smooth function
+            smoothed = uniform_filter1d(
+                signal.astype(float),
+                size=width,
+                axis=0,
+                mode="nearest",  # Equivalent to IDL's /edge_truncate
+            )
+        wv3[:, js] = smoothed
+    # If widi[j] <= 1, leave the data unchanged (IDL behavior)
 
 
 def cross_corr_wavelet(wa, wb, wid, gaussian=False):
@@ -221,76 +199,41 @@ def rotate_wavelet2(wv, bfield, xdir=None, wid=None, rotmats=None, get_rotmats=F
     else:
         xdir = np.asarray(xdir)
 
-    # Initialize rotation matrix and output wavelet
-    rot = np.zeros((nt, 3, 3), dtype=np.float32)
-    wvp = np.zeros_like(wv, dtype=wv.dtype)
-
     # Check if using precomputed rotmats
     use_rotmat = (rotmats is not None) and (not get_rotmats)
+    if not use_rotmat and wid is None:
+        raise ValueError("wid must be provided if rotmats are not used.")
 
     # Initialize rotmats for output if requested
     if get_rotmats:
         rotmats_out = np.zeros((nt, dim[1], 3, 3), dtype=np.float32)
 
-    # Main loop over scales (j=0 to jv, inclusive)
-    for j in range(jv + 1):
-        if use_rotmat:
-            # Use precomputed rotation matrices
-            rot = rotmats[:, j, :, :]
-        else:
-            if wid is None:
-                raise ValueError("wid must be provided if rotmats are not used.")
-
-            # Smooth B field components
-            for k in range(3):
-                vwidth = min(int(wid[j]), nt - 1)
-                if vwidth > 1:
-                    # Use uniform_filter1d to match IDL's smooth with /edge_truncate
-                    rot[:, k, 2] = uniform_filter1d(
-                        bfield[:, k].astype(float), size=vwidth, mode="nearest"
-                    )
-                else:
-                    rot[:, k, 2] = bfield[:, k]
-
-            # Normalize z-axis (rot[*,*,2])
-            z_norm = np.sqrt(np.sum(rot[:, :, 2] ** 2, axis=1))
-            # Avoid division by zero
-            z_norm = np.where(z_norm == 0, 1, z_norm)
-            rot[:, :, 2] = rot[:, :, 2] / z_norm[:, np.newaxis]
-
-            # Compute y-axis
-            for ni in range(nt):
-                rot[ni, :, 1] = np.cross(rot[ni, :, 2], xdir)
-
-            # Normalize y-axis
-            y_norm = np.sqrt(np.sum(rot[:, :, 1] ** 2, axis=1))
-            y_norm = np.where(y_norm == 0, 1, y_norm)
-            rot[:, :, 1] = rot[:, :, 1] / y_norm[:, np.newaxis]
-
-            # Compute x-axis
-            for ni in range(nt):
-                rot[ni, :, 0] = np.cross(rot[ni, :, 1], rot[ni, :, 2])
-
-            # Store rotation matrices if requested
-            if get_rotmats:
-                rotmats_out[:, j, :, :] = rot
+    wvp = np.zeros_like(wv, dtype=wv.dtype)
 
-        # Apply rotation to wavelet components
-        wvp[:, j, 2] = (
-            wv[:, j, 0] * rot[:, 0, 2]
-            + wv[:, j, 1] * rot[:, 1, 2]
-            + wv[:, j, 2] * rot[:, 2, 2]
-        )
-        wvp[:, j, 1] = (
-            wv[:, j, 0] * rot[:, 0, 1]
-            + wv[:, j, 1] * rot[:, 1, 1]
-            + wv[:, j, 2] * rot[:, 2, 1]
-        )
-        wvp[:, j, 0] = (
-            wv[:, j, 0] * rot[:, 0, 0]
-            + wv[:, j, 1] * rot[:, 1, 0]
-            + wv[:, j, 2] * rot[:, 2, 0]
-        )
+    if use_rotmat:
+        # Use precomputed rotation matrices
+        rots = [(np.arange(jv + 1), rotmats)]
+    else:
+        # The rotation matrices only depend on the smoothing width,
+        # so they're computed once for all of the scales with the same width
+        vwidths = np.minimum(np.asarray(wid[: jv + 1]).astype(int), nt - 1)
+        rots = []
+        for vwidth in np.unique(vwidths):
+            js = np.flatnonzero(vwidths == vwidth)
+            rot = rotate_wavelet2_rotmat(bfield, xdir, vwidth)
+            if get_rotmats:
+                rotmats_out[:, js, :, :] = rot[:, np.newaxis, :, :]
+            rots.append((js, rot[:, np.newaxis, :, :]))
+
+    # Apply rotation to wavelet components, [time, scale, component]
+    for js, rot in rots:
+        wvj = wv[:, js, :]
+        for i in range(3):
+            wvp[:, js, i] = (
+                wvj[..., 0] * rot[..., 0, i]
+                + wvj[..., 1] * rot[..., 1, i]
+                + wvj[..., 2] * rot[..., 2, i]
+            )
 
     if get_rotmats:
         return wvp, rotmats_out
@@ -298,6 +241,44 @@ def rotate_wavelet2(wv, bfield, xdir=None, wid=None, rotmats=None, get_rotmats=F
         return wvp, None
 
 
+def rotate_wavelet2_rotmat(bfield, xdir, vwidth):
+    """
+    Rotation matrices into the local coordinate frames defined by B (smoothed over vwidth points) and xdir.
+
+    Returns an array of shape (nt, 3, 3); the columns of each matrix are the x, y and z axes.
+    """
+    nt = bfield.shape[0]
+    rot = np.zeros((nt, 3, 3), dtype=np.float32)
+
+    # Smooth B field components
+    if vwidth > 1:
+        # Use uniform_filter1d to match IDL's smooth with /edge_truncate
+        rot[:, :, 2] = uniform_filter1d(
+            bfield.astype(float), size=vwidth, axis=0, mode="nearest"
+        )
+    else:
+        rot[:, :, 2] = bfield
+
+    # Normalize z-axis (rot[*,*,2])
+    z_norm = np.sqrt(np.sum(rot[:, :, 2] ** 2, axis=1))
+    # Avoid division by zero
+    z_norm = np.where(z_norm == 0, 1, z_norm)
+    rot[:, :, 2] = rot[:, :, 2] / z_norm[:, np.newaxis]
+
+    # Compute y-axis
+    rot[:, :, 1] = np.cross(rot[:, :, 2], xdir)
+
+    # Normalize y-axis
+    y_norm = np.sqrt(np.sum(rot[:, :, 1] ** 2, axis=1))
+    y_norm = np.where(y_norm == 0, 1, y_norm)
+    rot[:, :, 1] = rot[:, :, 1] / y_norm[:, np.newaxis]
+
+    # Compute x-axis
+    rot[:, :, 0] = np.cross(rot[:, :, 1], rot[:, :, 2])
+
+    return rot
+
+
 def wav_data_set_options(varname, vdict):
     """Set pyspedas options for wavelet data visualization."""
     for key, value in vdict.items():
@@ -627,8 +608,10 @@ def wav_data(
         if wvmag is not None:
             wvmag = wvmag * np.sqrt(normpow)
     else:
-        for k in range(nk):
-            wave[..., k] *= np.sqrt(normpow)
+        if nk > 1:
+            wave *= np.sqrt(normpow)[..., np.newaxis]
+        else:
+            wave *= np.sqrt(normpow)
         if wvmag is not None:
             wvmag *= np.sqrt(normpow)
 
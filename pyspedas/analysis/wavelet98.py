@@ -206,6 +206,72 @@ def dog(m, scale, k):
     return gauss, period, coi, dofmin, cdelta, psi0
 
 
+# Filter banks of recent transforms, keyed by the mother wavelet, parameter, scales and wavenumbers
+_filter_bank_cache = {}
+_filter_bank_cache_size = 2
+
+
+def wavelet98_filter_bank(mother, param, scale, k):
+    """
+    Mother wavelets in the Fourier domain for a set of scales.
+
+    The filter banks of the most recent transforms are cached, so repeated
+    transforms of time series with the same length, time step and scales
+    (e.g., the components of a vector) reuse them.
+
+    Parameters
+    ----------
+    mother : string {'MORLET', 'PAUL', 'DOG'}
+        Mother wavelet.
+    param : float
+        Parameter for the mother wavelet (-1 for the default).
+    scale : array_like
+        Wavelet scales.
+    k : array_like
+        Array of angular wavenumbers (rad / time unit).
+
+    Returns
+    -------
+    psi_bank : ndarray
+        Wavelets evaluated at the wavenumbers k, with dimensions (len(scale), len(k));
+        this array is shared with the cache, and is read-only.
+    period : ndarray
+        Fourier periods corresponding to the scales.
+    coi : float
+        Cone-of-influence factor.
+    dofmin : int
+        Minimum degrees of freedom for significance testing.
+    cdelta : float
+        Reconstruction factor (-1 if undefined).
+    psi0 : float
+        Time-domain normalization constant of the mother wavelet.
+    """
+    functions = {"MORLET": morlet, "PAUL": paul, "DOG": dog}
+    if mother.upper() not in functions:
+        raise ValueError("Unknown mother wavelet; accepted values: MORLET, PAUL, DOG")
+
+    scale = np.asarray(scale, dtype=np.float64)
+    k = np.asarray(k, dtype=np.float64)
+    key = (mother.upper(), param, scale.tobytes(), k.tobytes())
+    if key in _filter_bank_cache:
+        return _filter_bank_cache[key]
+
+    wavelet = functions[mother.upper()]
+    psi_bank = []
+    period = np.empty(len(scale), dtype=np.float32)
+    for a1 in range(len(scale)):
+        psi_fft, period[a1], coi, dofmin, cdelta, psi0 = wavelet(param, scale[a1], k)
+        psi_bank.append(psi_fft)
+    psi_bank = np.array(psi_bank)
+    psi_bank.flags.writeable = False
+
+    bank = (psi_bank, period, coi, dofmin, cdelta, psi0)
+    _filter_bank_cache[key] = bank
+    while len(_filter_bank_cache) > _filter_bank_cache_size:
+        del _filter_bank_cache[next(iter(_filter_bank_cache))]
+    return bank
+
+
 # Main wavelet transform function (Torrence & Compo 1998 style)
 def wavelet98(
     y1,
@@ -340,7 +406,6 @@ def wavelet98(
     na = int(j_scales + 1)  # Cast na as an integer, this is the number of scales
     scale = np.arange(na) * dj  # array of j values
     scale = (2.0**scale) * s0  # array of scales 2^j, [Eqn (9)]
-    period = np.empty(na, dtype=np.float32)  # uninitialized (empty) float array
     wave = np.empty((n, na), dtype=np.complex64)  # uninitialized (empty) complex array
     daughter = np.empty(
         (n, na), dtype=np.complex64
@@ -362,29 +427,27 @@ def wavelet98(
         fft_theor_k = (1 - lag1**2) / (
             1 - 2 * lag1 * np.cos(k * dt) + lag1**2
         )  # [Eqn(16)]
+
+    # Wavelets for all scales, in the Fourier domain
+    psi_bank, period, coi, dofmin, cdelta, psi0 = wavelet98_filter_bank(
+        mother, param, scale, k
+    )
+    period = period.copy()
+
     fft_theor_out = np.zeros(na)
 
-    # Main loop over all scales
-    for a1 in range(na):
-        if mother.upper() == "MORLET":
-            psi_fft, period1, coi, dofmin, cdelta, psi0 = morlet(param, scale[a1], k)
-        elif mother.upper() == "PAUL":
-            psi_fft, period1, coi, dofmin, cdelta, psi0 = paul(param, scale[a1], k)
-        elif mother.upper() == "DOG":
-            psi_fft, period1, coi, dofmin, cdelta, psi0 = dog(param, scale[a1], k)
-        else:
-            raise ValueError(
-                "Unknown mother wavelet; accepted values: MORLET, PAUL, DOG"
-            )
-        # Inverse FFT to get wavelet transform at this scale
+    # Inverse FFT to get wavelet transform at each scale, in chunks of scales
+    chunk = max(1, 2**22 // n)
+    for a0 in range(0, na, chunk):
+        a1 = min(a0 + chunk, na)
         if do_wave:
-            wave[:, a1] = np.fft.ifft(yfft * psi_fft) * n  # wavelet transform [Eqn (4)]
+            # wavelet transform [Eqn (4)]
+            wave[:, a0:a1] = (np.fft.ifft(yfft * psi_bank[a0:a1], axis=1) * n).T
         if do_daughter:
-            daughter[:, a1] = np.fft.ifft(psi_fft) * n
+            daughter[:, a0:a1] = (np.fft.ifft(psi_bank[a0:a1], axis=1) * n).T
 
-        period[a1] = period1
         # Theoretical spectrum for significance
-        fft_theor_out[a1] = np.sum(np.abs(psi_fft) ** 2 * fft_theor_k) / n
+        fft_theor_out[a0:a1] = np.sum(np.abs(psi_bank[a0:a1]) ** 2 * fft_theor_k, axis=1) / n
 
     #  ; COI [Sec.3g]
     idx = np.concatenate(
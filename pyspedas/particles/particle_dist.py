@@ -0,0 +1,183 @@
+import operator
+from collections.abc import MutableMapping
+from copy import deepcopy
+import numpy as np
+
+# marks keys deleted from a single distribution
+_deleted = object()
+
+
+class ParticleDistArray:
+    """
+    Time series of 3D particle distributions stored as arrays
+
+    The data are stored as a single array with time as the first dimension; the
+    bin geometry (energy, theta, phi, bin widths, etc.) is only stored with a time
+    dimension if it varies with time, otherwise it's stored once, with the smallest
+    shape that broadcasts to the shape of a single distribution (e.g., theta with
+    shape (1, 1, n_theta)). Indexing with an integer returns a ParticleDist, which
+    behaves like the per-sample dictionaries used by the SPEDAS particle routines;
+    indexing with a slice returns a ParticleDistArray containing views of the data.
+
+    Parameters
+    ----------
+        data: np.ndarray
+            Distribution data, [time, energy, phi, theta]
+
+        start_time: np.ndarray
+            Start times of the distributions
+
+        end_time: np.ndarray
+            End times of the distributions
+
+        fields: dict
+            Bin geometry ('bins', 'theta', 'phi', 'energy', 'dtheta', 'dphi', 'denergy'); arrays
+            must broadcast to the shape of a single distribution, or, for fields named in
+            'varying', to the shape of data
+
+        metadata: dict
+            Values shared by all distributions ('project_name', 'units_name', 'mass', 'charge', etc.)
+
+        varying: list of str
+            Names of the fields that have a time dimension
+
+    Examples
+    ----------
+    >>> dists = mms_get_fpi_dist('mms1_dis_dist_brst')
+    >>> dists[0]['theta'].shape
+    (32, 32, 16)
+    >>> subset = dists[10:20]  # no copies of the data are made
+    """
+    __slots__ = ('data', 'start_time', 'end_time', 'fields', 'metadata', 'varying')
+
+    def __init__(self, data, start_time, end_time, fields, metadata, varying=()):
+        self.data = data
+        self.start_time = np.atleast_1d(start_time)
+        self.end_time = np.atleast_1d(end_time)
+        self.fields = fields
+        self.metadata = metadata
+        self.varying = frozenset(varying)
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield ParticleDist(self, index)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice) or isinstance(key, (list, np.ndarray)):
+            fields = {name: value[key] if name in self.varying else value for name, value in self.fields.items()}
+            return ParticleDistArray(self.data[key], self.start_time[key], self.end_time[key], fields,
+                                     self.metadata, self.varying)
+
+        index = operator.index(key)
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('distribution index out of range')
+        return ParticleDist(self, index)
+
+    def __repr__(self):
+        return '<ParticleDistArray: ' + str(len(self)) + ' distributions of shape ' + str(self.data.shape[1:]) + '>'
+
+    def keys(self):
+        """
+        Returns the keys of the individual distributions
+        """
+        return list(self.metadata.keys()) + ['data'] + list(self.fields.keys()) + ['start_time', 'end_time']
+
+    def get_field(self, name):
+        """
+        Returns a field for all of the distributions, [time, energy, phi, theta]
+
+        Time-invariant fields are returned as read-only broadcast views
+        """
+        if name == 'data':
+            return self.data
+        value = self.fields[name]
+        if name not in self.varying:
+            value = value[np.newaxis]
+        return np.broadcast_to(value, self.data.shape)
+
+    def sample(self, name, index):
+        """
+        Returns a field for a single distribution
+        """
+        if name == 'data':
+            return self.data[index]
+        if name == 'start_time':
+            return self.start_time[index]
+        if name == 'end_time':
+            return self.end_time[index]
+        if name in self.fields:
+            value = self.fields[name]
+            if name in self.varying:
+                value = value[index]
+            return np.broadcast_to(value, self.data.shape[1:])
+        return self.metadata[name]
+
+
+class ParticleDist(MutableMapping):
+    """
+    Single 3D particle distribution from a ParticleDistArray
+
+    Behaves like a dictionary with the keys 'data', 'energy', 'theta', 'phi', etc.;
+    the geometry arrays are read-only views of the arrays stored in the
+    ParticleDistArray. Setting a key only changes this distribution; copying
+    the distribution with copy.deepcopy (or pickling it) creates a regular dictionary.
+    """
+    __slots__ = ('_series', '_index', '_fields')
+
+    def __init__(self, series, index, fields=None):
+        self._series = series
+        self._index = index
+        self._fields = {} if fields is None else fields
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            value = self._fields[key]
+            if value is _deleted:
+                raise KeyError(key)
+            return value
+        if key in self._series.metadata or key in self._series.fields or key in ('data', 'start_time', 'end_time'):
+            return self._series.sample(key, self._index)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        self._fields[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._fields[key] = _deleted
+
+    def __iter__(self):
+        for key in self._series.keys():
+            if self._fields.get(key) is not _deleted:
+                yield key
+        for key, value in self._fields.items():
+            if value is not _deleted and key not in self._series.metadata and key not in self._series.fields \
+                    and key not in ('data', 'start_time', 'end_time'):
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return '<ParticleDist: ' + str(self._index) + ' of ' + repr(self._series) + '>'
+
+    def copy(self):
+        """
+        Returns a shallow copy of the distribution (the arrays are not copied)
+        """
+        return ParticleDist(self._series, self._index, dict(self._fields))
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        return {key: deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self):
+        return dict, (dict(self.items()),)
@@ -1,3 +1,4 @@
 from .slice2d import slice2d
+from .slice2d_series import slice2d_series
 from .slice2d_plot import slice2d_plot
-from .slice1d_plot import slice1d_plot
\ No newline at end of file
+from .slice1d_plot import slice1d_plot
@@ -41,7 +41,8 @@ def slice2d(dists,
             vel_data=None,
             sun_data=None,
             slice_x=None,
-            slice_z=None):
+            slice_z=None,
+            cache=None):
     """
     Returns an interpolated 2D slice of 3D particle data for plotting
 
@@ -151,6 +152,11 @@ def slice2d(dists,
         subtract_bulk: bool
             Flag to subtract the bulk velocity vector
 
+        cache: dict
+            Dictionary used to keep the slice geometry (bin coverage for geometric
+            interpolation, triangulation for 2D interpolation) between calls; slices
+            with the same bins and orientation reuse it. See slice2d_series.
+
     Returns
     ---------------------
         Dictionary containing 2D slice of 3D particle data
@@ -309,9 +315,10 @@ def slice2d(dists,
         the_slice = slice2d_geo(data['data'], resolution, data['rad'], data['phi'], data['theta'], data['dr'], data['dp'],
                                 data['dt'], orient_matrix=orientation['matrix'], rotation_matrix=rot_matrix['matrix'],
                                 custom_matrix=custom_rot['matrix'], msg_prefix=msg_prefix, shift=geo_shift,
-                                average_angle=average_angle, sum_angle=sum_angle)
+                                average_angle=average_angle, sum_angle=sum_angle, cache=cache)
     elif interpolation == '2d':
-        the_slice = slice2d_2di(data['data'], rot_matrix['vectors'], resolution, thetarange=thetarange, zdirrange=zdirrange)
+        the_slice = slice2d_2di(data['data'], rot_matrix['vectors'], resolution, thetarange=thetarange, zdirrange=zdirrange,
+                                cache=cache)
 
     if smooth is not None:
         the_slice = slice2d_smooth(the_slice, smooth)
@@ -1,11 +1,17 @@
 import numpy as np
 import scipy.interpolate
 import scipy.spatial
+from pyspedas.particles.spd_slice2d.slice2d_cache import slice2d_cache_key, slice2d_cache_store
 
 
-def slice2d_2di(datapoints, xyz, resolution, thetarange=None, zdirrange=None):
+def slice2d_2di(datapoints, xyz, resolution, thetarange=None, zdirrange=None, cache=None):
     """
     Produces slice by interpolating projected data. Based on spd_slice2d_2di in IDL
+
+    The triangulation only depends on the projected positions of the data points;
+    if a cache dictionary is passed, the triangulation and the interpolation
+    weights on the slice mesh are reused for subsequent slices with the same
+    positions (see slice2d_series).
     """
 
     # cut by theta value
@@ -85,11 +91,26 @@ def slice2d_2di(datapoints, xyz, resolution, thetarange=None, zdirrange=None):
     xrange = [-1*xmax, xmax]
     xgrid = np.linspace(xrange[0], xrange[1], num=resolution)
     ygrid = np.linspace(xrange[0], xrange[1], num=resolution)
-    out = np.zeros((resolution, resolution))
-    grid_interpolator = griddata_tri(datapoints, x, y)
-    for xi, xp in enumerate(xgrid):
-        for yi, yp in enumerate(ygrid):
-            out[xi, yi] = grid_interpolator((xp, yp))
+
+    if cache is None:
+        grid_interpolator = griddata_tri(datapoints, x, y)
+
+        # evaluate the interpolator over the whole mesh at once
+        xmesh, ymesh = np.meshgrid(xgrid, ygrid, indexing='ij')
+        out = grid_interpolator(xmesh, ymesh)
+    else:
+        key = slice2d_cache_key('2di', resolution, x, y)
+        if key in cache:
+            weights = cache[key]
+        else:
+            weights = slice2d_cache_store(cache, key, griddata_tri_weights(x, y, xgrid, ygrid))
+
+        # linear interpolation on the triangles containing each mesh point
+        vertices = weights['vertices']
+        bary = weights['weights']
+        out = bary[..., 0]*datapoints[vertices[..., 0]] + bary[..., 1]*datapoints[vertices[..., 1]] \
+            + bary[..., 2]*datapoints[vertices[..., 2]]
+        out[weights['outside']] = np.nan
 
     return {'data': out, 'xgrid': xgrid, 'ygrid': ygrid}
 
@@ -99,3 +120,26 @@ def griddata_tri(data, x, y):
     points = np.stack(cart_temp).T
     delaunay = scipy.spatial.Delaunay(points)
     return scipy.interpolate.LinearNDInterpolator(delaunay, data)
+
+
+def griddata_tri_weights(x, y, xgrid, ygrid):
+    """
+    Finds the triangle containing each point of the slice mesh and the point's
+    barycentric coordinates, so that data on the same positions can be interpolated
+    with LinearNDInterpolator's results without triangulating again
+    """
+    cart_temp = np.array([x, y])
+    points = np.stack(cart_temp).T
+    delaunay = scipy.spatial.Delaunay(points)
+
+    xmesh, ymesh = np.meshgrid(xgrid, ygrid, indexing='ij')
+    mesh = np.stack([xmesh, ymesh], axis=-1)
+    simplex = delaunay.find_simplex(mesh)
+    outside = simplex == -1
+    simplex[outside] = 0
+
+    transform = delaunay.transform[simplex]
+    b = np.einsum('...jk,...k->...j', transform[..., :2, :], mesh - transform[..., 2, :])
+    bary = np.concatenate([b, 1.0 - np.sum(b, axis=-1, keepdims=True)], axis=-1)
+
+    return {'vertices': delaunay.simplices[simplex], 'weights': bary, 'outside': outside}
@@ -0,0 +1,43 @@
+import hashlib
+import numpy as np
+
+
+def slice2d_cache_key(*args):
+    """
+    Creates a hashable key from the inputs that determine a slice's geometry
+
+    Input
+    ------
+        args: np.ndarray, list, float, str or None
+            Values identifying the geometry (bin coordinates, rotation matrices, keywords, etc.)
+
+    Returns
+    --------
+        String containing a digest of the inputs
+    """
+    digest = hashlib.sha1()
+    for arg in args:
+        if arg is None:
+            digest.update(b'None')
+        elif isinstance(arg, str):
+            digest.update(arg.encode())
+        else:
+            arr = np.ascontiguousarray(arg, dtype=np.float64)
+            digest.update(str(arr.shape).encode())
+            digest.update(arr.tobytes())
+        digest.update(b'|')
+    return digest.hexdigest()
+
+
+def slice2d_cache_store(cache, key, value, max_entries=4):
+    """
+    Stores a value in a slice geometry cache, discarding the oldest
+    entries once the cache holds more than max_entries values.
+
+    A few entries are kept so that instruments that alternate between
+    energy tables (e.g., FPI fast survey) still reuse their geometry.
+    """
+    cache[key] = value
+    while len(cache) > max_entries:
+        del cache[next(iter(cache))]
+    return value
@@ -28,11 +28,7 @@ def slice2d_custom_rotation(custom_rotation=None,
 
     # Transform particle and support vectors
     if vectors is not None:
-        transformed = np.zeros(vectors.shape)
-        num_vectors = vectors.shape[0]
-        for vector_idx in range(num_vectors):
-            transformed[vector_idx] = matrix.T @ vectors[vector_idx, :]
-        vectors = transformed
+        vectors = vectors @ matrix
     if vbulk is not None:
         vbulk = matrix @ vbulk
     if bfield is not None:
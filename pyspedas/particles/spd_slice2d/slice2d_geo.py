@@ -3,27 +3,83 @@ from copy import deepcopy
 from time import time
 import numpy as np
 from pyspedas.particles.spd_slice2d.quaternions import qtom, qcompose
+from pyspedas.particles.spd_slice2d.slice2d_cache import slice2d_cache_key, slice2d_cache_store
 
 
 def slice2d_geo(data, resolution, r, phi, theta, dr, dp, dt, orient_matrix=None, rotation_matrix=None,
-                custom_matrix=None, msg_prefix='', shift=None, average_angle=None, sum_angle=None):
+                custom_matrix=None, msg_prefix='', shift=None, average_angle=None, sum_angle=None, cache=None):
     """
     Produces slices showing each bin's boundaries by assigning
     each bin's value to all points on the slice plane that
     fall within that bin's boundaries.
+
+    The region covered by each bin only depends on the bin geometry and the
+    slice orientation; if a cache dictionary is passed, it is reused for
+    subsequent slices with the same geometry (see slice2d_series).
+    """
+    n_int = int(resolution)
+
+    geometry = slice2d_geo_geometry(resolution, r, phi, theta, dr, dp, dt, orient_matrix=orient_matrix,
+                                    rotation_matrix=rotation_matrix, custom_matrix=custom_matrix,
+                                    msg_prefix=msg_prefix, average_angle=average_angle, sum_angle=sum_angle,
+                                    cache=cache)
+
+    out = np.zeros(n_int**2)
+    weight = np.zeros(n_int**2)
+
+    # accumulate the bins onto each slice plane; bins with no data never contribute to the slice
+    for pair_bin, pair_pt in geometry['coverage']:
+        valid = data[pair_bin] != 0
+        pair_bin = pair_bin[valid]
+        pair_pt = pair_pt[valid]
+        weight += np.bincount(pair_pt, minlength=n_int**2)
+        out += np.bincount(pair_pt, weights=data[pair_bin], minlength=n_int**2)
+
+    # average areas where bins overlapped
+    adj = np.argwhere(weight == 0)
+    if len(adj) > 0:
+        weight[adj] = 1
+
+    if sum_angle is None:
+        out = out / weight
+
+    out = out.reshape((n_int, n_int), order='F')
+
+    xgrid = geometry['xgrid'].copy()
+    ygrid = geometry['ygrid'].copy()
+
+    if shift is not None:
+        xgrid -= shift[0]
+        ygrid -= shift[1]
+
+    return {'data': out, 'xgrid': xgrid, 'ygrid': ygrid}
+
+
+def slice2d_geo_geometry(resolution, r, phi, theta, dr, dp, dt, orient_matrix=None, rotation_matrix=None,
+                         custom_matrix=None, msg_prefix='', average_angle=None, sum_angle=None, cache=None):
+    """
+    Determines which points on the slice plane(s) are covered by each bin.
+
+    Returns
+    --------
+        Dictionary containing the slice's x and y grids and, for each slice plane,
+        a tuple of (bin index, point index) arrays listing the points covered by each bin
     """
+    if cache is not None:
+        key = slice2d_cache_key('geo', resolution, r, phi, theta, dr, dp, dt, orient_matrix, rotation_matrix,
+                                custom_matrix, average_angle, sum_angle)
+        if key in cache:
+            return cache[key]
+
     n = float(resolution)
     n_int = int(n)
     rd = 180/np.pi
     tolerance = 5e-7 # to account for rounding errors
-    # for progress messages
-    previous_time = time()
 
     vrange = [-np.max(np.abs(r)), np.max(np.abs(r))]
     dr_range = [-np.max(dr), np.max(np.abs(dr))]
     xgrid = np.linspace(vrange[0]+dr_range[0], vrange[1]+dr_range[1], n_int)
     ygrid = np.linspace(vrange[0]+dr_range[0], vrange[1]+dr_range[1], n_int)
-    z = 0
 
     uvals = np.zeros((n_int**2, 3))
     xvals = np.outer(xgrid, np.ones(n_int)).flatten(order='F')
@@ -70,103 +126,184 @@ def slice2d_geo(data, resolution, r, phi, theta, dr, dp, dt, orient_matrix=None,
     else:
         na = 0
 
-    num_points = len(data)
-    out = np.zeros(n_int**2)
-    weight = np.zeros(n_int**2)
+    # Bin boundaries are the same for every slice plane, so compute them for all bins at once
+
+    # theta
+    tlim = np.array([theta-0.5*dt, theta+0.5*dt])
+
+    # account for rounding errors
+    # this is particularly important is slice plane is at zero elevation
+    tlim = np.where(np.abs(tlim - np.round(tlim)) < tolerance, np.round(tlim), tlim)
+
+    # phi
+    plim = np.array([phi-0.5*dp, phi+0.5*dp])
+
+    # keep limits within [-180, 180]
+    plim[plim > 180] += -360.0
+    plim[plim < -180] += 360.0
+
+    # account for rounding errors
+    plim = np.where(np.abs(plim - np.round(plim)) < tolerance, np.round(plim), plim)
+
+    # determine which region ( p0->p1 or p1->p0) each bin spans
+    pwrap = plim[0] > plim[1]
+
+    # R (velocity/energy)
+    rlim = np.array([r-0.5*dr, r+0.5*dr])
+
+    coverage = []
 
     # loop over slice plans (if averaging over angle)
     for j in range(-1, na):
         if j >= 0:
-            ut = np.matmul(ms[j, :, :], deepcopy(uvals).T).T
+            ut = np.matmul(ms[j, :, :], uvals.T).T
         else:
-            ut = deepcopy(uvals)
+            ut = uvals
 
         # Convert transformed slice coordinates to spherical
         pcoords = rd*np.arctan2(ut[:, 1], ut[:, 0])  # phi
         tcoords = rd*np.arctan2(ut[:, 2], np.sqrt(ut[:, 0]**2 + ut[:, 1]**2))  # theta
         rcoords = np.sqrt(ut[:, 0]**2 + ut[:, 1]**2 + ut[:, 2]**2)  # r
 
-        # Loop over bins to determine what region each bin covers on the slice plane
-        for i in range(0, num_points):
-            if data[i] == 0:
-                continue
-
-            # theta
-            tlim = np.array([theta[i]-0.5*dt[i], theta[i]+0.5*dt[i]])
-
-            # account for rounding errors
-            # this is particularly important is slice plane is at zero elevation
-            tr = np.argwhere(np.abs(tlim - np.round(tlim)) < tolerance).flatten()
-            if len(tr) > 0:
-               tlim[tr] = np.round(tlim[tr])
-
-            thetas =(tcoords > tlim[0]) & (tcoords <= tlim[1])
-
-            if len(thetas) == 0:
-                continue
-
-            if np.sum(thetas) < 1:
-                continue
-            
-            # phi
-            plim = np.array([phi[i]-0.5*dp[i], phi[i]+0.5*dp[i]])
-
-            # keep limits within [-180, 180]
-            over = np.argwhere(plim > 180).flatten()
-            under = np.argwhere(plim < -180).flatten()
-            if len(over) > 0:
-                plim[over] += -360.0
-            if len(under) > 0:
-                plim[under] += 360.0
-            
-            # account for rounding errors
-            pr = np.argwhere(np.abs(plim - np.round(plim)) < tolerance).flatten()
-            if len(pr) > 0:
-               plim[pr] = np.round(plim[pr])
-            
-            # determine which region ( p0->p1 or p1->p0) the bin spans
-            if plim[0] > plim[1]:
-                phis = (pcoords > plim[0]) | (pcoords <= plim[1])
-            else:
-                phis = (pcoords > plim[0]) & (pcoords <= plim[1])
-            
-            if len(phis) == 0:
-                continue
-
-            if np.sum(phis) < 1:
-                continue
-
-            # R (velocity/energy)
-            rdata = (rcoords >= r[i]-0.5*dr[i]) & (rcoords < r[i]+0.5*dr[i])
-
-            bidx = np.argwhere(phis & thetas & rdata).flatten()
-
-            if len(bidx) > 1:
-                weight[bidx] = weight[bidx] + 1
-                out[bidx] = out[bidx] + data[i]
-
-            # output progress messages every 6 seconds
-            if (time() - previous_time) > 6:
-                if na == 0:
-                    num_angles = 1
-                else:
-                    num_angles = na
-                msg = msg_prefix + str(int(100*((j+1)*num_points + i)/(num_angles*num_points))) + '% complete'
-                logging.info(msg)
-                previous_time = time()
+        if na == 0:
+            plane_prefix = msg_prefix
+        else:
+            plane_prefix = msg_prefix + 'plane ' + str(j+2) + '/' + str(na+1) + ': '
 
-    # average areas where bins overlapped
-    adj = np.argwhere(weight == 0)
-    if len(adj) > 0:
-        weight[adj] = 1
+        coverage.append(slice2d_geo_rasterize(rlim, tlim, plim, pwrap, rcoords, tcoords, pcoords,
+                                              msg_prefix=plane_prefix))
 
-    if sum_angle is None:
-        out = out / weight
+    geometry = {'xgrid': xgrid, 'ygrid': ygrid, 'coverage': coverage}
 
-    out = out.reshape((n_int, n_int), order='F')
+    if cache is not None:
+        slice2d_cache_store(cache, key, geometry)
 
-    if shift is not None:
-        xgrid -= shift[0]
-        ygrid -= shift[1]
+    return geometry
 
-    return {'data': out, 'xgrid': xgrid, 'ygrid': ygrid}
+
+def slice2d_geo_rasterize(rlim, tlim, plim, pwrap, rcoords, tcoords, pcoords, msg_prefix='', max_pairs=2**22):
+    """
+    Determines the region of the slice plane covered by each bin.
+
+    Rather than testing every point on the plane against every bin, the plane's
+    points are sorted by radius, theta and phi; for each bin, only the points
+    that fall within its limits along whichever of these dimensions contains
+    the fewest points are tested against the remaining limits. The candidate
+    (bin, point) pairs are generated and tested in bulk, in blocks of at most
+    max_pairs pairs to bound memory use.
+
+    Input
+    ------
+        rlim, tlim, plim: np.ndarray
+            Radial, theta and phi limits of each bin (2, nbins)
+
+        pwrap: np.ndarray
+            Flags bins whose phi range wraps around +/-180 degrees (nbins)
+
+        rcoords, tcoords, pcoords: np.ndarray
+            Spherical coordinates of the points on the slice plane (npoints)
+
+    Parameters
+    -----------
+        msg_prefix: str
+            Prefix for progress messages
+
+        max_pairs: int
+            Maximum number of candidate (bin, point) pairs tested at once
+
+    Returns
+    --------
+        Tuple of (bin index, point index) arrays, listing the points covered by
+        each bin; only bins covering more than one point are included
+    """
+    num_points = len(rcoords)
+    num_bins = rlim.shape[1]
+    bin_idx = []
+    pt_idx = []
+
+    if num_bins == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    previous_time = time()
+
+    # candidate points for each bin along the radial dimension
+    # (rlim[0] <= r < rlim[1])
+    r_order = np.argsort(rcoords, kind='stable')
+    r_sorted = rcoords[r_order]
+    r_lo = np.searchsorted(r_sorted, rlim[0], side='left')
+    r_hi = np.searchsorted(r_sorted, rlim[1], side='left')
+
+    # candidate points for each bin along the theta dimension
+    # (tlim[0] < theta <= tlim[1])
+    t_order = np.argsort(tcoords, kind='stable')
+    t_sorted = tcoords[t_order]
+    t_lo = np.searchsorted(t_sorted, tlim[0], side='right')
+    t_hi = np.searchsorted(t_sorted, tlim[1], side='right')
+
+    # candidate points for each bin along the phi dimension
+    # (plim[0] < phi <= plim[1]); bins that wrap around +/-180 span
+    # two ranges of sorted phi, so they are never searched along phi
+    p_order = np.argsort(pcoords, kind='stable')
+    p_sorted = pcoords[p_order]
+    p_lo = np.searchsorted(p_sorted, plim[0], side='right')
+    p_hi = np.searchsorted(p_sorted, plim[1], side='right')
+
+    orders = np.array([r_order, t_order, p_order])
+    los = np.array([r_lo, t_lo, p_lo])
+    lens = np.clip(np.array([r_hi, t_hi, p_hi]) - los, 0, None)
+    lens[2, pwrap] = num_points + 1
+
+    # search each bin along whichever dimension has the fewest candidates
+    axis = np.argmin(lens, axis=0)
+    lo = np.take_along_axis(los, axis[None, :], axis=0)[0]
+    lengths = np.take_along_axis(lens, axis[None, :], axis=0)[0]
+
+    # process the bins in blocks with a bounded number of candidate pairs
+    csum = np.cumsum(lengths)
+    start = 0
+    while start < num_bins:
+        offset = csum[start-1] if start > 0 else 0
+        stop = max(int(np.searchsorted(csum, offset + max_pairs, side='right')), start + 1)
+        bins = np.arange(start, stop)
+        blen = lengths[start:stop]
+        total = int(np.sum(blen))
+        start = stop
+
+        if total == 0:
+            continue
+
+        # expand each bin's range of candidates into (bin, point) pairs
+        pair_bin = np.repeat(bins, blen)
+        pos = np.arange(total) + np.repeat(lo[bins] - (np.cumsum(blen) - blen), blen)
+        pair_pt = orders[axis[pair_bin], pos]
+
+        # test the candidates against all of the bins' limits
+        p = pcoords[pair_pt]
+        t = tcoords[pair_pt]
+        rr = rcoords[pair_pt]
+        in_phi = np.where(pwrap[pair_bin],
+                          (p > plim[0, pair_bin]) | (p <= plim[1, pair_bin]),
+                          (p > plim[0, pair_bin]) & (p <= plim[1, pair_bin]))
+        inside = in_phi & (t > tlim[0, pair_bin]) & (t <= tlim[1, pair_bin]) \
+            & (rr >= rlim[0, pair_bin]) & (rr < rlim[1, pair_bin])
+
+        pair_bin = pair_bin[inside]
+        pair_pt = pair_pt[inside]
+
+        # only bins that cover more than one point contribute
+        bin_count = np.bincount(pair_bin - bins[0], minlength=len(bins))
+        keep = bin_count[pair_bin - bins[0]] > 1
+
+        bin_idx.append(pair_bin[keep])
+        pt_idx.append(pair_pt[keep])
+
+        # output progress messages every 6 seconds
+        if (time() - previous_time) > 6:
+            msg = msg_prefix + str(int(100*stop/num_bins)) + '% complete'
+            logging.info(msg)
+            previous_time = time()
+
+    if len(bin_idx) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    return np.concatenate(bin_idx), np.concatenate(pt_idx)
@@ -0,0 +1,173 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from .slice2d import slice2d
+from .slice2d_intrange import slice2d_intrange
+from .slice2d_nearest import slice2d_nearest
+from .tplot_average import tplot_average
+
+from pyspedas.tplot_tools import get_data, time_double
+
+# geometry cache used by the worker processes when rendering frames in parallel
+_worker_cache = {}
+
+
+def slice2d_series(dists,
+                   times=None,
+                   trange=None,
+                   samples=None,
+                   window=None,
+                   center_time=False,
+                   mag_data=None,
+                   vel_data=None,
+                   sun_data=None,
+                   slice_x=None,
+                   slice_z=None,
+                   custom_rotation=None,
+                   writer=None,
+                   processes=None,
+                   **kwargs):
+    """
+    Returns a series of 2D slices of 3D particle data (e.g., for creating movies)
+
+    This is equivalent to calling slice2d once per frame, but the work that does
+    not depend on the data values is only done once:
+
+        - support data (mag_data, vel_data, sun_data, slice_x, slice_z, custom_rotation)
+          stored in tplot variables is retrieved once and averaged over each frame's window
+        - the slice geometry (bin coverage for geometric interpolation, triangulation
+          for 2D interpolation) is shared by all frames with the same bins and orientation
+
+    Input
+    ---------------------
+        dists: list of dicts
+            List of 3D particle data structures
+
+    Parameters
+    ---------------------
+        times: list of str or list of float
+            Times of the frames; defaults to the center times of all distributions
+            within trange (or all distributions if trange is not set)
+
+        trange: list of str or list of float
+            Two-element time range used to select the frames when times is not set
+
+        samples: int
+            Number of samples nearest to each frame time to average (default 1)
+
+        window: int or float
+            Length in seconds from each frame time over which data will be averaged
+
+        center_time: bool
+            Flag denoting that the frame times should be the midpoint of the window
+
+        mag_data, vel_data, sun_data, slice_x, slice_z, custom_rotation:
+            Support data, see slice2d
+
+        writer: callable
+            Function called as writer(frame_index, frame_slice) as each frame is
+            completed, in order; if not set, the slices are returned as a list
+
+        processes: int
+            Number of worker processes used to compute the frames in parallel
+            (default: compute the frames in this process)
+
+        kwargs:
+            Other keywords are passed to slice2d (interpolation, resolution, rotation, erange, etc.)
+
+    Returns
+    ---------------------
+        List of slices (see slice2d) if writer is not set, otherwise None
+
+    Examples
+    ---------------------
+    >>> from pyspedas.particles.spd_slice2d import slice2d_series, slice2d_plot
+    >>> def save_frame(index, the_slice):
+    ...     slice2d_plot(the_slice, save_png='frame_%04d' % index, display=False)
+    >>> slice2d_series(dists, trange=['2015-10-16/13:06:50', '2015-10-16/13:07:00'], writer=save_frame)
+    """
+
+    if window is None and samples is None:
+        # use single closest distribution by default
+        samples = 1
+
+    centers = np.array([(dist['start_time'] + dist['end_time'])/2.0 for dist in dists])
+
+    if times is None:
+        if trange is None:
+            times = centers
+        else:
+            tr = time_double(trange)
+            times = centers[(centers >= tr[0]) & (centers <= tr[1])]
+    else:
+        times = np.atleast_1d(time_double(times))
+
+    if len(times) == 0:
+        logging.error('No data in the time range')
+        return
+
+    # time ranges of the frames
+    franges = []
+    for time in times:
+        if window is not None:
+            if center_time:
+                franges.append([time - window/2.0, time + window/2.0])
+            else:
+                franges.append([time, time + window])
+        else:
+            franges.append(slice2d_nearest(dists, time, samples))
+
+    # retrieve support data stored in tplot variables once, and average it over each frame
+    support = {'mag_data': mag_data, 'vel_data': vel_data, 'sun_data': sun_data,
+               'slice_x': slice_x, 'slice_z': slice_z, 'custom_rotation': custom_rotation}
+    frame_support = [{} for _ in franges]
+    for keyword, variable in support.items():
+        if isinstance(variable, str):
+            data = get_data(variable, dt=True)
+            if data is None:
+                logging.error('Error reading: ' + variable)
+                return
+            logging.info('Averaging ' + variable)
+            for frame, frange in zip(frame_support, franges):
+                frame[keyword] = tplot_average(variable, frange, quiet=True, data=data)
+        else:
+            for frame in frame_support:
+                frame[keyword] = variable
+
+    # only the distributions within each frame's window are needed
+    frames = []
+    for frange, frame in zip(franges, frame_support):
+        idx = slice2d_intrange(dists, frange)
+        frame_dists = [dists[i] for i in idx] if len(idx) > 0 else dists
+        frames.append((frame_dists, {'trange': frange, **frame, **kwargs}))
+
+    if processes is not None and processes > 1:
+        executor = ProcessPoolExecutor(max_workers=processes)
+        results = executor.map(slice2d_series_frame, frames)
+    else:
+        executor = None
+        cache = {}
+        results = (slice2d(frame_dists, cache=cache, **frame_kwargs) for frame_dists, frame_kwargs in frames)
+
+    out = []
+    try:
+        for index, frame_slice in enumerate(results):
+            if writer is None:
+                out.append(frame_slice)
+            else:
+                writer(index, frame_slice)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if writer is None:
+        return out
+
+
+def slice2d_series_frame(frame):
+    """
+    Computes a single frame of a slice series in a worker process
+    """
+    frame_dists, frame_kwargs = frame
+    return slice2d(frame_dists, cache=_worker_cache, **frame_kwargs)
@@ -3,7 +3,7 @@ import numpy as np
 from pyspedas.tplot_tools import get_data, time_string
 
 
-def tplot_average(tvar, trange, quiet=False):
+def tplot_average(tvar, trange, quiet=False, data=None):
     """
     Returns the average value of a tplot variable over a specified time range.
 
@@ -15,11 +15,21 @@ def tplot_average(tvar, trange, quiet=False):
         trange: list of str or list of float
             Time range to average over
 
+    Parameters
+    ----------
+        quiet: bool
+            Suppress the informational message
+
+        data: namedtuple
+            Data previously returned by get_data(tvar, dt=True); avoids retrieving
+            the variable again when averaging over many time ranges
+
     Returns
     -------
         Average value of the tplot variable
     """
-    data = get_data(tvar, dt=True)
+    if data is None:
+        data = get_data(tvar, dt=True)
 
     if data is None:
         logging.error('Error reading: ' + tvar)
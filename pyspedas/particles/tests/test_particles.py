@@ -1,6 +1,12 @@
 import unittest
 import logging
+from copy import deepcopy
+import numpy as np
 import pyspedas
+from pyspedas.particles.spd_slice2d.slice2d_geo import slice2d_geo
+from pyspedas.particles.spd_slice2d.slice2d_2di import slice2d_2di
+from pyspedas.particles.spd_slice2d import slice2d, slice2d_series
+from pyspedas.particles.particle_dist import ParticleDistArray
 from pyspedas.projects.erg.satellite.erg.particle.erg_lepe_get_dist import erg_lepe_get_dist
 from pyspedas.particles.spd_part_products.spd_pgs_make_theta_spec import spd_pgs_make_theta_spec
 from pyspedas.particles.spd_part_products.spd_pgs_make_phi_spec import spd_pgs_make_phi_spec
@@ -41,8 +47,91 @@ class MyTestCase(unittest.TestCase):
         self.assertTrue(e_vals is not None)
         self.assertTrue(spectra is not None)
 
+    def test_slice2d_geo(self):
+        # two bins in the x-y plane: one in the first quadrant, one in the third
+        data = np.array([2.0, 4.0])
+        r = np.array([1.5, 1.5])
+        phi = np.array([45.0, -135.0])
+        theta = np.array([0.0, 0.0])
+        dr = np.array([1.0, 1.0])
+        dp = np.array([90.0, 90.0])
+        dt = np.array([20.0, 20.0])
+        the_slice = slice2d_geo(data, 101, r, phi, theta, dr, dp, dt, orient_matrix=np.identity(3))
+        x, y = np.meshgrid(the_slice['xgrid'], the_slice['ygrid'], indexing='ij')
+        rad = np.sqrt(x**2 + y**2)
+        shell = (rad > 1.05) & (rad < 1.95)
+        self.assertTrue(np.all(the_slice['data'][shell & (x > 0.05) & (y > 0.05)] == 2.0))
+        self.assertTrue(np.all(the_slice['data'][shell & (x < -0.05) & (y < -0.05)] == 4.0))
+        self.assertTrue(np.all(the_slice['data'][(rad < 0.95) | (rad > 2.05)] == 0.0))
+        self.assertTrue(np.all(the_slice['data'][(x > 0.05) & (y < -0.05)] == 0.0))
 
+    def test_slice2d_2di(self):
+        # a linear function of x and y should be reproduced by the linear interpolation
+        rng = np.random.default_rng(42)
+        xyz = rng.uniform(-1, 1, size=(400, 3))
+        xyz[:, 2] = 0.0
+        xyz = xyz[np.argsort(xyz[:, 0], kind='stable'), :]
+        datapoints = 2.0*xyz[:, 0] + xyz[:, 1]
+        the_slice = slice2d_2di(datapoints, xyz, 21)
+        x, y = np.meshgrid(the_slice['xgrid'], the_slice['ygrid'], indexing='ij')
+        valid = np.isfinite(the_slice['data'])
+        self.assertTrue(np.sum(valid) > 0)
+        self.assertTrue(np.allclose(the_slice['data'][valid], 2.0*x[valid] + y[valid]))
 
+    def test_slice2d_series(self):
+        # synthetic distributions on a static grid; the series should match individual slices
+        rng = np.random.default_rng(0)
+        energy, theta, phi = np.meshgrid(np.logspace(1, 3, 8), np.linspace(-67.5, 67.5, 4),
+                                         np.arange(8)*45.0 + 22.5, indexing='ij')
+        dists = []
+        for i in range(4):
+            dists.append({'project_name': 'test', 'spacecraft': '1', 'data_name': 'synthetic', 'units_name': 'df_cm',
+                          'species': 'i', 'data': rng.random(energy.shape), 'bins': np.ones(energy.shape, dtype=int),
+                          'energy': energy, 'theta': theta, 'phi': phi, 'dtheta': np.full(energy.shape, 45.0),
+                          'dphi': np.full(energy.shape, 45.0), 'mass': 0.0104535,
+                          'start_time': 1.6e9 + i, 'end_time': 1.6e9 + i + 1})
+        for interpolation in ['geometric', '2d']:
+            frames = slice2d_series(dists, interpolation=interpolation, resolution=50)
+            self.assertEqual(len(frames), 4)
+            for i, frame in enumerate(frames):
+                expected = slice2d(dists, time=1.6e9 + i + 0.5, interpolation=interpolation, resolution=50)
+                self.assertTrue(np.allclose(frame['data'], expected['data'], equal_nan=True))
+
+        written = []
+        self.assertIsNone(slice2d_series(dists, resolution=50, writer=lambda index, frame: written.append(index)))
+        self.assertEqual(written, [0, 1, 2, 3])
+
+
+    def test_particle_dist_array(self):
+        # time-invariant geometry is stored once and shared by all of the distributions
+        rng = np.random.default_rng(0)
+        data = rng.random((5, 8, 4, 2))
+        energy = np.logspace(1, 3, 8).reshape([8, 1, 1])
+        phi = (np.arange(4)*90.0 + rng.random((5, 1))).reshape([5, 1, 4, 1])
+        dists = ParticleDistArray(data, 1.6e9 + np.arange(5), 1.6e9 + np.arange(5) + 1,
+                                  {'bins': np.array(1.0), 'energy': energy, 'phi': phi},
+                                  {'species': 'i', 'mass': 0.0104535}, varying=['phi'])
+        self.assertEqual(len(dists), 5)
+        dist = dists[2]
+        self.assertEqual(dist['energy'].shape, (8, 4, 2))
+        self.assertTrue(np.shares_memory(dist['energy'], dists[4]['energy']))
+        self.assertTrue(np.shares_memory(dist['data'], data))
+        self.assertTrue(np.array_equal(dist['phi'][0, :, 0], phi[2, 0, :, 0]))
+        self.assertEqual(dist['start_time'], 1.6e9 + 2)
+        self.assertEqual(dist['species'], 'i')
+        self.assertEqual(dists.get_field('bins').shape, data.shape)
+        # slices are views
+        subset = dists[1:3]
+        self.assertEqual(len(subset), 2)
+        self.assertTrue(np.shares_memory(subset.data, data))
+        self.assertTrue(np.array_equal(subset[1]['phi'], dist['phi']))
+        # distributions behave like dictionaries
+        copied = {**dist}
+        self.assertTrue('denergy' not in copied and 'energy' in copied)
+        dist['orig_energy'] = dist['energy'][:, 0, 0]
+        self.assertTrue('orig_energy' in dist and 'orig_energy' not in dists[2])
+        self.assertTrue(isinstance(deepcopy(dist), dict))
+        self.assertEqual(len([d['end_time'] for d in dists]), 5)
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,7 @@
 import logging
 
+from functools import lru_cache
+
 import numpy as np
 
 from copy import deepcopy
@@ -9,7 +11,7 @@ logging.basicConfig(format='%(asctime)s: %(message)s',
                     datefmt='%d-%b-%y %H:%M:%S', level=logging.INFO)
 
 
-def erg_convert_flux_units(input_dist, units='flux', relativistic=False):
+def erg_convert_flux_units(input_dist, units='flux', relativistic=False, out=None):
     """
     ; The following unit names are acceptable for units:
     ;   'flux' 'eflux' 'df' 'df_cm'
@@ -19,17 +21,100 @@ def erg_convert_flux_units(input_dist, units='flux', relativistic=False):
     ; CAUTION!!!
     ; "relativistic" keyword is valid only for electron currently.
     ; Using it for ions just messes up the conversion.
+    ;
+    ; An optional preallocated array can be passed with the "out" keyword
+    ; to hold the converted data (see erg_convert_flux_units_array).
     """
 
-    output_dist = deepcopy(input_dist)
-
     units_out = units.lower()
-    species_lc = input_dist['species'].lower()
     units_in = input_dist['units_name'].lower()
 
     if units_in == units_out:
         return input_dist
 
+    converted = erg_convert_flux_units_array(input_dist['data'], input_dist['energy'], input_dist['species'],
+                                             units_in, units_out, relativistic=relativistic, out=out)
+
+    if converted is None:
+        return None
+
+    # Unify some unit notations
+    if (units_out == 'df_km') or (units_out == 'psd'):
+        units_out = 'df'
+
+    # the data array is replaced, so there's no need to copy it
+    output_dist = deepcopy({key: value for key, value in input_dist.items() if key != 'data'})
+
+    output_dist['data'] = converted
+
+    output_dist['units_name'] = units_out
+
+    return output_dist
+
+
+def erg_convert_flux_units_array(data, energy, species, units_in, units_out, relativistic=False, out=None):
+    """
+    Converts arrays of ERG particle data between units
+
+    This applies the same conversion as erg_convert_flux_units to a whole stack of
+    distributions at once, e.g., data with shape (ntimes, nenergy, nphi, ntheta);
+    the energy array must be broadcastable to the shape of the data.
+    The output can be written to a preallocated array with the "out" keyword,
+    which can be the input data array to convert the data in place.
+    """
+    units_in = units_in.lower()
+    units_out = units_out.lower()
+
+    if units_in == units_out:
+        if out is None:
+            return data.copy()
+        out[...] = data
+        return out
+
+    factors = erg_flux_conversion_factors(species.lower(), units_in, units_out)
+
+    if factors is None:
+        logging.error('Error, unknown particle species: %s', species)
+        return None
+
+    exp, flux_to_df, cm_to_km = factors
+
+    if relativistic:
+        # Conversion here is based on those adopted by Hilmer+JGR,2000.
+
+        mc2 = 5.10999e-1  # Electron rest energy [MeV]
+        ene = energy  # [eV]
+        MeV_ene = ene * 1e-6  # [MeV]
+        p2c2 = MeV_ene * (MeV_ene + 2.0 * mc2)  # [MeV^2]
+
+        """
+        ;; f [(c/MeV/cm)^3]
+        ;;     = j [#/eV/s/str/cm2] * 1d+3 / p2c2 * 1.66d-10 * 200.3 
+        ;; 1d+3 is to convert input flux values to [#/keV/s/sr/cm2]. 
+        ;; The multiplication of energy [eV] is to be consistent
+        ;; with the conversion below. 
+        """
+        flux_to_df = 1.0e+3 / p2c2 * 1.66e-10 * 200.3 * ene
+
+    """
+    ;; Ensure everything is double prec first for numerical stability
+    ;;  -target field won't be mutated since it's part of a structure
+    """
+
+    scaled = np.multiply(data, energy**exp[0], out=out)
+    scaled = np.multiply(scaled, flux_to_df ** exp[1] * cm_to_km ** exp[2], out=scaled)
+
+    return scaled
+
+
+@lru_cache(maxsize=None)
+def erg_flux_conversion_factors(species, units_in, units_out):
+    """
+    Returns the [energy, flux_to_df, cm_to_km] exponents, the (non-relativistic)
+    flux_to_df factor and the cm_to_km factor for converting ERG particle data
+    from units_in to units_out; returns None for unknown species.
+    """
+
     # Unify some unit notations
 
     if (units_in == 'df_km') or (units_in == 'psd'):
@@ -38,24 +123,26 @@ def erg_convert_flux_units(input_dist, units='flux', relativistic=False):
         units_out = 'df'
 
     # Get the mass of species (unit: proton mass)
-    if species_lc == 'e':
+    if species == 'e':
         A = 1.0/1836.0  # e-
-    elif species_lc == 'hplus':
+    elif species == 'hplus':
         A = 1.0  # H+
-    elif species_lc == 'proton':
+    elif species == 'proton':
         A = 1.0  # H+
-    elif species_lc == 'he2plus':
+    elif species == 'he2plus':
         A = 4.0  # He2+
-    elif species_lc == 'alpha':
+    elif species == 'alpha':
         A = 4.0  # He2+
-    elif species_lc == 'heplus':
+    elif species == 'heplus':
         A = 4.0  # He+
-    elif species_lc == 'oplusplus':
+    elif species == 'oplusplus':
         A = 16.0  # O++
-    elif species_lc == 'oplus':
+    elif species == 'oplus':
         A = 16.0  # O+
-    elif species_lc == 'o2plus':
+    elif species == 'o2plus':
         A = 32.0  # (O2)+
+    else:
+        return None
 
     """
     ;; Scaling factor between df (s^3/km^6) and flux (#/eV/s/str/cm2).
@@ -77,23 +164,6 @@ def erg_convert_flux_units(input_dist, units='flux', relativistic=False):
 
     flux_to_df = A**2.0 * 0.5447 * 1e6
 
-    if relativistic:
-        # Conversion here is based on those adopted by Hilmer+JGR,2000.
-
-        mc2 = 5.10999e-1  # Electron rest energy [MeV]
-        ene = deepcopy(input_dist['energy'])  # [eV]
-        MeV_ene = ene * 1e-6  # [MeV]
-        p2c2 = MeV_ene * (MeV_ene + 2.0 * mc2)  # [MeV^2]
-
-        """
-        ;; f [(c/MeV/cm)^3]
-        ;;     = j [#/eV/s/str/cm2] * 1d+3 / p2c2 * 1.66d-10 * 200.3 
-        ;; 1d+3 is to convert input flux values to [#/keV/s/sr/cm2]. 
-        ;; The multiplication of energy [eV] is to be consistent
-        ;; with the conversion below. 
-        """
-        flux_to_df = 1.0e+3 / p2c2 * 1.66e-10 * 200.3 * ene
-
     # factor between km^6 and cm^6 for df
     cm_to_km = 1e+30
 
@@ -128,14 +198,4 @@ def erg_convert_flux_units(input_dist, units='flux', relativistic=False):
 
     exp = np.array(exp_in) + np.array(exp_out)
 
-    """
-    ;; Ensure everything is double prec first for numerical stability
-    ;;  -target field won't be mutated since it's part of a structure
-    """
-
-    output_dist['data'] = input_dist['data'] * input_dist['energy']**exp[0] * \
-        (flux_to_df ** exp[1] * cm_to_km ** exp[2])
-
-    output_dist['units_name'] = units_out
-
-    return output_dist
+    return tuple(int(e) for e in exp), flux_to_df, cm_to_km
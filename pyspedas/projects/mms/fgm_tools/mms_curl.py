@@ -118,89 +118,70 @@ def mms_curl(fields=None, positions=None, suffix=''):
     timesp3, p3 = mms3_pos
     timesp4, p4 = mms4_pos
 
-    divb = np.zeros([len(timesb1), 5])
-    baryb = np.zeros([len(timesb1), 3])
-    baryb2 = np.zeros([len(timesb1), 3])
-    baryb3 = np.zeros([len(timesb1), 3])
-    baryb4 = np.zeros([len(timesb1), 3])
-
-    jtotal = np.zeros([len(timesb1), 4])
-    btotal = np.zeros([len(timesb1), 1])
-    jparallel = np.zeros([len(timesb1), 1])
-    jperpvec = np.zeros([len(timesb1), 4])
-    alphaparallel = np.zeros([len(timesb1), 1])
-    alpha = np.zeros([len(timesb1), 1])
-
-    # leave as a loop for now because you have to construct and manipulate a matrix for each time step.
-    for i, time in enumerate(timesb1):
-        p12 = p2[i, 0:3]-p1[i, 0:3]
-        p13 = p3[i, 0:3]-p1[i, 0:3]
-        p14 = p4[i, 0:3]-p1[i, 0:3]
+    p1 = p1[:, 0:3]
+    p2 = p2[:, 0:3]
+    p3 = p3[:, 0:3]
+    p4 = p4[:, 0:3]
 
-        k2 = np.cross(p13, p14)*(1/(np.matmul(p12, np.transpose(np.cross(p13, p14)))))
-        k3 = np.cross(p12, p14)*(1/(np.matmul(p13, np.transpose(np.cross(p12, p14)))))
-        k4 = np.cross(p12, p13)*(1/(np.matmul(p14, np.transpose(np.cross(p12, p13)))))
-
-        k1 = 0-k4-k3-k2
+    divb = np.zeros([len(timesb1), 5])
 
-        curlmag = np.cross(k1, b1[i, :])+np.cross(k2, b2[i, :])+np.cross(k3, b3[i, :])+np.cross(k4, b4[i, :])
-        divergence = np.matmul(b1[i, :], k1) + np.matmul(b2[i, :], k2) + np.matmul(b3[i, :], k3) + np.matmul(b4[i, :], k4)
+    # the reciprocal vectors of the tetrahedron, for all of the time steps at once
+    p12 = p2-p1
+    p13 = p3-p1
+    p14 = p4-p1
 
-        gradbx = b1[i, 0]*k1 + b2[i, 0]*k2 + b3[i, 0]*k3 + b4[i, 0]*k4
-        gradby = b1[i, 1]*k1 + b2[i, 1]*k2 + b3[i, 1]*k3 + b4[i, 1]*k4
-        gradbz = b1[i, 2]*k1 + b2[i, 2]*k2 + b3[i, 2]*k3 + b4[i, 2]*k4
+    c34 = np.cross(p13, p14)
+    c24 = np.cross(p12, p14)
+    c23 = np.cross(p12, p13)
+    k2 = c34*(1/np.sum(p12*c34, axis=1))[:, np.newaxis]
+    k3 = c24*(1/np.sum(p13*c24, axis=1))[:, np.newaxis]
+    k4 = c23*(1/np.sum(p14*c23, axis=1))[:, np.newaxis]
 
-        barycentre = (p1[i, 0:3] + p2[i, 0:3] + p3[i, 0:3] + p4[i, 0:3])/4.0
+    k1 = 0-k4-k3-k2
 
-        # and here is the field at the barycentre (calculate 4 ways)
-        baryb[i, 0] = b1[i, 0] + np.sum(gradbx*(barycentre-p1[i, 0:3]))
-        baryb[i, 1] = b1[i, 1] + np.sum(gradby*(barycentre-p1[i, 0:3]))
-        baryb[i, 2] = b1[i, 2] + np.sum(gradbz*(barycentre-p1[i, 0:3]))
+    curlmag = np.cross(k1, b1)+np.cross(k2, b2)+np.cross(k3, b3)+np.cross(k4, b4)
+    divergence = np.sum(b1*k1, axis=1) + np.sum(b2*k2, axis=1) + np.sum(b3*k3, axis=1) + np.sum(b4*k4, axis=1)
 
-        baryb2[i, 0] = b2[i, 0] + np.sum(gradbx*(barycentre-p2[i, 0:3]))
-        baryb2[i, 1] = b2[i, 1] + np.sum(gradby*(barycentre-p2[i, 0:3]))
-        baryb2[i, 2] = b2[i, 2] + np.sum(gradbz*(barycentre-p2[i, 0:3]))
+    # gradb[:, c, :] is the gradient of the c component of B
+    gradb = (b1[:, :, np.newaxis]*k1[:, np.newaxis, :] + b2[:, :, np.newaxis]*k2[:, np.newaxis, :] +
+             b3[:, :, np.newaxis]*k3[:, np.newaxis, :] + b4[:, :, np.newaxis]*k4[:, np.newaxis, :])
 
-        baryb3[i, 0] = b3[i, 0] + np.sum(gradbx*(barycentre-p3[i, 0:3]))
-        baryb3[i, 1] = b3[i, 1] + np.sum(gradby*(barycentre-p3[i, 0:3]))
-        baryb3[i, 2] = b3[i, 2] + np.sum(gradbz*(barycentre-p3[i, 0:3]))
+    barycentre = (p1 + p2 + p3 + p4)/4.0
 
-        baryb4[i, 0] = b4[i, 0] + np.sum(gradbx*(barycentre-p4[i, 0:3]))
-        baryb4[i, 1] = b4[i, 1] + np.sum(gradby*(barycentre-p4[i, 0:3]))
-        baryb4[i, 2] = b4[i, 2] + np.sum(gradbz*(barycentre-p4[i, 0:3]))
+    # and here is the field at the barycentre
+    # (the same field is found from each of the 4 spacecraft, so MMS1 is used)
+    baryb = b1 + np.sum(gradb*(barycentre-p1)[:, np.newaxis, :], axis=2)
 
-        # (these above all agree so this is the magnetic field at the barycentre)
-        divb[i, 0] = time
-        divb[i, 1] = divergence
-        divb[i, 2] = curlmag[0]
-        divb[i, 3] = curlmag[1]
-        divb[i, 4] = curlmag[2]
+    divb[:, 0] = timesb1
+    divb[:, 1] = divergence
+    divb[:, 2:5] = curlmag
 
-        # the cross product of the calculated curl and the sample field times 1e-21 (SI), divided by m0
+    # the cross product of the calculated curl and the sample field times 1e-21 (SI), divided by m0
 
-        # curl is in nT/km, nT/km*1e-12 = T/m
-        # field is in nT, nT*1e-9 = T
-        # j is curl B / m0 (curl B = m0*j)
-        # use the magnetic field at the barycentre
+    # curl is in nT/km, nT/km*1e-12 = T/m
+    # field is in nT, nT*1e-9 = T
+    # j is curl B / m0 (curl B = m0*j)
+    # use the magnetic field at the barycentre
 
-        # compute the current components and total specifically
-        jtotal[i, 0:3] = 1e-12*divb[i, 2:5]/m0
-        jtotal[i, 3] = np.sqrt(jtotal[i, 0]**2+jtotal[i, 1]**2+jtotal[i, 2]**2)
+    # compute the current components and total specifically
+    jtotal = np.zeros([len(timesb1), 4])
+    jtotal[:, 0:3] = 1e-12*divb[:, 2:5]/m0
+    jtotal[:, 3] = np.sqrt(jtotal[:, 0]**2+jtotal[:, 1]**2+jtotal[:, 2]**2)
 
-        # compute the parallel and perpendicular components of the current
-        btotal[i] = np.sqrt(np.dot(baryb[i, 0:3], baryb[i, 0:3]))
+    # compute the parallel and perpendicular components of the current
+    btotal = np.sqrt(np.sum(baryb*baryb, axis=1))[:, np.newaxis]
 
-        # parallel is J.B/|B|
-        jparallel[i] = np.dot(jtotal[i, 0:3], baryb[i, 0:3])/btotal[i]
-        jparallel[i] = jparallel[i][0]
+    # parallel is J.B/|B|
+    jparallel = np.sum(jtotal[:, 0:3]*baryb, axis=1)[:, np.newaxis]/btotal
 
-        # perp is J - J// B/|B| (components and total perpendicular current)
-        jperpvec[i, 0:3] = jtotal[i, 0:3] - (jparallel[i]*baryb[i, 0:3])/btotal[i]
-        jperpvec[i, 3] = np.sqrt(jperpvec[i, 0]**2 + jperpvec[i, 1]**2 + jperpvec[i, 2]**2)
+    # perp is J - J// B/|B| (components and total perpendicular current)
+    jperpvec = np.zeros([len(timesb1), 4])
+    jperpvec[:, 0:3] = jtotal[:, 0:3] - (jparallel*baryb)/btotal
+    jperpvec[:, 3] = np.sqrt(jperpvec[:, 0]**2 + jperpvec[:, 1]**2 + jperpvec[:, 2]**2)
 
-        # alpha parameter
-        alphaparallel[i] = np.abs(jparallel[i])/(1e-9*btotal[i])
-        alpha[i] = np.abs(jtotal[i, 3])/(1e-9*btotal[i])
+    # alpha parameter
+    alphaparallel = np.abs(jparallel)/(1e-9*btotal)
+    alpha = np.abs(jtotal[:, 3:4])/(1e-9*btotal)
 
     # create the output variables
     store_data('baryb' + suffix, data={'x': timesb1, 'y': baryb})
@@ -1,6 +1,7 @@
 import logging
 import numpy as np
 from pyspedas.tplot_tools import get_data, time_double
+from pyspedas.particles.particle_dist import ParticleDistArray
 
 logging.captureWarnings(True)
 logging.basicConfig(format='%(asctime)s: %(message)s', datefmt='%d-%b-%y %H:%M:%S', level=logging.INFO)
@@ -33,7 +34,8 @@ def mms_get_fpi_dist(tname, index=None, probe=None, data_rate=None, species=None
 
     Returns
     ----------
-        3D particle data structure(s) containing MMS FPI distribution functions
+        ParticleDistArray containing the MMS FPI distribution functions; indexing it
+        returns the 3D particle data structure for a single time
     """
 
     data_in = get_data(tname)
@@ -117,75 +119,51 @@ def mms_get_fpi_dist(tname, index=None, probe=None, data_rate=None, species=None
 
     # we shuffle the output to be [time, energy, phi, theta]
     out_data = data[1].transpose([0, 3, 1, 2])
-    out_energy = np.empty(data[1].shape).transpose([0, 3, 1, 2])
-    out_theta = np.empty(data[1].shape).transpose([0, 3, 1, 2])
-    out_phi = np.empty(data[1].shape).transpose([0, 3, 1, 2])
-    out_bins = np.zeros(out_data.shape) + 1
-    out_dphi = np.zeros(out_data.shape) + 11.25
-    out_dtheta = np.zeros(out_data.shape) + 11.25
-    out_denergy = np.zeros(out_data.shape)
+
+    # the bin geometry is stored once, with the smallest shape that broadcasts
+    # to [energy, phi, theta], or [time, energy, phi, theta] if it varies with time
+    varying = []
 
     # elevations are constant across time
     # convert colat -> lat
-    theta_reform = 90. - np.reshape(data[3], [1, 1, len(data[3])])
-
-    # in the IDL code, we use reform to repeat the vector above
-    # here, we'll do the same thing with np.repeat
-    theta_rebin1 = np.repeat(theta_reform, data[1].shape[1], axis=0) # repeated across phi
-    theta_rebinned = np.repeat(theta_rebin1, data[1].shape[3], axis=1) # repeated across energy
+    theta_lat = -(90. - np.asarray(data[3])).astype(np.float64)
+    if theta_lat.ndim == 1:
+        out_theta = np.reshape(theta_lat, [1, 1, len(data[3])])
+    else:
+        out_theta = np.reshape(theta_lat, [len(data[0]), 1, 1, theta_lat.shape[1]])
+        varying.append('theta')
 
     # energies
     if data[4].ndim == 1:
-        energy_reform = np.reshape(data[4], [len(data[4]), 1, 1])
-        energy_rebin1 = np.repeat(energy_reform, len(data[3]), axis=2) # repeated across theta
-        energy_table = np.repeat(energy_rebin1, len(data[2]), axis=1)
         energy_len = len(data[4])
-    elif data[4].ndim == 2:
+        out_energy = np.reshape(np.asarray(data[4], dtype=np.float64), [energy_len, 1, 1])
+    elif data[4].ndim == 2: # time varying energy table
         energy_len = len(data[4][0])
+        out_energy = np.reshape(np.asarray(data[4], dtype=np.float64), [len(data[0]), energy_len, 1, 1])
+        varying.append('energy')
 
     # phi
     if data[2].ndim == 1:
-        phi_reform = np.reshape(data[2], [1, len(data[2]), 1])
-        phi_rebin1 = np.repeat(phi_reform, energy_len, axis=0) # repeated across energy
-        phi_rebinned = np.repeat(phi_rebin1, len(data[3]), axis=2)
         phi_len = len(data[2])
+        out_phi = np.reshape(np.asarray(data[2], dtype=np.float64), [1, phi_len, 1])
     elif data[2].ndim == 2:
         phi_len = len(data[2][0])
+        out_phi = np.reshape(np.asarray(data[2], dtype=np.float64), [len(data[0]), 1, phi_len, 1])
+        varying.append('phi')
 
-    for idx in range(len(data[0])):
-        out_theta[idx] = theta_rebinned
-        if data[4].ndim == 2: # time varying energy table
-            energy_reform = np.reshape(data[4][idx], [energy_len, 1, 1])
-            energy_rebin1 = np.repeat(energy_reform, len(data[3]), axis=2) # repeated across theta
-            energy_table = np.repeat(energy_rebin1, phi_len, axis=1)
-        out_energy[idx] = energy_table
-        if data[2].ndim == 2:
-            phi_reform = np.reshape(data[2][idx], [1, phi_len, 1])
-            phi_rebin1 = np.repeat(phi_reform, energy_len, axis=0) # repeated across energy
-            phi_rebinned = np.repeat(phi_rebin1, len(data[3]), axis=2)
-        out_phi[idx] = phi_rebinned
+    out_phi = (out_phi+180.) % 360
 
+    fields = {'bins': np.array(1.0),
+              'theta': out_theta,
+              'phi': out_phi,
+              'energy': out_energy,
+              'dtheta': np.array(11.25),
+              'dphi': np.array(11.25),
+              'denergy': np.array(0.0)}
 
-    out_phi = (out_phi+180.) % 360
-    out_theta = -out_theta
-
-    out_list = []
-
-    for time_idx, time in enumerate(data[0]):
-        out_table = {**out}
-        out_table['data'] = out_data[time_idx, :]
-        out_table['bins'] = out_bins[time_idx, :]
-        out_table['theta'] = out_theta[time_idx, :]
-        out_table['phi'] = out_phi[time_idx, :]
-        out_table['energy'] = out_energy[time_idx, :]
-        out_table['dtheta'] = out_dtheta[time_idx, :]
-        out_table['dphi'] = out_dphi[time_idx, :]
-        out_table['denergy'] = out_denergy[time_idx, :]
-        out_table['n_energy'] = energy_len
-        out_table['n_theta'] = len(data[3])
-        out_table['n_phi'] = phi_len
-        out_table['start_time'] = time # note: assumes the FPI data weren't centered!
-        out_table['end_time'] = time + integ_time
-        out_list.append(out_table)
-
-    return out_list
+    out['n_energy'] = energy_len
+    out['n_theta'] = out_theta.shape[-1]
+    out['n_phi'] = phi_len
+
+    # note: assumes the FPI data weren't centered!
+    return ParticleDistArray(out_data, data[0], data[0] + integ_time, fields, out, varying=varying)
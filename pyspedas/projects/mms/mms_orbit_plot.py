@@ -2,8 +2,12 @@ import logging
 import os
 import matplotlib.pyplot as plt
 from pyspedas.tplot_tools import get_data
+from pyspedas.tplot_tools.MPLPlotter.tplotxy import decimate_track_points
 from . import mms_load_mec
 
+# decoded reference image of the Earth, reused by later plots
+_earth_image_cache = {}
+
 
 def mms_orbit_plot(trange=['2015-10-16', '2015-10-17'],
                    probes=[1, 2, 3, 4],
@@ -25,7 +29,8 @@ def mms_orbit_plot(trange=['2015-10-16', '2015-10-17'],
                    save_jpeg='',
                    save_svg='',
                    return_plot_objects=False,
-                   display=True
+                   display=True,
+                   decimate_pixels=None
                    ):
     """
     This function creates MMS orbit plots
@@ -97,6 +102,10 @@ def mms_orbit_plot(trange=['2015-10-16', '2015-10-17'],
         display: bool
             whether to display the plot using matplotlib's `show()` function (default: True)
 
+        decimate_pixels: int
+            if set, the orbits are reduced to the points needed to draw them at this resolution
+            (e.g., the width of the saved figure in pixels) before plotting (default: None)
+
     """
     spacecraft_colors = [(0, 0, 0), (213/255, 94/255, 0), (0, 158/255, 115/255), (86/255, 180/255, 233/255)]
 
@@ -122,8 +131,10 @@ def mms_orbit_plot(trange=['2015-10-16', '2015-10-17'],
     fig, axis = plt.subplots(sharey=True, sharex=True, figsize=(xsize, ysize))
 
     if earth:
-        im = plt.imread(os.path.dirname(os.path.realpath(__file__)) + '/mec_tools/earth_polar1.png')
-        plt.imshow(im, extent=(-1, 1, -1, 1))
+        image_file = os.path.dirname(os.path.realpath(__file__)) + '/mec_tools/earth_polar1.png'
+        if image_file not in _earth_image_cache:
+            _earth_image_cache[image_file] = plt.imread(image_file)
+        plt.imshow(_earth_image_cache[image_file], extent=(-1, 1, -1, 1))
 
     plot_count = 0
 
@@ -137,15 +148,18 @@ def mms_orbit_plot(trange=['2015-10-16', '2015-10-17'],
             plot_count += 1
 
         if plane == 'xy':
-            axis.plot(d[:, 0]/km_in_re, d[:, 1]/km_in_re, label='MMS' + str(probe), color=spacecraft_colors[int(probe)-1], marker=marker, markevery=markevery, markersize=markersize)
+            track_x, track_y, track_markevery = decimate_track_points(d[:, 0]/km_in_re, d[:, 1]/km_in_re, decimate_pixels, marker, markevery)
+            axis.plot(track_x, track_y, label='MMS' + str(probe), color=spacecraft_colors[int(probe)-1], marker=marker, markevery=track_markevery, markersize=markersize)
             axis.set_xlabel('X Position, Re')
             axis.set_ylabel('Y Position, Re')
         if plane == 'yz':
-            axis.plot(d[:, 1]/km_in_re, d[:, 2]/km_in_re, label='MMS' + str(probe), color=spacecraft_colors[int(probe)-1], marker=marker, markevery=markevery, markersize=markersize)
+            track_x, track_y, track_markevery = decimate_track_points(d[:, 1]/km_in_re, d[:, 2]/km_in_re, decimate_pixels, marker, markevery)
+            axis.plot(track_x, track_y, label='MMS' + str(probe), color=spacecraft_colors[int(probe)-1], marker=marker, markevery=track_markevery, markersize=markersize)
             axis.set_xlabel('Y Position, Re')
             axis.set_ylabel('Z Position, Re')
         if plane == 'xz':
-            axis.plot(d[:, 0]/km_in_re, d[:, 2]/km_in_re, label='MMS' + str(probe), color=spacecraft_colors[int(probe)-1], marker=marker, markevery=markevery, markersize=markersize)
+            track_x, track_y, track_markevery = decimate_track_points(d[:, 0]/km_in_re, d[:, 2]/km_in_re, decimate_pixels, marker, markevery)
+            axis.plot(track_x, track_y, label='MMS' + str(probe), color=spacecraft_colors[int(probe)-1], marker=marker, markevery=track_markevery, markersize=markersize)
             axis.set_xlabel('X Position, Re')
             axis.set_ylabel('Z Position, Re')
 
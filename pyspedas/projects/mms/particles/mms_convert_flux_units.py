@@ -1,11 +1,12 @@
 import logging
+from functools import lru_cache
 import numpy as np
 
 logging.captureWarnings(True)
 logging.basicConfig(format='%(asctime)s: %(message)s', datefmt='%d-%b-%y %H:%M:%S', level=logging.INFO)
 
 
-def mms_convert_flux_units(data_in, units=None):
+def mms_convert_flux_units(data_in, units=None, out=None):
     """
     Perform unit conversions for MMS particle data structures
     
@@ -24,6 +25,11 @@ def mms_convert_flux_units(data_in, units=None):
                 df_cm  -  s^3 / cm^6
                 df_km     -  s^3 / km^6
 
+        out: np.ndarray
+            Optional preallocated array (same shape as data_in['data']) to hold the
+            converted data; this avoids allocating a new array for each distribution
+            when converting many distributions in a loop
+
     Returns
     ----------
         3D particle data structure with the data in the units specified by
@@ -34,14 +40,96 @@ def mms_convert_flux_units(data_in, units=None):
         return None
 
     units_out = units.lower()
-    species_lc = data_in['species'].lower()
     units_in = data_in['units_name'].lower()
 
     if units_in == units_out:
         return data_in
 
+    converted = mms_convert_flux_units_array(data_in['data'], data_in['energy'], data_in['species'],
+                                             units_in, units_out, out=out)
+
+    if converted is None:
+        return None
+
+    # handle synonymous notations
+    if units_out == 'psd':
+        units_out = 'df_km'
+
     data_out = data_in.copy()
+    data_out['units_name'] = units_out
+    data_out['data'] = converted
+
+    return data_out
+
 
+def mms_convert_flux_units_array(data, energy, species, units_in, units_out, out=None):
+    """
+    Perform unit conversions on arrays of MMS particle data
+
+    This applies the same conversion as mms_convert_flux_units to a whole stack of
+    distributions at once, e.g., data with shape (ntimes, nenergy, nphi, ntheta)
+
+    Input
+    ----------
+        data: np.ndarray
+            Particle data
+
+        energy: np.ndarray
+            Energies of the bins; must be broadcastable to the shape of data
+
+        species: str
+            Particle species
+
+        units_in: str
+            Units of the input data
+
+        units_out: str
+            Output units (see mms_convert_flux_units)
+
+    Parameters
+    ----------
+        out: np.ndarray
+            Optional preallocated output array; this can be the input data
+            array to convert the data in place
+
+    Returns
+    ----------
+        Array containing the data in the output units
+    """
+    units_in = units_in.lower()
+    units_out = units_out.lower()
+
+    if units_in == units_out:
+        if out is None:
+            return data.copy()
+        out[...] = data
+        return out
+
+    factors = mms_flux_conversion_factors(species.lower(), units_in, units_out)
+
+    if factors is None:
+        logging.error('Error, unknown particle species: %s', species)
+        return None
+
+    energy_exp, scale = factors
+
+    if energy_exp == 0:
+        scaled = np.multiply(data, scale, out=out)
+    else:
+        scaled = np.multiply(data, energy**energy_exp, out=out)
+        scaled = np.multiply(scaled, scale, out=scaled)
+
+    return scaled
+
+
+@lru_cache(maxsize=None)
+def mms_flux_conversion_factors(species, units_in, units_out):
+    """
+    Returns the energy exponent and scale factor for converting MMS particle
+    data from units_in to units_out; returns None for unknown species.
+
+    The conversion is data * energy**exponent * scale
+    """
     # handle synonymous notations
     if units_in == 'psd':
         units_in = 'df_km'
@@ -53,24 +141,23 @@ def mms_convert_flux_units(data_in, units=None):
     # the same as the ion mass number, but HPCA flux products are organized
     # by energy-per-charge; multiply charged species must therefore use A/q
     # (e.g., He++ -> 4/2 = 2, O++ -> 16/2 = 8).
-    if species_lc == 'i':
+    if species == 'i':
         a_over_q = 1.0  # H+
-    elif species_lc == 'proton':
+    elif species == 'proton':
         a_over_q = 1.0  # H+
-    elif species_lc == 'hplus':
+    elif species == 'hplus':
         a_over_q = 1.0  # H+
-    elif species_lc == 'heplus':
+    elif species == 'heplus':
         a_over_q = 4.0  # He+
-    elif species_lc == 'heplusplus':
+    elif species == 'heplusplus':
         a_over_q = 2.0  # He++
-    elif species_lc == 'oplus':
+    elif species == 'oplus':
         a_over_q = 16.0  # O+
-    elif species_lc == 'oplusplus':
+    elif species == 'oplusplus':
         a_over_q = 8.0  # O++
-    elif species_lc == 'e':
+    elif species == 'e':
         a_over_q = 1.0/1836.0  # e-
     else:
-        logging.error('Error, unknown particle species: %s', data_in['species'])
         return None
 
     # scaling factor between df and flux units
@@ -104,7 +191,4 @@ def mms_convert_flux_units(data_in, units=None):
 
     exp = np.array(exp_in) + np.array(exp_out)
 
-    data_out['units_name'] = units_out
-    data_out['data'] = data_in['data']*data_in['energy']**exp[0]*(flux_to_df**exp[1]*cm_to_km**exp[2])
-
-    return data_out
+    return int(exp[0]), flux_to_df**exp[1]*cm_to_km**exp[2]
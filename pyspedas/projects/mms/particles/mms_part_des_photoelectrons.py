@@ -1,5 +1,6 @@
 import os
 import logging
+import numpy as np
 from pyspedas.projects.mms.mms_config import CONFIG
 from pyspedas.utilities.download import download
 from pyspedas.tplot_tools import get_data, cdf_to_tplot
@@ -7,16 +8,32 @@ from pyspedas.tplot_tools import get_data, cdf_to_tplot
 logging.captureWarnings(True)
 logging.basicConfig(format='%(asctime)s: %(message)s', datefmt='%d-%b-%y %H:%M:%S', level=logging.INFO)
 
+# photoelectron models already loaded in this session, keyed by model CDF filename
+_pe_models = {}
 
-def mms_part_des_photoelectrons(dist_var):
+
+def mms_part_des_photoelectrons(dist_var, use_cache=True):
     """
     Loads and returns the FPI/DES photoelectron model based on stepper ID
 
+    The model only depends on the data rate and the stepper ID of the
+    distribution, so it is cached in memory, and on disk (as a .npz file
+    next to the model CDF files in the MMS data directory). Every call checks
+    the SDC for the latest version of the model file, and the cached model is
+    only used if it was read from that version; subsequent calls don't need to
+    read the model CDF file again until a new version of the model is released.
+
     Input
     ----------
         dist_var: str
             tplot variable containing DES distribution data
 
+    Parameters
+    ----------
+        use_cache: bool
+            Use the cached model if available (default: True); set to False
+            to download and read the model CDF file again
+
     Notes
     ----------
         For more information on the model, see:
@@ -24,17 +41,19 @@ def mms_part_des_photoelectrons(dist_var):
 
     Returns
     ----------
-        Dictionary containing the photoelectron model
+        Dictionary containing the photoelectron model:
+            bgdist: background distributions, [parity, startdelphi index, phi, theta, energy]
+            n: photoelectron number densities, [parity, startdelphi index, spacecraft potential]
+            scpot: spacecraft potentials the number densities are tabulated at, [parity, spacecraft potential]
+        Fast survey data have a single parity; burst data have the models for both stepper parities.
     """
-    data = get_data(dist_var)
+    # get the metadata for the 'energy_table_name' from the global attributes
+    metadata = get_data(dist_var, metadata=True)
 
-    if data is None:
+    if metadata is None:
         logging.error('Problem reading DES distribution variable')
         return
 
-    # get the metadata for the 'energy_table_name' from the global attributes
-    metadata = get_data(dist_var, metadata=True)
-
     try:
         table_name = metadata['CDF']['GATT']['Energy_table_name']
     except KeyError:
@@ -49,33 +68,156 @@ def mms_part_des_photoelectrons(dist_var):
     # we'll need the data rate
     data_rate = dist_var.split('_')[-1]
 
-    # download the model file from the SDC
-    pe_model = download(
+    if data_rate not in ['fast', 'brst']:
+        logging.error('Error: something went wrong with the photoelectron model')
+        return
+
+    local_path = os.path.join(CONFIG['local_data_dir'], 'mms', 'sdc', 'public', 'data', 'models', 'fpi')
+    cache_file = os.path.join(local_path, 'mms_fpi_'+data_rate+'_l2_des-bgdist_p'+stepper_id+'_cache.npz')
+
+    # find the latest version of the model file (downloading it from the SDC if it's newer than the local copy)
+    model_file = download(
         last_version=True,
         remote_path='https://lasp.colorado.edu/mms/sdc/public/data/models/fpi/',
         remote_file='mms_fpi_'+data_rate+'_l2_des-bgdist_v?.?.?_p'+stepper_id+'.cdf',
-        local_path=os.path.join(CONFIG['local_data_dir'], 'mms'+os.path.sep+'sdc'+os.path.sep+'public'+os.path.sep+'data'+os.path.sep+'models'+os.path.sep+'fpi'+os.path.sep+''))
+        local_path=local_path+os.path.sep)
 
-    if len(pe_model) != 1:
+    if len(model_file) != 1:
         logging.error('Problem downloading DES model from the SDC')
         return
 
-    model_vars = cdf_to_tplot(pe_model[0], get_support_data=True)
+    model_name = os.path.basename(model_file[0])
+
+    if use_cache:
+        if model_name in _pe_models:
+            return _pe_models[model_name]
+
+        pe_model = mms_part_des_photoelectrons_read_cache(cache_file, model_name)
+        if pe_model is not None:
+            _pe_models[model_name] = pe_model
+            return pe_model
+
+    model_vars = cdf_to_tplot(model_file[0], get_support_data=True)
 
     if data_rate == 'fast':
-        bg_dist = get_data('mms_des_bgdist_fast')
-        nphoto = get_data('mms_des_numberdensity_fast')
-        return {'bg_dist': bg_dist, 'n': nphoto}
-    elif data_rate == 'brst':
-        bg_dist_0 = get_data('mms_des_bgdist_p0_brst')
-        bg_dist_1 = get_data('mms_des_bgdist_p1_brst')
-        nphoto_0 = get_data('mms_des_numberdensity_p0_brst')
-        nphoto_1 = get_data('mms_des_numberdensity_p1_brst')
-        return {'bgdist_p0': bg_dist_0, 
-                'bgdist_p1': bg_dist_1, 
-                'n_0': nphoto_0, 
-                'n_1': nphoto_1}
-
-    # shouldn't get here
-    logging.error('Error: something went wrong with the photoelectron model')
-    return
+        parity_suffixes = ['_fast']
+    else:
+        parity_suffixes = ['_p0_brst', '_p1_brst']
+
+    bgdist = []
+    nphoto = []
+    scpot = []
+    for suffix in parity_suffixes:
+        bg_dist = get_data('mms_des_bgdist'+suffix)
+        n_value = get_data('mms_des_numberdensity'+suffix)
+        if bg_dist is None or n_value is None:
+            logging.error('Error: something went wrong with the photoelectron model')
+            return
+        bgdist.append(bg_dist.y)
+        nphoto.append(n_value.y)
+        scpot.append(n_value.v)
+
+    pe_model = {'bgdist': np.array(bgdist), 'n': np.array(nphoto), 'scpot': np.array(scpot)}
+
+    try:
+        np.savez(cache_file, source=model_name, **pe_model)
+    except OSError:
+        logging.warning('Unable to save the DES photoelectron model cache: ' + cache_file)
+
+    _pe_models[model_name] = pe_model
+    return pe_model
+
+
+def mms_part_des_photoelectrons_read_cache(cache_file, model_name):
+    """
+    Reads a cached photoelectron model; returns None if there's no cache, or if the
+    cached model wasn't read from the model CDF file model_name (e.g., a newer
+    version of the model has been released since the cache was written)
+    """
+    if not os.path.exists(cache_file):
+        return
+
+    try:
+        with np.load(cache_file) as cached:
+            source = str(cached['source'])
+            pe_model = {'bgdist': cached['bgdist'], 'n': cached['n'], 'scpot': cached['scpot']}
+    except (OSError, KeyError, ValueError):
+        logging.warning('Problem reading the DES photoelectron model cache: ' + cache_file)
+        return
+
+    if source != model_name:
+        return
+
+    return pe_model
+
+
+def mms_part_des_photoelectron_corrections(pe_model, startdelphi, scpot, parity=None):
+    """
+    Precomputes the indices into the photoelectron model and the photoelectron
+    number densities for every distribution in the time series
+
+    From Dan Gershman's release notes on the FPI photoelectron model:
+    Find the index I in the startdelphi_counts_brst or startdelphi_counts_fast array
+    [360 possibilities] whose corresponding value is closest to the measured
+    startdelphi_count_brst or startdelphi_count_fast for the skymap of interest. The
+    closest index can be approximated by I = floor(startdelphi_count_brst/16) or I =
+    floor(startdelphi_count_fast/16)
+
+    Input
+    ----------
+        pe_model: dict
+            Photoelectron model returned by mms_part_des_photoelectrons
+
+        startdelphi: np.ndarray
+            startdelphi counts of the distributions
+
+        scpot: np.ndarray
+            Spacecraft potential at the times of the distributions
+
+    Parameters
+    ----------
+        parity: np.ndarray
+            Stepper parities of the distributions (burst data only)
+
+    Returns
+    ----------
+        Dictionary containing the parity, startdelphi index and photoelectron
+        number density for each distribution
+    """
+    startdelphi_I = np.floor(np.asarray(startdelphi)/16.0).astype(int)
+
+    if parity is None:
+        parity_num = np.zeros(len(startdelphi_I), dtype=int)
+    else:
+        parity_num = np.fix(np.asarray(parity)).astype(int)
+
+    # need to interpolate using SC potential data to get Nphoto value
+    # (linear interpolation with extrapolation, as in pyspedas.interpol)
+    nphoto = np.zeros(len(startdelphi_I))
+    scpot = np.asarray(scpot, dtype=np.float64)
+    for p in np.unique(parity_num):
+        idx = np.argwhere(parity_num == p).flatten()
+        order = np.argsort(pe_model['scpot'][p], kind='stable')
+        x = pe_model['scpot'][p][order]
+        y = pe_model['n'][p][startdelphi_I[idx]][:, order]
+        hi = np.clip(np.searchsorted(x, scpot[idx], side='left'), 1, len(x)-1)
+        lo = hi - 1
+        rows = np.arange(len(idx))
+        slope = (y[rows, hi] - y[rows, lo])/(x[hi] - x[lo])
+        nphoto[idx] = y[rows, lo] + (scpot[idx] - x[lo])*slope
+
+    return {'parity': parity_num, 'index': startdelphi_I, 'nphoto': nphoto}
+
+
+def mms_part_des_photoelectron_model(pe_model, corrections, start, stop):
+    """
+    Returns the photoelectron distributions (fphoto*nphoto) for the distributions
+    from start to stop, in the same order as dist['data'] (energy-azimuth-elevation)
+    """
+    parity = corrections['parity'][start:stop]
+    index = corrections['index'][start:stop]
+    nphoto = corrections['nphoto'][start:stop]
+
+    # note: transpose is to shuffle fphoto*nphoto to energy-azimuth-elevation, to match dist.data
+    fphoto = pe_model['bgdist'][parity, index]
+    return (fphoto*nphoto[:, None, None, None]).transpose([0, 3, 1, 2])
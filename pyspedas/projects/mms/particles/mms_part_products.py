@@ -3,7 +3,6 @@ import numpy as np
 
 from pyspedas.tplot_tools import get_data
 
-from pyspedas.utilities.interpol import interpol
 from pyspedas.particles.spd_part_products.spd_pgs_make_tplot import spd_pgs_make_tplot
 from pyspedas.particles.spd_part_products.spd_pgs_limit_range import spd_pgs_limit_range
 from pyspedas.particles.spd_part_products.spd_pgs_progress_update import spd_pgs_progress_update
@@ -24,7 +23,8 @@ from pyspedas.projects.mms.particles.mms_pgs_split_hpca import mms_pgs_split_hpc
 from pyspedas.projects.mms.particles.mms_pgs_make_e_spec import mms_pgs_make_e_spec
 from pyspedas.projects.mms.particles.mms_pgs_make_phi_spec import mms_pgs_make_phi_spec
 from pyspedas.projects.mms.particles.mms_pgs_make_theta_spec import mms_pgs_make_theta_spec
-from pyspedas.projects.mms.particles.mms_part_des_photoelectrons import mms_part_des_photoelectrons
+from pyspedas.projects.mms.particles.mms_part_des_photoelectrons import mms_part_des_photoelectrons, \
+    mms_part_des_photoelectron_corrections, mms_part_des_photoelectron_model
 
 logging.captureWarnings(True)
 logging.basicConfig(format='%(asctime)s: %(message)s', datefmt='%d-%b-%y %H:%M:%S', level=logging.INFO)
@@ -223,9 +223,9 @@ def mms_part_products(in_tvarname,
     output = output_lc
 
     if instrument == 'fpi':
-        dist_in = mms_get_fpi_dist(in_tvarname, species=species, probe=probe, data_rate=data_rate)
+        dists = mms_get_fpi_dist(in_tvarname, species=species, probe=probe, data_rate=data_rate)
     elif instrument == 'hpca':
-        dist_in = mms_get_hpca_dist(in_tvarname, species=species, probe=probe, data_rate=data_rate)
+        dists = mms_get_hpca_dist(in_tvarname, species=species, probe=probe, data_rate=data_rate)
     else:
         logging.error('Error, unknown instrument: ' + instrument + '; valid options: fpi, hpca')
         return
@@ -236,7 +236,7 @@ def mms_part_products(in_tvarname,
         data_times = data_in.times
 
     # ntimes = len(data_times)
-    ntimes = len(dist_in)
+    ntimes = len(dists)
 
     # create rotation matrix to field aligned coordinates if needed
     fac_outputs = ['pa', 'gyro', 'fac_energy', 'fac_moments']
@@ -248,19 +248,19 @@ def mms_part_products(in_tvarname,
             # problem creating the FAC matrices
             fac_requested = False
 
-    out_energy = np.zeros((ntimes, dist_in[0]['n_energy']))
-    out_energy_y = np.zeros((ntimes, dist_in[0]['n_energy']))
-    out_theta = np.zeros((ntimes, dist_in[0]['n_theta']))
-    out_phi = np.zeros((ntimes, dist_in[0]['n_phi']))
-    out_theta_y = np.zeros((ntimes, dist_in[0]['n_theta']))
-    out_phi_y = np.zeros((ntimes, dist_in[0]['n_phi']))
+    out_energy = np.zeros((ntimes, dists[0]['n_energy']))
+    out_energy_y = np.zeros((ntimes, dists[0]['n_energy']))
+    out_theta = np.zeros((ntimes, dists[0]['n_theta']))
+    out_phi = np.zeros((ntimes, dists[0]['n_phi']))
+    out_theta_y = np.zeros((ntimes, dists[0]['n_theta']))
+    out_phi_y = np.zeros((ntimes, dists[0]['n_phi']))
     if fac_requested:
-        out_pad = np.zeros((ntimes, dist_in[0]['n_theta']))
-        out_pad_y = np.zeros((ntimes, dist_in[0]['n_theta']))
-        out_gyro = np.zeros((ntimes, dist_in[0]['n_phi']))
-        out_gyro_y = np.zeros((ntimes, dist_in[0]['n_phi']))
-        out_fac_energy = np.zeros((ntimes, dist_in[0]['n_energy']))
-        out_fac_energy_y = np.zeros((ntimes, dist_in[0]['n_energy']))
+        out_pad = np.zeros((ntimes, dists[0]['n_theta']))
+        out_pad_y = np.zeros((ntimes, dists[0]['n_theta']))
+        out_gyro = np.zeros((ntimes, dists[0]['n_phi']))
+        out_gyro_y = np.zeros((ntimes, dists[0]['n_phi']))
+        out_fac_energy = np.zeros((ntimes, dists[0]['n_energy']))
+        out_fac_energy_y = np.zeros((ntimes, dists[0]['n_energy']))
 
     # moments
     if 'moments' in output:
@@ -342,59 +342,42 @@ are the scientific products that should be used for analysis."""
             return
 
         # will need stepper parities for burst mode data
+        parity = None
         if data_rate == 'brst':
-            parity = get_data('mms'+probe+'_des_steptable_parity_brst')
+            parity = get_data('mms'+probe+'_des_steptable_parity_brst').y
 
         startdelphi = get_data('mms'+probe+'_des_startdelphi_count_'+data_rate)
+
+        # model indices and photoelectron densities for all distributions
+        pe_corrections = mms_part_des_photoelectron_corrections(fpi_photoelectrons, startdelphi.y, scpot_data, parity=parity)
+
+        # the model distributions are evaluated for blocks of this many samples at a time
+        pe_block_size = 256
+
+    units_buffer = None
+
 #### Looping over times to build spectrograms (this is what takes the longest)
     for i in range(0, ntimes):
         last_update_time = spd_pgs_progress_update(last_update_time=last_update_time, current_sample=i, total_samples=ntimes, type_string=in_tvarname)
 
         if instrument == 'fpi':
-            dists = mms_get_fpi_dist(in_tvarname, index=i, species=species, probe=probe, data_rate=data_rate)
+            # views into the distribution arrays loaded above; nothing is re-read or copied
+            dist_in = dists[i]
         elif instrument == 'hpca':
-            dists = mms_get_hpca_dist(in_tvarname, index=i, species=species, probe=probe, data_rate=data_rate)
-
-        if isinstance(dists, list):
-            dist_in = dists[0]
-        else:
-            dist_in = dists
+            dist_in = mms_get_hpca_dist(in_tvarname, index=i, species=species, probe=probe, data_rate=data_rate)
+            if isinstance(dist_in, list):
+                dist_in = dist_in[0]
 
         # Save the original energy table in case it gets manipulated (e.g. via bulk velocity subtraction)
         dist_in['orig_energy'] = dist_in['energy'][:,0,0]
 
         # apply the DES photoelectron corrections
         if correct_photoelectrons or internal_photoelectron_corrections:
-            # From Dan Gershman's release notes on the FPI photoelectron model:
-            # Find the index I in the startdelphi_counts_brst or startdelphi_counts_fast array
-            # [360 possibilities] whose corresponding value is closest to th = e measured
-            # startdelphi_count_brst or startdelphi_count_fast for the skymap of interest. The
-            # closest index can be approximated by I = floor(startdelphi_count_brst/16) or I =
-            # floor(startdelphi_count_fast/16)
-            startdelphi_I = int(np.floor(startdelphi.y[i]/16.0))
-
-            if data_rate == 'brst':
-                parity_num = str(int(np.fix(parity.y[i])))
-
-                bg_dist = fpi_photoelectrons['bgdist_p'+parity_num]
-                n_value = fpi_photoelectrons['n_'+parity_num]
-
-                fphoto = bg_dist.y[startdelphi_I, :, :, :]
-
-                # need to interpolate using SC potential data to get Nphoto value
-                nphoto_scpot_dependent = n_value.y[startdelphi_I, :]
-                nphoto = interpol(nphoto_scpot_dependent, n_value.v, scpot_data[i])
-            else:
-                fphoto = fpi_photoelectrons['bg_dist'].y[startdelphi_I, :, :, :]
-
-                # need to interpolate using SC potential data to get Nphoto value
-                nphoto_scpot_dependent = fpi_photoelectrons['n'].y[startdelphi_I, :]
-                nphoto = interpol(nphoto_scpot_dependent, fpi_photoelectrons['n'].v, scpot_data[i])
+            if i % pe_block_size == 0:
+                pe_block = mms_part_des_photoelectron_model(fpi_photoelectrons, pe_corrections, i, i+pe_block_size)
 
             # now, the corrected distribution function is simply f_corrected = f-fphoto*nphoto
-            # note: transpose is to shuffle fphoto*nphoto to energy-azimuth-elevation, to match dist.data
-            correction = fphoto*nphoto
-            corrected_df = dist_in['data']-correction.transpose([2, 0, 1])
+            corrected_df = dist_in['data']-pe_block[i % pe_block_size]
 
             if zero_negative_values:
                 corrected_df[corrected_df < 0] = 0.0
@@ -402,7 +385,10 @@ are the scientific products that should be used for analysis."""
             dist_in['data'] = corrected_df
 
         # note: why are the units converted before the data is cleaned?
-        data = mms_convert_flux_units(dist_in, units=units)
+        # (the converted data are written to the same array for every sample)
+        if units_buffer is None or units_buffer.shape != dist_in['data'].shape:
+            units_buffer = np.empty(dist_in['data'].shape)
+        data = mms_convert_flux_units(dist_in, units=units, out=units_buffer)
 
         # sanitizes data 
             # removes unneeded fields from strucutre to increase efficiency
@@ -7,12 +7,15 @@ def mms_pgs_clean_data(data_in):
     Sanitize MMS FPI/HPCA data structures for use with
     mms_part_products; reforms energy by theta by phi to energy by angle
     and calculates delta-energy for each bin
+
+    The bins are copied if the input bins are read-only (e.g., broadcast
+    views from a ParticleDistArray), since they're modified by spd_pgs_limit_range
     """
 
     output = {'charge': data_in['charge'], 'mass': data_in['mass'],
               'orig_energy': data_in['orig_energy'],
               'data': np.reshape(data_in['data'], [data_in['data'].shape[0], data_in['data'].shape[1]*data_in['data'].shape[2]], order='F'),
-              'bins': np.reshape(data_in['bins'], [data_in['data'].shape[0], data_in['data'].shape[1]*data_in['data'].shape[2]], order='F'),
+              'bins': np.require(np.reshape(data_in['bins'], [data_in['data'].shape[0], data_in['data'].shape[1]*data_in['data'].shape[2]], order='F'), requirements='W'),
               'theta': np.reshape(data_in['theta'], [data_in['data'].shape[0], data_in['data'].shape[1]*data_in['data'].shape[2]], order='F'),
               'energy': np.reshape(data_in['energy'], [data_in['data'].shape[0], data_in['data'].shape[1]*data_in['data'].shape[2]], order='F'),
               'phi': np.reshape(data_in['phi'], [data_in['data'].shape[0], data_in['data'].shape[1]*data_in['data'].shape[2]], order='F'),
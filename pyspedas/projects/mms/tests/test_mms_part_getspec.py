@@ -1,7 +1,9 @@
 import unittest
 import numpy as np
 from pyspedas.projects.mms.particles.mms_part_getspec import mms_part_getspec
-from pyspedas.projects.mms.particles.mms_convert_flux_units import mms_convert_flux_units
+from pyspedas.projects.mms.particles.mms_convert_flux_units import mms_convert_flux_units, mms_convert_flux_units_array
+from pyspedas.projects.mms.particles.mms_part_des_photoelectrons import mms_part_des_photoelectron_corrections, \
+    mms_part_des_photoelectron_model
 from pyspedas.projects.mms.hpca_tools.hpca import mms_load_hpca
 from pyspedas.projects.mms.hpca_tools.mms_hpca_calc_anodes import mms_hpca_calc_anodes
 from pyspedas.projects.mms.hpca_tools.mms_hpca_spin_sum import mms_hpca_spin_sum
@@ -199,6 +201,21 @@ class PGSTests(unittest.TestCase):
         np.testing.assert_allclose(oplusplus, oplus * 4.0)
         np.testing.assert_allclose(hplus, data * energy**2 / (0.5447e6) * 1e30)
 
+    def test_flux_unit_conversion_stack(self):
+        # converting a stack of distributions at once should match converting them one at a time
+        rng = np.random.default_rng(0)
+        data = rng.random((5, 4, 3, 2))
+        energy = np.broadcast_to(np.logspace(1, 4, 4)[:, None, None], (4, 3, 2))
+        expected = np.array([mms_convert_flux_units({'species': 'e', 'units_name': 'df_cm', 'energy': energy,
+                                                     'data': data[i]}, units='eflux')['data'] for i in range(5)])
+        converted = mms_convert_flux_units_array(data, energy, 'e', 'df_cm', 'eflux')
+        self.assertTrue(np.array_equal(converted, expected))
+        # in place
+        stack = data.copy()
+        out = mms_convert_flux_units_array(stack, energy, 'e', 'df_cm', 'eflux', out=stack)
+        self.assertTrue(out is stack)
+        self.assertTrue(np.array_equal(stack, expected))
+
     def test_hpca_heplusplus_energy_flux_matches_spin_average(self):
         # Regression for PySPEDAS issue #1313: He++ spectra generated from
         # HPCA phase-space-density data were about 4x smaller than the HPCA
@@ -280,5 +297,25 @@ class PGSTests(unittest.TestCase):
         delta = np.max(np.abs(data1.y - data0.y))
         self.assertTrue(delta > 0.0)
 
+    def test_des_photoelectron_corrections(self):
+        # synthetic burst mode model with two stepper parities
+        rng = np.random.default_rng(0)
+        pe_model = {'bgdist': rng.random((2, 360, 4, 3, 5)),
+                    'n': rng.random((2, 360, 6)),
+                    'scpot': np.array([np.linspace(0, 25, 6), np.linspace(0, 30, 6)])}
+        startdelphi = np.array([0, 17, 100, 5759])
+        parity = np.array([0, 1, 1, 0])
+        scpot = np.array([2.5, 12.0, 40.0, -1.0])
+        corrections = mms_part_des_photoelectron_corrections(pe_model, startdelphi, scpot, parity=parity)
+        self.assertTrue(np.array_equal(corrections['index'], [0, 1, 6, 359]))
+        model = mms_part_des_photoelectron_model(pe_model, corrections, 0, 4)
+        self.assertEqual(model.shape, (4, 5, 4, 3))
+        for i in range(4):
+            nphoto = np.interp(scpot[i], pe_model['scpot'][parity[i]], pe_model['n'][parity[i], corrections['index'][i]])
+            if i < 2:
+                self.assertAlmostEqual(corrections['nphoto'][i], nphoto)
+            expected = pe_model['bgdist'][parity[i], corrections['index'][i]]*corrections['nphoto'][i]
+            self.assertTrue(np.allclose(model[i], expected.transpose([2, 0, 1])))
+
 if __name__ == '__main__':
     unittest.main()
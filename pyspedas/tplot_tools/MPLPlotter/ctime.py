@@ -19,9 +19,21 @@ class TimeSelector:
         for vline in self.selected_lines:
             vline.set_color('r')
             vline.remove()
-        plt.draw()
+        self.saved_fig.canvas.draw_idle()
         self.selected_lines.clear()
 
+    # Define the draw event handler: save the figure without the cursor lines, so they can be moved
+    # by restoring the saved figure and drawing only the cursor lines (blitting), rather than
+    # redrawing the whole figure on every mouse move
+    def ctime_on_draw(self, event):
+        if not self.use_blit:
+            return
+        self.background = self.saved_fig.canvas.copy_from_bbox(self.saved_fig.bbox)
+        self.draw_cursor_lines()
+
+    def draw_cursor_lines(self):
+        for vline in self.vertical_lines:
+            vline.axes.draw_artist(vline)
 
     # Define the motion event handler
     def ctime_on_motion(self, event):
@@ -31,7 +43,13 @@ class TimeSelector:
             # Update the vertical line position
             for vline in self.vertical_lines:
                 vline.set_xdata([cursor_time, cursor_time])
-            plt.draw()
+            canvas = self.saved_fig.canvas
+            if self.background is not None:
+                canvas.restore_region(self.background)
+                self.draw_cursor_lines()
+                canvas.blit(self.saved_fig.bbox)
+            else:
+                canvas.draw_idle()
 
 
     # Define the click event handler
@@ -49,16 +67,17 @@ class TimeSelector:
                     timestamp = mdates.num2date(event.xdata).timestamp()
                     self.selected_times.append(timestamp)
                     self.add_selection_line(event.xdata)
-                plt.draw()
+                self.saved_fig.canvas.draw_idle()
             elif event.button == 3:  # Right-click to stop
                 self.logs.append("right click")
                 plt.disconnect(self.cid)  # Disconnect the event handler
                 plt.disconnect(self.motion_cid)  # Disconnect motion event handler
                 plt.disconnect(self.kbd_on_cid)  # Disconnect kbd event handler
                 plt.disconnect(self.kbd_off_cid)  # Disconnect kbd event handler
+                plt.disconnect(self.draw_cid)  # Disconnect draw event handler
                 for vline in self.vertical_lines:
                     vline.remove()  # Remove the vertical line from the plot
-                plt.draw()
+                self.saved_fig.canvas.draw_idle()
                 self.saved_fig.canvas.stop_event_loop()
 
     # Define the key press event handler
@@ -69,7 +88,7 @@ class TimeSelector:
             #print("Pressed 'c', clearing selections")
             self.clear_selection_lines()
             self.selected_times.clear()
-            plt.draw()
+            self.saved_fig.canvas.draw_idle()
         elif event.key == 'shift':
             self.shift_on=True
         elif event.key == 'q':  # Check if 'q' was pressed
@@ -78,9 +97,10 @@ class TimeSelector:
             plt.disconnect(self.motion_cid)  # Disconnect motion event handler
             plt.disconnect(self.kbd_on_cid)  # Disconnect kbd event handler
             plt.disconnect(self.kbd_off_cid)  # Disconnect kbd event handler
+            plt.disconnect(self.draw_cid)  # Disconnect draw event handler
             for vline in self.vertical_lines:
                 vline.remove()  # Remove the vertical line from the plot
-            plt.draw()
+            self.saved_fig.canvas.draw_idle()
             self.saved_fig.canvas.stop_event_loop()
             #clear_selection_lines()
 
@@ -128,18 +148,25 @@ class TimeSelector:
         self.motion_cid = None
         self.kbd_on_cid = None
         self.kbd_off_cid = None
+        self.draw_cid = None
         self.shift_on = False
         self.logs = []
+        self.background = None
+        self.use_blit = getattr(fig.canvas, 'supports_blit', False)
 
         # Create vertical lines in each subplot to track the cursor position
+        # (if the canvas supports blitting, they're animated: only drawn by the motion handler)
         for ax in fig.axes:
             # Get the y-axis range
             y_bottom, y_top = ax.get_ylim()
-            vline = Line2D([0, 0], [y_bottom, y_top], color='g', linestyle='--')
+            vline = Line2D([0, 0], [y_bottom, y_top], color='g', linestyle='--', animated=self.use_blit)
             self.vertical_lines.append(vline)
             ax.add_line(vline)
             self.axis_list.append((ax, y_bottom, y_top))
 
+        # Connect the draw event to the handler
+        self.draw_cid = fig.canvas.mpl_connect('draw_event', self.ctime_on_draw)
+
         # Connect the motion event to the handler
         self.motion_cid = fig.canvas.mpl_connect('motion_notify_event', self.ctime_on_motion)
 
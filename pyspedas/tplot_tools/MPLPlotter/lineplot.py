@@ -1,6 +1,8 @@
 import numpy as np
+import matplotlib.dates
 import pyspedas
 import logging
+from pyspedas.tplot_tools.tplot_pyramid import pyramid_minmax_indices
 
 
 def lineplot(var_data,
@@ -12,7 +14,10 @@ def lineplot(var_data,
              running_trace_count=None,
              time_idxs=None,
              style=None,
-             var_metadata=None):
+             var_metadata=None,
+             decimate_pixels=None,
+             x_range=None,
+             pyramid=None):
     """
     Generate a matplotlib line plot from a tplot variable
 
@@ -38,6 +43,16 @@ def lineplot(var_data,
             A matplotlib style to be used in the plot. Defaults to None.
         var_metadata: dict
             The metadata dictionary associated with this tplot variable (used as a fallback for trace labels). Defaults to None.
+        decimate_pixels: int
+            If provided, plain line traces (no markers, symbols or error bars) with many more points than this
+            number of pixel columns are reduced to per-column min/max envelopes before plotting (see decimate_minmax).
+            Defaults to None (plot every point).
+        x_range: np.ndarray
+            The [start, stop] times (datetime64) of the panel, used to determine the pixel columns when decimating.
+            Defaults to None (the time range of the data).
+        pyramid: list of dict
+            The min/max pyramid of the variable (see tplot_pyramid), used to find the points to decimate without
+            scanning every point; time_idxs must be contiguous. Defaults to None (decimate from every point).
 
     Returns
     -------
@@ -219,9 +234,29 @@ def lineplot(var_data,
         if marker_every is not None:
             line_options['markevery'] = marker_every[line]
 
-        this_line = plotter(var_times, var_data.y[time_idxs] if num_lines == 1 else var_data.y[time_idxs, line], color=color,
+        # with a pyramid, the time indices are contiguous, so the trace can be a view of the data
+        rows = slice(time_idxs[0], time_idxs[-1] + 1) if pyramid is not None else time_idxs
+        line_times = var_times
+        line_data = var_data.y[rows] if num_lines == 1 else var_data.y[rows, line]
+
+        # reduce plain line traces to what can be displayed at the panel's resolution
+        full_resolution = None
+        if decimate_pixels is not None and plotter == this_axis.plot and marker is None and marker_every is None:
+            keep = decimate_trace(line_times, line_data, decimate_pixels, x_range=x_range, pyramid=pyramid,
+                                  offset=time_idxs[0] if pyramid is not None else 0, trace=line)
+            if keep is not None:
+                full_resolution = (line_times, line_data)
+                line_times = line_times[keep]
+                line_data = line_data[keep]
+
+        this_line = plotter(line_times, line_data, color=color,
                             linestyle=this_line_style, linewidth=thick[line], marker=marker, **line_options)
 
+        # when zooming in, re-decimate the visible time range from the full resolution data
+        if full_resolution is not None:
+            lineplot_connect_zoom(this_axis, this_line[0], full_resolution[0], full_resolution[1], decimate_pixels,
+                                  pyramid=pyramid, offset=time_idxs[0] if pyramid is not None else 0, trace=line)
+
         if labels is not None:
             try:
                 if isinstance(this_line, list):
@@ -245,6 +280,118 @@ def lineplot(var_data,
 
     return True
 
+def decimate_minmax(times, values, npixels, x_range=None):
+    """ Find the points of a line trace needed to draw it at a given number of pixel columns
+
+    The time range is divided into npixels columns; within each column, the first, last, minimum
+    and maximum points of each run of finite values are kept, so spikes are preserved, and
+    the first point of each run of NaNs is kept, so gaps are still drawn as gaps.
+
+    Parameters
+    -----------
+        times: np.ndarray
+            Sorted times of the trace (datetime64 or numeric)
+        values: np.ndarray
+            Values of the trace
+        npixels: int
+            Number of pixel columns spanned by the time range
+        x_range: np.ndarray
+            The [start, stop] times of the columns. Defaults to None (the first and last time).
+
+    Returns:
+    --------
+        np.ndarray of the (sorted) indices of the points to plot, or None if the trace has too few
+        points to benefit from decimation
+
+    """
+    n = len(values)
+    npixels = int(npixels)
+    # each column contributes at most 4 points
+    if npixels < 1 or n <= 4*npixels or values.ndim != 1:
+        return None
+
+    t = np.asarray(times)
+    if t.dtype.kind == 'M':
+        t = t.astype('datetime64[ns]').astype(np.int64)
+        if x_range is not None:
+            x_range = np.asarray(x_range).astype('datetime64[ns]').astype(np.int64)
+    t = t.astype(np.float64)
+    if x_range is None:
+        x_range = [t[0], t[-1]]
+    start, stop = float(x_range[0]), float(x_range[1])
+    if not stop > start:
+        return None
+
+    column = np.clip(np.floor((t - start)/(stop - start)*npixels), -1, npixels).astype(np.int64)
+    nan = np.isnan(values)
+
+    # runs of points in the same column with the same NaN state
+    starts = np.flatnonzero(np.concatenate(([True], (column[1:] != column[:-1]) | (nan[1:] != nan[:-1]))))
+    sizes = np.diff(np.append(starts, n))
+    finite = ~nan[starts]
+
+    position = np.arange(n)
+    filled = np.where(nan, 0, values)
+    mins = np.repeat(np.minimum.reduceat(filled, starts), sizes)
+    maxs = np.repeat(np.maximum.reduceat(filled, starts), sizes)
+    min_pos = np.minimum.reduceat(np.where(filled == mins, position, n), starts)
+    max_pos = np.minimum.reduceat(np.where(filled == maxs, position, n), starts)
+
+    keep = np.concatenate((starts, (starts + sizes - 1)[finite], min_pos[finite], max_pos[finite]))
+    return np.unique(keep)
+
+
+def decimate_trace(times, values, npixels, x_range=None, pyramid=None, offset=0, trace=0):
+    """ Find the points of a line trace needed to draw it at a given number of pixel columns (see decimate_minmax)
+
+    With a min/max pyramid of the variable (see tplot_pyramid), only the candidate points from the pyramid
+    are decimated; offset is the index of the first point of the trace in the variable, and trace is the
+    column of the trace in the variable's data.
+    """
+    if pyramid is not None:
+        candidates = pyramid_minmax_indices(pyramid, offset, offset + len(values), npixels, trace=trace)
+        if candidates is not None:
+            candidates = candidates - offset
+            keep = decimate_minmax(times[candidates], values[candidates], npixels, x_range=x_range)
+            return candidates if keep is None else candidates[keep]
+    return decimate_minmax(times, values, npixels, x_range=x_range)
+
+
+def lineplot_connect_zoom(this_axis, line, times, values, npixels, pyramid=None, offset=0, trace=0):
+    """ Update a decimated line trace from the full resolution data when the visible time range changes
+
+    The existing line is updated in place with the points needed for the visible time range; they're found
+    with a binary search of the times (and from the variable's pyramid, if given; see decimate_trace),
+    and nothing is updated unless the set of visible points changes.
+    """
+    ns_times = np.asarray(times).astype('datetime64[ns]').astype(np.int64)
+    state = {"window": (0, len(ns_times))}
+    epoch = matplotlib.dates.date2num(np.datetime64("1970-01-01T00:00:00"))
+
+    def on_xlim_changed(axis):
+        xmin, xmax = axis.get_xlim()
+        start = (xmin - epoch)*86400e9
+        stop = (xmax - epoch)*86400e9
+
+        # the visible points, plus one on either side so the line continues off the edges
+        first = max(np.searchsorted(ns_times, start, side="left") - 1, 0)
+        last = min(np.searchsorted(ns_times, stop, side="right") + 1, len(ns_times))
+        if (first, last) == state["window"] or last - first < 2:
+            return
+        state["window"] = (first, last)
+
+        window_times = times[first:last]
+        window_values = values[first:last]
+        keep = decimate_trace(ns_times[first:last], window_values, npixels, x_range=[start, stop], pyramid=pyramid,
+                              offset=offset + first, trace=trace)
+        if keep is not None:
+            window_times = window_times[keep]
+            window_values = window_values[keep]
+        line.set_data(window_times, window_values)
+
+    this_axis.callbacks.connect("xlim_changed", on_xlim_changed)
+
+
 def get_trace_options(parent_array, start_trace=None, num_traces=1, repeat=False, fill=False, fillval=None):
     """ Get options for a set of traces from a parent array, extending or slicing as necessary to handle pseudovariable options
 
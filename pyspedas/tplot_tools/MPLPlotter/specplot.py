@@ -1,12 +1,15 @@
 import numpy as np
 from scipy.interpolate import interp1d
 import matplotlib as mpl
+import matplotlib.dates
 from datetime import datetime, timezone
 from matplotlib.colors import LinearSegmentedColormap
 import warnings
 import pyspedas
 import logging
 from copy import copy
+from pyspedas.tplot_tools.tplot_math.bin_reduce import bin_reduce
+from pyspedas.tplot_tools.tplot_pyramid import pyramid_reduce_times
 
 def get_bin_boundaries(bin_centers:np.ndarray, ylog:bool = False):
     """ Calculate a list of bin boundaries from a 1-D array of bin center values.
@@ -128,7 +131,7 @@ def specplot_make_1d_ybins(values: np.ndarray, vdata:np.ndarray, ylog:bool, min_
     Parameters
     ----------
     values : np.ndarray
-    A 2-D array of values to be plotted as a spectrogram
+    A 2-D array of values to be plotted as a spectrogram (may be None if no_regrid is True)
 
     vdata: np.ndarray
     A 1-d or 2-D array of values representing center values of Y axis bins.
@@ -165,95 +168,41 @@ def specplot_make_1d_ybins(values: np.ndarray, vdata:np.ndarray, ylog:bool, min_
     are allowed.
 
     """
-    #logging.info("Starting 1D vbins processing")
-    ntimes = values.shape[0]
-    bins_1d = False
+    if values is not None:
+        ntimes = values.shape[0]
+    else:
+        # only the bin boundaries are needed (no_regrid=True)
+        ntimes = vdata.shape[0] if len(vdata.shape) > 1 else 1
 
-    # Determine bin boundaries at each time step (or for all time, with 1-d bin center arrays),
+    # Determine bin boundaries for each distinct bin table (or for all time, with 1-d bin center arrays),
     # weeding out NaNs in the bin center values. Form the union of all the individual bin
-    # boundary sets (keeping the time-specific boundary sets, to use when rebinning later
-    # Also determine the direction of increase at each time step, and flag any time steps
+    # boundary sets (keeping the table-specific boundary sets, to use when rebinning later).
+    # Also determine the direction of increase of each table, and flag any time steps
     # where a direction cannot be determined.
 
     if len(vdata.shape) == 1:
-        #logging.info("Starting 1D vbins boundary processing")
-        bins_1d = True
-        result = get_bin_boundaries(vdata, ylog=ylog)
-        vdata_bins = result[0]
-        vdata_direction = result[1]
-        bin_boundaries_set = set(vdata_bins)
-        input_bin_center_count = len(vdata)
+        tables = vdata[np.newaxis, :]
+        table_index = np.zeros(ntimes, dtype=np.int64)
     else:  # 2-d V
-        #logging.info("Starting 2D vbins boundary processing")
-        bins_1d = False
-        input_bin_center_count = vdata.shape[1]
-        vdata_bins = np.zeros((ntimes, input_bin_center_count + 1), dtype=np.float64)
-        vdata_direction = np.zeros(ntimes, dtype=np.int64)
-
-        # The sentinel values are inserted because arrays with nans will not compare equal,
-        # even if the nans are in same places
-        sentinel = 1e31
-        result = get_bin_boundaries(vdata[0, :], ylog=ylog)
-        vdata_bins[0,:] = result[0]
-        vdatadir_thistime = result[1]
-        vdata_direction[0] = vdatadir_thistime
-        pbins = vdata_bins[0,:]
-        bin_boundaries_set = set(pbins)
-        p = np.copy(vdata[0,:])
-        p[np.where(~np.isfinite(p))] = sentinel
-        # Now that everything is initialized, go through each time index
-        # and maintain a set of all the bin boundaries seen so far.
-        for i in range(ntimes-1):
-            k = i+1
-            t=np.copy(vdata[k,:])
-            t[np.where(~np.isfinite(t))] = sentinel
-            diff=t-p
-            if np.any(diff):
-                # bin values have changed, recalculate boundaries and add to running set
-                #print(k)
-                result = get_bin_boundaries(vdata[k,:], ylog=ylog)
-                u = result[0]
-                vdatadir_thistime = result[1]
-                pbins = u
-                vdata_bins[k,:] = u
-                vdata_direction[k] = vdatadir_thistime
-                uset = set(u)
-                bin_boundaries_set = bin_boundaries_set | uset
-                p = t
-            else:
-                # bin values have not channged at this time step, use previously computed values
-                vdata_bins[k,:] = pbins
-                vdata_direction[k] = vdatadir_thistime
-
-    if bins_1d:
-        if vdata_direction == 1:
-            #print("1d bins are increasing")
-            pass
-        elif vdata_direction == -1:
-            #print("1d bins are decreasing")
-            pass
-        else:
+        tables, table_index = specplot_unique_bin_tables(vdata)
+
+    input_bin_center_count = tables.shape[1]
+    table_bins = np.zeros((len(tables), input_bin_center_count + 1), dtype=np.float64)
+    table_direction = np.zeros(len(tables), dtype=np.int64)
+    for i in range(len(tables)):
+        table_bins[i, :], table_direction[i] = get_bin_boundaries(tables[i, :], ylog=ylog)
+
+    if len(vdata.shape) == 1:
+        if table_direction[0] == 0:
             logging.warning("specplot_make_1d_ybins: Direction of increase of 1-D input bin centers are indeterminate (all-nan, all-same, or nonmonotonic)")
-            pass
     else:
-        inc_count = (vdata_direction == 1).sum()
-        dec_count = (vdata_direction == -1).sum()
-        ind_count = (vdata_direction == 0).sum()
-        #print("2d bins increasing: ", str(inc_count))
-        #print("2d bins decreasing: ", str(dec_count))
-        #print("2d bins indeterminate: ", str(ind_count))
+        ind_count = np.count_nonzero(table_direction[table_index] == 0)
         if ind_count > 0:
             logging.warning("specplot_make_1d_ybins: Direction of increase of input bin centers was indeterminate (all-nan, all-same, or non-monotonic) at %d of %d time indices.", ind_count, ntimes)
 
-    # Convert the bin boundary set back to an array
-    #logging.info("Done finding bin boundaries, sorting")
-    vdata_unsorted = np.array(list(bin_boundaries_set))
-
-    # Clean nans and sentinel values (e.g. may be present in FAST y bin values)
-    vdata_finite = [val for val in vdata_unsorted if np.isfinite(val)]
-
-    # Sort in ascending order
-    output_bin_boundaries = np.sort(vdata_finite)
+    # The union of the bin boundaries, in ascending order, without nans
+    # (or sentinel values, e.g. may be present in FAST y bin values)
+    output_bin_boundaries = np.unique(table_bins[np.isfinite(table_bins)])
 
     output_bin_boundary_len = len(output_bin_boundaries)
 
@@ -263,46 +212,30 @@ def specplot_make_1d_ybins(values: np.ndarray, vdata:np.ndarray, ylog:bool, min_
 
     ymax=output_bin_boundaries[output_bin_boundary_len-1]
     ymin=output_bin_boundaries[0]
-    yrange = ymax-ymin
-    #logging.info("Thinning bin boundaries")
     # With the default min_ratio, epsilon is about one pixel in the y direction for a typical plot size and dpi
     # If min_ratio is 0, the effect is that no bin boundaries will be discarded.
 
     if ylog:
         epsilon = (np.log10(ymax)-np.log10(ymin)) * min_ratio
+        scaled_boundaries = np.log10(output_bin_boundaries).tolist()
     else:
         epsilon = (ymax-ymin)*min_ratio
-    diff=output_bin_boundaries[1:]-output_bin_boundaries[:output_bin_boundary_len-1]
-
-    # logging.info("Specplot 1-D y bins before thinning: array size %d, yrange %f, smallest difference %f, epsilon %f,  ratio %f",len(output_bin_boundaries),yrange,np.min(diff),epsilon, (ymax-ymin)/np.min(diff))
-
-    last_val = output_bin_boundaries[0]
-    thinned_list = [output_bin_boundaries[0]]
-    for i in range(output_bin_boundary_len):
-        val = output_bin_boundaries[i]
-        if ylog:
-            diff = np.log10(val) - np.log10(last_val)
-        else:
-            diff = val-last_val
-        if abs(diff) > epsilon:
-            thinned_list.append(val)
+        scaled_boundaries = output_bin_boundaries.tolist()
+
+    # Each boundary is compared against the last one kept, so this is inherently sequential,
+    # but the union of the boundaries is small compared to the data
+    last_val = scaled_boundaries[0]
+    thinned = [0]
+    for i, val in enumerate(scaled_boundaries):
+        if abs(val - last_val) > epsilon:
+            thinned.append(i)
             last_val = val
 
-    output_bin_boundaries = np.array(thinned_list)
-
-    #logging.info("Done thinning bin boundaries")
+    output_bin_boundaries = output_bin_boundaries[thinned]
     output_bin_boundary_len = len(output_bin_boundaries)
-    # There could be NaNs (e.g. FAST)
-    ymax=output_bin_boundaries[output_bin_boundary_len-1]
-    ymin=output_bin_boundaries[0]
-    yrange = ymax-ymin
-    diff=output_bin_boundaries[1:]-output_bin_boundaries[:output_bin_boundary_len-1]
-
-    # logging.info("Specplot 1-D y bins after thinning: array size %d, yrange %f, smallest difference %f, epsilon %f,  ratio %f",len(output_bin_boundaries),yrange,np.min(diff),epsilon, (ymax-ymin)/np.min(diff))
 
     if no_regrid:
         return output_bin_boundaries
-    #logging.info("Started rebinning (new style)")
     if values.dtype.kind == 'f':
         fill = np.nan
     else:
@@ -312,60 +245,109 @@ def specplot_make_1d_ybins(values: np.ndarray, vdata:np.ndarray, ylog:bool, min_
     # and combined bin boundaries.
 
     # The output value array should have a y dimension one less than the bin boundary count
-    out_values = np.zeros((ntimes, output_bin_boundary_len - 1), dtype=values.dtype)
-    out_values[:,:] = fill
+    out_values = np.full((ntimes, output_bin_boundary_len - 1), fill, dtype=values.dtype)
 
     # Note that output_bin_boundaries is always monotonically increasing, but
-    # vdata_bins (the original inputs) can be monotonically decreasing
-
-    for time_index in range(ntimes):
-        if len(vdata.shape) == 1:
-            input_bin_boundaries = vdata_bins
-            input_bin_centers = vdata
-            direction = vdata_direction
-        else:
-            input_bin_boundaries = vdata_bins[time_index, :]
-            input_bin_centers = vdata[time_index,:]
-            direction = vdata_direction[time_index]
-
-        #print("Time index: " + str(time_index))
-        #print("Input bin boundaries:")
-        #print(input_bin_boundaries)
-        #print("Input bin centers")
-        #print(input_bin_centers)
-        #print("Output bin boundaries")
-        #print(output_bin_boundaries)
-        #print("Data values at time step:")
-        #print(values[time_index,:])
-        if direction == 1:
-            # Increasing bin values
-            lower_bound_indices = np.searchsorted(output_bin_boundaries, input_bin_boundaries[0:-1],side="left")
-            upper_bound_indices = np.searchsorted(output_bin_boundaries, input_bin_boundaries[1:],side="left")
-        elif direction == -1:
-            lower_bound_indices = np.searchsorted(output_bin_boundaries, input_bin_boundaries[1:],side="left")
-            upper_bound_indices = np.searchsorted(output_bin_boundaries, input_bin_boundaries[0:-1],side="left")
-        else:
+    # the original bin boundaries can be monotonically decreasing.
+    # For each bin table, map each output bin to the input bin it's filled from, then
+    # fill all the time steps using that table at once.
+    order = np.argsort(table_index, kind='stable')
+    group_starts = np.searchsorted(table_index[order], np.arange(len(tables) + 1))
+    for i in range(len(tables)):
+        rows = order[group_starts[i]:group_starts[i+1]]
+        if len(rows) == 0:
             continue
-        #print("Lower bound indices:")
-        #print(lower_bound_indices)
-        #print("Upper bound indices")
-        #print(upper_bound_indices)
-
-        for i in range(input_bin_center_count):
-            if not np.isfinite(input_bin_centers[i]):
-                pass
-            else:
-                #print("input bin index: " + str(i))
-                #print("input bin center: " + str(input_bin_centers[i]))
-                #print("output lower bound index: " + str(lower_bound_indices[i]))
-                #print("output upper bound index: " + str(upper_bound_indices[i]))
-                #print("output bin value range: " + str(output_bin_boundaries[lower_bound_indices[i]:upper_bound_indices[i]+1]))
-                out_values[time_index,lower_bound_indices[i]:upper_bound_indices[i]] = values[time_index, i]
-                #print(out_values)
-    #logging.info("Done making 1D Y bins")
+        source = specplot_bin_map(tables[i, :], table_bins[i, :], table_direction[i], output_bin_boundaries)
+        if source is None:
+            continue
+        columns = np.flatnonzero(source >= 0)
+        if len(columns) == 0:
+            continue
+        if len(rows) == ntimes:
+            out_values[:, columns] = values[:, source[columns]]
+        else:
+            out_values[np.ix_(rows, columns)] = values[np.ix_(rows, source[columns])]
 
     return out_values, output_bin_boundaries
 
+
+def specplot_unique_bin_tables(vdata: np.ndarray):
+    """ Find the distinct bin tables in a 2-D (time-varying) array of bin centers
+
+    Parameters
+    ----------
+    vdata: np.ndarray
+    A 2-D array of Y bin center values, [time, bin]
+
+    Returns
+    -------
+    tuple
+    tables: np.ndarray
+        The distinct rows of vdata
+    table_index: np.ndarray
+        For each time step, the index of its row in tables
+
+    """
+    # Non-finite values are replaced by a sentinel, since rows with nans will not compare equal,
+    # even if the nans are in same places
+    sentinel = 1e31
+    keys = np.where(np.isfinite(vdata), vdata, sentinel).astype(np.float64)
+
+    # Bin tables usually change rarely, so only compare the rows where the table changes
+    changed = np.concatenate(([True], np.any(keys[1:] != keys[:-1], axis=1)))
+    run_starts = np.flatnonzero(changed)
+    run_index = np.cumsum(changed) - 1
+
+    # Hash the rows by viewing each one as a single opaque value (normalizing -0.0 to 0.0 first)
+    run_keys = np.ascontiguousarray(keys[run_starts] + 0.0)
+    row_view = run_keys.view(np.dtype((np.void, run_keys.dtype.itemsize*run_keys.shape[1]))).ravel()
+    _, first, inverse = np.unique(row_view, return_index=True, return_inverse=True)
+
+    tables = vdata[run_starts[first]]
+    return tables, inverse.ravel()[run_index]
+
+
+def specplot_bin_map(bin_centers: np.ndarray, bin_boundaries: np.ndarray, direction: int, output_bin_boundaries: np.ndarray):
+    """ Map the output bins of specplot_make_1d_ybins to the input bins of a single bin table
+
+    Parameters
+    ----------
+    bin_centers: np.ndarray
+    Input bin center values
+
+    bin_boundaries: np.ndarray
+    Input bin boundaries, from get_bin_boundaries
+
+    direction: int
+    Direction of increase of the input bins, from get_bin_boundaries
+
+    output_bin_boundaries: np.ndarray
+    Output bin boundaries, in ascending order
+
+    Returns
+    -------
+    np.ndarray
+        For each output bin, the index of the input bin whose value it takes, or -1
+        if it's not covered by any (finite) input bin; None if the direction is indeterminate
+
+    """
+    if direction == 1:
+        # Increasing bin values
+        lower_bound_indices = np.searchsorted(output_bin_boundaries, bin_boundaries[0:-1], side="left")
+        upper_bound_indices = np.searchsorted(output_bin_boundaries, bin_boundaries[1:], side="left")
+    elif direction == -1:
+        lower_bound_indices = np.searchsorted(output_bin_boundaries, bin_boundaries[1:], side="left")
+        upper_bound_indices = np.searchsorted(output_bin_boundaries, bin_boundaries[0:-1], side="left")
+    else:
+        return None
+
+    # Later input bins take precedence where the ranges overlap
+    source = np.full(len(output_bin_boundaries) - 1, -1, dtype=np.int64)
+    for i in np.flatnonzero(np.isfinite(bin_centers)):
+        source[lower_bound_indices[i]:upper_bound_indices[i]] = i
+    return source
+
+
 def specplot(
     var_data,
     var_times,
@@ -379,6 +361,9 @@ def specplot(
     variable,
     time_idxs=None,
     style=None,
+    decimate_pixels=None,
+    x_range=None,
+    pyramid=None,
 ):
     """
     Plot a tplot variable as a spectrogram
@@ -409,6 +394,17 @@ def specplot(
         The indices of the subset of times to use for this plot. Defaults to None (plot all timestamps).
     style
         A matplotlib style object to be used for this plot. Defaults to None.
+    decimate_pixels: int
+        If provided, spectrograms with many more time steps than this number of pixel columns are reduced
+        to one time step per column (averaging, or the maximum with the 'spec_decimate' option set to 'max'),
+        and spectrograms with linear Y axes are drawn as images rather than meshes. The data are reduced again
+        for the visible time range when the panel is zoomed. Defaults to None (draw every time step as a mesh).
+    x_range: np.ndarray
+        The [start, stop] times (datetime64) of the panel, used to determine the pixel columns. Defaults to None
+        (the time range of the data).
+    pyramid: list of dict
+        The mean pyramid of the variable (see tplot_pyramid), used to reduce the time steps without scanning every
+        time step, if the bin centers don't vary with time; time_idxs must be contiguous. Defaults to None.
 
     Returns
     -------
@@ -430,7 +426,8 @@ def specplot(
     #logging.info("ylog_str is " + str(ylog_str))
     #logging.info("zlog_str is " + str(zlog_str))
 
-    yrange = yaxis_options["y_range"]
+    # copy the range, so the plot options aren't modified
+    yrange = list(yaxis_options["y_range"])
     if yrange[0] is None or not np.isfinite(yrange[0]):
         yrange[0] = None
     if yrange[1] is None or not np.isfinite(yrange[1]):
@@ -448,21 +445,22 @@ def specplot(
 
     # Clean up any fill values in data array
     #set -1.e31 fill values to NaN, jmjm, 2024-02-29
-    ytp = np.where(var_data.y==-1.e31,np.nan,var_data.y)
-    var_data.y[:,:] = ytp[:,:]
+    # (var_data may be a view of the stored variable, so it's only copied if there are fill values)
+    zvalues = var_data.y
+    zfill = zvalues == -1.e31
+    if np.any(zfill):
+        zvalues = np.where(zfill, np.nan, zvalues)
 
     if zlog:
-        zmin = np.nanmin(var_data.y)
-        zmax = np.nanmax(var_data.y)
         # gracefully handle the case of all NaNs in the data, but log scale set
         # all 0 is also a problem, causes a crash later when creating the colorbar
-        if np.isnan(var_data.y).all():
+        if np.isnan(zvalues).all():
             # no need to set a log scale if all the data values are NaNs, or all zeroes
             spec_options["norm"] = None
             spec_options["vmin"] = zrange[0]
             spec_options["vmax"] = zrange[1]
             logging.info("Variable %s contains all-NaN data", variable)
-        elif not np.any(var_data.y):
+        elif not np.any(zvalues):
             # properly handle all 0s in the data
             spec_options["norm"] = None
             spec_options["vmin"] = zrange[0]
@@ -495,7 +493,6 @@ def specplot(
 
     spec_options["cmap"] = cmap
 
-    input_zdata = var_data.y[time_idxs, :]
     input_times = var_data.times[time_idxs]
 
     # Figure out which attribute to use for Y bin centers
@@ -521,16 +518,34 @@ def specplot(
         return
 
     # Clean up any fill values in bin center array
-    vtp = np.where(input_bin_centers == -1.e31, np.nan, input_bin_centers)
-    if len(vtp.shape) == 1:
-        input_bin_centers[:] = vtp[:]
-    else:
-        input_bin_centers[:, :] = vtp[:, :]
+    vfill = input_bin_centers == -1.e31
+    if np.any(vfill):
+        input_bin_centers = np.where(vfill, np.nan, input_bin_centers)
 
     if len(input_bin_centers.shape) > 1:
         # time varying 'v', need to limit the values to those within the requested time range
         input_bin_centers = input_bin_centers[time_idxs, :]
 
+    # For long intervals, there can be many more time steps than pixels; the time axis is reduced to the
+    # panel's resolution before any interpolation or rendering
+    spec_decimate = plot_extras.get("spec_decimate")
+    if spec_decimate is None:
+        spec_decimate = "mean"
+    column_range = None
+    if x_range is not None:
+        column_range = np.asarray(x_range).astype("datetime64[ns]").astype(np.int64) / 1e9
+
+    # With a pyramid (and bin centers that don't vary with time), the time steps are reduced from the
+    # pyramid's blocks, and only the reduced data need to be regridded
+    pyramid_reduced = None
+    if pyramid is not None and decimate_pixels is not None and len(input_bin_centers.shape) == 1:
+        pyramid_reduced = pyramid_reduce_times(pyramid, var_data.times, var_data.y, time_idxs[0], time_idxs[-1] + 1,
+                                               decimate_pixels, method=spec_decimate, trange=column_range)
+    if pyramid_reduced is not None:
+        input_zdata = pyramid_reduced[1]
+    else:
+        input_zdata = zvalues[time_idxs, :]
+
     # This call flattens any time-varying bin boundaries into a 1-d list (out_vdata)
     # and regrids the data array to the new y bin count (regridded_zdata)
 
@@ -558,20 +573,44 @@ def specplot(
 
     #could also have a fill in yrange
     #    if yrange[0] == -1e31: #This does not work sometimes?
-    if yrange[0] < -0.9e31:
+    if yrange[0] is not None and yrange[0] < -0.9e31:
         yrange[0] = vmin
-    if yrange[1] < -0.9e31:
+    if yrange[1] is not None and yrange[1] < -0.9e31:
         yrange[1] = vmax
 
 
     #logging.info("Starting specplot time boundary processing")
     input_unix_times = np.int64(input_times) / 1e9
-    result = get_bin_boundaries(input_unix_times)
+
+    # window_data returns the (reduced) times and values to draw for a range of time steps, when zooming
+    window_data = None
+    if pyramid_reduced is not None:
+        full_unix_times = input_unix_times
+        input_unix_times = pyramid_reduced[0]
+        window_data = specplot_pyramid_window(pyramid, var_data, zvalues, time_idxs[0], full_unix_times,
+                                              input_bin_centers, ylog, decimate_pixels, spec_decimate)
+    elif decimate_pixels is not None:
+        reduced = specplot_reduce_times(input_unix_times, regridded_zdata, decimate_pixels, method=spec_decimate, trange=column_range)
+        if reduced is not None:
+            full_unix_times = input_unix_times
+            full_zdata = regridded_zdata
+            input_unix_times, regridded_zdata = reduced
+
+            def window_data(first, last, start, stop):
+                times = full_unix_times[first:last]
+                values = full_zdata[first:last]
+                window_pixels = decimate_pixels*(times[-1] - times[0])/(stop - start)
+                reduced = specplot_reduce_times(times, values, max(window_pixels, 1), method=spec_decimate)
+                return (times, values) if reduced is None else reduced
+
     # For pcolormesh, we also want bin boundaries (not center values) on the time axis
-    time_boundaries_dbl = result[0]
-    time_boundaries_ns = np.int64(time_boundaries_dbl*1e9)
-    # Now back to numpy datetime64
-    time_boundaries = np.array(time_boundaries_ns, dtype='datetime64[ns]')
+    time_boundaries = specplot_time_boundaries(input_unix_times)
+    if window_data is not None:
+        # the outer boundaries of reduced time steps are extrapolated from the column times; make sure they
+        # still cover all of the time steps, as the boundaries of the unreduced time steps do
+        time_span = np.array(np.int64(full_unix_times[[0, -1]]*1e9), dtype="datetime64[ns]")
+        time_boundaries[0] = min(time_boundaries[0], time_span[0])
+        time_boundaries[-1] = max(time_boundaries[-1], time_span[1])
     #logging.info("Done with specplot initial processing")
     # If the user set a yrange with the 'options' command, nothing is needed here
     # since tplot takes care of it.   If not, set it here to the min/max finite bin
@@ -601,7 +640,7 @@ def specplot(
             zdata[zdata == np.nan] = 0.0
 
             # convert to floats for the interpolation
-            spec_unix_times = np.int64(var_data.times[time_idxs]) / 1e9
+            spec_unix_times = input_unix_times
 
             # interpolate in the x-direction
             interp_func = interp1d(
@@ -619,10 +658,7 @@ def specplot(
                 regridded_zdata = 10**regridded_zdata
 
             # Convert time bin centers to bin boundaries
-            result = get_bin_boundaries(out_times, ylog=False)
-            # Convert unix times back to np.datetime64[ns] objects
-            unix_time_boundaries_int64 = np.int64(result[0]*1e9)
-            time_boundaries = np.array(unix_time_boundaries_int64, dtype="datetime64[ns]")
+            time_boundaries = specplot_time_boundaries(out_times)
 
     if yaxis_options.get("y_interp") is not None:
         y_interp = yaxis_options["y_interp"]
@@ -684,17 +720,15 @@ def specplot(
     if zlog:
         regridded_zdata[regridded_zdata < 0.0] = 0.0
 
-    ylim_before = this_axis.get_ylim()
-    # create the spectrogram (ignoring warnings)
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore")
-        #logging.info("Starting pcolormesh")
-        im = this_axis.pcolormesh(time_boundaries, bin_boundaries_1d.T, regridded_zdata.T, **spec_options)
-        #logging.info("Done with pcolormesh")
-    ylim_after = this_axis.get_ylim()
+    # Images are only placed correctly on linear axes, so log Y axes always use pcolormesh
+    image = decimate_pixels is not None and not ylog
 
-    #logging.info("ylim before pcolormesh: %s ",str(ylim_before))
-    #logging.info("ylim after pcolormesh: %s", str(ylim_after))
+    # create the spectrogram
+    im = specplot_draw(this_axis, time_boundaries, bin_boundaries_1d, regridded_zdata, spec_options, image)
+
+    # Re-rasterize the visible time range from the full resolution data when zooming
+    if window_data is not None and not yaxis_options.get("x_interp") and not yaxis_options.get("y_interp"):
+        specplot_connect_zoom(this_axis, im, full_unix_times, bin_boundaries_1d, image, window_data)
 
     # store everything needed to create the colorbars
     colorbars[variable] = {}
@@ -703,3 +737,135 @@ def specplot(
     colorbars[variable]["ztitle"] = ztitle
     colorbars[variable]["zsubtitle"] = zsubtitle
     return True
+
+
+def specplot_time_boundaries(unix_times: np.ndarray):
+    """ Convert spectrogram time step centers (unix times) to time bin boundaries (np.datetime64[ns])
+    """
+    result = get_bin_boundaries(unix_times)
+    return np.array(np.int64(result[0]*1e9), dtype="datetime64[ns]")
+
+
+def specplot_reduce_times(unix_times: np.ndarray, zdata: np.ndarray, npixels, method: str = "mean", trange=None):
+    """ Reduce the time axis of a spectrogram to at most one time step per pixel column
+
+    Parameters
+    ----------
+    unix_times: np.ndarray
+    Sorted times of the spectrogram (unix times)
+
+    zdata: np.ndarray
+    Spectrogram values, [time, bin]
+
+    npixels: int
+    Number of pixel columns spanned by trange
+
+    method: str
+    'mean' to average the values in each column, or 'max' to take the maximum (NaNs are ignored)
+
+    trange: list of float
+    Unix times spanned by the pixel columns. Defaults to None (the time range of the data).
+
+    Returns
+    -------
+    tuple
+    times: np.ndarray
+        Mean time of the time steps in each (non-empty) column
+    values: np.ndarray
+        Reduced values of each (non-empty) column
+    Returns None if there are too few time steps to benefit from the reduction.
+
+    """
+    ntimes = len(unix_times)
+    npixels = int(npixels)
+    if npixels < 1 or ntimes <= 2*npixels:
+        return None
+
+    if trange is None:
+        start, stop = unix_times[0], unix_times[-1]
+    else:
+        start, stop = trange[0], trange[1]
+    if not stop > start:
+        return None
+
+    column = np.clip(np.floor((unix_times - start)/(stop - start)*npixels), 0, npixels - 1).astype(np.int64)
+    values = bin_reduce(column, zdata, npixels, method=method)
+    if values is None:
+        return None
+
+    # empty columns are dropped, so the neighboring time steps stretch to cover them, as with the unreduced data
+    counts = np.bincount(column, minlength=npixels)
+    filled = counts > 0
+    times = np.bincount(column, weights=unix_times - start, minlength=npixels)[filled]/counts[filled] + start
+    return times, values[filled]
+
+
+def specplot_draw(this_axis, time_boundaries, bin_boundaries_1d, zdata, spec_options, image=False):
+    """ Draw a spectrogram, as an image (uniform or rectilinear grid) if image is True, otherwise as a mesh
+    """
+    # ignore warnings (e.g. all-NaN data)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        if image:
+            # pcolorfast draws near-uniform grids with imshow, and other rectilinear grids as a PcolorImage
+            this_axis.xaxis.update_units(time_boundaries)
+            image_options = {key: value for key, value in spec_options.items() if key != "shading"}
+            return this_axis.pcolorfast(this_axis.convert_xunits(time_boundaries), bin_boundaries_1d, zdata.T, **image_options)
+        return this_axis.pcolormesh(time_boundaries, bin_boundaries_1d.T, zdata.T, **spec_options)
+
+
+def specplot_pyramid_window(pyramid, var_data, zvalues, offset, unix_times, bin_centers, ylog, npixels, method):
+    """ Return a function that reduces a range of time steps of a spectrogram from its pyramid, for zooming
+
+    The range (first to last-1) is relative to offset; if it has too few time steps to use the pyramid, the
+    time steps are regridded and reduced directly.
+    """
+    def window_data(first, last, start, stop):
+        window_pixels = max(npixels*(unix_times[last - 1] - unix_times[first])/(stop - start), 1)
+        reduced = pyramid_reduce_times(pyramid, var_data.times, var_data.y, offset + first, offset + last,
+                                       window_pixels, method=method)
+        if reduced is not None:
+            return reduced[0], specplot_make_1d_ybins(reduced[1], bin_centers, ylog)[0]
+        times = unix_times[first:last]
+        values = specplot_make_1d_ybins(zvalues[offset + first:offset + last], bin_centers, ylog)[0]
+        reduced = specplot_reduce_times(times, values, window_pixels, method=method)
+        return (times, values) if reduced is None else reduced
+    return window_data
+
+
+def specplot_connect_zoom(this_axis, im, unix_times, bin_boundaries_1d, image, window_data):
+    """ Redraw a reduced spectrogram from the full resolution data when the visible time range changes
+
+    Only the time steps in the visible range are reduced, by window_data(first, last, start, stop), which
+    returns the times and values to draw for time steps first to last-1 (visible from start to stop); they're
+    found with a binary search of the times, and nothing is redrawn unless the set of visible time steps changes.
+    """
+    state = {"im": im, "window": (0, len(unix_times))}
+    epoch = matplotlib.dates.date2num(np.datetime64("1970-01-01T00:00:00"))
+
+    def on_xlim_changed(axis):
+        xmin, xmax = axis.get_xlim()
+        start = (xmin - epoch)*86400.0
+        stop = (xmax - epoch)*86400.0
+
+        # the visible time steps, plus one on either side so the edges are covered
+        first = max(np.searchsorted(unix_times, start, side="left") - 1, 0)
+        last = min(np.searchsorted(unix_times, stop, side="right") + 1, len(unix_times))
+        if (first, last) == state["window"] or last - first < 2:
+            return
+        state["window"] = (first, last)
+
+        times, values = window_data(first, last, start, stop)
+
+        # keep the color scale of the original plot
+        old = state["im"]
+        options = {"norm": old.norm, "cmap": old.cmap, "alpha": old.get_alpha()}
+        if not image:
+            options["shading"] = "auto"
+        old.remove()
+        state["im"] = specplot_draw(axis, specplot_time_boundaries(times), bin_boundaries_1d, values, options, image)
+        # Adding the new artist requests an autoscale; resolve it now, while autoscaling is off for this axis,
+        # rather than letting a shared axis (whose limits are updated after this callback) apply it
+        axis.get_xlim()
+
+    this_axis.callbacks.connect("xlim_changed", on_xlim_changed)
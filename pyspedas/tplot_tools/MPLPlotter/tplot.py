@@ -7,10 +7,9 @@ from matplotlib import pyplot as plt
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 import pyspedas
 from fnmatch import filter as tname_filter
-from time import sleep
 from pyspedas.tplot_tools import tplot_wildcard_expand, tname_byindex, get_data, var_label_panel
 from pyspedas.tplot_tools import lineplot, count_traces, makegap
-from pyspedas.tplot_tools import specplot, specplot_make_1d_ybins, reduce_spec_dataset
+from pyspedas.tplot_tools import specplot, specplot_make_1d_ybins, reduce_spec_dataset, tplot_pyramid
 from pyspedas.tplot_tools import get_var_label_ticks
 from .save_plot import save_plot
 
@@ -22,7 +21,7 @@ munits.registry[np.datetime64] = converter
 munits.registry[date] = converter
 munits.registry[datetime] = converter
 
-def pseudovar_component_props(varname: str):
+def pseudovar_component_props(varname: str, dat=None):
     """ Return or calculate the plot properties for a single normal tplot variable
 
 
@@ -30,6 +29,8 @@ def pseudovar_component_props(varname: str):
     ----------
     varname: str
         Name of the tplot variable to inspect
+    dat: tuple
+        The data of the variable, as returned by get_data, if already available. Default: None (call get_data)
 
     Returns
     -------
@@ -57,7 +58,8 @@ def pseudovar_component_props(varname: str):
         yrange=[None, None]
 
     plot_extras = attrs['plot_options']['extras']
-    dat = get_data(varname)
+    if dat is None:
+        dat = get_data(varname)
 
     if ylog is None or ylog is False or ylog == '' or ylog.lower() == 'linear':
         output_dict['ylog'] = False
@@ -128,7 +130,7 @@ def pseudovar_component_props(varname: str):
             output_dict['ymax'] = np.nanmax(dat.y)
     return output_dict
 
-def gather_pseudovar_props(pseudovars:list[str]):
+def gather_pseudovar_props(pseudovars:list[str], render_plan=None):
     """ Inspect the components of a pseudovariable to determine plot limits and other settings
 
     If any component has y or z ranges/scales set, they will be used, otherwise limits will be determined from
@@ -141,6 +143,8 @@ def gather_pseudovar_props(pseudovars:list[str]):
     ----------
     pseudovars: list[str]
         List of tplot composite variable components to inspect
+    render_plan: dict
+        Data already retrieved for the components, from tplot_render_plan. Default: None (call get_data)
 
     Returns
     -------
@@ -168,7 +172,10 @@ def gather_pseudovar_props(pseudovars:list[str]):
 
 
     for var in pseudovars:
-        props = pseudovar_component_props(var)
+        dat = None
+        if render_plan is not None and render_plan.get(var) is not None:
+            dat = render_plan[var]['raw']
+        props = pseudovar_component_props(var, dat=dat)
         #print(f"{var}: is_spec: {props['is_spec']} ymin: {props['ymin']} ymax: {props['ymax']} ylog: {props['ylog']} zmin: {props['zmin']} zmax: {props['zmax']} zlog: {props['zlog']}")
         if props['is_spec']:
             output_dict['has_spec_plots'] = True
@@ -191,6 +198,56 @@ def gather_pseudovar_props(pseudovars:list[str]):
     return output_dict
 
 
+def tplot_render_plan(variables, render_plan=None):
+    """ Retrieve the data for a set of tplot panels, including the components of any pseudovariables
+
+    Each variable's data is retrieved once, as read-only views of the stored arrays (plotting routines
+    copy anything they need to modify), and variables with more than two dimensions are reduced for
+    plotting as spectrograms (the reduced data are cached until the variable's data change).
+
+    Parameters
+    ----------
+    variables: list of str
+        Names of the tplot variables to be plotted
+    render_plan: dict
+        A render plan to add the variables to. Default: None (create a new one)
+
+    Returns
+    -------
+    dict
+        Dictionary keyed by variable name; each entry is a dictionary with the keys:
+            data: the data to plot (as returned by get_data with dt=True)
+            raw: the data before any reduction of extra dimensions
+            metadata: the variable's metadata
+    """
+    if render_plan is None:
+        render_plan = {}
+
+    for variable in variables:
+        if variable in render_plan:
+            continue
+        raw = get_data(variable, dt=True)
+        var_data = raw
+        # Check for a 3d variable, call reduce_spec_dataset
+        if hasattr(raw, 'v1') and hasattr(raw, 'v2'):
+            temp_dq = reduce_spec_dataset(name=variable, use_cache=True)
+            var_data = get_data(variable, dt=True, data_quant_in=temp_dq)
+        render_plan[variable] = {'data': var_data, 'raw': raw, 'metadata': get_data(variable, metadata=True)}
+
+        # resolve the components of pseudovariables as well
+        components = None
+        if isinstance(raw, list) or isinstance(raw, str):
+            components = raw.split(' ') if isinstance(raw, str) else raw
+        else:
+            var_quants = pyspedas.tplot_tools.data_quants.get(variable)
+            if var_quants is not None and not isinstance(var_quants, dict):
+                components = var_quants.attrs['plot_options'].get('overplots_mpl')
+        if components is not None and len(components) > 0:
+            tplot_render_plan(components, render_plan)
+
+    return render_plan
+
+
 def tplot(variables,
           trange=None,
           var_label=None,
@@ -215,7 +272,9 @@ def tplot(variables,
           pseudo_extra_options=None,
           show_colorbar=True,
           slice=False,
-          return_plot_objects=False):
+          return_plot_objects=False,
+          decimate=None,
+          render_plan=None):
     """
     Plot tplot variables to the display, or as saved files, using Matplotlib
 
@@ -281,6 +340,14 @@ def tplot(variables,
             If True, show an interactive window with a plot of Z versus Y values for the X axis (time) value under the cursor. Default: False
         return_plot_objects: bool, optional
             If true, returns the matplotlib fig and axes objects for further manipulation. Default: False
+        decimate: bool, optional
+            If True, line traces with many more points than the panel has pixel columns are reduced to the
+            per-column minimum and maximum values (preserving spikes and gaps) before plotting, and spectrograms
+            are reduced to one time step per pixel column (and drawn as images if their Y axis is linear). Set to False
+            to plot every point, e.g. for publication-exact output. Default: the global 'decimate' option
+            set with tplot_options (True if not set)
+        render_plan: dict, optional
+            In recursive calls for rendering composite variables, the data retrieved by tplot_render_plan for all panels.
 
     Returns
     -------
@@ -394,9 +461,12 @@ def tplot(variables,
 
     colorbars = {}
 
+    # Retrieve the data for all of the panels up front
+    render_plan = tplot_render_plan(variables, render_plan)
+
     for idx, variable in enumerate(variables):
-        var_data_org = get_data(variable, dt=True)
-        var_metadata = get_data(variable, metadata=True)
+        var_data = render_plan[variable]['data']
+        var_metadata = render_plan[variable]['metadata']
 
         # reset all plot options to None for this iteration
         xaxis_options = dict()
@@ -405,16 +475,11 @@ def tplot(variables,
         line_opts = dict()
         plot_extras = dict()
 
-        #Check for a 3d variable, call reduce_spec_dataset
-        if hasattr(var_data_org, 'v1') and hasattr(var_data_org, 'v2'):
-            temp_dq = reduce_spec_dataset(name=variable)
-            var_data_org = get_data(variable, dt=True, data_quant_in=temp_dq)
-        
-        if var_data_org is None:
+        if var_data is None:
             logging.info('Variable not found: ' + variable)
             continue
 
-        var_data = copy.deepcopy(var_data_org)
+        # var_data contains read-only views of the stored data, which the plotting routines don't modify
 
         # plt.subplots returns a list of axes for multiple panels
         # but only a single axis for a single panel
@@ -477,7 +542,7 @@ def tplot(variables,
                     line_opts = var_quants.attrs['plot_options']['line_opt']
 
             traces_processed = 0
-            pseudovar_props = gather_pseudovar_props(pseudo_vars)
+            pseudovar_props = gather_pseudovar_props(pseudo_vars, render_plan=render_plan)
             #
             # Determine which Y axis options need to be changed to accommodate multiple component variables
             # There might be line variables and spectra, each with their own overall yscale and yrange.
@@ -550,7 +615,9 @@ def tplot(variables,
                 if not var_is_spec:
                     # Do not propagate spec flag or spec_dims_to_plot for non-spec base variables
                     # But we do want to propagate some other options, like line colors
+                    # (copied, so the pseudovariable's options aren't modified)
                     if this_plot_extras is not None:
+                        this_plot_extras = dict(this_plot_extras)
                         this_plot_extras["spec"] = False
                         this_plot_extras["spec_dim_to_plot"] = None
                 this_zaxis_options = zaxis_options if var_is_spec else None
@@ -565,7 +632,9 @@ def tplot(variables,
                       pseudo_xaxis_options=xaxis_options, pseudo_yaxis_options=yaxis_options, pseudo_zaxis_options=this_zaxis_options,
                       pseudo_line_options=line_opts, pseudo_extra_options=this_plot_extras,
                       pseudo_right_axis=pseudo_right_axis,
-                      show_colorbar=pseudo_show_colorbar)
+                      show_colorbar=pseudo_show_colorbar,
+                      decimate=decimate,
+                      render_plan=render_plan)
                 traces_processed += trace_count_thisvar
             
 
@@ -583,6 +652,7 @@ def tplot(variables,
                 var_data = makegap(var_data, dt = pyspedas.tplot_tools.tplot_opt_glob['data_gap'])
 
         # set the x-axis range, if it was set with xlim or tlimit or the trange parameter
+        x_range = None
         if trange is None and pyspedas.tplot_tools.tplot_opt_glob.get('x_range') is None:
             var_data_times = var_data.times
             time_idxs = np.arange(len(var_data_times))
@@ -591,10 +661,9 @@ def tplot(variables,
                 if len(trange) != 2:
                     logging.error('Invalid trange setting: must be a 2-element list or array')
                     return
-                if isinstance(trange[0], str):
-                    x_range = pyspedas.tplot_tools.time_double(trange) # seconds since epoch
-                    x_range_start = x_range[0]
-                    x_range_stop = x_range[1]
+                x_range = pyspedas.tplot_tools.time_double(trange) # seconds since epoch
+                x_range_start = x_range[0]
+                x_range_stop = x_range[1]
             else:
                 x_range = pyspedas.tplot_tools.tplot_opt_glob['x_range']  # Seconds since epoch
                 x_range_start = x_range[0]
@@ -700,8 +769,8 @@ def tplot(variables,
 
         user_set_yrange = yaxis_options.get('y_range_user')
         if user_set_yrange is not None:
-            # the user has set the yrange manually
-            yrange = yaxis_options['y_range']
+            # the user has set the yrange manually (copied, so the plot options aren't modified)
+            yrange = list(yaxis_options['y_range'])
             if not np.isfinite(yrange[0]):
                 yrange[0] = None
             if not np.isfinite(yrange[1]):
@@ -778,14 +847,32 @@ def tplot(variables,
         if plot_extras.get('spec') is not None:
             spec = plot_extras['spec']
 
+        decimate_pixels = None
+        if decimate is None:
+            decimate = pyspedas.tplot_tools.tplot_opt_glob.get('decimate', True)
+        if decimate:
+            # number of pixel columns in this panel, at the display or output resolution
+            decimate_pixels = this_axis.get_position().width*fig.get_figwidth()*max(fig.dpi, dpi if dpi is not None else 0)
+
+        # multi-resolution summary of the variable (if enabled with the 'pyramid' option); only usable if
+        # the plotted data are the stored data (not reduced from more dimensions, or with gaps inserted),
+        # and the plotted time steps are contiguous
+        pyramid = None
+        if decimate_pixels is not None and plot_extras.get('pyramid') and len(time_idxs) > 0 \
+                and var_data is render_plan[variable]['data'] and var_data is render_plan[variable]['raw'] \
+                and time_idxs[-1] - time_idxs[0] + 1 == len(time_idxs):
+            pyramid = tplot_pyramid(variable, kind='mean' if spec else 'minmax')
+
         if spec:
             # create spectrogram plots
-            plot_created = specplot(var_data, var_times, this_axis, yaxis_options, zaxis_options, plot_extras, colorbars, axis_font_size, fig, variable, time_idxs=time_idxs, style=style)
+            plot_created = specplot(var_data, var_times, this_axis, yaxis_options, zaxis_options, plot_extras, colorbars, axis_font_size, fig, variable, time_idxs=time_idxs, style=style,
+                                    decimate_pixels=decimate_pixels, x_range=x_range, pyramid=pyramid)
             if not plot_created:
                 continue
         else:
             # create line plots
-            plot_created = lineplot(var_data, var_times, this_axis, line_opts, yaxis_options, plot_extras, running_trace_count=running_trace_count, time_idxs=time_idxs, style=style, var_metadata=var_metadata)
+            plot_created = lineplot(var_data, var_times, this_axis, line_opts, yaxis_options, plot_extras, running_trace_count=running_trace_count, time_idxs=time_idxs, style=style, var_metadata=var_metadata,
+                                    decimate_pixels=decimate_pixels, x_range=x_range, pyramid=pyramid)
             if not plot_created:
                 continue
 
@@ -902,7 +989,8 @@ def tplot(variables,
     if slice:
         slice_fig, slice_axes = plt.subplots(nrows=1)
         slice_plot, = slice_axes.plot([0], [0])
-        mouse_event_func = lambda event: mouse_move_slice(event, slice_axes, slice_plot)
+        slice_state = {}
+        mouse_event_func = lambda event: mouse_move_slice(event, slice_axes, slice_plot, slice_state)
         cid = fig.canvas.mpl_connect('motion_notify_event', mouse_event_func)
 
     if display:
@@ -961,65 +1049,111 @@ def varlabels_extra_axes(num_panels, this_axis, var_label, axis_font_size, plot_
         # fig.subplots_adjust(bottom=0.05+len(var_label)*0.1)
 
 
-def mouse_move_slice(event, slice_axes, slice_plot):
+def mouse_move_slice(event, slice_axes, slice_plot, slice_state=None):
     """
     This function is called when the mouse moves over an axis
     and the slice keyword is set to True; for spectra figures, it
     updates the slice plot based on the mouse location
+
+    The data, ranges and labels for each variable are kept in slice_state (see mouse_slice_state),
+    so each mouse move only has to find the nearest time (with a binary search) and update the
+    existing slice line; nothing is redrawn unless the variable or the time index changes.
     """
-    if event.inaxes is None:
+    if event.inaxes is None or event.xdata is None:
         return
 
     # check for a spectrogram
     try:
-        data = get_data(event.inaxes.var_name)
+        var_name = event.inaxes.var_name
     except AttributeError:
         return
 
-    if data is None:
-        return
+    if slice_state is None:
+        slice_state = {}
+
+    var_state = slice_state.get(var_name)
+    var_quants = pyspedas.tplot_tools.data_quants.get(var_name)
+    if var_state is None or var_state['source'] is not var_quants or var_state['data'] is not var_quants.data:
+        var_state = mouse_slice_state(var_name)
+        slice_state[var_name] = var_state
+        slice_state['current'] = None
 
-    if len(data) != 3:
+    if var_state is None or var_state['times'] is None:
         return
 
+    times = var_state['times']
     slice_time = mdates.num2date(event.xdata).timestamp()
-    idx = np.abs(data.times-slice_time).argmin()
+    idx = min(np.searchsorted(times, slice_time), len(times) - 1)
+    if idx > 0 and slice_time - times[idx - 1] <= times[idx] - slice_time:
+        idx -= 1
 
-    if len(data.v.shape) > 1:
+    if slice_state.get('current') == (var_name, idx):
+        return
+
+    y = var_state['y']
+    v = var_state['v']
+    if len(v.shape) > 1:
         # time varying y-axis
-        vdata = data.v[idx, :]
+        vdata = v[idx, :]
     else:
-        vdata = data.v
+        vdata = v
 
-    xaxis_options = pyspedas.tplot_tools.data_quants[event.inaxes.var_name].attrs['plot_options']['xaxis_opt']
-    yaxis_options = pyspedas.tplot_tools.data_quants[event.inaxes.var_name].attrs['plot_options']['yaxis_opt']
-    zaxis_options = pyspedas.tplot_tools.data_quants[event.inaxes.var_name].attrs['plot_options']['zaxis_opt']
+    title = datetime.fromtimestamp(times[idx], timezone.utc).strftime('%Y-%m-%d %H:%M:%S.%f')
+    if var_state['x_label'] is not None:
+        title = var_state['x_label'] + ' (' + title + ')'
+    slice_axes.set_title(title)
 
-    yrange = yaxis_options.get('y_range')
+    if slice_state.get('current') is None or slice_state['current'][0] != var_name:
+        # only needed when moving to a different variable
+        if var_state['y_label'] is not None:
+            slice_axes.set_ylabel(var_state['y_label'])
+        if var_state['x_subtitle'] is not None:
+            slice_axes.set_xlabel(var_state['x_subtitle'])
+        slice_axes.set_xscale(var_state['xscale'])
+        slice_axes.set_yscale(var_state['yscale'])
+
+    yrange = var_state['yrange']
     if yrange is None:
         yrange = [np.nanmin(vdata), np.nanmax(vdata)]
 
-    zrange = zaxis_options.get('z_range')
-    if zrange is None:
-        zrange = [np.nanmin(data.y), np.nanmax(data.y)]
+    zrange = list(var_state['zrange'])
+    if var_state['yscale'] == 'log' and zrange[0] == 0.0:
+        zrange[0] = np.nanmin(y[idx, :])
+
+    slice_plot.set_data(vdata, y[idx, :])
+    slice_axes.set_ylim(zrange)
+    slice_axes.set_xlim(yrange)
+    slice_state['current'] = (var_name, idx)
 
-    y_label = zaxis_options.get('axis_label')
-    if y_label is not None:
-        slice_axes.set_ylabel(y_label)
+    try:
+        slice_axes.figure.canvas.draw_idle()
+    except ValueError:
+        return
 
-    title = datetime.fromtimestamp(data.times[idx], timezone.utc).strftime('%Y-%m-%d %H:%M:%S.%f')
 
-    x_label = yaxis_options.get('axis_label')
-    if x_label is not None:
-        title = x_label + ' (' + title + ')'
+def mouse_slice_state(var_name):
+    """
+    Retrieve the data, ranges, labels and scales needed to draw slices of a spectrogram variable
 
-    slice_axes.set_title(title)
+    Returns None if the variable doesn't exist; the 'times' entry is None if it isn't a spectrogram
+    """
+    var_quants = pyspedas.tplot_tools.data_quants.get(var_name)
+    if var_quants is None or isinstance(var_quants, dict):
+        return None
+    var_state = {'source': var_quants, 'data': var_quants.data, 'times': None}
+
+    data = get_data(var_name)
+    if data is None or len(data) != 3:
+        return var_state
+
+    yaxis_options = var_quants.attrs['plot_options']['yaxis_opt']
+    zaxis_options = var_quants.attrs['plot_options']['zaxis_opt']
 
-    x_subtitle = yaxis_options.get('axis_subtitle')
-    if x_subtitle is not None:
-        slice_axes.set_xlabel(x_subtitle)
+    zrange = zaxis_options.get('z_range')
+    if zrange is None:
+        zrange = [np.nanmin(data.y), np.nanmax(data.y)]
 
-    slice_yaxis_opt = pyspedas.tplot_tools.data_quants[event.inaxes.var_name].attrs['plot_options'].get('slice_yaxis_opt')
+    slice_yaxis_opt = var_quants.attrs['plot_options'].get('slice_yaxis_opt')
 
     xscale = None
     yscale = None
@@ -1042,20 +1176,12 @@ def mouse_move_slice(event, slice_axes, slice_plot):
         if xscale is None:
             xscale = 'linear'
 
-    if yscale == 'log' and zrange[0] == 0.0:
-        zrange[0] = np.nanmin(data.y[idx, :])
+    var_state.update({'times': data.times, 'y': data.y, 'v': data.v,
+                      'yrange': yaxis_options.get('y_range'), 'zrange': zrange,
+                      'x_label': yaxis_options.get('axis_label'), 'x_subtitle': yaxis_options.get('axis_subtitle'),
+                      'y_label': zaxis_options.get('axis_label'), 'xscale': xscale, 'yscale': yscale})
+    return var_state
 
-    slice_plot.set_data(vdata, data.y[idx, :])
-    slice_axes.set_ylim(zrange)
-    slice_axes.set_xlim(yrange)
-    slice_axes.set_xscale(xscale)
-    slice_axes.set_yscale(yscale)
-
-    try:
-        plt.draw()
-    except ValueError:
-        return
-    sleep(0.01)
 
 def replace_common_exp(title):
     if hasattr(title, 'decode'):
@@ -0,0 +1,258 @@
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import xarray as xr
+import pyspedas
+from pyspedas.tplot_tools import tplot_wildcard_expand, time_double
+
+# shared memory blocks attached by the worker processes (kept open while the workers render)
+_worker_memory = []
+
+# file extensions of the output formats supported by save_plot
+_save_keywords = {'.png': 'save_png', '.eps': 'save_eps', '.svg': 'save_svg', '.pdf': 'save_pdf', '.jpeg': 'save_jpeg'}
+
+
+def tplot_batch(jobs, processes=None):
+    """
+    Render a list of tplot figures to files, optionally in parallel
+
+    Each job is equivalent to calling tplot(variables, trange=trange, save_png=filename, display=False, **options).
+    When rendering in parallel, the tplot variables needed by all of the jobs are copied into a single block of
+    shared memory once (each variable only over the union of the time ranges of the jobs that plot it,
+    so figures for overlapping time ranges share the same data), and the worker processes render the
+    figures with the Agg backend directly from the shared data.
+
+    Parameters
+    ----------
+        jobs: list of dict or list of tuple
+            Figures to render; each job is a dictionary with the keys 'variables', 'trange', 'filename' and
+            (optionally) 'options', or a tuple (variables, trange, filename[, options]):
+                variables: tplot variable names (wildcards are expanded, as in tplot)
+                trange: time range of the figure (None for the full time range of the data)
+                filename: output file; the format is determined by the extension
+                    ('.png', '.eps', '.svg', '.pdf' or '.jpeg'; default: '.png')
+                options: dictionary of other keywords passed to tplot (e.g., var_label, xsize, ysize, dpi)
+
+        processes: int
+            Number of worker processes used to render the figures in parallel
+            (default: render the figures in this process)
+
+    Returns
+    -------
+        List of dictionaries, one per job, in order, with the keys:
+            filename: output file
+            seconds: time spent rendering the figure
+            error: None if the figure was saved, otherwise a description of the problem
+
+    Examples
+    --------
+        >>> from pyspedas import tplot_batch
+        >>> jobs = [(['mms1_fgm_b_gse_srvy_l2', 'mms1_dis_energyspectr_omni_fast'], [day, day + 86400.0], 'overview_' + str(i) + '.png')
+        ...         for i, day in enumerate(days)]
+        >>> timing = tplot_batch(jobs, processes=4)
+    """
+    jobs = [tplot_batch_job(job) for job in jobs]
+    if None in jobs:
+        return
+
+    if processes is None or processes <= 1:
+        return [tplot_batch_render(job) for job in jobs]
+
+    variables = tplot_batch_variables(jobs)
+    snapshot, shm = tplot_batch_snapshot(variables)
+    try:
+        with ProcessPoolExecutor(max_workers=processes, initializer=tplot_batch_attach,
+                                 initargs=(shm.name, snapshot, dict(pyspedas.tplot_tools.tplot_opt_glob))) as executor:
+            results = list(executor.map(tplot_batch_render, jobs))
+    finally:
+        shm.close()
+        shm.unlink()
+    return results
+
+
+def tplot_batch_job(job):
+    """
+    Converts a job to a dictionary with the keys 'variables', 'trange', 'filename' and 'options'
+    """
+    if isinstance(job, dict):
+        job = dict(job)
+    elif isinstance(job, (list, tuple)) and len(job) in [3, 4]:
+        job = dict(zip(['variables', 'trange', 'filename', 'options'], job))
+    else:
+        logging.error('tplot_batch: invalid job: ' + str(job))
+        return
+
+    if job.get('variables') is None or job.get('filename') is None:
+        logging.error('tplot_batch: jobs must include the variables and the output filename')
+        return
+    job['variables'] = tplot_wildcard_expand(job['variables'])
+    if job.get('trange') is not None:
+        job['trange'] = time_double(job['trange'])
+    if job.get('options') is None:
+        job['options'] = {}
+    return job
+
+
+def tplot_batch_variables(jobs):
+    """
+    Returns the time ranges needed for each tplot variable plotted by the jobs, including the
+    components of pseudovariables and variables used for labels; the time range is None if
+    the full time range is needed
+    """
+    variables = {}
+    for job in jobs:
+        names = list(job['variables'])
+        var_label = job['options'].get('var_label')
+        if var_label is not None:
+            names += tplot_wildcard_expand(var_label)
+        seen = set()
+        while len(names) > 0:
+            name = names.pop()
+            var_quants = pyspedas.tplot_tools.data_quants.get(name)
+            if var_quants is None or name in seen:
+                continue
+            seen.add(name)
+            if not isinstance(var_quants, dict):
+                overplots = var_quants.attrs['plot_options'].get('overplots_mpl')
+                if overplots is not None:
+                    names += list(overplots)
+            if job['trange'] is None or (name in variables and variables[name] is None):
+                variables[name] = None
+            elif name not in variables:
+                variables[name] = [job['trange'][0], job['trange'][1]]
+            else:
+                variables[name] = [min(variables[name][0], job['trange'][0]), max(variables[name][1], job['trange'][1])]
+    return variables
+
+
+def tplot_batch_snapshot(variables):
+    """
+    Copies the data of the tplot variables into a block of shared memory
+
+    Each variable is limited to its time range (plus one sample on either side, so the
+    edges of spectrograms are drawn as they are from the full data)
+
+    Returns
+    -------
+        Tuple containing the description of the variables (used by the workers to recreate them
+        from the shared memory) and the SharedMemory object
+    """
+    arrays = []
+    snapshot = {}
+    for name, trange in variables.items():
+        var_quants = pyspedas.tplot_tools.data_quants[name]
+        if isinstance(var_quants, dict) or 'time' not in var_quants.dims:
+            snapshot[name] = var_quants
+            continue
+        if trange is not None:
+            times = var_quants.coords['time'].values
+            limits = np.array(trange)*1e9
+            start = max(np.searchsorted(times, limits[0].astype('datetime64[ns]'), side='left') - 1, 0)
+            end = np.searchsorted(times, limits[1].astype('datetime64[ns]'), side='right') + 1
+            var_quants = var_quants.isel(time=slice(start, end))
+
+        coords = {}
+        for coord_name, coord in var_quants.coords.items():
+            coords[coord_name] = (coord.dims, tplot_batch_add_array(arrays, coord.values))
+        snapshot[name] = {'dims': var_quants.dims, 'data': tplot_batch_add_array(arrays, var_quants.values),
+                          'coords': coords, 'attrs': var_quants.attrs}
+
+    # one block for all of the arrays, each aligned to 64 bytes
+    offsets = []
+    size = 0
+    for array in arrays:
+        offsets.append(size)
+        size += (array.nbytes + 63)//64*64
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for array, offset in zip(arrays, offsets):
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf, offset=offset)[...] = array
+
+    # replace the array indices with their locations in the shared memory
+    for entry in snapshot.values():
+        if isinstance(entry, dict) and 'coords' in entry and 'dims' in entry:
+            entry['data'] = tplot_batch_locate(arrays, offsets, entry['data'])
+            entry['coords'] = {coord_name: (dims, tplot_batch_locate(arrays, offsets, index))
+                               for coord_name, (dims, index) in entry['coords'].items()}
+    return snapshot, shm
+
+
+def tplot_batch_add_array(arrays, array):
+    """
+    Adds an array to the list to be copied to shared memory; object arrays (e.g., strings) can't be
+    shared, so they're returned to be sent to the workers directly
+    """
+    if array.dtype.hasobject:
+        return array
+    arrays.append(np.ascontiguousarray(array))
+    return len(arrays) - 1
+
+
+def tplot_batch_locate(arrays, offsets, index):
+    """
+    Returns the (offset, shape, dtype) of an array in shared memory, or the array itself if it isn't shared
+    """
+    if isinstance(index, np.ndarray):
+        return index
+    return offsets[index], arrays[index].shape, arrays[index].dtype.str
+
+
+def tplot_batch_attach(shm_name, snapshot, tplot_opt_glob):
+    """
+    Initializes a worker process: recreates the tplot variables from shared memory, and selects the Agg backend
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_memory.append(shm)
+
+    def view(location):
+        if isinstance(location, np.ndarray):
+            return location
+        offset, shape, dtype = location
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+        array.flags.writeable = False
+        return array
+
+    for name, entry in snapshot.items():
+        if isinstance(entry, dict) and 'coords' in entry and 'dims' in entry:
+            coords = {coord_name: (dims, view(location)) for coord_name, (dims, location) in entry['coords'].items()}
+            entry = xr.DataArray(view(entry['data']), dims=entry['dims'], coords=coords, name=name, attrs=entry['attrs'])
+        pyspedas.tplot_tools.data_quants[name] = entry
+
+    pyspedas.tplot_tools.tplot_opt_glob.clear()
+    pyspedas.tplot_tools.tplot_opt_glob.update(tplot_opt_glob)
+
+
+def tplot_batch_render(job):
+    """
+    Renders a single job, returning the output filename, the time spent rendering it, and any error
+    """
+    from matplotlib import pyplot as plt
+    from pyspedas.tplot_tools import tplot
+
+    filename = job['filename']
+    extension = os.path.splitext(filename)[1].lower()
+    save_keyword = _save_keywords.get(extension, 'save_png')
+
+    start = time.perf_counter()
+    error = None
+    try:
+        plot_objects = tplot(job['variables'], trange=job['trange'], display=False, return_plot_objects=True,
+                             **{save_keyword: filename}, **job['options'])
+        if plot_objects is None:
+            error = 'no matching tplot variables were found'
+        else:
+            plt.close(plot_objects[0])
+    except Exception as e:
+        error = str(e)
+    seconds = time.perf_counter() - start
+
+    if error is None:
+        logging.info('tplot_batch: ' + filename + ' rendered in ' + str(round(seconds, 3)) + ' seconds')
+    else:
+        logging.error('tplot_batch: problem rendering ' + filename + ': ' + error)
+    return {'filename': filename, 'seconds': seconds, 'error': error}
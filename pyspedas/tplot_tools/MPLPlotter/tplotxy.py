@@ -33,6 +33,7 @@ def tplotxy(tvars,
             display=True,
             fig=None,
             axis=None,
+            decimate_pixels=None,
             ):
     """
     Plot one or more 3d tplot variables, by projecting them onto one of the coordinate planes XY, XY, or YZ.
@@ -103,6 +104,9 @@ def tplotxy(tvars,
         Use an existing figure to plot in (mainly for recursive calls to render composite variables)
     axis: Matplotlib axes object
         Use an existing set of axes to plot on (mainly for recursive calls to render composite variables)
+    decimate_pixels: int, optional
+        If set, orbit tracks are reduced to the points needed to draw them at this resolution
+        (e.g., the width of the saved figure in pixels) before plotting; see decimate_track. Default: None
 
 
     Returns
@@ -264,7 +268,8 @@ def tplotxy(tvars,
         n_endmarkers = len(endmarkers)
         thisendmarker = endmarkers[index % n_endmarkers]
 
-        this_line = axis.plot(proj_x, proj_y, color=thiscolor, linestyle=thisstyle, linewidth=thiswidth, marker=thismarker, markersize=markersize, markevery=markevery)
+        track_x, track_y, track_markevery = decimate_track_points(proj_x, proj_y, decimate_pixels, thismarker, markevery)
+        this_line = axis.plot(track_x, track_y, color=thiscolor, linestyle=thisstyle, linewidth=thiswidth, marker=thismarker, markersize=markersize, markevery=track_markevery)
         if thisstartmarker is not None:
             axis.plot(proj_x[0], proj_y[0], color=thiscolor, linestyle=thisstyle, marker=thisstartmarker, markersize=markersize)
         if thisendmarker is not None:
@@ -322,7 +327,8 @@ def tplotxy(tvars,
     if legend_names is not None:
         legend = axis.legend(loc=legend_location, markerfirst=True)
 
-    fig.canvas.draw()
+    # Saving or displaying the figure renders it, so only request a redraw here
+    fig.canvas.draw_idle()
 
     save_plot(save_png=save_png, save_eps=save_eps, save_jpeg=save_jpeg, save_pdf=save_pdf, save_svg=save_svg, dpi=dpi)
 
@@ -330,3 +336,76 @@ def tplotxy(tvars,
         plt.show()
 
 
+def decimate_track(x, y, npixels, markevery=None):
+    """
+    Returns the indices of the points needed to draw a 2D track at a given resolution
+
+    The extent of the track is divided into npixels x npixels cells; consecutive points in
+    the same cell are reduced to the first and last point of the run, so the decimated track
+    differs from the full track by less than a cell. NaN gaps and the points needed for the
+    markers (every markevery-th point) are kept.
+
+    Parameters
+    ----------
+    x, y: np.ndarray
+        Coordinates of the track (1D)
+    npixels: int
+        Resolution of the track (e.g., the width of the figure in pixels)
+    markevery: int
+        If set, the points with markers (every markevery-th point) are kept
+
+    Returns
+    -------
+    Tuple containing the indices of the points to plot, and the positions of the markers
+    within those points (the markevery value to use when plotting the decimated track;
+    None if markevery is None)
+    """
+    n = len(x)
+    if n < 3:
+        return np.arange(n), markevery
+
+    cells = []
+    for values in [x, y]:
+        finite = np.isfinite(values)
+        if not np.any(finite):
+            return np.arange(n), markevery
+        vmin = np.min(values[finite])
+        span = np.max(values[finite]) - vmin
+        cell = np.zeros(n, dtype=np.int64)
+        if span > 0:
+            cell[finite] = ((values[finite] - vmin)*(npixels/span)).astype(np.int64)
+        # NaNs are kept, since they're gaps in the track
+        cell[~finite] = -1 - np.arange(np.sum(~finite))
+        cells.append(cell)
+
+    changed = (cells[0][1:] != cells[0][:-1]) | (cells[1][1:] != cells[1][:-1])
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    keep[1:] |= changed
+    keep[:-1] |= changed
+    if markevery is not None:
+        keep[::markevery] = True
+
+    indices = np.flatnonzero(keep)
+    if markevery is not None:
+        markevery = list(np.flatnonzero(indices % markevery == 0))
+    return indices, markevery
+
+
+def decimate_track_points(x, y, decimate_pixels, marker=None, markevery=None):
+    """
+    Returns the coordinates and the markevery value to use when plotting a track,
+    decimated with decimate_track if decimate_pixels is set
+
+    Field line traces (2D arrays) and markers placed with anything other than
+    an integer markevery are plotted at full resolution.
+    """
+    if decimate_pixels is None or np.ndim(x) != 1:
+        return x, y, markevery
+    if marker is None:
+        indices, _ = decimate_track(x, y, decimate_pixels)
+        return x[indices], y[indices], markevery
+    if isinstance(markevery, (int, np.integer)) and not isinstance(markevery, bool) and markevery > 0:
+        indices, marker_indices = decimate_track(x, y, decimate_pixels, markevery=int(markevery))
+        return x[indices], y[indices], marker_indices
+    return x, y, markevery
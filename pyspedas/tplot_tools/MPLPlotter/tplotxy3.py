@@ -4,6 +4,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.patches import Wedge
 from .save_plot import save_plot
+from .tplotxy import decimate_track_points
 
 km_in_re = 6371.2
 
@@ -134,7 +135,8 @@ def tplotxy3_add_mpause(x,
         handles, labels = xz_plane.get_legend_handles_labels()
         legend = fig.legend(handles, labels, loc="upper right", markerfirst=True, bbox_to_anchor=(legend_bbox_right, legend_bbox_top), framealpha=1.0)
 
-    fig.canvas.draw()
+    # Saving or displaying the figure renders it, so only request a redraw here
+    fig.canvas.draw_idle()
 
     save_plot(save_png=save_png, save_eps=save_eps, save_jpeg=save_jpeg, save_pdf=save_pdf, save_svg=save_svg, dpi=dpi)
 
@@ -266,7 +268,8 @@ def tplotxy3_add_neutral_sheet( x,
         handles, labels = xz_plane.get_legend_handles_labels()
         legend = fig.legend(handles, labels, loc="upper right", markerfirst=True,bbox_to_anchor=(legend_bbox_right,legend_bbox_top),framealpha=1.0)
 
-    fig.canvas.draw()
+    # Saving or displaying the figure renders it, so only request a redraw here
+    fig.canvas.draw_idle()
 
     save_plot(save_png=save_png, save_eps=save_eps, save_jpeg=save_jpeg, save_pdf=save_pdf, save_svg=save_svg, dpi=dpi)
     if display:
@@ -298,6 +301,7 @@ def tplotxy3(tvars,
             display=True,
             fig=None,
             axis=None,
+            decimate_pixels=None,
             ):
     """
     Plot one or more 3d tplot variables, by projecting them onto the three coordinate axes planes in a single figure.
@@ -366,7 +370,9 @@ def tplotxy3(tvars,
         Use an existing figure to plot in (mainly for recursive calls to render composite variables)
     axis: Matplotlib axes object
         Use an existing set of axes to plot on (mainly for recursive calls to render composite variables)
-
+    decimate_pixels: int, optional
+        If set, orbit tracks are reduced to the points needed to draw them at this resolution
+        (e.g., the width of the saved figure in pixels) before plotting; see decimate_track. Default: None
 
     Note
     ====
@@ -533,7 +539,8 @@ def tplotxy3(tvars,
 
         # XY plane
         this_axis = xy_plane
-        this_axis.plot(proj_x, proj_y, color=thiscolor, linestyle=thisstyle, linewidth=thiswidth, marker=thismarker, markersize=markersize, markevery=markevery)
+        track_x, track_y, track_markevery = decimate_track_points(proj_x, proj_y, decimate_pixels, thismarker, markevery)
+        this_axis.plot(track_x, track_y, color=thiscolor, linestyle=thisstyle, linewidth=thiswidth, marker=thismarker, markersize=markersize, markevery=track_markevery)
         if thisstartmarker is not None:
             this_axis.plot(proj_x[0], proj_y[0], color=thiscolor, linestyle=thisstyle, marker=thisstartmarker, markersize=markersize)
         if thisendmarker is not None:
@@ -543,7 +550,8 @@ def tplotxy3(tvars,
         # If present, the neutral sheet will only be plotted on this axis. So it's the
         # one we'll use to track the legends.
         this_axis = xz_plane
-        this_line = this_axis.plot(proj_x, proj_z, color=thiscolor, linestyle=thisstyle, linewidth=thiswidth, marker=thismarker, markersize=markersize, markevery=markevery)
+        track_x, track_z, track_markevery = decimate_track_points(proj_x, proj_z, decimate_pixels, thismarker, markevery)
+        this_line = this_axis.plot(track_x, track_z, color=thiscolor, linestyle=thisstyle, linewidth=thiswidth, marker=thismarker, markersize=markersize, markevery=track_markevery)
         if thisstartmarker is not None:
             this_axis.plot(proj_x[0], proj_z[0], color=thiscolor, linestyle=thisstyle, marker=thisstartmarker, markersize=markersize)
         if thisendmarker is not None:
@@ -551,7 +559,8 @@ def tplotxy3(tvars,
 
         # YZ plane
         this_axis = yz_plane
-        this_axis.plot(proj_y, proj_z, color=thiscolor, linestyle=thisstyle, linewidth=thiswidth, marker=thismarker, markersize=markersize, markevery=markevery)
+        track_y, track_z, track_markevery = decimate_track_points(proj_y, proj_z, decimate_pixels, thismarker, markevery)
+        this_axis.plot(track_y, track_z, color=thiscolor, linestyle=thisstyle, linewidth=thiswidth, marker=thismarker, markersize=markersize, markevery=track_markevery)
         if thisstartmarker is not None:
             this_axis.plot(proj_y[0], proj_z[0], color=thiscolor, linestyle=thisstyle, marker=thisstartmarker, markersize=markersize)
         if thisendmarker is not None:
@@ -651,7 +660,8 @@ def tplotxy3(tvars,
     if legend_names is not None:
         legend = fig.legend(handles, labels, loc="upper right", markerfirst=True, bbox_to_anchor=(legend_bbox_right,legend_bbox_top))
 
-    fig.canvas.draw()
+    # Saving or displaying the figure renders it, so only request a redraw here
+    fig.canvas.draw_idle()
 
     save_plot(save_png=save_png, save_eps=save_eps, save_jpeg=save_jpeg, save_pdf=save_pdf, save_svg=save_svg, dpi=dpi)
     if display:
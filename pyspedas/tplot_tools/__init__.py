@@ -119,6 +119,7 @@ from .tplot_math.dpwrspc import dpwrspc
 from .tplot_math.tdpwrspc import tdpwrspc
 
 from .reduce_spec_dataset import reduce_spec_dataset
+from .tplot_pyramid import tplot_pyramid
 from .MPLPlotter.lineplot import lineplot
 from .MPLPlotter.specplot import specplot, specplot_make_1d_ybins
 from .MPLPlotter.get_var_label_ticks import get_var_label_ticks
@@ -127,6 +128,7 @@ from .MPLPlotter.ctime import ctime
 from .MPLPlotter.highlight import highlight
 from .MPLPlotter.annotate import annotate
 from .MPLPlotter.tplot import tplot
+from .MPLPlotter.tplot_batch import tplot_batch
 from .MPLPlotter.tplotxy import tplotxy
 from .MPLPlotter.tplotxy3 import tplotxy3, tplotxy3_add_mpause, tplotxy3_add_neutral_sheet
 from .importers.cdf_to_tplot import cdf_to_tplot
@@ -6,6 +6,7 @@
 import pyspedas
 import fnmatch
 import logging
+from pyspedas.tplot_tools.exporters.tplot_save import session_release
 
 
 def del_data(name=None):
@@ -46,5 +47,7 @@ def del_data(name=None):
             str_name = temp_data_quants.name
 
         del pyspedas.tplot_tools.data_quants[str_name]
-        
+
+    # close any session files held open by the deleted variables
+    session_release(in_use=False)
     return
\ No newline at end of file
@@ -3,14 +3,22 @@
 # This software was developed at the University of Colorado's Laboratory for Atmospheric and Space Physics.
 # Verify current version before use at: https://github.com/MAVENSDC/Pytplot
 
+import gzip
+import logging
+import numpy as np
 import pyspedas
 
-def tplot_ascii(tvar, filename=None, extension='.csv'):
+
+def tplot_ascii(tvar, filename=None, extension='.csv', chunk_size=100000, fmt=None, na_rep='', compression=None):
     """
     Save a single tplot variable in CSV format.
 
-    This routine converts the internal tplot data structure into a Pandas data frame, then uses
-    the Pandas to_csv() function to save it in CSV format.
+    The data are written in chunks of chunk_size rows: the times of each chunk are converted to
+    ISO strings in a single call, and the values are formatted with a single format operation per chunk
+    (as in np.savetxt), so the variable isn't copied into a Pandas data frame first. The columns match the
+    files previously written with the Pandas to_csv() function: a "time" column, followed by one
+    column per data component (named with the variable name for 1-D data, or the component indices;
+    components of data with more than 2 dimensions are flattened, e.g. "0_1").
 
     If the tplot variable includes spectral bin metadata, it will be written to a separate file with
     a "_v" inserted after the filename and before the ".csv" suffix.
@@ -23,8 +31,18 @@ def tplot_ascii(tvar, filename=None, extension='.csv'):
             Base filename to use.  If spec_bin data is present, it will be written to a separate file
             with "_v" appended to the base filename. The file extension suffix should not be included here (it will be added internally).
         extension: str
-            File extension suffix to apply to the base filename.  Default: ".csv" (no other file formats
-            are supported).
+            File extension suffix to apply to the base filename.  Default: ".csv"
+            Use ".parquet" to save the data in Parquet format instead (requires the pyarrow package).
+        chunk_size: int
+            Number of rows written at a time. Default: 100000
+        fmt: str
+            Format of the data values (e.g., '%.6e'); see np.savetxt. Default: None (shortest representation
+            that round-trips the values, as written by Pandas)
+        na_rep: str
+            String written for NaN values. Default: '' (empty)
+        compression: str
+            'gzip' to compress the CSV files (".gz" is appended to the filenames), or the Parquet compression
+            codec (e.g., 'snappy', 'gzip', 'zstd'). Default: None (no compression for CSV files, 'snappy' for Parquet)
 
     Examples
     --------
@@ -32,14 +50,145 @@ def tplot_ascii(tvar, filename=None, extension='.csv'):
     >>> import pyspedas
     >>> pyspedas.projects.themis.state(probe='a', trange=['2007-03-23', '2007-03-24'])
     >>> pyspedas.tplot_ascii('tha_pos',filename='themis_a_position')
+    >>> pyspedas.tplot_ascii('tha_pos',filename='themis_a_position', compression='gzip')
     """
 
+    if tvar not in pyspedas.tplot_tools.data_quants.keys():
+        logging.error('tplot_ascii: ' + str(tvar) + ' is not a valid tplot variable')
+        return
+    var_quants = pyspedas.tplot_tools.data_quants[tvar]
+    if isinstance(var_quants, dict):
+        logging.error('tplot_ascii: ' + str(tvar) + ' is not a time series')
+        return
+
+    parquet = extension.lower() == '.parquet'
+    if not parquet and compression not in [None, 'gzip']:
+        logging.error('tplot_ascii: unsupported compression for CSV files: ' + str(compression))
+        return
+    if parquet and ascii_parquet_module() is None:
+        return
+
     # grab data, prepend index column
     if filename is None:
         filename = tvar
+    suffix = extension + ('.gz' if compression == 'gzip' and not parquet else '')
+
     # save data
-    pyspedas.tplot_tools.data_quants[tvar].to_pandas().to_csv(filename + extension)
+    values = var_quants.values
+    if values.ndim == 1:
+        columns = [tvar]
+    else:
+        columns = ascii_column_names(values.shape[1:])
+    ascii_write_table(filename + suffix, 'time', var_quants.coords['time'].values, columns, values,
+                      chunk_size=chunk_size, fmt=fmt, na_rep=na_rep, compression=compression, parquet=parquet)
+
     # only try to save spec_bins (y-values in spectrograms) if we're sure they exist
-    if 'spec_bins' in pyspedas.tplot_tools.data_quants[tvar].coords.keys():
-        pyspedas.tplot_tools.data_quants[tvar].coords['spec_bins'].to_pandas().to_csv(filename + '_v' + extension)
+    if 'spec_bins' in var_quants.coords.keys():
+        spec_bins = var_quants.coords['spec_bins']
+        if 'time' in spec_bins.dims:
+            ascii_write_table(filename + '_v' + suffix, 'time', var_quants.coords['time'].values,
+                              ascii_column_names(spec_bins.shape[1:]), spec_bins.values, chunk_size=chunk_size,
+                              fmt=fmt, na_rep=na_rep, compression=compression, parquet=parquet)
+        else:
+            ascii_write_table(filename + '_v' + suffix, spec_bins.dims[0], np.arange(spec_bins.shape[0]), ['spec_bins'],
+                              spec_bins.values, chunk_size=chunk_size, fmt=fmt, na_rep=na_rep,
+                              compression=compression, parquet=parquet)
+
+
+def ascii_column_names(shape):
+    """
+    Returns the names of the columns of the flattened components of data with the given (non-time) shape
+    """
+    if len(shape) == 1:
+        return [str(index) for index in range(shape[0])]
+    indices = np.unravel_index(np.arange(int(np.prod(shape))), shape)
+    return ['_'.join(str(index) for index in component) for component in zip(*indices)]
+
+
+def ascii_time_unit(times):
+    """
+    Returns the coarsest unit that represents all of the times exactly (as chosen by Pandas when writing times)
+    """
+    ns = times.astype('datetime64[ns]').view(np.int64)
+    for unit, size in [('D', 86400000000000), ('s', 1000000000), ('ms', 1000000), ('us', 1000)]:
+        if np.all(ns % size == 0):
+            return unit
+    return 'ns'
+
+
+def ascii_time_strings(times, unit):
+    """
+    Converts an array of datetime64 times to ISO strings ("YYYY-MM-DD hh:mm:ss.fff...")
+    """
+    strings = np.datetime_as_string(times, unit=unit)
+    if unit != 'D' and len(strings) > 0:
+        # replace the 'T' separator with a space, in place
+        codes = strings.view(np.uint32).reshape(len(strings), -1)
+        separator = codes[:, 10] == ord('T')
+        codes[separator, 10] = ord(' ')
+    return strings
+
+
+def ascii_parquet_module():
+    """
+    Returns the pyarrow modules used to write Parquet files, or None if pyarrow isn't installed
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        logging.error('tplot_ascii: the pyarrow package is required to save Parquet files')
+        return None
+    return pyarrow
+
+
+def ascii_write_table(filename, index_name, index, columns, values, chunk_size=100000, fmt=None, na_rep='',
+                      compression=None, parquet=False):
+    """
+    Writes an index column (times or integers) and the flattened values to a CSV or Parquet file, in chunks of rows
+    """
+    values = values.reshape(len(index), len(columns))
+    chunk_size = max(int(chunk_size), 1)
+    is_time = np.issubdtype(index.dtype, np.datetime64)
+
+    if parquet:
+        pa = ascii_parquet_module()
+        writer = None
+        try:
+            for start in range(0, max(len(index), 1), chunk_size):
+                chunk = {index_name: index[start:start + chunk_size]}
+                for column, name in enumerate(columns):
+                    chunk[name] = values[start:start + chunk_size, column]
+                table = pa.table(chunk)
+                if writer is None:
+                    writer = pa.parquet.ParquetWriter(filename, table.schema,
+                                                      compression='snappy' if compression is None else compression)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        return
+
+    # float32 values are written with their shortest round-trip representation (as float32, not float64)
+    float32_strings = fmt is None and values.dtype == np.float32
+    if fmt is None:
+        fmt = '%s'
+    row_format = '%s' + (',' + fmt)*len(columns) + '\n'
+    replace_nan = values.dtype.kind in 'fc' and na_rep != 'nan'
+    time_unit = ascii_time_unit(index) if is_time else None
 
+    opener = gzip.open if compression == 'gzip' else open
+    with opener(filename, 'wt') as f:
+        f.write(','.join([index_name] + [str(column) for column in columns]) + '\n')
+        for start in range(0, len(index), chunk_size):
+            block = values[start:start + chunk_size]
+            cells = np.empty((block.shape[0], block.shape[1] + 1), dtype=object)
+            if is_time:
+                cells[:, 0] = ascii_time_strings(index[start:start + chunk_size], time_unit)
+            else:
+                cells[:, 0] = index[start:start + chunk_size]
+            cells[:, 1:] = block.astype(str) if float32_strings else block
+            text = (row_format*block.shape[0]) % tuple(cells.ravel().tolist())
+            if replace_nan:
+                text = text.replace('nan', na_rep)
+            f.write(text)
@@ -3,26 +3,51 @@
 # This software was developed at the University of Colorado's Laboratory for Atmospheric and Space Physics.
 # Verify current version before use at: https://github.com/MAVENSDC/PyTplot
 
+import os
+import json
+import base64
 import pickle
+import datetime
+import numpy as np
 import pyspedas
 import logging
 
-def tplot_save(names, filename=None):
+# version of the tplot session file format written by tplot_save
+_session_format = 1
+
+# target size of the compressed chunks, in bytes
+_session_chunk_bytes = 1 << 20
+
+# files opened by tplot_restore for lazily restored variables: [(name, filename, dataset, variable), ...]
+_session_datasets = []
+
+
+def tplot_save(names, filename=None, compress=True, append=False):
     """
-    This function will save tplot variables into a single file by using the python "pickle" function.
-    This file can then be "restored" using tplot_restore.  This is useful if you want to end the pyspedas session,
-    but save all of your data/options.  All variables and plot options can be read back into tplot with the 
-    "tplot_restore" command.  
-    
+    This function will save tplot variables into a single file, which can then be "restored" using tplot_restore.
+    This is useful if you want to end the pyspedas session, but save all of your data/options.  All variables
+    and plot options can be read back into tplot with the "tplot_restore" command.
+
+    The file is a NetCDF4 (HDF5) file with one group per tplot variable: the data and coordinates are stored
+    as chunked (and, by default, compressed) arrays, and the metadata and plot options are stored as JSON,
+    so tplot_restore can read a subset of the variables, and load the arrays only when they're first used.
+    Variables can be added to an existing file with append=True, without rewriting the variables already saved.
+
     Parameters:
         names : str/list
-            A string or a list of strings of the tplot variables you would like saved.  
+            A string or a list of strings of the tplot variables you would like saved.
         filename : str, optional
-            The filename where you want to save the file.  
-            
+            The filename where you want to save the file.
+        compress : bool, optional
+            If True (default), compress the arrays; if False, the arrays are stored uncompressed and
+            contiguous, so tplot_restore can memory-map them (see the mmap keyword of tplot_restore)
+        append : bool, optional
+            If True, add the variables to an existing file (variables already in the file with the same
+            names are replaced; the space they used isn't reclaimed). Default: False
+
     Returns:
         None
-    
+
     Examples:
         >>> # Save a single tplot variable
         >>> import pyspedas
@@ -31,39 +56,215 @@ def tplot_save(names, filename=None):
         >>> pyspedas.store_data("Variable1", data={'x':x_data, 'y':y_data})
         >>> pyspedas.ylim('Variable1', 2, 4)
         >>> pyspedas.tplot_save('Variable1', filename='C:/temp/variable1.pyspedas')
+        >>> # Add another variable to the file
+        >>> pyspedas.store_data("Variable2", data={'x':x_data, 'y':y_data})
+        >>> pyspedas.tplot_save('Variable2', filename='C:/temp/variable1.pyspedas', append=True)
 
     """
+    from netCDF4 import Dataset
+
     if isinstance(names,int):
         names = list(pyspedas.tplot_tools.data_quants.keys())[names-1]
     if not isinstance(names, list):
         names = [names]
-    
+
     #Check that we have all available data
     for name in names:
+        if name not in pyspedas.tplot_tools.data_quants.keys():
+            logging.error("The name %s is currently not in pyspedas", name)
+            return
         if not isinstance(pyspedas.tplot_tools.data_quants[name], dict): # not a NRV variable
             # variable is a time series
             for oplot_name in pyspedas.tplot_tools.data_quants[name].attrs['plot_options']['overplots']:
                 if oplot_name not in names:
                     names.append(oplot_name)
-    
-    #Pickle it up
-    to_pickle =[]
-    for name in names:    
-        if name not in pyspedas.tplot_tools.data_quants.keys():
-            logging.error("The name %s is currently not in pyspedas", name)
-            return
-        to_pickle.append(pyspedas.tplot_tools.data_quants[name])
-    
-    num_quants = len(to_pickle)
-    to_pickle = [num_quants] + to_pickle
-    temp_tplot_opt_glob = pyspedas.tplot_tools.tplot_opt_glob
-    to_pickle.append(temp_tplot_opt_glob)
-    
+
     if filename is None:
         filename='var_'+'-'.join(names)+'.pyspedas'
-    
-    out_file = open(filename, "wb")
-    pickle.dump(to_pickle, out_file)
-    out_file.close()
-    
-    return
\ No newline at end of file
+
+    # variables lazily restored from the file are read into memory before it's modified
+    session_release(filename)
+
+    if append and os.path.isfile(filename):
+        variables = session_variables(filename)
+        if variables is None:
+            logging.error("tplot_save: %s is not a tplot session file, unable to append to it", filename)
+            return
+        with Dataset(filename, 'r') as root:
+            group_number = len(root.groups)
+    else:
+        variables = {}
+        group_number = 0
+        with Dataset(filename, 'w', format='NETCDF4') as root:
+            root.setncattr('pyspedas_tplot_session', _session_format)
+
+    # each variable is written to a new group, so appending never rewrites the groups already in the file
+    for name in names:
+        group = 'var' + str(group_number)
+        session_write_variable(filename, group, pyspedas.tplot_tools.data_quants[name], compress)
+        variables[name] = group
+        group_number += 1
+
+    with Dataset(filename, 'a') as root:
+        root.setncattr('tplot_variables', json.dumps(variables))
+        root.setncattr('tplot_opt_glob', session_json_encode(pyspedas.tplot_tools.tplot_opt_glob))
+
+    return
+
+
+def session_variables(filename):
+    """
+    Returns the tplot variables in a tplot session file ({name: group}), or None if the file isn't a session file
+    """
+    from netCDF4 import Dataset
+
+    with open(filename, 'rb') as f:
+        if f.read(8) != b'\x89HDF\r\n\x1a\n':
+            return None
+    with Dataset(filename, 'r') as root:
+        if 'pyspedas_tplot_session' not in root.ncattrs():
+            return None
+        if 'tplot_variables' not in root.ncattrs():
+            return {}
+        return json.loads(root.getncattr('tplot_variables'))
+
+
+def session_release(filename=None, in_use=True):
+    """
+    Closes the tplot session files held open by lazily restored variables
+
+    The files of variables that were deleted or replaced since they were restored are closed. If in_use
+    is True, the variables restored from filename (or from any file, if filename is None) that are still
+    in use are also read into memory, and their files are closed.
+    """
+    for entry in list(_session_datasets):
+        name, source, dataset, variable = entry
+        if pyspedas.tplot_tools.data_quants.get(name) is variable:
+            if not in_use or (filename is not None and os.path.abspath(filename) != source):
+                continue
+            variable.load()
+        dataset.close()
+        _session_datasets.remove(entry)
+
+
+def session_write_variable(filename, group, var_quants, compress=True):
+    """
+    Writes a tplot variable to a new group of a tplot session file
+    """
+    import xarray as xr
+
+    if isinstance(var_quants, dict):
+        # NRV variable
+        dataset = xr.Dataset({'data': xr.DataArray(np.asarray(var_quants['data']))})
+        kind = 'nrv'
+        attrs = {key: value for key, value in var_quants.items() if key not in ['data']}
+        coord_attrs = {}
+    else:
+        dataset = xr.Dataset({'data': var_quants.variable.to_base_variable()},
+                             coords={name: coord.variable.to_base_variable() for name, coord in var_quants.coords.items()})
+        kind = 'timeseries'
+        # the min/max pyramid is a cache, rebuilt when needed
+        attrs = {key: value for key, value in var_quants.attrs.items() if key != 'pyramid'}
+        coord_attrs = {name: dict(coord.attrs) for name, coord in var_quants.coords.items() if len(coord.attrs) > 0}
+
+    encoding = {}
+    for name, variable in dataset.variables.items():
+        variable.attrs = {}
+        variable.encoding = {}
+        if np.issubdtype(variable.dtype, np.datetime64):
+            encoding[name] = {'units': 'nanoseconds since 1970-01-01', 'dtype': 'int64'}
+        elif variable.dtype.kind in 'biufc':
+            encoding[name] = {'_FillValue': None}
+            if not compress:
+                encoding[name]['contiguous'] = True
+            elif variable.size > 0 and variable.ndim > 0:
+                row_bytes = max(int(np.prod(variable.shape[1:], dtype=np.int64))*variable.dtype.itemsize, 1)
+                rows = int(min(max(_session_chunk_bytes//row_bytes, 1), variable.shape[0]))
+                encoding[name].update({'zlib': True, 'complevel': 1, 'shuffle': True,
+                                       'chunksizes': (rows,) + variable.shape[1:]})
+
+    dataset.attrs = {'tplot_name': str(var_quants['name'] if kind == 'nrv' else var_quants.name),
+                     'tplot_kind': kind,
+                     'tplot_attrs': session_json_encode(attrs),
+                     'tplot_coord_attrs': session_json_encode(coord_attrs)}
+    dataset.to_netcdf(filename, mode='a', group=group, engine='netcdf4', encoding=encoding)
+
+
+def session_json_encode(value):
+    """
+    Encodes tplot metadata and plot options as JSON
+
+    Arrays, tuples, dates and other values that JSON doesn't represent directly are stored as tagged
+    objects; values that can't be represented at all (e.g., colormap objects) are pickled.
+    """
+    return json.dumps(session_json_value(value))
+
+
+def session_json_value(value):
+    """
+    Converts a value to an object that can be encoded as JSON (see session_json_encode)
+    """
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, np.generic):
+        return value
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value.keys()):
+            return {key: session_json_value(item) for key, item in value.items()}
+        return {'__dict__': [[session_json_value(key), session_json_value(item)] for key, item in value.items()]}
+    if isinstance(value, list):
+        return [session_json_value(item) for item in value]
+    if isinstance(value, tuple):
+        return {'__tuple__': [session_json_value(item) for item in value]}
+    if isinstance(value, np.ndarray) and value.dtype.kind in 'biufcUSM':
+        if value.dtype.kind == 'M':
+            return {'__ndarray__': value.astype('datetime64[ns]').view(np.int64).tolist(), 'dtype': 'datetime64[ns]'}
+        if value.dtype.kind == 'c':
+            return {'__ndarray__': [value.real.tolist(), value.imag.tolist()], 'dtype': value.dtype.str}
+        return {'__ndarray__': value.tolist(), 'dtype': value.dtype.str}
+    if isinstance(value, np.datetime64):
+        return {'__datetime64__': str(value)}
+    if isinstance(value, np.generic) and value.dtype.kind in 'biuf':
+        # numpy scalars keep their type, as arrays do
+        return {'__generic__': value.item(), 'dtype': value.dtype.str}
+    if isinstance(value, datetime.datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, bytes):
+        return {'__bytes__': base64.b64encode(value).decode('ascii')}
+    return {'__pickle__': base64.b64encode(pickle.dumps(value)).decode('ascii')}
+
+
+def session_json_decode(text):
+    """
+    Decodes tplot metadata and plot options encoded with session_json_encode
+    """
+    return json.loads(text, object_hook=session_json_object)
+
+
+def session_json_object(value):
+    """
+    Converts the tagged JSON objects written by session_json_value back to their original types
+    """
+    if '__dict__' in value:
+        return {key: item for key, item in value['__dict__']}
+    if '__tuple__' in value:
+        return tuple(value['__tuple__'])
+    if '__ndarray__' in value:
+        dtype = np.dtype(value['dtype'])
+        if dtype.kind == 'M':
+            return np.array(value['__ndarray__'], dtype=np.int64).view(dtype)
+        if dtype.kind == 'c':
+            return (np.array(value['__ndarray__'][0]) + 1j*np.array(value['__ndarray__'][1])).astype(dtype)
+        return np.array(value['__ndarray__'], dtype=dtype)
+    if '__generic__' in value:
+        return np.dtype(value['dtype']).type(value['__generic__'])
+    if '__datetime64__' in value:
+        return np.datetime64(value['__datetime64__'])
+    if '__datetime__' in value:
+        return datetime.datetime.fromisoformat(value['__datetime__'])
+    if '__bytes__' in value:
+        return base64.b64decode(value['__bytes__'])
+    if '__pickle__' in value:
+        return pickle.loads(base64.b64decode(value['__pickle__']))
+    return value
+
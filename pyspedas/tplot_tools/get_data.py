@@ -86,6 +86,10 @@ def get_data(name, xarray=False, metadata=False, dt=False, units=False, data_qua
         return temp_data_quant
 
     if metadata:
+        if 'pyramid' in temp_data_quant.attrs:
+            # the min/max pyramid (see tplot_pyramid) is an internal cache, not metadata; the nested
+            # dictionaries (plot_options, CDF, etc.) are still returned by reference
+            return {key: value for key, value in temp_data_quant.attrs.items() if key != 'pyramid'}
         return temp_data_quant.attrs
 
     error = temp_data_quant.attrs['plot_options']['error']
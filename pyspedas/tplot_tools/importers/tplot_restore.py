@@ -5,22 +5,26 @@
 
 import os
 import pickle
+import fnmatch
 import numpy as np
 import pyspedas
 from pyspedas.tplot_tools import options, store_data
 from pyspedas.tplot_tools.tplot_options import tplot_options
+from pyspedas.tplot_tools.exporters.tplot_save import session_variables, session_json_decode, session_release
+from pyspedas.tplot_tools.exporters.tplot_save import _session_datasets
 from scipy.io import readsav
 import logging
 
 
-def tplot_restore(filename):
+def tplot_restore(filename, names=None, lazy=True, mmap=False):
     """
     Restore tplot variables that have been saved to a file.
 
     If the filename has a suffix ".tplot", it is assumed to be in the IDL .sav format as written by the IDL tplot_save routine.
     In this case, it is read using the scipy.io.readsav() routine.
 
-    For any other filename suffix, the file is assumed to be a Python pickle file, as written by the PySPEDAS tplot_save routine.
+    For any other filename suffix, the file is assumed to be a tplot session file written by the PySPEDAS tplot_save
+    routine (or a Python pickle file, as written by earlier versions of tplot_save).
 
     Most of the metadata (units, coordinate systems, CDF attributes etc.) should be correctly represented in the
     tplot variables created by tplot_restore.
@@ -34,8 +38,19 @@ def tplot_restore(filename):
     Parameters
     -----------
         filename : str
-            The path to the ".tplot" file created by IDL tplot_save, or for any other suffix, the pickle file created by PySPEDAS tplot_save.
-            
+            The path to the ".tplot" file created by IDL tplot_save, or for any other suffix, the file created by PySPEDAS tplot_save.
+        names : str or list of str, optional
+            Names of the variables to restore from a PySPEDAS tplot_save file (wildcards accepted). Default: all variables
+        lazy : bool, optional
+            If True (default), the arrays of variables restored from a tplot session file are read from the file
+            when they're first used, rather than when the variables are restored. The file is kept open until the
+            variables are deleted or replaced (or saved to the same file with tplot_save); call
+            pyspedas.tplot_tools.exporters.tplot_save.session_release() to read them into memory and close it.
+        mmap : bool, optional
+            If True, uncompressed arrays (saved with tplot_save(..., compress=False)) are memory-mapped instead of
+            read into memory (requires the h5py package); changes to memory-mapped arrays aren't written to the file.
+            Default: False
+
     Returns
     --------
 
@@ -235,16 +250,98 @@ def tplot_restore(filename):
             #temp_tplot['tv'][0][1]['Y'][0] is y axis options
         ####################################################################
     else:
+        variables = session_variables(filename)
+        if variables is not None:
+            tplot_restore_session(filename, variables, names=names, lazy=lazy, mmap=mmap)
+            return
+
         in_file = open(filename,"rb")
         temp = pickle.load(in_file)
         num_data_quants = temp[0]
         for i in range(0, num_data_quants):
+            name = temp[i+1]['name'] if isinstance(temp[i+1], dict) else temp[i+1].name
+            if names is not None and len(restore_names([name], names)) == 0:
+                continue
             if isinstance(temp[i+1], dict):
                 # NRV variable
                 pyspedas.tplot_tools.data_quants[temp[i+1]['name']] = temp[i+1]
             else:
                 pyspedas.tplot_tools.data_quants[temp[i+1].name] = temp[i+1]
-        pyspedas.tplot_tools.tplot_opt_glob = temp[num_data_quants+1]
+        # update the global options in place, since other modules hold references to them
+        pyspedas.tplot_tools.tplot_opt_glob.clear()
+        pyspedas.tplot_tools.tplot_opt_glob.update(temp[num_data_quants+1])
         in_file.close()
     
     return
+
+
+def restore_names(available, names):
+    """
+    Returns the available variable names that match the requested names (wildcards accepted)
+    """
+    if not isinstance(names, (list, tuple, np.ndarray)):
+        names = [names]
+    return [name for name in available if any(fnmatch.fnmatchcase(name, pattern) for pattern in names)]
+
+
+def tplot_restore_session(filename, variables, names=None, lazy=True, mmap=False):
+    """
+    Restores variables from a tplot session file written by tplot_save
+    """
+    import xarray as xr
+    from netCDF4 import Dataset
+
+    if names is not None:
+        selected = restore_names(list(variables.keys()), names)
+        if len(selected) == 0:
+            logging.warning("tplot_restore: no variables matching %s found in %s", str(names), filename)
+            return
+    else:
+        selected = list(variables.keys())
+
+    if mmap:
+        try:
+            import h5py
+        except ImportError:
+            logging.warning("tplot_restore: the h5py package is required to memory-map arrays; reading them from the file instead")
+            mmap = False
+
+    for name in selected:
+        group = variables[name]
+        dataset = xr.open_dataset(filename, group=group, engine='netcdf4')
+        attrs = session_json_decode(dataset.attrs['tplot_attrs'])
+
+        if dataset.attrs['tplot_kind'] == 'nrv':
+            # NRV variable
+            data = dataset['data'].values
+            dataset.close()
+            pyspedas.tplot_tools.data_quants[name] = dict(attrs, data=data, name=name)
+            continue
+
+        var_quants = dataset['data'].rename(name)
+        var_quants.attrs = attrs
+        for coord_name, coord_attrs in session_json_decode(dataset.attrs['tplot_coord_attrs']).items():
+            var_quants.coords[coord_name].attrs = coord_attrs
+
+        if mmap:
+            with h5py.File(filename, 'r') as f:
+                stored = f[group]['data']
+                offset = stored.id.get_offset() if stored.chunks is None and stored.compression is None else None
+                if offset is not None and stored.dtype == var_quants.dtype:
+                    # copy-on-write, so changes to the restored data don't modify the file
+                    var_quants = var_quants.copy(data=np.memmap(filename, dtype=stored.dtype, mode='c', offset=offset,
+                                                                shape=stored.shape))
+        if not lazy:
+            var_quants = var_quants.load()
+            dataset.close()
+        else:
+            _session_datasets.append((name, os.path.abspath(filename), dataset, var_quants))
+        pyspedas.tplot_tools.data_quants[name] = var_quants
+
+    # close the files of the variables that were replaced
+    session_release(in_use=False)
+
+    with Dataset(filename, 'r') as root:
+        if 'tplot_opt_glob' in root.ncattrs():
+            pyspedas.tplot_tools.tplot_opt_glob.clear()
+            pyspedas.tplot_tools.tplot_opt_glob.update(session_json_decode(root.getncattr('tplot_opt_glob')))
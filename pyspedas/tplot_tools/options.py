@@ -133,6 +133,8 @@ def options(name, option=None, value=None, opt_dict=None, quiet=False):
         x_interp_points         numeric      Number of interpolation points to use in the X direction
         y_interp                bool         If true, perform smoothing of spectrograms in the Y direction
         y_interp_points         numeric      Number of interpolation points to use in the Y direction
+        spec_decimate           str          How time steps are combined when a spectrogram has more time steps than pixels: 'mean' (default) or 'max'
+        pyramid                 bool         If True, a multi-resolution summary of the variable (see tplot_pyramid) is built the first time it's plotted, and used to plot long time ranges
         xrange_slice            flt/list     Two numbers that give the x axis range of spectrogram slicing plots.
         yrange_slice            flt/list     Two numbers that give the y axis range of spectrogram slicing plots.
         xlog_slice              bool         Sets x axis on slice plot to log scale if True.
@@ -617,6 +619,12 @@ def options(name, option=None, value=None, opt_dict=None, quiet=False):
             elif option == 'y_no_resample':
                 pyspedas.tplot_tools.data_quants[i].attrs['plot_options']['yaxis_opt']['y_no_resample'] = value
 
+            elif option == 'spec_decimate':
+                pyspedas.tplot_tools.data_quants[i].attrs['plot_options']['extras']['spec_decimate'] = value
+
+            elif option == 'pyramid':
+                pyspedas.tplot_tools.data_quants[i].attrs['plot_options']['extras']['pyramid'] = value
+
             else:
                 # Apparently cdf_to_tplot is treating all variable attributes as potential plot
                 # options.  Adding this warning will end up spamming the logs unless cdf_to_tplot is changed.
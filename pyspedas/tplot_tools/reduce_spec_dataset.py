@@ -5,23 +5,49 @@
 
 import pyspedas
 import copy
+import weakref
 
-def reduce_spec_dataset(tplot_dataset=None, name=None):
+# reduced datasets from recent calls with use_cache=True, keyed by (name, spec_dim_to_plot, spec_slices_to_use)
+_reduced_cache = {}
+_reduced_cache_size = 8
+
+
+def reduce_spec_dataset(tplot_dataset=None, name=None, use_cache=False):
     # This function will reduce the data in a 3+ dimensional DataSet object into something that can be plotted with a
     # spectrogram, either by taking slices of the data or by summing the dimensions into this one.
+    #
+    # With use_cache=True (and a variable name), the result is memoized until the variable is replaced (store_data)
+    # or its data array is replaced (replace_data, or assigning to its values); the cached result is shared, so its
+    # data array is read-only.
     if tplot_dataset is not None:
-        da = copy.deepcopy(tplot_dataset)
+        source = tplot_dataset
     elif name is not None:
-        da = copy.deepcopy(pyspedas.tplot_tools.data_quants[name])
+        source = pyspedas.tplot_tools.data_quants[name]
     else:
         return
 
-    if da.attrs['plot_options']['extras'].get('spec_dim_to_plot', None) is not None:
-        coordinate_to_plot = da.attrs['plot_options']['extras']['spec_dim_to_plot']
+    extras = source.attrs['plot_options']['extras']
+    if extras.get('spec_dim_to_plot', None) is not None:
+        coordinate_to_plot = extras['spec_dim_to_plot']
     else:
         # If not found, default to v2 (to match behavior in options.py when setting "spec" option)
         coordinate_to_plot = "v2"
 
+    key = None
+    if use_cache and tplot_dataset is None:
+        key = (name, coordinate_to_plot, repr(extras.get('spec_slices_to_use')))
+        cached = _reduced_cache.get(key)
+        # the data version is the identity of the DataArray and of its data array
+        if cached is not None and cached[0]() is source and cached[1]() is source.data:
+            return cached[2]
+
+    if key is None:
+        da = copy.deepcopy(source)
+    else:
+        # isel and sum don't modify the source, so only the attributes need to be copied
+        da = source.copy(deep=False)
+        da.attrs = copy.deepcopy(source.attrs)
+
     dim_to_plot = coordinate_to_plot + '_dim'
 
     for d in da.dims:
@@ -31,8 +57,8 @@ def reduce_spec_dataset(tplot_dataset=None, name=None):
             pass
         else:
             if 'spec_slices_to_use' in da.attrs['plot_options']['extras']:
-                for key, value in da.attrs['plot_options']['extras']['spec_slices_to_use'].items():
-                    dim = key+"_dim"
+                for key_name, value in da.attrs['plot_options']['extras']['spec_slices_to_use'].items():
+                    dim = key_name+"_dim"
                     if dim == d:
                         da=da.isel({dim:value})
                         break
@@ -40,5 +66,13 @@ def reduce_spec_dataset(tplot_dataset=None, name=None):
                     da = da.sum(dim=d, skipna=True, keep_attrs=True)
             else:
                 da = da.sum(dim=d, skipna=True, keep_attrs=True)
-    return da
 
+    if key is not None:
+        # isel may return a view of the source data, so the cached (shared) result gets a read-only view
+        data = da.data.view()
+        data.flags.writeable = False
+        da = da.copy(deep=False, data=data)
+        _reduced_cache[key] = (weakref.ref(source), weakref.ref(source.data), da)
+        while len(_reduced_cache) > _reduced_cache_size:
+            del _reduced_cache[next(iter(_reduced_cache))]
+    return da
@@ -49,6 +49,8 @@ def replace_data(tplot_name, new_data):
         return
 
     pyspedas.tplot_tools.data_quants[tplot_name].values = new_data_np
+    # the pyramid (see tplot_pyramid) summarizes the old data
+    pyspedas.tplot_tools.data_quants[tplot_name].attrs.pop('pyramid', None)
 
     pyspedas.tplot_tools.data_quants[tplot_name].attrs["plot_options"]["yaxis_opt"]["y_range"] = (
         get_y_range(pyspedas.tplot_tools.data_quants[tplot_name])
@@ -125,7 +125,7 @@ def store_data(name, data=None, delete=False, newname=None, attr_dict={}):
         # Copying the first variable to use all of its plot options
         # However, we probably want each overplot to retain its original plot option
         pyspedas.tplot_tools.data_quants[name] = copy.deepcopy(pyspedas.tplot_tools.data_quants[base_data[0]])
-        pyspedas.tplot_tools.data_quants[name].attrs = copy.deepcopy(pyspedas.tplot_tools.data_quants[base_data[0]].attrs)
+        pyspedas.tplot_tools.data_quants[name].attrs = copy.deepcopy({key: value for key, value in pyspedas.tplot_tools.data_quants[base_data[0]].attrs.items() if key != 'pyramid'})
         pyspedas.tplot_tools.data_quants[name].name = name
         pyspedas.tplot_tools.data_quants[name].attrs['plot_options']['overplots'] = base_data[1:]
         pyspedas.tplot_tools.data_quants[name].attrs['plot_options']['overplots_mpl'] = base_data
@@ -434,7 +434,8 @@ def store_data(name, data=None, delete=False, newname=None, attr_dict={}):
 
     # Add dicts to the xarray attrs
     temp.name = name
-    temp.attrs = copy.deepcopy(attr_dict)
+    # (any pyramid in the attributes was built from other data; see tplot_pyramid)
+    temp.attrs = copy.deepcopy({key: value for key, value in attr_dict.items() if key != 'pyramid'})
     if extra_v_values is not None:
         temp.attrs['extra_v_values'] = extra_v_values
 
@@ -3,12 +3,13 @@
 # This software was developed at the University of Colorado's Laboratory for Atmospheric and Space Physics.
 # Verify current version before use at: https://github.com/MAVENSDC/PyTplot
 
+import numpy as np
 import pyspedas
 
 from pyspedas.tplot_tools import xlim
 
 
-def tlimit(arg=None, full=False, last=False):
+def tlimit(arg=None, full=False, last=False, fig=None):
     """
 
     Parameters
@@ -20,6 +21,10 @@ def tlimit(arg=None, full=False, last=False):
         If True, revert to the full time range. Equivalent to tlimit('full').
     last: bool:
         If True, revert to the previous time range. Equivalent to tlimit('last').
+    fig: matplotlib.figure.Figure
+        A figure returned by tplot (with return_plot_objects=True). If set, the time range of the figure is
+        updated in place: the existing panels are kept, and only the decimated lines and spectrograms
+        are recomputed for the new time range, rather than calling tplot again.
 
     Returns
     -------
@@ -30,6 +35,10 @@ def tlimit(arg=None, full=False, last=False):
     >>> import pyspedas
     >>> pyspedas.tlimit(['2023/03/24/', '2023/03/25'])
 
+    >>> # Zoom in on an existing figure
+    >>> fig, axes = pyspedas.tplot('mms1_fgm_b_gse_brst_l2', return_plot_objects=True)
+    >>> pyspedas.tlimit(['2015-10-16/13:06:50', '2015-10-16/13:07:10'], fig=fig)
+
     """
 
     if full or (isinstance(arg,str) and arg == 'full'):
@@ -41,5 +50,40 @@ def tlimit(arg=None, full=False, last=False):
         minn = arg[0]
         maxx = arg[1]
         xlim(minn, maxx)
-        
+
+    if fig is not None:
+        tlimit_figure(fig)
+
     return
+
+
+def tlimit_figure(fig):
+    """
+    Set the time range of the panels of a tplot figure to the current time range, or the
+    time range of the data in the figure if no time range is set
+    """
+    axes = [ax for ax in fig.axes if hasattr(ax, 'var_name')]
+    if len(axes) == 0:
+        return
+
+    x_range = pyspedas.tplot_tools.tplot_opt_glob.get('x_range')
+    if x_range is None:
+        starts = []
+        stops = []
+        for ax in axes:
+            var_quants = pyspedas.tplot_tools.data_quants.get(ax.var_name)
+            if var_quants is None or isinstance(var_quants, dict) or len(var_quants.time) == 0:
+                continue
+            starts.append(var_quants.time.values[0])
+            stops.append(var_quants.time.values[-1])
+        if len(starts) == 0:
+            return
+        x_range = [np.min(starts), np.max(stops)]
+    else:
+        x_range = pyspedas.tplot_tools.time_double(x_range)
+        x_range = np.array(np.array([x_range[0]*1e9, x_range[1]*1e9]), dtype='datetime64[ns]')
+
+    # twinned axes (e.g., for right_axis) don't necessarily share the time axis, so each panel is set
+    for ax in axes:
+        ax.set_xlim(x_range[0], x_range[1])
+    fig.canvas.draw_idle()
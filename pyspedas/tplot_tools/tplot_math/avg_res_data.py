@@ -2,6 +2,7 @@ import pyspedas
 import numpy as np
 import copy
 import logging
+from pyspedas.tplot_tools.tplot_math.bin_reduce import bin_reduce
 
 def avg_res_data(tvar,res,newname=None):
     """
@@ -23,8 +24,8 @@ def avg_res_data(tvar,res,newname=None):
     Note
     ----
 
-    This routine uses the xarray coarsen() method to reduce the time resolution.  It will only work if the
-    data is evenly gridded, and the res parameter evenly divides the number of samples.
+    This routine averages groups of res consecutive samples (NaN values are ignored); any samples
+    left over at the end are dropped. It is only meaningful if the data is evenly gridded.
     For most purposes, it is more appropriate to use pyspedas.avg_data() instead.
 
     Examples
@@ -36,20 +37,34 @@ def avg_res_data(tvar,res,newname=None):
 
     """
 
-    tvar_new = pyspedas.tplot_tools.data_quants[tvar].coarsen(time=res, boundary='trim').mean()
-    tvar_new.name = pyspedas.tplot_tools.data_quants[tvar].name
-    tvar_new.attrs = copy.deepcopy(pyspedas.tplot_tools.data_quants[tvar].attrs)
+    d = pyspedas.get_data(tvar)
+    if d is None:
+        logging.error('avg_res_data: ' + str(tvar) + ' does not exist')
+        return
 
     if newname is None:
-        pyspedas.tplot_tools.data_quants[tvar] = newname
-    else:
-        if 'spec_bins' in pyspedas.tplot_tools.data_quants[tvar].coords:
-           pyspedas.store_data(newname, data={'x': tvar_new.coords['time'].values, 'y': tvar_new.values,
-                                               'v': tvar_new.coords['spec_bins'].values})
+        newname = tvar
+
+    # consecutive groups of res samples; the remaining samples at the end are dropped
+    res = int(res)
+    times = d.times
+    nbins = len(times)//res
+    ind = np.arange(len(times))//res
+
+    # times are averaged relative to the first time to avoid losing precision
+    new_times = bin_reduce(ind, times - times[0], nbins) + times[0]
+    data = {'x': new_times, 'y': bin_reduce(ind, d.y, nbins)}
+
+    # time-varying v, v1, v2, v3 are averaged the same way; others are copied as-is
+    for field in d._fields[2:]:
+        values = getattr(d, field)
+        if np.ndim(values) > 1 and len(values) == len(times):
+            data[field] = bin_reduce(ind, values, nbins)
         else:
-           pyspedas.store_data(newname, data={'x': tvar_new.coords['time'].values, 'y': tvar_new.values})
+            data[field] = values
 
-        pyspedas.tplot_tools.data_quants[newname].attrs = copy.deepcopy(pyspedas.tplot_tools.data_quants[tvar].attrs)
+    attrs = copy.deepcopy(pyspedas.tplot_tools.data_quants[tvar].attrs)
+    pyspedas.store_data(newname, data=data)
+    pyspedas.tplot_tools.data_quants[newname].attrs = attrs
 
     return
-
@@ -0,0 +1,119 @@
+import logging
+import numpy as np
+
+
+def bin_reduce(ind, values, nbins, method='mean', skipna=True):
+    """
+    Reduces the values in each bin of a set of bin indices (e.g., time bins) in a single pass
+
+    The values are grouped by sorting the bin indices (already sorted indices, e.g.,
+    bins computed from monotonic times, are not re-sorted), then each group is reduced
+    with np.add.reduceat (or the equivalent min/max reductions). This is used by
+    avg_data, avg_res_data and reduce_tres.
+
+    Parameters
+    ----------
+    ind: array_like
+        Bin index of each value (first dimension of values); values with
+        negative indices, or indices >= nbins, are ignored
+    values: array_like
+        Values to reduce; the first dimension must match ind, the other
+        dimensions are reduced independently
+    nbins: int
+        Number of output bins
+    method: str, optional
+        Reduction to apply: 'mean', 'median', 'min', 'max', 'std' or 'count'
+        Default: 'mean'
+    skipna: bool, optional
+        If True, NaN values are ignored (as in np.nanmean, np.nanmedian, etc.);
+        if False, NaN values propagate to the results for their bins
+        Default: True
+
+    Returns
+    -------
+    np.ndarray
+        Array with shape (nbins,) + values.shape[1:]; bins without any (non-NaN) values are NaN
+        (or 0 for method='count')
+
+    Examples
+    --------
+        >>> from pyspedas.tplot_tools.tplot_math.bin_reduce import bin_reduce
+        >>> bin_reduce([0, 0, 1, 1, 1], [1., 2., 3., np.nan, 5.], 2)
+        array([1.5, 4. ])
+    """
+    if method not in ['mean', 'median', 'min', 'max', 'std', 'count']:
+        logging.error('bin_reduce: invalid method: ' + str(method))
+        return None
+
+    ind = np.asarray(ind)
+    values = np.asarray(values)
+    out_shape = (int(nbins),) + values.shape[1:]
+    if values.dtype.kind not in 'fc':
+        values = values.astype(np.float64)
+
+    valid = (ind >= 0) & (ind < nbins)
+    ind = ind[valid].astype(np.int64)
+    values = values[valid].reshape(len(ind), int(np.prod(values.shape[1:])))
+
+    # group the values by bin
+    if np.any(ind[1:] < ind[:-1]):
+        order = np.argsort(ind, kind='stable')
+        ind = ind[order]
+        values = values[order]
+
+    bins = np.arange(int(nbins))
+    starts = np.searchsorted(ind, bins, side='left')
+    sizes = np.searchsorted(ind, bins, side='right') - starts
+    filled = sizes > 0
+
+    if method == 'count':
+        out = np.zeros((int(nbins), values.shape[1]), dtype=np.int64)
+    else:
+        out = np.full((int(nbins), values.shape[1]), np.nan, dtype=values.dtype)
+
+    if len(ind) == 0:
+        return out.reshape(out_shape)
+
+    # the groups are contiguous, so each reduction is over [start, next start)
+    idx = starts[filled]
+    nan = np.isnan(values) if skipna else np.zeros(values.shape, dtype=bool)
+    counts = np.add.reduceat(~nan, idx, axis=0)
+
+    if method == 'count':
+        out[filled] = counts
+        return out.reshape(out_shape)
+
+    if method == 'min' or method == 'max':
+        reduce = np.fmin if method == 'min' else np.fmax
+        if not skipna:
+            reduce = np.minimum if method == 'min' else np.maximum
+        result = reduce.reduceat(values, idx, axis=0)
+    elif method == 'median':
+        result = _bin_median(ind, values, idx, counts)
+        if not skipna:
+            result[np.add.reduceat(np.isnan(values), idx, axis=0) > 0] = np.nan
+    else:
+        sums = np.add.reduceat(np.where(nan, 0, values), idx, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = sums/counts
+            if method == 'std':
+                dev = np.where(nan, 0, values - np.repeat(result, sizes[filled], axis=0))
+                result = np.sqrt(np.add.reduceat(np.abs(dev)**2, idx, axis=0)/counts)
+
+    result[counts == 0] = np.nan
+    out[filled] = result
+    return out.reshape(out_shape)
+
+
+def _bin_median(ind, values, idx, counts):
+    """
+    Medians of the groups of values; ind must be sorted, and NaNs are sorted to the end of each group
+    """
+    # sort by value, then (stable) by bin, so each group is sorted with its NaNs last
+    order = np.argsort(values, axis=0, kind='stable')
+    order = np.take_along_axis(order, np.argsort(ind[order], axis=0, kind='stable'), axis=0)
+    ordered = np.take_along_axis(values, order, axis=0)
+
+    lo = idx[:, None] + np.maximum(counts - 1, 0)//2
+    hi = idx[:, None] + counts//2
+    return (np.take_along_axis(ordered, lo, axis=0) + np.take_along_axis(ordered, hi, axis=0))/2.0
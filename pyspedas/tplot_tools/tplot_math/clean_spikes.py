@@ -9,7 +9,7 @@ Similar to clean_spikes.pro in IDL SPEDAS.
 import logging
 import numpy as np
 #import pyspedas
-from pyspedas.tplot_tools import tsmooth
+from pyspedas.tplot_tools import smooth
 from pyspedas.tplot_tools import subtract_average
 from pyspedas.tplot_tools import tnames, tplot_copy
 from pyspedas.tplot_tools import get_data
@@ -82,35 +82,16 @@ def clean_spikes(names, nsmooth=10, thresh=0.3, sub_avg=False,
         else:
             tplot_copy(new, tmp)
 
-        # Find spikes
-        tmps = tmp + '-s'
-        tsmooth(tmp, newname=tmps, width=nsmooth)
-        ds0 = get_data(tmps)  # smoothed out values
-        ds = ds0[1]
-        dor0 = get_data(tmp)  # original values
-        d0 = dor0[1]
+        # Find spikes: compare smoothed out values to original values
+        d0 = get_data(tmp)[1]  # original values
+        ds = smooth(d0, width=nsmooth)  # smoothed out values
         dn = d0.copy()  # final values
-
-        dim = dn.shape
-        if len(dim) == 1:
-            # One dim data.
-            for i in range(dim[0]):
-                # compare smoothed out values to original values
-                if abs(d0[i] - ds[i]) > thresh * abs(ds[i]):
-                    dn[i] = np.nan  # for spikes, set to NaN
-        else:
-            # More than one dim data.
-            for j in range(dim[1]):
-                for i in range(dim[0]):
-                    # compare smoothed out values to original values
-                    if abs(d0[i, j] - ds[i, j]) > thresh * abs(ds[i, j]):
-                        dn[i, j] = np.nan  # for spikes, set to NaN
+        dn[np.abs(d0 - ds) > thresh * np.abs(ds)] = np.nan  # for spikes, set to NaN
 
         # pyspedas.tplot_tools.data_quants[new] = d
         replace_data(new, dn)
 
         # remove temp data
         del data_quants[tmp]
-        del data_quants[tmps]
 
         logging.info('clean_spikes was applied to: ' + new)
@@ -3,6 +3,7 @@ from pyspedas.tplot_tools import store_data, get_data, tnames
 import copy
 import numpy as np
 import logging
+from .gap_fill import fill_flagged
 
 
 def deflag(tvar, flag=None, newname=None, method=None, fillval=None):
@@ -79,9 +80,8 @@ def deflag(tvar, flag=None, newname=None, method=None, fillval=None):
         else:
             flag = flag_array
     
-    nf = len(flag)
     if method == 'remove_nan':  # this is different from the other methods, which retain all time intervals
-        a = copy.deepcopy(get_data(tvar))
+        a = get_data(tvar)
         alen = len(a)
         # Ignore more than 2d Y input
         if alen > 3:
@@ -90,38 +90,21 @@ def deflag(tvar, flag=None, newname=None, method=None, fillval=None):
 
         time = a[0]
         data = a[1]
-        # Added this to prevent error on !-d arrays (see below)
-        data_dim = data.ndim
-        new_time = []
-        new_data = []
-        
+        # Keep the times where the sum over the other dimensions isn't NaN, i.e. with no NaN in any dimension
+        keep = ~np.isnan(np.sum(data.reshape(len(time), -1), axis=1))
+        if not np.any(keep):
+            logging.warning('No unflagged data in %s, returning.', tvar)
+            return
+        new_time = time[keep]
+        new_data = data[keep]
+
         if alen == 3:  # v variable
             v = a[2]
             if v.ndim == 1:
-                new_v = v
-                append_v = False
+                new_v = np.array(v)
             else:
-                new_v = []
-                append_v = True
-
-        # Fill the new variable
-        non_nan_seen = False
-        for j in range(len(time)):
-            # This used to be "if len(data[j]) > 1", which failed if data is 1-D so that data[j] is scalar
-            # Instead we go by the dimensions of the data array itself
-            if data_dim > 1:
-                tj = np.sum(data[j])
-            else:
-                tj = data[j]
-            if not np.isnan(tj):
-                non_nan_seen = True
-                new_time.append(time[j])
-                new_data.append(data[j])
-                if alen == 3 and append_v:
-                    new_v.append(v[j])
-        if non_nan_seen is False:
-            logging.warning('No unflagged data in %s, returning.', tvar)
-            return
+                new_v = v[keep]
+
         if newname is None:
             if alen == 2:
                 store_data(tvar, data={'x': new_time, 'y': new_data})
@@ -134,76 +117,35 @@ def deflag(tvar, flag=None, newname=None, method=None, fillval=None):
                 store_data(newname, data={'x': new_time, 'y': new_data, 'v': new_v})
             pyspedas.tplot_tools.data_quants[newname].attrs = copy.deepcopy(pyspedas.tplot_tools.data_quants[tvar].attrs)
     elif method == 'repeat' or method == 'linear' or method == 'replace':
-        a = copy.deepcopy(get_data(tvar))
-        time = a[0]
-        data = a[1]
-        # Force the data into a 2-d view, retaining the original shape so we can restore it later
-        original_data_shape = data.shape
-        data = data.reshape(len(time), -1)
+        a = get_data(tvar)
         alen = len(a)
         if alen > 3:
             logging.info('deflag is not used for more than 2-d input')
             return
+        time = a[0]
+        # Force the data into a 2-d copy, retaining the original shape so we can restore it later
+        original_data_shape = a[1].shape
+        data = np.array(a[1]).reshape(len(time), -1)
         if alen == 3:
-            v = a[2]
-        ntimes = time.shape[0]
-        nydim = data.ndim
-        if nydim == 1:
-            ny = 1
+            v = np.array(a[2])
+
+        # Find the values matching any of the flags, in all columns at once; NaN flags need special handling
+        flag_is_nan = np.isnan(flag)
+        flagged = np.isin(data, flag[~flag_is_nan])
+        if np.any(flag_is_nan):
+            flagged |= np.isnan(data)
+            # only finite values are used to fill NaNs
+            good = ~flagged & np.isfinite(data)
         else:
-            ny = data.shape[1]
-        for i in range(nf):
-            if np.isnan(flag[i]):  # NaN flags need special handling
-                flag_is_nan = True
-            else:
-                flag_is_nan = False
-            for k in range(ny):
-                #print(data[:, k])
-                if (flag_is_nan):
-                    flagged_data = np.argwhere(np.isnan(data[:, k])).flatten()
-                else:
-                    flagged_data = np.argwhere(data[:, k] == flag[i]).flatten()
-                if len(flagged_data) > 0:
-                    if flag_is_nan:
-                        okval = np.argwhere(np.isfinite(data[:, k])).flatten()
-                    else:
-                        okval = np.argwhere(data[:, k] != flag[i]).flatten()
-
-                    if len(okval) == 0 and method in ['linear', 'repeat']:
-                        logging.info('No unflagged data in %s, returning', tvar)
-                        return
-                    if method == 'repeat':  # flagged data repeats the previous unflagged value
-                        for j in range(ntimes):
-                            if (flag_is_nan):
-                                if np.isnan(data[j, k]):
-                                    if j == 0:
-                                        data[j, k] = data[okval[0], k]
-                                    else:
-                                        data[j, k] = data[j-1, k]
-                            else:
-                                if data[j, k] == flag[i]:
-                                    if j == 0:
-                                        data[j, k] = data[okval[0], k]
-                                    else:
-                                        data[j, k] = data[j-1, k]
-                        #print("After repeat: ", data[:, k])
-                    elif method == 'replace':
-                        if fillval is None:
-                            fv = np.nan
-                        else:
-                            fv = fillval
-                        data[flagged_data, k] = fv
-                        #print("After replace: ", data[:,k])
-                    else:  # method = 'linear'
-                        # interpolate flagged data, using np.interp
-                        dataj = data[okval, k]
-                        timej = time[okval]
-                        timej_flagged = time[flagged_data]
-                        dataj_interpd = np.interp(timej_flagged, timej, dataj)
-                        data[flagged_data, k] = dataj_interpd
-                        #print("After linear: ", data[:,k])
-                else:
-                    logging.info("No flagged data in %s", tvar)
+            good = ~flagged
+
+        if not np.any(flagged):
+            logging.info("No flagged data in %s", tvar)
+        elif method in ['linear', 'repeat'] and np.any(np.any(flagged, axis=0) & ~np.any(good, axis=0)):
+            logging.info('No unflagged data in %s, returning', tvar)
+            return
+        else:
+            fill_flagged(time, data, flagged, method=method, fillval=np.nan if fillval is None else fillval, good=good)
 
         if newname is None:
             if alen == 2:
@@ -215,13 +157,10 @@ def deflag(tvar, flag=None, newname=None, method=None, fillval=None):
                 store_data(newname, data={'x': time, 'y': data.reshape(original_data_shape)})
             else:
                 store_data(newname, data={'x': time, 'y': data.reshape(original_data_shape), 'v': v})
-                pyspedas.tplot_tools.data_quants[newname].attrs = copy.deepcopy(pyspedas.tplot_tools.data_quants[tvar].attrs)
+            pyspedas.tplot_tools.data_quants[newname].attrs = copy.deepcopy(pyspedas.tplot_tools.data_quants[tvar].attrs)
     else:  # any other option includes method=None, replace flags with NaN
-        nf = len(flag)
-        a = copy.deepcopy(pyspedas.tplot_tools.data_quants[tvar].where(pyspedas.tplot_tools.data_quants[tvar] != flag[0]))
-        if nf > 1:
-            for j in range(nf):
-                a = copy.deepcopy(a.where(a != flag[j]))
+        dq = pyspedas.tplot_tools.data_quants[tvar]
+        a = dq.where(~dq.isin(flag))
         if newname is None:
             a.name = tvar
             pyspedas.tplot_tools.data_quants[tvar] = a
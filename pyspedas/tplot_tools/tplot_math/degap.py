@@ -3,6 +3,8 @@ from pyspedas.tplot_tools import store_data, get_data, tnames
 import numpy as np
 import copy
 import logging
+import xarray as xr
+from .gap_fill import time_gaps
 
 
 def degap(
@@ -79,19 +81,17 @@ def degap(
     #    gap_size = np.diff(pyspedas.tplot_tools.data_quants[tvar].coords['time']) This is in Nanoseconds, and causes a type mismatch with dt+margin
     #    new_tvar_index = pyspedas.tplot_tools.data_quants[tvar].coords['time']
     new_tvar_index = get_data(tvar)[0]  # Unix time float64
-    gap_size = np.diff(new_tvar_index)
     if maxgap is None:
         maxgap = np.nanmax(new_tvar_index)-np.nanmin(new_tvar_index)
 
     # Default for dt is the median value of gap_size, the time interval differences
     if dt == None:
-        dt = np.median(gap_size)
+        dt = np.median(np.diff(new_tvar_index))
 
-    gap_index_locations = np.where((gap_size > dt + margin) & (gap_size < maxgap))
-    values_to_add = np.array([])
+    # The gaps are found once, and the times to add are generated for all of them at once
+    gap_starts = time_gaps(new_tvar_index, dt, margin, maxgap)
     if onenanpergap == True:
-        for i in gap_index_locations[0]:
-            values_to_add = np.append(values_to_add, new_tvar_index[i] + dt)
+        values_to_add = new_tvar_index[gap_starts] + dt
     elif twonanpergap == True:
         # add two NaN values between the two values, either at margin if it's nonzero, or at dt/2
         # since the gap is greater than dt, this will work
@@ -102,25 +102,21 @@ def degap(
                 dt_nan = dt / 2.0
         else:
             dt_nan = dt / 2.0
-        for i in gap_index_locations[0]:
-            values_to_add = np.append(values_to_add, new_tvar_index[i] + dt_nan)
-            values_to_add = np.append(values_to_add, new_tvar_index[i + 1] - dt_nan)
+        values_to_add = np.stack((new_tvar_index[gap_starts] + dt_nan, new_tvar_index[gap_starts + 1] - dt_nan), axis=1).flatten()
     else:
-        for i in gap_index_locations[0]:
-            values_to_add = np.append(
-                values_to_add, np.arange(new_tvar_index[i], new_tvar_index[i + 1], dt)
-            )
+        # equivalent to np.arange(start, stop, dt) for each gap
+        start = np.asarray(new_tvar_index[gap_starts], dtype=np.float64)
+        stop = np.asarray(new_tvar_index[gap_starts + 1], dtype=np.float64)
+        step = (start + dt) - start
+        counts = np.maximum(np.ceil((stop - start)/dt), 0).astype(np.int64)
+        offsets = np.arange(np.sum(counts)) - np.repeat(np.cumsum(counts) - counts, counts)
+        values_to_add = np.repeat(start, counts) + offsets*np.repeat(step, counts)
 
     # new_index = np.sort(np.unique(np.concatenate((values_to_add, new_tvar_index))))
     new_index_float64 = np.sort(
         np.unique(np.concatenate((values_to_add, new_tvar_index)))
     )
 
-    if func == "nan":
-        method = None
-    if func == "ffill":
-        method = "ffill"
-
     # Replace any NaN or inf time values with 0.0  (Is this needed? It seems like it could result in non-monotonic times)
     cond=np.logical_not(np.isfinite(new_index_float64))
     new_index_float64[cond]=0.0
@@ -128,8 +124,7 @@ def degap(
     # Convert back to datetime64 (nanoseconds since epoch)
     new_index=np.array(new_index_float64*1e9,dtype='datetime64[ns]')
 
-    # This can fail if the stored quantities are np.datetime64 and new_index is something else, like datetime.datetime
-    a = pyspedas.tplot_tools.data_quants[tvar].reindex({"time": new_index}, method=method)
+    a = degap_reindex(pyspedas.tplot_tools.data_quants[tvar], new_index, ffill=(func == "ffill"))
 
     if newname is None:
         a.name = tvar
@@ -151,3 +146,49 @@ def degap(
             )
 
     return
+
+
+def degap_reindex(data_quant, new_index, ffill=False):
+    """
+    Returns a copy of a tplot variable's DataArray at the times new_index, which should include the original times
+
+    This is equivalent to data_quant.reindex({"time": new_index}, method="ffill" if ffill else None),
+    but the times are matched with a single searchsorted, and the data and the time-varying
+    coordinates are gathered into preallocated arrays in one step.
+
+    The new times get NaN (or the last value before them if ffill is True)
+    """
+    old_index = data_quant.coords["time"].values
+    order = np.argsort(old_index, kind="stable")
+    sorted_index = old_index[order]
+    pos = np.searchsorted(sorted_index, new_index, side="right") - 1
+    found = pos >= 0
+    source = order[np.maximum(pos, 0)]
+    if not ffill:
+        found &= sorted_index[np.maximum(pos, 0)] == new_index
+
+    def take(values):
+        out = values[source]
+        if not np.all(found):
+            if out.dtype.kind in "iub":
+                out = out.astype(np.float64)
+            elif out.dtype.kind not in "fcmM":
+                out = out.astype(object)
+            out[~found] = np.datetime64("NaT") if out.dtype.kind in "mM" else np.nan
+        return out
+
+    coords = {}
+    for name, coord in data_quant.coords.items():
+        if name == "time":
+            coords[name] = ("time", new_index, coord.attrs)
+        elif "time" in coord.dims:
+            coords[name] = (coord.dims, take(coord.values), coord.attrs)
+        else:
+            coords[name] = coord
+    return xr.DataArray(
+        take(data_quant.values),
+        dims=data_quant.dims,
+        coords=coords,
+        name=data_quant.name,
+        attrs=data_quant.attrs,
+    )
@@ -126,7 +126,7 @@ def dpwrspc(
     # test nspectra, if the value of nshiftpnts is much smaller than
     # nboxpnts/2 strange things happen
 
-    nbegin = np.array([nshiftpnts * i for i in range(nspectra)], dtype=np.int64)
+    nbegin = (np.arange(nspectra) * nshiftpnts).astype(np.int64)
     nend = nbegin + nboxpnts
 
     okspec = np.where(nend <= totalpoints - 1)
@@ -137,107 +137,143 @@ def dpwrspc(
     else:
         nspectra = len(okspec[0])
 
-    tdps = np.zeros(nspectra)
     nfreqs = int(int(nboxpnts / 2) / bin)
 
     if nfreqs <= 1:
         logging.error("Not enough frequencies for a calculation")
         return tdps0, fdps0, dps0
 
-    dps = np.zeros([nspectra, nfreqs])
-    fdps = np.zeros([nspectra, nfreqs])
-
-    # Main calculation loop
-    for nthspectrum in range(0, nspectra):
-        nbegin = int(nthspectrum * nshiftpnts)
-        nend = nbegin + nboxpnts
-
-        if nend <= totalpoints:
-            t = times2process[nbegin:nend]
-            t0 = t[0]
-            t = t - t0
-            x = quantity2process[nbegin:nend]
+    # start index of each spectrum
+    nbegin = nbegin[okspec]
 
-            # Use center time
-            tdps[nthspectrum] = (times2process[nbegin] + times2process[nend - 1]) / 2.0
+    # Use center time
+    tdps = (times2process[nbegin] + times2process[nbegin + nboxpnts - 1]) / 2.0
 
-            if noline is False:
-                coef = np.polyfit(t, x, 1)
-                poly1d_fn = np.poly1d(coef)
-                line = poly1d_fn(t)
-                x = x - line
+    bign = nboxpnts
+    if bign % 2 != 0:
+        logging.warning(
+            "dpwrspc: needs an even number of data points, dropping last point..."
+        )
+        bign = bign - 1
 
-            if nohanning is False:
-                x = x * window
-
-            bign = nboxpnts
-
-            if bign % 2 != 0:
-                logging.warning(
-                    "dpwrspc: needs an even number of data points, dropping last point..."
-                )
-                t = t[0 : bign - 1]
-                x = x[0 : bign - 1]
-                bign = bign - 1
+    if nohanning is False:
+        window_power = float(np.sum(window**2))
+    else:
+        window_power = None
 
-            n_tm = len(t)
+    dps = np.zeros([nspectra, nfreqs])
+    fdps = np.zeros([nspectra, nfreqs])
 
-            # time variance can break power spectrum
-            # this keyword skips over those gaps
-            if notmvariance and n_tm > 1:
-                if tm_sensitivity is not None:
-                    tmsn = tm_sensitivity
-                else:
-                    tmsn = 100.0
+    # All windows are views of the data; they are processed in chunks of
+    # spectra to limit the memory used for very long time series
+    twindows = np.lib.stride_tricks.sliding_window_view(times2process, nboxpnts)
+    xwindows = np.lib.stride_tricks.sliding_window_view(quantity2process, nboxpnts)
+    chunk = max(1, 2**20 // nboxpnts)
+
+    for start in range(0, nspectra, chunk):
+        rows = slice(start, start + chunk)
+        t = twindows[nbegin[rows]]
+        t = t - t[:, :1]
+        x = xwindows[nbegin[rows]]
+
+        if noline is False:
+            # least squares straight line fit for all windows at once
+            tm = np.mean(t, axis=1, keepdims=True)
+            xm = np.mean(x, axis=1, keepdims=True)
+            slope = np.sum((t - tm) * (x - xm), axis=1, keepdims=True) / np.sum((t - tm) ** 2, axis=1, keepdims=True)
+            x = x - (xm + slope * (t - tm))
+
+        if nohanning is False:
+            x = x * window
+
+        t = t[:, 0:bign]
+        x = x[:, 0:bign]
+
+        tdiff = t[:, 1:] - t[:, :-1]
+        tres = np.median(tdiff, axis=1)
+
+        fk, power = binned_power_spectra(x, tres, bin=bin, window_power=window_power, notperhz=notperhz)
+
+        # Note: zeroth point includes zero freq. power.
+        iarray = np.arange(power.shape[1])
+        dps[rows] = power
+        fdps[rows] = (fk[:, iarray * bin + 1] + fk[:, iarray * bin + bin]) / 2.0
+
+        # time variance can break power spectrum
+        # this keyword skips over those gaps
+        if notmvariance and bign > 1:
+            if tm_sensitivity is not None:
+                tmsn = tm_sensitivity
+            else:
+                tmsn = 100.0
+
+            med_diff = np.median(tdiff, axis=1, keepdims=True)
+            bad = np.any(np.abs(tdiff / med_diff - 1) > 1.0 / tmsn, axis=1)
+            dps[rows][bad] = float("nan")
+            fdps[rows][bad] = float("nan")
 
-                tdiff = t[1:n_tm] - t[0 : n_tm - 1]
-                med_diff = np.median(tdiff)
+    return tdps, fdps, dps
 
-                idx = np.where(np.abs(tdiff / med_diff - 1) > 1.0 / tmsn)
 
-                if len(idx[0]) > 0:
-                    dps[nthspectrum, :] = float("nan")
-                    fdps[nthspectrum, :] = float("nan")
+def binned_power_spectra(x, tres, bin=3, window_power=None, notperhz=False):
+    """
+    Compute binned power spectra of a set of equal length windows of data.
 
-                    continue
+    Parameters
+    ----------
+    x: array of float
+        Data windows, [number of spectra, number of points];
+        the number of points must be even.
+    tres: array of float
+        Time resolution of each window.
+    bin: int, optional
+        Size for binning of the data along the frequency domain.
+        The default is 3.
+    window_power: float, optional
+        Sum of the squares of the window (e.g. hanning) applied to the data;
+        its power is divided out of the spectra.
+        The default is None (no window).
+    notperhz: bool, optional
+        If True, the output units are the square of the input units.
+        The default is False.
 
-            # following Numerical recipes in Fortran, p. 421, sort of...
-            # (actually following the IDL implementation)
-            k = np.array(range(int(bign / 2) + 1))
-            tres = np.median(t[1 : len(t)] - t[0 : len(t) - 1])
-            fk = k / (bign * tres)
+    Returns
+    -------
+    tuple
 
-            xs2 = np.abs(np.fft.fft(x)) ** 2
+        fk: array of float
+            The frequencies of the unbinned spectra, [number of spectra, number of points/2+1].
+        power: array of float
+            The binned power spectra, [number of spectra, number of points/2/bin].
+    """
+    x = np.atleast_2d(x)
+    tres = np.atleast_1d(tres)
+    bign = x.shape[1]
 
-            pwr = np.zeros(int(bign / 2 + 1))
-            pwr[0] = xs2[0] / bign**2
-            ptmp = 1 + np.array(range(int(bign / 2 - 1)))
-            pwr[1 : int(bign / 2)] = (
-                xs2[1 : int(bign / 2)] + xs2[bign - ptmp]
-            ) / bign**2
-            pwr[int(bign / 2)] = xs2[int(bign / 2)] / bign**2
+    # following Numerical recipes in Fortran, p. 421, sort of...
+    # (actually following the IDL implementation)
+    k = np.arange(int(bign / 2) + 1)
+    fk = k / (bign * tres[:, np.newaxis])
 
-            if nohanning is False:
-                wss = float(bign) * float(np.sum(window**2))
-                pwr = bign**2 * pwr / wss
+    # for real data, the negative frequency terms are the same as the positive ones
+    xs2 = np.abs(np.fft.rfft(x, axis=1)) ** 2
 
-            dfreq = bin * (fk[1] - fk[0])
+    pwr = xs2 / bign**2
+    pwr[:, 1 : int(bign / 2)] *= 2.0
 
-            npwr = len(pwr) - 1
-            nfinal = int(npwr / bin)
-            iarray = np.array(range(nfinal))
-            power = np.zeros(nfinal)
+    if window_power is not None:
+        wss = float(bign) * window_power
+        pwr = bign**2 * pwr / wss
 
-            # Note: zeroth point includes zero freq. power.
-            freqcenter = (fk[iarray * bin + 1] + fk[iarray * bin + bin]) / 2.0
+    dfreq = bin * (fk[:, 1] - fk[:, 0])
 
-            for i in range(bin):
-                power = power + pwr[iarray * bin + i + 1]
+    npwr = pwr.shape[1] - 1
+    nfinal = int(npwr / bin)
 
-            if notperhz is False:
-                power = power / dfreq
+    # sum over each frequency bin
+    power = np.add.reduceat(pwr[:, 1 : nfinal * bin + 1], np.arange(0, nfinal * bin, bin), axis=1)
 
-            dps[nthspectrum, :] = power
-            fdps[nthspectrum, :] = freqcenter
+    if notperhz is False:
+        power = power / dfreq[:, np.newaxis]
 
-    return tdps, fdps, dps
+    return fk, power
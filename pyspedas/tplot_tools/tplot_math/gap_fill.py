@@ -0,0 +1,113 @@
+import numpy as np
+
+
+def gap_index(good):
+    """
+    Finds the nearest good samples before and after each sample, for every column at once
+
+    This is the gap analysis shared by deflag, degap and interp_nan: the gap boundaries
+    are computed once, with running maxima/minima of the indices of the good samples,
+    and the fill methods are then applied as single array operations.
+
+    Parameters
+    ----------
+    good: array_like of bool
+        Mask of the good (unflagged) samples, [time] or [time, column]
+
+    Returns
+    -------
+    tuple of np.ndarray
+        (prev, next), with the same shape as good: the index of the last good sample
+        at or before each sample (-1 if there is none), and the index of the first good
+        sample at or after each sample (len(good) if there is none)
+    """
+    good = np.asarray(good, dtype=bool)
+    ntimes = good.shape[0]
+    index = np.arange(ntimes).reshape((ntimes,) + (1,)*(good.ndim - 1))
+    prev = np.maximum.accumulate(np.where(good, index, -1), axis=0)
+    next = np.minimum.accumulate(np.where(good, index, ntimes)[::-1], axis=0)[::-1]
+    return prev, next
+
+
+def time_gaps(times, dt, margin, maxgap):
+    """
+    Finds the gaps in a series of times
+
+    Returns the indices i of the gaps between times[i] and times[i+1], i.e. the time
+    steps larger than dt + margin and smaller than maxgap
+    """
+    gap_size = np.diff(times)
+    return np.flatnonzero((gap_size > dt + margin) & (gap_size < maxgap))
+
+
+def fill_flagged(times, data, flagged, method='linear', fillval=np.nan, good=None, limit=None, fill_edges=True):
+    """
+    Fills the flagged values of all the columns of an array in a single pass
+
+    Parameters
+    ----------
+    times: array_like
+        Times of the samples (float), used for the linear interpolation
+    data: np.ndarray
+        Data values, [time, column]; modified in place
+    flagged: np.ndarray of bool
+        Mask of the values to fill, same shape as data
+    method: str, optional
+        'repeat': repeat the last good value (flagged values at the start take the first good value)
+        'linear': interpolate linearly in time between the nearest good values
+        'replace': replace the flagged values with fillval
+        Default: 'linear'
+    fillval: int or float, optional
+        Replacement value for method='replace'
+        Default: NaN
+    good: np.ndarray of bool, optional
+        Mask of the values that can be used to fill the flagged ones
+        Default: the values that aren't flagged
+    limit: int, optional
+        Only fill the first limit values of each run of flagged values
+        Default: fill all of them
+    fill_edges: bool, optional
+        If False, flagged values before the first or after the last good value are left
+        unchanged; otherwise they take the nearest good value (as np.interp does)
+        Default: True
+
+    Returns
+    -------
+    np.ndarray
+        The filled data (the same array as data)
+    """
+    if method == 'replace':
+        data[flagged] = fillval
+        return data
+
+    if good is None:
+        good = ~flagged
+    prev, next = gap_index(good)
+    ntimes = data.shape[0]
+
+    fill = flagged & ((prev >= 0) | (next < ntimes))
+    if not fill_edges:
+        fill &= (prev >= 0) & (next < ntimes)
+    if limit is not None:
+        fill &= (np.arange(ntimes)[:, np.newaxis] - prev) <= limit
+
+    rows, cols = np.nonzero(fill)
+    lo = prev[rows, cols]
+    hi = next[rows, cols]
+    if method == 'repeat':
+        data[rows, cols] = data[np.where(lo >= 0, lo, hi), cols]
+        return data
+
+    # linear interpolation between the nearest good values; values at the edges take the nearest good value
+    lo_ok = lo >= 0
+    hi_ok = hi < ntimes
+    lo = np.where(lo_ok, lo, hi)
+    hi = np.where(hi_ok, hi, lo)
+    times = np.asarray(times, dtype=np.float64)
+    y_lo = data[lo, cols]
+    y_hi = data[hi, cols]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = (y_hi - y_lo)/(times[hi] - times[lo])
+        value = slope*(times[rows] - times[lo]) + y_lo
+    data[rows, cols] = np.where(lo == hi, y_lo, value)
+    return data
@@ -1,11 +1,14 @@
 import pyspedas
 import copy
 import logging
+import numpy as np
+from .gap_fill import fill_flagged
 
 
 def interp_nan(tvar, newname=None, s_limit=None):
     """
-    Interpolates the tplot variable through NaNs in the data. This is basically just a wrapper for xarray's interpolate_na function.
+    Interpolates the tplot variable through NaNs in the data, linearly in time. This gives the same results as xarray's
+    interpolate_na function, but all the columns are filled at once, using the gap boundaries found by gap_index.
 
     .. note::
         This analysis routine assumes the data is no more than 2 dimensions. If there are more, they may become flattened!
@@ -32,8 +35,16 @@ def interp_nan(tvar, newname=None, s_limit=None):
 
     """
 
-    x = pyspedas.tplot_tools.data_quants[tvar].interpolate_na(dim="time", limit=s_limit)
-    x.attrs = copy.deepcopy(pyspedas.tplot_tools.data_quants[tvar].attrs)
+    dq = pyspedas.tplot_tools.data_quants[tvar]
+    data = np.array(dq.values)
+    if data.dtype.kind in 'fc':
+        data2d = data.reshape(data.shape[0], -1)
+        times = dq.coords['time'].values.astype(np.int64).astype(np.float64)
+        # NaNs before the first or after the last valid value are left in place
+        fill_flagged(times, data2d, np.isnan(data2d), method='linear', limit=s_limit, fill_edges=False)
+
+    x = dq.copy(data=data)
+    x.attrs = copy.deepcopy(dq.attrs)
 
     if newname is None:
         pyspedas.tplot_tools.data_quants[tvar] = x
@@ -1,6 +1,7 @@
 import logging
 import numpy as np
 from scipy.stats import linregress
+from pyspedas.tplot_tools.tplot_math.dpwrspc import binned_power_spectra
 
 
 def pwrspc(time, quantity, noline=False, nohanning=False, bin=3, notperhz=False):
@@ -85,37 +86,21 @@ def pwrspc(time, quantity, noline=False, nohanning=False, bin=3, notperhz=False)
         x = x[:-1]
         nt -= 1
 
-    xs2 = np.abs(np.fft.fft(x)) ** 2
     dbign = float(nt)
     logging.info("bign=" + str(dbign))
 
-    k = np.arange(0, dbign // 2 + 1)
     tres = float(np.median(np.diff(t)))
-    fk = k / (dbign * tres)
-
-    pwr = np.zeros(nt // 2 + 1)
-    pwr[0] = xs2[0] / dbign**2
-    pwr[1 : nt // 2] = (xs2[1 : nt // 2] + xs2[nt : nt // 2 : -1]) / dbign**2
-    pwr[-1] = xs2[-1] / dbign**2
-
-    if not nohanning:
-        wss = dbign * np.sum(window**2)
-        pwr = pwr * dbign**2 / wss
+    window_power = None if nohanning else float(np.sum(window**2))
+    fk, power = binned_power_spectra(x, tres, bin=binsize, window_power=window_power, notperhz=notperhz)
+    fk = fk[0]
+    power = power[0]
 
     dfreq = binsize * (fk[1] - fk[0])
-    npwr = len(pwr) - 1
-    nfinal = int(npwr / binsize)
+    nfinal = len(power)
     iarray = np.arange(nfinal)
-    power = np.zeros(nfinal)
 
     idx = (iarray + 0.5) * binsize + 1
-    freq = [fk[int(i)] for i in idx]
-
-    for i in range(binsize):
-        power += pwr[iarray * binsize + i + 1]
-
-    if not notperhz:
-        power /= dfreq
+    freq = fk[idx.astype(int)]
 
     logging.info("dfreq=" + str(dfreq))
 
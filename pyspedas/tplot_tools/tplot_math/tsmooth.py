@@ -11,28 +11,40 @@ Also, see: https://www.harrisgeospatial.com/docs/SMOOTH.html
 """
 import logging
 import math
+import warnings
 import numpy as np
 import pyspedas
 from pyspedas.tplot_tools import tnames, tplot_copy
 
 
-def smooth(data, width=10, preserve_nans=None):
+def smooth(data, width=10, preserve_nans=None, median=None, chunk_size=4096):
     """
     Boxcar average.
 
+    Each point is replaced by the mean of the non-NaN values in the window
+    centered on it (or, if median is set, by their median), so points next
+    to NaN gaps aren't biased toward zero. Points within width/2 of the ends
+    of the data, and points whose window contains only NaNs, are unchanged.
+
     Parameters
     ----------
-    data : list of floats
-        The data should be a one-dim array.
+    data : list of floats or np.ndarray
+        The data to smooth; for arrays with more than one dimension, each
+        column is smoothed along the first (time) dimension.
     width : float, optional
         Data window to use for smoothing. The default is 10.
     preserve_nans : bool, optional
         If None, then replace NaNs. The default is None.
+    median : bool, optional
+        Use a running median instead of the boxcar average. The default is None.
+    chunk_size : int, optional
+        Number of points smoothed at a time; this limits the memory used
+        for very long series. The default is 4096.
 
     Returns
     -------
-    list of float
-        Smoothed data.
+    list of float or np.ndarray
+        Smoothed data (the same type as the input data).
     
     Example
     -------
@@ -41,26 +53,66 @@ def smooth(data, width=10, preserve_nans=None):
         >>> print(pyspedas.smooth(np.random.random(100)))
 
     """
-    result = data.copy()
     N = len(data)
 
     if N <= width:
         logging.error("smooth: Not enough points.")
+        return data.copy()
+
+    values = np.asarray(data, dtype=np.float64)
+    values = values.reshape(N, int(np.prod(values.shape[1:])))
+    smoothed = values.copy()
+    changed = np.zeros(values.shape, dtype=bool)
+
+    # window of point i: [i + offset, i + offset + nwin), as in IDL SMOOTH
+    nwin = int(width)
+    offset = math.ceil(-width/2)
+    first = math.ceil((width-1)/2)
+    last = math.floor(N-(width+1)/2)
+
+    for start in range(first, last + 1, chunk_size):
+        stop = min(start + chunk_size, last + 1)
+        segment = values[start + offset:stop + offset + nwin - 1]
+        finite = ~np.isnan(segment)
+        counts = np.cumsum(finite, axis=0)
+        counts = np.concatenate((np.zeros((1, counts.shape[1]), dtype=counts.dtype), counts))
+        counts = counts[nwin:] - counts[:-nwin]
+
+        if median:
+            windows = np.lib.stride_tricks.sliding_window_view(segment, nwin, axis=0)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                result = np.nanmedian(windows, axis=-1)
+        elif nwin <= 32:
+            # short windows: add the shifted data, in the same order as the IDL loop
+            finite_values = np.where(finite, segment, 0.0)
+            sums = np.zeros((stop - start, values.shape[1]))
+            for j in range(nwin):
+                sums += finite_values[j:j + stop - start]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result = sums / counts
+        else:
+            # long windows: windowed sums from cumulative sums (restarted for each chunk)
+            sums = np.cumsum(np.where(finite, segment, 0.0), axis=0)
+            sums = np.concatenate((np.zeros((1, sums.shape[1])), sums))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result = (sums[nwin:] - sums[:-nwin]) / counts
+
+        update = counts > 0  # otherwise, all NaN
+        if preserve_nans is not None:
+            update &= ~np.isnan(values[start:stop])
+
+        smoothed[start:stop][update] = result[update]
+        changed[start:stop] = update
+
+    if isinstance(data, list):
+        result = list(data)
+        for i in np.flatnonzero(changed[:, 0]):
+            result[i] = float(smoothed[i, 0])
         return result
 
-    for i, d in enumerate(data):
-        if (i >= (width-1)/2) and (i <= N-(width+1)/2):
-            if (preserve_nans is not None) and data[i] is np.nan:
-                continue
-            tsum = 0
-            count = 0
-            for j in range(int(width)):
-                idx = math.ceil(i+j-width/2)
-                if data[idx] is not np.nan:
-                    tsum += data[idx]
-                    count += 1
-            if count > 0:  # otherwise, all NaN
-                result[i] = (1/width) * tsum
+    result = np.array(data, copy=True)
+    result[changed.reshape(result.shape)] = smoothed[changed]
     return result
 
 
@@ -76,7 +128,7 @@ def tsmooth(names, width=10, median=None, preserve_nans=None,
     width: int, optional
         Data window to use for smoothing. The default is 10.
     median: bool, optional
-        Apply the median as well. The default is None.
+        Use a running median instead of the boxcar average. The default is None.
     preserve_nans: bool, optional
         If None, then replace NaNs. The default is None.
     newname: str/list of str, optional
@@ -133,13 +185,8 @@ def tsmooth(names, width=10, median=None, preserve_nans=None,
 
         data = pyspedas.tplot_tools.data_quants[new].values
 
-        dim = data.shape
-        if len(dim) == 1:
-            data = smooth(data, width=width, preserve_nans=preserve_nans)
-        else:
-            for k in range(dim[1]):
-                data[:, k] = smooth(data[:, k], width=width,
-                                    preserve_nans=preserve_nans)
+        # all columns are smoothed at once
+        data = smooth(data, width=width, median=median, preserve_nans=preserve_nans)
 
         pyspedas.tplot_tools.data_quants[new].values = data
 
@@ -44,6 +44,9 @@ def set_tplot_options(option, value, old_tplot_opt_glob):
     elif option == 'varlabel_style':
         new_tplot_opt_glob['varlabel_style'] = value
 
+    elif option == 'decimate':
+        new_tplot_opt_glob['decimate'] = value
+
     else:
         logging.warning("Unknown option supplied: " + str(option))
 
@@ -79,6 +82,7 @@ def tplot_options(option, value):
         ymargin             [flt, flt]   The height of the top and bottom margins of the plot (in inches)
         annotations         dict         A dictionary of text, positions, xycoords, and other options to be placed on the plot
         varlabel_style      str          Set to 'extra_axes' for each variable on its own axis, or 'extra_panel' for a more compact display in a single panel
+        decimate            bool         Reduce dense line traces and spectrograms to the panel's pixel resolution before plotting (default True); set to False for publication-exact output
         ==================  ==========   =====
 
     Returns
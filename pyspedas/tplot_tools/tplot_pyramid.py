@@ -0,0 +1,321 @@
+import logging
+import weakref
+import numpy as np
+import pyspedas
+
+# number of samples in each block of the finest level of a pyramid
+_pyramid_block = 16
+
+
+class TplotPyramid(dict):
+    """
+    The pyramids of a tplot variable, keyed by kind, and a weak reference to the data they summarize ('source')
+
+    Pyramids can always be rebuilt from the data, so they're discarded (replaced with an empty dictionary)
+    when the variable's attributes are copied or pickled (e.g., by tplot_copy or tplot_save).
+    """
+    def __deepcopy__(self, memo):
+        return {}
+
+    def __reduce__(self):
+        return dict, ()
+
+
+def tplot_pyramid(name, kind='minmax'):
+    """
+    Return the multi-resolution summary (pyramid) of a tplot variable, building it if needed
+
+    The samples are grouped into blocks of 16, 32, 64, ... consecutive time steps (one level per block size).
+    For line plots ('minmax'), each level has the indices of the minimum, maximum and first NaN value
+    of each trace in each block; for spectrograms ('mean'), it has the NaN-aware sum, count and maximum
+    of each bin in each block, and the mean time of each block. Plots of long time ranges can then be
+    reduced to the pixel resolution from the coarsest level that still has several blocks per pixel,
+    rather than from every sample.
+
+    The pyramid is stored in the variable's attributes ('pyramid'); it's rebuilt if the variable's
+    data change, and store_data and replace_data discard it.
+
+    Parameters
+    ----------
+        name: str
+            Name of the tplot variable
+        kind: str
+            'minmax' (line plots) or 'mean' (spectrograms)
+            Default: 'minmax'
+
+    Returns
+    -------
+        list of dict
+            The levels of the pyramid, finest first; each has the block size ('size') and the
+            summary arrays, with one row per block. None if the variable has too few time steps
+            (or too many dimensions) to need a pyramid.
+
+    Examples
+    --------
+        >>> import pyspedas
+        >>> pyspedas.store_data('b', data={'x': 1e9 + np.arange(1e6), 'y': np.random.rand(1000000, 3)})
+        >>> levels = pyspedas.tplot_pyramid('b')
+        >>> levels[0]['size'], levels[0]['max'].shape
+        (16, (62500, 3))
+    """
+    if kind not in ['minmax', 'mean']:
+        logging.error('tplot_pyramid: invalid kind: ' + str(kind))
+        return
+
+    var_quants = pyspedas.tplot_tools.data_quants.get(name)
+    if var_quants is None or isinstance(var_quants, dict):
+        logging.error('tplot_pyramid: variable not found: ' + str(name))
+        return
+
+    values = var_quants.data
+    if values.ndim not in [1, 2] or values.dtype.kind not in 'fiu' or len(values) < 2*_pyramid_block:
+        return
+
+    # the pyramid is only valid for the data array it was built from
+    pyramid = var_quants.attrs.get('pyramid')
+    if not isinstance(pyramid, TplotPyramid) or pyramid['source']() is not values:
+        pyramid = TplotPyramid(source=weakref.ref(values))
+        var_quants.attrs['pyramid'] = pyramid
+
+    if kind not in pyramid:
+        y = values.reshape(len(values), -1)
+        if y.dtype.kind != 'f':
+            y = y.astype(np.float64)
+        if kind == 'minmax':
+            pyramid[kind] = pyramid_minmax_levels(y)
+        else:
+            times = var_quants.time.values.astype('datetime64[ns]').astype(np.int64)/1e9
+            pyramid[kind] = pyramid_mean_levels(times, np.where(y == -1.e31, np.nan, y))
+    return pyramid[kind]
+
+
+def pyramid_blocks(y):
+    """
+    Split y, [time, ...], into the blocks of the finest pyramid level: the full blocks, as a view with
+    shape [block, sample in block, ...], and the samples in the partial block at the end (if any)
+    """
+    nfull = len(y)//_pyramid_block
+    full = y[:nfull*_pyramid_block].reshape((nfull, _pyramid_block) + y.shape[1:])
+    return full, y[nfull*_pyramid_block:]
+
+
+def pyramid_minmax_levels(y):
+    """
+    Build the levels of a min/max pyramid of y, [time, trace]
+    """
+    lows = []
+    highs = []
+    nans = []
+    start = 0
+    for blocks in pyramid_blocks(y):
+        if len(blocks) == 0:
+            continue
+        if blocks.ndim == 2:
+            # partial block at the end
+            blocks = blocks[np.newaxis]
+        nan = np.isnan(blocks)
+        empty = nan.all(axis=1)
+        offsets = start + np.arange(len(blocks))[:, np.newaxis]*_pyramid_block
+        lows.append(np.where(empty, -1, np.where(nan, np.inf, blocks).argmin(axis=1) + offsets))
+        highs.append(np.where(empty, -1, np.where(nan, -np.inf, blocks).argmax(axis=1) + offsets))
+        nans.append(np.where(nan.any(axis=1), nan.argmax(axis=1) + offsets, -1))
+        start += blocks.shape[0]*blocks.shape[1]
+
+    levels = [{'size': _pyramid_block, 'min': np.concatenate(lows), 'max': np.concatenate(highs), 'nan': np.concatenate(nans)}]
+
+    # each level combines pairs of blocks of the previous level
+    while len(levels[-1]['min']) > 1:
+        level = levels[-1]
+        levels.append({'size': level['size']*2,
+                       'min': pyramid_pair_extremes(y, level['min'], np.less),
+                       'max': pyramid_pair_extremes(y, level['max'], np.greater),
+                       'nan': pyramid_pairs(level['nan'], lambda a, b: np.where(a >= 0, a, b))})
+    return levels
+
+
+def pyramid_pairs(values, combine):
+    """
+    Combine the values of consecutive pairs of blocks (a final unpaired block is kept as it is)
+    """
+    npairs = len(values)//2
+    combined = combine(values[0:2*npairs:2], values[1:2*npairs:2])
+    if len(values) % 2 == 1:
+        combined = np.concatenate((combined, values[-1:]))
+    return combined
+
+
+def pyramid_pair_extremes(y, indices, better):
+    """
+    Combine the indices of the extreme values of consecutive pairs of blocks (-1 for blocks without finite values)
+    """
+    def combine(a, b):
+        value_a = np.take_along_axis(y, np.maximum(a, 0), axis=0)
+        value_b = np.take_along_axis(y, np.maximum(b, 0), axis=0)
+        use_b = (b >= 0) & ((a < 0) | better(value_b, value_a))
+        return np.where(use_b, b, a)
+    return pyramid_pairs(indices, combine)
+
+
+def pyramid_mean_levels(times, y):
+    """
+    Build the levels of a sum/count/max pyramid of y, [time, bin], with times in seconds
+    """
+    sums = []
+    counts = []
+    maxs = []
+    time_sums = []
+    samples = []
+    # (the times are summed relative to the first time, to keep their precision)
+    for block_times, blocks in zip(pyramid_blocks(times - times[0]), pyramid_blocks(y)):
+        if len(blocks) == 0:
+            continue
+        if blocks.ndim == y.ndim:
+            # partial block at the end
+            blocks = blocks[np.newaxis]
+            block_times = block_times[np.newaxis]
+        nan = np.isnan(blocks)
+        sums.append(np.where(nan, 0.0, blocks).sum(axis=1))
+        counts.append((~nan).sum(axis=1))
+        maxs.append(np.fmax.reduce(blocks, axis=1))
+        time_sums.append(block_times.sum(axis=1))
+        samples.append(np.full(len(blocks), block_times.shape[1]))
+
+    levels = [{'size': _pyramid_block, 'sum': np.concatenate(sums), 'count': np.concatenate(counts),
+               'max': np.concatenate(maxs), 'time_sum': np.concatenate(time_sums), 'samples': np.concatenate(samples)}]
+
+    while len(levels[-1]['sum']) > 1:
+        level = levels[-1]
+        levels.append({'size': level['size']*2,
+                       'sum': pyramid_pairs(level['sum'], np.add),
+                       'count': pyramid_pairs(level['count'], np.add),
+                       'max': pyramid_pairs(level['max'], np.fmax),
+                       'time_sum': pyramid_pairs(level['time_sum'], np.add),
+                       'samples': pyramid_pairs(level['samples'], np.add)})
+
+    # the mean time of each block, used to assign the blocks to pixel columns
+    for level in levels:
+        level['time'] = level.pop('time_sum')/level['samples'] + times[0]
+    return levels
+
+
+def pyramid_level(levels, nsamples, npixels, per_pixel=4):
+    """
+    Select the coarsest level with at least per_pixel blocks per pixel column for nsamples time steps;
+    None if even the finest level is too coarse
+    """
+    chosen = None
+    for level in levels:
+        if nsamples//level['size'] < per_pixel*npixels:
+            break
+        chosen = level
+    return chosen
+
+
+def pyramid_minmax_indices(levels, first, last, npixels, trace=0):
+    """
+    Find the candidate points of a line trace needed to draw time steps first to last-1 at npixels columns
+
+    The result includes the minimum, maximum and first NaN of each block of the selected level (and every
+    point of the partial blocks at the ends of the range); reducing these points with decimate_minmax gives
+    (within the width of a block) the same plot as reducing every point.
+
+    Returns
+    -------
+        np.ndarray of the sorted indices, or None if the range has too few points to use the pyramid
+    """
+    level = pyramid_level(levels, last - first, npixels)
+    if level is None:
+        return None
+
+    size = level['size']
+    first_block = -(-first//size)
+    last_block = last//size
+    # the first and last points are always kept, so the line spans the whole range
+    pieces = [np.arange(first, first_block*size), np.arange(last_block*size, last), [first, last - 1]]
+    for key in ['min', 'max', 'nan']:
+        indices = level[key][first_block:last_block, trace]
+        pieces.append(indices[indices >= 0])
+    return np.unique(np.concatenate(pieces))
+
+
+def pyramid_reduce_times(levels, times, y, first, last, npixels, method='mean', trange=None):
+    """
+    Reduce the time steps first to last-1 of a spectrogram to at most one time step per pixel column,
+    from the blocks of a mean pyramid (see specplot_reduce_times)
+
+    Parameters
+    ----------
+        levels: list of dict
+            Levels of the 'mean' pyramid of the variable
+        times: np.ndarray
+            Times of the variable (datetime64 or unix times); only the times of the partial blocks at the
+            ends of the range are used
+        y: np.ndarray
+            Values of the variable, [time, bin]; only the partial blocks at the ends of the range are used
+        first, last: int
+            Range of time steps to reduce
+        npixels: int
+            Number of pixel columns spanned by trange
+        method: str
+            'mean' or 'max'
+        trange: list of float
+            Unix times spanned by the pixel columns. Defaults to None (the times of the first and last time steps).
+
+    Returns
+    -------
+        tuple of the mean time of each (non-empty) column and the reduced values, [column, bin];
+        None if the range has too few time steps to use the pyramid
+    """
+    if method not in ['mean', 'max']:
+        return None
+    level = pyramid_level(levels, last - first, int(npixels))
+    if level is None:
+        return None
+
+    size = level['size']
+    first_block = -(-first//size)
+    last_block = last//size
+
+    # the time steps of the partial blocks at the ends are used as blocks of their own
+    edges = np.concatenate((np.arange(first, first_block*size), np.arange(last_block*size, last)))
+    edge_times = np.asarray(times[edges])
+    if edge_times.dtype.kind == 'M':
+        edge_times = edge_times.astype('datetime64[ns]').astype(np.int64)/1e9
+    edge_values = np.asarray(y[edges], dtype=np.float64)
+    edge_values = np.where(edge_values == -1.e31, np.nan, edge_values)
+    edge_nan = np.isnan(edge_values)
+    head = first_block*size - first
+    blocks = slice(first_block, last_block)
+
+    def pieces(edge, full):
+        return np.concatenate((edge[:head], full[blocks], edge[head:]))
+
+    block_times = pieces(edge_times, level['time'])
+    samples = pieces(np.ones(len(edges), dtype=np.int64), level['samples'])
+    sums = pieces(np.where(edge_nan, 0.0, edge_values), level['sum'])
+    counts = pieces((~edge_nan).astype(np.int64), level['count'])
+    maxs = pieces(edge_values, level['max'])
+
+    if trange is None:
+        start, stop = np.asarray(times[[first, last - 1]])
+        if start.dtype.kind == 'M':
+            start, stop = np.array([start, stop]).astype('datetime64[ns]').astype(np.int64)/1e9
+    else:
+        start, stop = trange[0], trange[1]
+    if not stop > start:
+        return None
+
+    npixels = int(npixels)
+    column = np.clip(np.floor((block_times - start)/(stop - start)*npixels), 0, npixels - 1).astype(np.int64)
+    starts = np.flatnonzero(np.concatenate(([True], column[1:] != column[:-1])))
+
+    column_samples = np.add.reduceat(samples, starts)
+    column_times = np.add.reduceat(block_times*samples, starts)/column_samples
+    if method == 'max':
+        values = np.fmax.reduceat(maxs, starts, axis=0)
+    else:
+        column_counts = np.add.reduceat(counts, starts, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = np.add.reduceat(sums, starts, axis=0)/column_counts
+        values[column_counts == 0] = np.nan
+    return column_times, values
@@ -1,5 +1,9 @@
 import numpy as np
 
+# bow shock curves computed on the default grid, by (xsh_max, short, return_west)
+_bshock_cache = {}
+
+
 def bshock_2(xsh=None, *, short=False, xsh_max=14.3, return_west=False):
     """
     Compute location of bow shock, ported from the IDL SPEDAS bshock_2 utility
@@ -21,7 +25,19 @@ def bshock_2(xsh=None, *, short=False, xsh_max=14.3, return_west=False):
     xsh_out : ndarray
     ysh_out : ndarray
     (optional) ysh_west : ndarray
+
+    Notes
+    -----
+    The curves computed on the default grid are cached, so repeated calls (e.g., when drawing
+    the bow shock on a series of orbit plots) return copies of the cached arrays.
     """
+    if xsh is None or np.size(xsh) == 0:
+        key = (float(xsh_max), bool(short), bool(return_west))
+        if key not in _bshock_cache:
+            _bshock_cache[key] = bshock_2(np.linspace(-300.0, xsh_max, 1000, dtype=float), short=short,
+                                          return_west=return_west)
+        return tuple(np.copy(array) for array in _bshock_cache[key])
+
     # IDL defaults / constants
     xsh_min = -300.0
     npoints = 1000
@@ -1,5 +1,8 @@
 import numpy as np
 
+# magnetopause curves computed on the default grid, by (xmp_max, short)
+_mpause_cache = {}
+
 
 def mpause_2(xmp=None, ymp_west=None, short=False, xmp_max=10.78):
     """
@@ -30,7 +33,15 @@ def mpause_2(xmp=None, ymp_west=None, short=False, xmp_max=10.78):
 
     Similar to mpause_2.pro in IDL SPEDAS.
 
+    The curves computed on the default grid are cached; repeated calls return copies of the cached arrays.
+
     """
+    if xmp is None:
+        key = (float(xmp_max), bool(short))
+        if key not in _mpause_cache:
+            _mpause_cache[key] = mpause_2(np.linspace(-300, xmp_max, 1000), short=short)
+        return tuple(np.copy(array) for array in _mpause_cache[key])
+
 
     # Define constants
     xp = -15.
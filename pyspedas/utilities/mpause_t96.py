@@ -1,5 +1,9 @@
 import numpy as np
 
+# magnetopause boundaries, by solar wind ram pressure
+_boundary_cache = {}
+_boundary_cache_size = 32
+
 
 def mpause_t96(pd, xgsm=None, ygsm=None, zgsm=None):
     """
@@ -27,6 +31,9 @@ def mpause_t96(pd, xgsm=None, ygsm=None, zgsm=None):
     (TSYGANENKO, JGR, V.100, P.5599, 1995; ESA SP-389, P.181, O;T. 1996)
 
     Similar to mpause_t96.pro in IDL SPEDAS.
+
+    The boundary only depends on the pressure, so it's cached for each pressure; the
+    returned boundary arrays are copies of the cached arrays.
     """
 
     # Constants defined in the T96 model
@@ -44,17 +51,27 @@ def mpause_t96(pd, xgsm=None, ygsm=None, zgsm=None):
     xm = x0 - a
 
     # Calculate the magnetopause boundary
-    n = np.arange(1, 46)
-    tau = 1 - 10 ** (-5) * n**3
-    xmgnp_half = x0 - a * (1 - s0 * tau)
-    arg = (s0**2 - 1) * (1 - tau**2)
-
-    # Ensure argument of sqrt is non-negative
-    rhomgnp = a * np.sqrt(np.maximum(arg, 0))
-    ymgnp_half = rhomgnp
-    xmgnp = np.concatenate([xmgnp_half[::-1], xmgnp_half])
-    ymgnp = np.concatenate([-ymgnp_half[::-1], ymgnp_half])
-    zmgnp = np.concatenate([-ymgnp_half[::-1], ymgnp_half])
+    key = float(pd) if np.ndim(pd) == 0 else None
+    if key is None or key not in _boundary_cache:
+        n = np.arange(1, 46)
+        tau = 1 - 10 ** (-5) * n**3
+        xmgnp_half = x0 - a * (1 - s0 * tau)
+        arg = (s0**2 - 1) * (1 - tau**2)
+
+        # Ensure argument of sqrt is non-negative
+        rhomgnp = a * np.sqrt(np.maximum(arg, 0))
+        ymgnp_half = rhomgnp
+        boundary = (np.concatenate([xmgnp_half[::-1], xmgnp_half]),
+                    np.concatenate([-ymgnp_half[::-1], ymgnp_half]),
+                    np.concatenate([-ymgnp_half[::-1], ymgnp_half]))
+        if key is None:
+            xmgnp, ymgnp, zmgnp = boundary
+        else:
+            _boundary_cache[key] = boundary
+            while len(_boundary_cache) > _boundary_cache_size:
+                del _boundary_cache[next(iter(_boundary_cache))]
+    if key is not None:
+        xmgnp, ymgnp, zmgnp = (np.copy(array) for array in _boundary_cache[key])
 
     # Initialize output variables
     id = np.full(len(xgsm), np.nan) if xgsm is not None else None
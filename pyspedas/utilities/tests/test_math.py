@@ -25,11 +25,18 @@ from pyspedas import (
     derive,
     tres,
     tpwrspc,
+    pwrspc,
+    dpwrspc,
     pwr_spec,
     spec_mult,
     data_exists,
     time_float,
+    avg_res_data,
+    deflag,
+    interp_nan,
 )
+from pyspedas.tplot_tools.tplot_math.bin_reduce import bin_reduce
+from pyspedas.tplot_tools.tplot_math.gap_fill import gap_index, time_gaps
 
 
 class BaseTestCase(unittest.TestCase):
@@ -162,6 +169,16 @@ class AnalysisTestCases(BaseTestCase):
         clean_spikes(["test", "test1"], newname="test1-desp")
         clean_spikes("test1", overwrite=1)
         self.assertTrue(len(d2[1]) == 6)
+        # Points next to NaN gaps aren't spikes
+        yg = np.full(40, 100.0)
+        yg[15:20] = np.nan
+        yg[30] = 200.0
+        store_data("test_gap", data={"x": np.arange(40.0), "y": yg})
+        clean_spikes("test_gap", nsmooth=5)
+        dg = get_data("test_gap-despike")
+        expected = yg.copy()
+        expected[30] = np.nan
+        assert_array_equal(dg[1], expected)
 
     def test_tsmooth(self):
         """Test smooth."""
@@ -188,12 +205,12 @@ class AnalysisTestCases(BaseTestCase):
             1.0,
             1.3333333333333333,
             2.0,
-            1.6666666666666665,
-            1.0,
+            2.5,
+            3.0,
             np.nan,
             np.nan,
-            0.6666666666666666,
-            1.0,
+            2.0,
+            1.5,
             1.3333333333333333,
             1.0,
         ]
@@ -205,6 +222,32 @@ class AnalysisTestCases(BaseTestCase):
         tsmooth(["test", "test-s"], newname="testtest2")
         self.assertTrue(d[1].tolist() == [3.0, 5.0, 8.0, 15.0, 20.0, 1.0])
 
+    def test_smooth_arrays(self):
+        """Test smooth with arrays, NaNs, median and chunks."""
+        b = np.array([1.0, 1.0, 2.0, 3.0, np.nan, np.nan, np.nan, np.nan, 2.0, 1.0, 1.0])
+        y = smooth(b, width=3)
+        self.assertTrue(np.isclose(y[3], 2.5))
+        self.assertTrue(np.isnan(y[5]))
+        self.assertTrue(np.isnan(smooth(b, width=3, preserve_nans=True)[4]))
+        # windows are averaged over their non-NaN values, so flat data next to gaps stays flat
+        g = np.full(100, 100.0)
+        g[40:45] = np.nan
+        for w in [5, 40]:
+            yg = smooth(g, width=w)
+            assert_array_equal(yg[~np.isnan(yg)], 100.0)
+        store_data("test_gap", data={"x": np.arange(100.0), "y": g})
+        tsmooth("test_gap", width=5)
+        assert_array_equal(get_data("test_gap-s")[1], np.r_[np.full(42, 100.0), np.nan, np.full(57, 100.0)])
+        # all columns are smoothed at once, in chunks
+        rng = np.random.default_rng(0)
+        c = rng.random((100, 3))
+        yc = smooth(c, width=5, chunk_size=7)
+        for k in range(3):
+            assert_array_equal(yc[:, k], smooth(c[:, k], width=5))
+        ym = smooth(c, width=5, median=True)
+        assert_array_equal(ym[2:98], [np.median(c[i-2:i+3], axis=0) for i in range(2, 98)])
+        assert_array_equal(ym[:2], c[:2])
+
     def test_tplot_arithmetic(self):
         del_data("*")
         times = [0.0, 1.0, 2.0, 3.0, 4.0]
@@ -250,6 +293,19 @@ class AnalysisTestCases(BaseTestCase):
         assert_array_equal(updated_t, np.array(times))
         assert_array_equal(updated_d, vector / scalar[:, np.newaxis])
 
+    def test_dpwrspc_windows(self):
+        """Test that the batched dynamic power spectra match single spectra."""
+        t = np.arange(2000) / 8.0
+        x = np.sin(2.0 * np.pi * t) + 0.01 * t
+        tdps, fdps, dps = dpwrspc(t, x, nboxpoints=256, nshiftpoints=128)
+        self.assertEqual(dps.shape, (14, 42))
+        assert_array_equal(tdps[:2], [(t[0] + t[255]) / 2.0, (t[128] + t[383]) / 2.0])
+        # the 1 Hz signal is in the same frequency bin for every spectrum
+        self.assertTrue(np.all(np.argmax(dps, axis=1) == np.argmin(np.abs(fdps[0] - 1.0))))
+        for i in [0, 5, 13]:
+            _, power = pwrspc(t[i*128:i*128 + 256], x[i*128:i*128 + 256])
+            self.assertTrue(np.allclose(dps[i], power))
+
     def test_tplot_spectools(self):
         del_data("*")
         # tpwrspc, pwrspc
@@ -409,5 +465,53 @@ class AnalysisTestCases(BaseTestCase):
         )
 
 
+    def test_bin_reduce(self):
+        ind = [0, 0, 2, 1, 1, 1, 5]
+        values = np.array([1.0, 3.0, 4.0, 2.0, np.nan, 6.0, 9.0])
+        assert_array_equal(bin_reduce(ind, values, 3), [2.0, 4.0, 4.0])
+        assert_array_equal(bin_reduce(ind, values, 3, method="median"), [2.0, 4.0, 4.0])
+        assert_array_equal(bin_reduce(ind, values, 3, method="min"), [1.0, 2.0, 4.0])
+        assert_array_equal(bin_reduce(ind, values, 3, method="max"), [3.0, 6.0, 4.0])
+        assert_array_equal(bin_reduce(ind, values, 3, method="std"), [1.0, 2.0, 0.0])
+        assert_array_equal(bin_reduce(ind, values, 4, method="count"), [2, 2, 1, 0])
+        self.assertTrue(np.isnan(bin_reduce(ind, values, 3, skipna=False)[1]))
+        self.assertTrue(np.isnan(bin_reduce(ind, values, 4)[3]))
+        # columns are reduced independently
+        vectors = np.stack([values, 2.0*values], axis=1)
+        assert_array_equal(bin_reduce(ind, vectors, 3), [[2.0, 4.0], [4.0, 8.0], [4.0, 8.0]])
+
+    def test_avg_res_data(self):
+        store_data("d", data={"x": [2, 5, 8, 11, 14, 17, 21],
+                              "y": [[1, 1, 50], [2, 2, 3], [100, 4, 47], [4, 90, 5], [5, 5, 99], [6, 6, 25], [7, 7, -5]],
+                              "v": [1, 2, 3]})
+        avg_res_data("d", 2, "d2res")
+        d = get_data("d2res")
+        assert_array_equal(d.times, [3.5, 9.5, 15.5])
+        assert_array_equal(d.y, [[1.5, 1.5, 26.5], [52.0, 47.0, 26.0], [5.5, 5.5, 62.0]])
+        assert_array_equal(d.v, [1, 2, 3])
+
+    def test_gap_index(self):
+        good = np.array([[False, True], [True, False], [False, False], [True, True]])
+        prev, next = gap_index(good)
+        assert_array_equal(prev, [[-1, 0], [1, 0], [1, 0], [3, 3]])
+        assert_array_equal(next, [[1, 0], [1, 3], [3, 3], [3, 3]])
+        assert_array_equal(time_gaps([0.0, 1.0, 2.0, 6.0, 7.0, 20.0], 1.0, 0.25, 10.0), [2])
+
+    def test_deflag_columns(self):
+        # each column is filled from its own unflagged values
+        store_data("flagged", data={"x": [0.0, 1.0, 2.0, 3.0, 4.0],
+                                    "y": [[np.nan, 1.0], [2.0, -1.0], [np.nan, 3.0], [np.nan, -1.0], [8.0, np.nan]]})
+        deflag("flagged", [np.nan, -1.0], method="repeat", newname="flagged_repeat")
+        assert_array_equal(get_data("flagged_repeat").y, [[2.0, 1.0], [2.0, 1.0], [2.0, 3.0], [2.0, 3.0], [8.0, 3.0]])
+        deflag("flagged", [np.nan, -1.0], method="linear", newname="flagged_linear")
+        assert_array_equal(get_data("flagged_linear").y, [[2.0, 1.0], [2.0, 2.0], [4.0, 3.0], [6.0, 3.0], [8.0, 3.0]])
+        deflag("flagged", -1.0, method="replace", fillval=0.0, newname="flagged_replace")
+        assert_array_equal(get_data("flagged_replace").y[:, 1], [1.0, 0.0, 3.0, 0.0, np.nan])
+        deflag("flagged", method="remove_nan", newname="flagged_removed")
+        assert_array_equal(get_data("flagged_removed").times, [1.0])
+        # interp_nan doesn't extrapolate
+        interp_nan("flagged", newname="flagged_interp")
+        assert_array_equal(get_data("flagged_interp").y[:, 0], [np.nan, 2.0, 4.0, 6.0, 8.0])
+
 if __name__ == "__main__":
     unittest.main()
@@ -24,6 +24,9 @@ from pyspedas import (
     set_units,
     set_coords,
     bshock_2,
+    tplot_ascii,
+    tplot_save,
+    tplot_restore,
 )
 
 
@@ -438,6 +441,10 @@ class UtilTestCases(unittest.TestCase):
         bounds=np.array([xmin,xmax,ymin,ymax])
         assert_allclose(bounds,[-300,14.3,-120.87395,190.05394])
 
+        # the default curve is cached; changes to the returned arrays don't affect later calls
+        result[0][:] = 0.0
+        self.assertEqual(np.min(bshock_2()[0]), -300.0)
+
         result=bshock_2([])  # empty xsh array
         self.assertTrue(len(result)==2)
         self.assertTrue(len(result[0]) == 2000)
@@ -545,5 +552,121 @@ class UtilTestCases(unittest.TestCase):
         self.assertTrue(data_exists("tha_pos"))
 
 
+    def test_tplot_ascii(self):
+        """Test the CSV exporter."""
+        import gzip
+        import os
+        import tempfile
+        from pyspedas import time_double
+
+        times = time_double("2020-01-01") + np.arange(5)*0.5
+        store_data("ascii_test", data={"x": times, "y": np.array([[0.1, 1.0], [np.nan, 2.5], [1e-20, 3.0], [4.0, -1.0], [5.0, 6.0]]),
+                                       "v": [10.0, 20.0]})
+        store_data("ascii_3d", data={"x": times, "y": np.arange(20).reshape(5, 2, 2)})
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "ascii_test")
+            tplot_ascii("ascii_test", filename=filename, chunk_size=2)
+            with open(filename + ".csv") as f:
+                lines = f.read().splitlines()
+            self.assertEqual(lines[0], "time,0,1")
+            self.assertEqual(lines[1], "2020-01-01 00:00:00.000,0.1,1.0")
+            self.assertEqual(lines[2], "2020-01-01 00:00:00.500,,2.5")
+            self.assertEqual(lines[3], "2020-01-01 00:00:01.000,1e-20,3.0")
+            self.assertEqual(len(lines), 6)
+            with open(filename + "_v.csv") as f:
+                self.assertEqual(f.read().splitlines(), ["v_dim,spec_bins", "0,10.0", "1,20.0"])
+
+            tplot_ascii("ascii_3d", filename=filename, compression="gzip", fmt="%.1f")
+            with gzip.open(filename + ".csv.gz", "rt") as f:
+                lines = f.read().splitlines()
+            self.assertEqual(lines[0], "time,0_0,0_1,1_0,1_1")
+            self.assertEqual(lines[5], "2020-01-01 00:00:02.000,16.0,17.0,18.0,19.0")
+
+            # float32 values are written as float32, not as the equivalent float64
+            store_data("ascii_f32", data={"x": times, "y": np.array([1.6243454, np.nan, 0.1, 1.5e-7, 3.4e38], dtype=np.float32)})
+            tplot_ascii("ascii_f32", filename=filename)
+            with open(filename + ".csv") as f:
+                lines = f.read().splitlines()
+            self.assertEqual([line.split(",")[1] for line in lines[1:]], ["1.6243454", "", "0.1", "1.5e-07", "3.4e+38"])
+
+    def test_tplot_save_restore(self):
+        """Test saving and restoring tplot sessions."""
+        import os
+        import copy
+        import pickle
+        import tempfile
+        import pyspedas
+        from pyspedas import time_double
+        from pyspedas.tplot_tools.exporters.tplot_save import _session_datasets
+
+        # restoring a session replaces the global plot options
+        opt_glob = copy.deepcopy(pyspedas.tplot_tools.tplot_opt_glob)
+        self.addCleanup(pyspedas.tplot_tools.tplot_opt_glob.update, opt_glob)
+        self.addCleanup(pyspedas.tplot_tools.tplot_opt_glob.clear)
+        times = time_double("2020-01-01") + np.arange(100)*0.5
+        store_data("save_line", data={"x": times, "y": np.random.randn(100, 3)})
+        set_units("save_line", "nT")
+        options("save_line", "legend_names", ["x", "y", "z"])
+        options("save_line", "color", ("r", "g", "b"))
+        options("save_line", "yrange", [np.float32(-2.5), np.float32(2.5)])
+        pyspedas.tplot_tools.data_quants["save_line"].attrs["CDF"] = {"VATT": {"FILLVAL": np.float32(-1e31)}}
+        store_data("save_spec", data={"x": times, "y": np.random.rand(100, 4), "v": np.tile(np.arange(4.0), (100, 1))})
+        store_data("save_nrv", data={"y": np.arange(4)})
+        store_data("save_both", data=["save_line", "save_spec"])
+        line = get_data("save_line")
+        spec = get_data("save_spec")
+        line_color = pyspedas.tplot_tools.data_quants["save_line"].attrs["plot_options"]["extras"]["line_color"]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "session.pyspedas")
+            tplot_save(["save_line", "save_nrv", "save_both"], filename=filename)
+            del_data("save_*")
+            tplot_restore(filename, names="save_l*")
+            self.assertTrue(data_exists("save_line"))
+            self.assertFalse(data_exists("save_both"))
+            restored = get_data("save_line")
+            self.assertTrue(np.array_equal(restored.times, line.times))
+            self.assertTrue(np.array_equal(restored.y, line.y))
+            self.assertEqual(get_units("save_line"), "nT")
+            plot_options = pyspedas.tplot_tools.data_quants["save_line"].attrs["plot_options"]
+            self.assertEqual(plot_options["yaxis_opt"]["legend_names"], ["x", "y", "z"])
+            self.assertEqual(plot_options["extras"]["line_color"], line_color)
+            # numpy scalars keep their types
+            fillval = pyspedas.tplot_tools.data_quants["save_line"].attrs["CDF"]["VATT"]["FILLVAL"]
+            self.assertEqual(fillval.dtype, np.float32)
+            self.assertEqual(fillval, np.float32(-1e31))
+            self.assertEqual([y.dtype for y in plot_options["yaxis_opt"]["y_range"]], [np.float32, np.float32])
+            self.assertEqual([entry[0] for entry in _session_datasets], ["save_line"])
+
+            # append a variable without rewriting the file, then restore everything
+            store_data("save_spec", data={"x": times, "y": spec.y, "v": spec.v})
+            tplot_save("save_spec", filename=filename, append=True)
+            # the lazily restored variable was read into memory before the file was modified
+            self.assertEqual(len(_session_datasets), 0)
+            self.assertTrue(np.array_equal(get_data("save_line").y, line.y))
+            del_data("save_*")
+            tplot_restore(filename, lazy=False)
+            self.assertTrue(np.array_equal(get_data("save_both").y, line.y))
+            self.assertTrue(np.array_equal(get_data("save_spec").v, spec.v))
+            self.assertTrue(np.array_equal(pyspedas.tplot_tools.data_quants["save_nrv"]["data"], np.arange(4)))
+
+            # uncompressed arrays can be memory-mapped
+            tplot_save("save_spec", filename=filename, compress=False)
+            tplot_restore(filename, mmap=True)
+            self.assertTrue(np.array_equal(get_data("save_spec").y, spec.y))
+            # the files of deleted variables are closed
+            del_data("save_spec")
+            self.assertEqual(len(_session_datasets), 0)
+
+            # files written by earlier versions of tplot_save are still restored
+            with open(filename, "wb") as f:
+                pickle.dump([1, pyspedas.tplot_tools.data_quants["save_line"], copy.deepcopy(opt_glob)], f)
+            del_data("save_*")
+            opt_glob_object = pyspedas.tplot_tools.tplot_opt_glob
+            tplot_restore(filename)
+            self.assertTrue(np.array_equal(get_data("save_line").y, line.y))
+            self.assertIs(pyspedas.tplot_tools.tplot_opt_glob, opt_glob_object)
+            self.assertEqual(pyspedas.tplot_tools.tplot_opt_glob["title_text"], opt_glob["title_text"])
+
 if __name__ == "__main__":
     unittest.main()
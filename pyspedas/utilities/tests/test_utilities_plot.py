@@ -25,6 +25,7 @@ from pyspedas import (
     count_traces,
     annotate,
     is_pseudovariable,
+    specplot_make_1d_ybins,
 )
 from pyspedas.utilities.config_testing import TESTING_CONFIG
 import pyspedas
@@ -1156,6 +1157,310 @@ class PlotTestCases(unittest.TestCase):
         )
         tplot_options("title", "")
 
+    def test_line_decimation(self):
+        from pyspedas.tplot_tools.MPLPlotter.lineplot import decimate_minmax
+
+        del_data("*")
+        times = time_double("2007-03-23") + np.arange(200000) / 8.0
+        data = np.sin(np.arange(200000) / 1000.0)
+        data[50000:60000] = np.nan
+        data[123456] = 10.0
+        keep = decimate_minmax(times, data, 500)
+        self.assertTrue(len(keep) <= 4 * 1000)
+        self.assertTrue(np.all(np.diff(keep) > 0))
+        # spikes, gaps and the end points are preserved
+        self.assertTrue(123456 in keep)
+        self.assertTrue(50000 in keep)
+        self.assertTrue(60000 in keep)
+        self.assertEqual(keep[0], 0)
+        self.assertEqual(keep[-1], 199999)
+        self.assertEqual(np.nanmin(data[keep]), np.nanmin(data))
+        # too few points to decimate
+        self.assertTrue(decimate_minmax(times[:100], data[:100], 500) is None)
+
+        store_data("dense", data={"x": times, "y": np.stack([data, -data], axis=1)})
+        trange = ["2007-03-23/01:00", "2007-03-23/02:00"]
+        fig, axes = tplot("dense", trange=trange, display=False, return_plot_objects=True)
+        self.assertTrue(all(len(line.get_xdata()) < 28800 for line in axes.get_lines()))
+        fig, axes = tplot("dense", trange=trange, display=False, return_plot_objects=True, decimate=False)
+        self.assertTrue(all(len(line.get_xdata()) == 28801 for line in axes.get_lines()))
+        tplot_options("decimate", False)
+        fig, axes = tplot("dense", trange=trange, display=False, return_plot_objects=True)
+        self.assertTrue(all(len(line.get_xdata()) == 28801 for line in axes.get_lines()))
+        tplot_options("decimate", True)
+
+    def test_specplot_make_1d_ybins(self):
+        from pyspedas.tplot_tools.MPLPlotter.specplot import specplot_unique_bin_tables
+
+        # two alternating bin tables, one of them in decreasing order, and one time step without bins
+        table1 = np.array([10.0, 20.0, 40.0])
+        table2 = np.array([60.0, 30.0, 15.0])
+        vdata = np.array([table1, table2, table1, table2, [np.nan, np.nan, np.nan]])
+        values = np.arange(15, dtype=np.float64).reshape(5, 3)
+        tables, table_index = specplot_unique_bin_tables(vdata)
+        self.assertEqual(len(tables), 3)
+        self.assertTrue(np.array_equal(tables[table_index[:4]], vdata[:4]))
+
+        zdata, boundaries = specplot_make_1d_ybins(values, vdata, False, min_ratio=0)
+        self.assertTrue(np.all(np.diff(boundaries) > 0))
+        self.assertEqual(zdata.shape, (5, len(boundaries) - 1))
+        self.assertTrue(np.all(np.isnan(zdata[4])))
+        centers = (boundaries[1:] + boundaries[:-1]) / 2.0
+        for time_index in range(4):
+            # each output bin takes the value of the input bin containing it
+            bins = vdata[time_index]
+            for bin_index in range(3):
+                self.assertEqual(zdata[time_index, np.argmin(np.abs(centers - bins[bin_index]))], values[time_index, bin_index])
+        self.assertTrue(np.array_equal(specplot_make_1d_ybins(None, vdata, False, min_ratio=0, no_regrid=True), boundaries))
+
+    def test_specplot_decimation(self):
+        from matplotlib.image import AxesImage, PcolorImage
+        from matplotlib.collections import QuadMesh
+        from pyspedas.tplot_tools.MPLPlotter.specplot import specplot_reduce_times
+
+        times = np.arange(10.0)
+        zdata = np.stack([np.arange(10.0), np.arange(10.0)], axis=1)
+        zdata[4, 0] = np.nan
+        reduced_times, reduced = specplot_reduce_times(times, zdata, 2)
+        self.assertTrue(np.array_equal(reduced_times, [2.0, 7.0]))
+        self.assertTrue(np.array_equal(reduced[:, 0], [1.5, 7.0]))
+        reduced_times, reduced = specplot_reduce_times(times, zdata, 2, method="max")
+        self.assertTrue(np.array_equal(reduced[:, 1], [4.0, 9.0]))
+        self.assertTrue(specplot_reduce_times(times, zdata, 5) is None)
+
+        del_data("*")
+        times = time_double("2007-03-23") + np.arange(100000) / 2.0
+        zdata = np.random.rand(100000, 16)
+        store_data("spec_lin", data={"x": times, "y": zdata, "v": np.linspace(0.0, 100.0, 16)})
+        store_data("spec_log", data={"x": times, "y": zdata, "v": np.geomspace(10.0, 1e4, 16)})
+        options(["spec_lin", "spec_log"], "spec", 1)
+        options("spec_lin", "ylog", 0)
+        options("spec_log", "ylog", 1)
+        fig, axes = tplot(["spec_lin", "spec_log"], trange=["2007-03-23", "2007-03-24"], display=False, return_plot_objects=True)
+        # linear Y axes are drawn as images, log Y axes as meshes, both at the panel resolution
+        images = axes[0].get_images()
+        self.assertEqual(len(images), 1)
+        self.assertTrue(isinstance(images[0], (AxesImage, PcolorImage)))
+        self.assertTrue(images[0].get_array().shape[1] < 5000)
+        meshes = [child for child in axes[1].get_children() if isinstance(child, QuadMesh)]
+        self.assertEqual(len(meshes), 1)
+        self.assertTrue(meshes[0].get_array().shape[1] < 5000)
+
+        # zooming redraws the visible time range from the full resolution data
+        start = axes[0].get_xlim()[0]
+        axes[0].set_xlim(start, start + 100.0 / 86400.0)
+        self.assertEqual(axes[0].get_xlim(), (start, start + 100.0 / 86400.0))
+        images = axes[0].get_images()
+        self.assertEqual(len(images), 1)
+        self.assertTrue(images[0].get_array().shape[1] <= 202)
+
+        fig, axes = tplot(["spec_lin", "spec_log"], trange=["2007-03-23", "2007-03-24"], display=False, return_plot_objects=True, decimate=False)
+        self.assertEqual(len(axes[0].get_images()), 0)
+
+
+    def test_render_plan(self):
+        from pyspedas.tplot_tools import reduce_spec_dataset, replace_data
+
+        del_data("*")
+        times = time_double("2007-03-23") + np.arange(100.0)
+        store_data("spec3d", data={"x": times, "y": np.random.rand(100, 8, 4), "v1": np.arange(8.0), "v2": np.arange(4.0)})
+        options("spec3d", "spec", 1)
+        # reduced datasets are reused until the variable's data change
+        reduced = reduce_spec_dataset(name="spec3d", use_cache=True)
+        self.assertTrue(reduce_spec_dataset(name="spec3d", use_cache=True) is reduced)
+        self.assertFalse(reduced.data.flags.writeable)
+        replace_data("spec3d", np.ones((100, 8, 4)))
+        reduced = reduce_spec_dataset(name="spec3d", use_cache=True)
+        self.assertTrue(np.all(reduced.values == 8.0))
+        store_data("spec3d", data={"x": times, "y": np.zeros((100, 8, 4)), "v1": np.arange(8.0), "v2": np.arange(4.0)})
+        options("spec3d", "spec", 1)
+        self.assertTrue(np.all(reduce_spec_dataset(name="spec3d", use_cache=True).values == 0.0))
+
+        # plotting doesn't modify the stored data or plot options
+        y = np.random.rand(100, 16)
+        y[10, :] = -1e31
+        store_data("spec2d", data={"x": times, "y": y.copy(), "v": np.arange(16.0)})
+        options("spec2d", "spec", 1)
+        options("spec2d", "yrange", [np.nan, 10.0])
+        options("spec2d", "zrange", [0.0, 1.0])
+        store_data("line", data={"x": times, "y": np.random.rand(100)})
+        store_data("combined", data=["spec2d", "line"])
+        options("combined", "spec", 1)
+        tplot(["spec2d", "combined", "spec3d"], display=False)
+        self.assertTrue(np.array_equal(get_data("spec2d").y, y))
+        attrs = get_data("spec2d", metadata=True)["plot_options"]
+        self.assertTrue(np.isnan(attrs["yaxis_opt"]["y_range"][0]))
+        self.assertEqual(attrs["zaxis_opt"]["z_range"], [0.0, 1.0])
+        self.assertTrue(get_data("combined", metadata=True)["plot_options"]["extras"]["spec"])
+
+    def test_tplot_batch(self):
+        from pyspedas import tplot_batch
+
+        del_data("*")
+        start = time_double("2007-03-23")
+        times = start + np.arange(8640) * 10.0
+        store_data("batch_line", data={"x": times, "y": np.random.rand(8640, 3)})
+        store_data("batch_spec", data={"x": times, "y": np.random.rand(8640, 16), "v": np.arange(16.0)})
+        options("batch_spec", "spec", 1)
+        store_data("batch_combined", data=["batch_spec", "batch_line"])
+        jobs = [(["batch_line", "batch_combined"], [start + hour * 3600.0, start + (hour + 2) * 3600.0],
+                 os.path.join(save_dir, "batch_" + str(hour) + ".png"), {"xsize": 6, "ysize": 4}) for hour in range(3)]
+        jobs.append({"variables": "batch_spec", "trange": None, "filename": os.path.join(save_dir, "batch_full.pdf")})
+        for processes in [None, 2]:
+            for job in jobs[:3]:
+                if os.path.exists(job[2]):
+                    os.remove(job[2])
+            results = tplot_batch(jobs, processes=processes)
+            self.assertEqual([result["filename"] for result in results], [job[2] for job in jobs[:3]] + [jobs[3]["filename"]])
+            for result in results:
+                self.assertTrue(result["error"] is None)
+                self.assertTrue(result["seconds"] > 0.0)
+                self.assertTrue(os.path.exists(result["filename"]))
+
+        results = tplot_batch([("no_such_variable", None, os.path.join(save_dir, "batch_none.png"))])
+        self.assertTrue(results[0]["error"] is not None)
+
+    def test_interactive_redraw(self):
+        from types import SimpleNamespace
+        import matplotlib.pyplot as plt
+        import matplotlib.dates as mdates
+        from pyspedas import tlimit
+        from pyspedas.tplot_tools.MPLPlotter.tplot import mouse_move_slice
+        from pyspedas.tplot_tools.MPLPlotter.ctime import TimeSelector
+
+        del_data("*")
+        start = time_double("2007-03-23")
+        times = start + np.arange(200000) * 0.25
+        store_data("burst_line", data={"x": times, "y": np.random.rand(200000)})
+        store_data("burst_spec", data={"x": times[::100], "y": np.random.rand(2000, 16), "v": np.arange(16.0)})
+        options("burst_spec", "spec", 1)
+        fig, axes = tplot(["burst_line", "burst_spec"], display=False, return_plot_objects=True)
+        line = axes[0].get_lines()[0]
+        self.assertTrue(len(line.get_xdata()) < 20000)
+
+        # zooming updates the existing line with the full resolution data for the new time range
+        tlimit([start + 1000.0, start + 1100.0], fig=fig)
+        self.assertTrue(axes[0].get_lines()[0] is line)
+        self.assertEqual(len(line.get_xdata()), 403)
+        self.assertTrue(np.array_equal(line.get_ydata(), get_data("burst_line").y[3999:4402]))
+        tlimit("full", fig=fig)
+        self.assertAlmostEqual(mdates.num2date(axes[1].get_xlim()[1]).timestamp(), times[-1], places=3)
+        self.assertTrue(len(line.get_xdata()) < 20000)
+
+        # the slice plot is updated from the retained state, without redrawing for the same time
+        slice_fig, slice_axes = plt.subplots(nrows=1)
+        slice_plot, = slice_axes.plot([0], [0])
+        slice_state = {}
+        xdata = mdates.date2num(np.datetime64(int((times[1000] + 1.0) * 1e9), "ns"))
+        mouse_move_slice(SimpleNamespace(inaxes=axes[1], xdata=xdata), slice_axes, slice_plot, slice_state)
+        self.assertEqual(slice_state["current"], ("burst_spec", 10))
+        self.assertTrue(np.array_equal(slice_plot.get_ydata(), get_data("burst_spec").y[10]))
+        state = slice_state["burst_spec"]
+        mouse_move_slice(SimpleNamespace(inaxes=axes[1], xdata=xdata), slice_axes, slice_plot, slice_state)
+        self.assertTrue(slice_state["burst_spec"] is state)
+        plt.close(slice_fig)
+
+        # the ctime cursor lines are animated, and redrawn from the saved background
+        selector = TimeSelector(fig)
+        fig.canvas.draw()
+        self.assertTrue(selector.background is not None)
+        selector.ctime_on_motion(SimpleNamespace(inaxes=axes[0], xdata=xdata))
+        self.assertEqual(list(selector.vertical_lines[0].get_xdata()), [xdata, xdata])
+        plt.close(fig)
+
+    def test_tplot_pyramid(self):
+        import pickle
+        from pyspedas import tplot_pyramid, replace_data
+        from pyspedas.tplot_tools.tplot_pyramid import pyramid_minmax_indices, pyramid_reduce_times
+        from pyspedas.tplot_tools.MPLPlotter.specplot import specplot_reduce_times
+
+        del_data("*")
+        times = time_double("2007-03-23") + np.arange(100003) * 0.5
+        y = np.random.randn(100003, 2).cumsum(axis=0)
+        y[20000:20100, 1] = np.nan
+        store_data("pyr_line", data={"x": times, "y": y})
+        levels = tplot_pyramid("pyr_line")
+        self.assertEqual(levels[0]["size"], 16)
+        self.assertEqual(len(levels[0]["max"]), 6251)
+        level = levels[3]
+        for block in [0, 10, 156, len(level["min"]) - 1]:
+            values = y[block * level["size"]:(block + 1) * level["size"], 1]
+            self.assertEqual(level["min"][block, 1], block * level["size"] + np.nanargmin(values))
+            self.assertEqual(level["max"][block, 1], block * level["size"] + np.nanargmax(values))
+        self.assertTrue(tplot_pyramid("pyr_line") is levels)
+        self.assertTrue("pyramid" not in get_data("pyr_line", metadata=True))
+
+        # the candidate points include the extremes and the gaps of the range
+        indices = pyramid_minmax_indices(levels, 1000, 90000, 100, trace=1)
+        self.assertTrue(len(indices) < 10000)
+        self.assertEqual(indices[0], 1000)
+        self.assertEqual(indices[-1], 89999)
+        self.assertEqual(np.nanmax(y[indices, 1]), np.nanmax(y[1000:90000, 1]))
+        self.assertEqual(np.nanmin(y[indices, 1]), np.nanmin(y[1000:90000, 1]))
+        self.assertTrue(np.any(np.isnan(y[indices, 1])))
+
+        # the pyramid is rebuilt when the data change, and isn't saved with the variable
+        replace_data("pyr_line", y * 2.0)
+        self.assertTrue("pyramid" not in get_data("pyr_line", metadata=True))
+        self.assertFalse(tplot_pyramid("pyr_line") is levels)
+        attrs = pyspedas.tplot_tools.data_quants["pyr_line"].attrs
+        self.assertEqual(pickle.loads(pickle.dumps(attrs))["pyramid"], {})
+        store_data("pyr_line", data={"x": times, "y": y}, attr_dict=get_data("pyr_line", metadata=True))
+        self.assertTrue("pyramid" not in get_data("pyr_line", metadata=True))
+
+        # spectrograms are reduced from the block sums, as from the full data (within a block)
+        z = np.ones((100003, 4))
+        z[:, 1] = 2.0
+        z[500:600, 2] = np.nan
+        store_data("pyr_spec", data={"x": times, "y": z, "v": np.arange(4.0)})
+        levels = tplot_pyramid("pyr_spec", kind="mean")
+        reduced_times, reduced = pyramid_reduce_times(levels, times, z, 0, 100003, 100)
+        full_times, full = specplot_reduce_times(times, z, 100)
+        self.assertEqual(reduced.shape, full.shape)
+        self.assertTrue(np.array_equal(reduced, full))
+        self.assertTrue(np.max(np.abs(reduced_times - full_times)) < levels[-1]["size"])
+
+        options(["pyr_line", "pyr_spec"], "pyramid", True)
+        options("pyr_spec", "spec", 1)
+        fig, axes = tplot(["pyr_line", "pyr_spec"], display=False, return_plot_objects=True)
+        line = axes[0].get_lines()[0]
+        self.assertTrue(len(line.get_xdata()) < 10000)
+        self.assertEqual(line.get_ydata()[0], y[0, 0])
+        self.assertEqual(line.get_ydata()[-1], y[-1, 0])
+        self.assertEqual(len(axes[1].get_images()), 1)
+
+    def test_decimate_orbit_tracks(self):
+        import matplotlib.pyplot as plt
+        from pyspedas import tplotxy3, set_units
+        from pyspedas.tplot_tools.MPLPlotter.tplotxy import decimate_track
+
+        del_data("*")
+        angle = np.linspace(0.0, 6.0*np.pi, 200000)
+        x = 12.0*np.cos(angle) - 3.0
+        y = 8.0*np.sin(angle)
+        x[5000:5010] = np.nan
+        indices, markevery = decimate_track(x, y, 500, markevery=1000)
+        self.assertTrue(len(indices) < len(x)/10)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], len(x) - 1)
+        self.assertTrue(np.all(np.isnan(x[indices][np.isin(indices, np.arange(5000, 5010))])))
+        self.assertTrue(np.array_equal(indices[markevery], np.arange(0, len(x), 1000)))
+        # every skipped point is within a cell of the decimated track
+        dx = np.nanmax(x) - np.nanmin(x)
+        dropped = np.setdiff1d(np.arange(len(x)), indices)
+        nearest = np.searchsorted(indices, dropped)
+        self.assertTrue(np.all(np.abs(x[dropped] - x[indices[nearest]]) <= dx/500))
+
+        store_data("orbit_pos", data={"x": time_double("2020-01-01") + np.arange(len(x)), "y": np.stack([x, y, y/4.0], axis=1)})
+        set_units("orbit_pos", "re")
+        images = []
+        for decimate_pixels in [None, 2000]:
+            fig = tplotxy3("orbit_pos", decimate_pixels=decimate_pixels, markers="x", markevery=20000, display=False)
+            self.assertEqual(len(fig.xy_plane.get_lines()[0].get_xdata()) < len(x), decimate_pixels is not None)
+            fig.canvas.draw()
+            images.append(np.asarray(fig.canvas.buffer_rgba()).copy())
+            plt.close(fig)
+        self.assertTrue(np.mean(np.any(images[0] != images[1], axis=2)) < 0.01)
 
 if __name__ == "__main__":
     unittest.main()